@@ -6,10 +6,15 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 from flask import Flask, send_from_directory
 from flask_cors import CORS
 from src.models.user import db
+from src.models.company import CompanyRecord
+from src.models.geocoding import GeocodedAddress
+from src.models.tco_calculation import TcoCalculation
 from src.routes.ai_services import ai_bp
-from src.routes.swiss_data import swiss_bp
-from src.routes.tco_calculator import tco_bp
+from src.routes.swiss_data import start_occupancy_sampling, swiss_bp, upstream_breakers
+from src.routes.tco_calculator import tco_bp, tco_history
 from src.routes.customer_insights import insights_bp
+from src.services.deadline import init_request_deadlines
+from src.services.electricity_tariffs import start_tariff_refresh
 from config import config
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
@@ -18,25 +23,46 @@ app.config['SECRET_KEY'] = config.app.secret_key
 # Enable CORS for all routes
 CORS(app, origins=config.app.cors_origins, supports_credentials=True)
 
+# Request-scoped time budget for outbound calls
+init_request_deadlines(app)
+
 # Register blueprints
 app.register_blueprint(ai_bp, url_prefix='/api/ai')
 app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
 app.register_blueprint(tco_bp, url_prefix='/api/tco')
 app.register_blueprint(insights_bp, url_prefix='/api/insights')
 
-# Database configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+# Database configuration: the shared PostgreSQL database from DATABASE_URL (tco_calculations
+# history, company index, geocoding cache), a local SQLite file when it is not set
+database_url = os.getenv('DATABASE_URL')
+app.config['SQLALCHEMY_DATABASE_URI'] = (
+    database_url or f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}"
+)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_pre_ping': True}
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
-with app.app_context():
-    db.create_all()
+# The shared schema is owned by database/init and database/migrations; only the local file is created here
+if not database_url:
+    with app.app_context():
+        db.create_all()
+
+# Bulk-insert TCO results in the background (drained at exit)
+tco_history.init_app(app)
+
+# Periodic ElCom tariff download (only when ELCOM_TARIFF_URL is set)
+start_tariff_refresh()
+
+# Charging station availability every 5 minutes for the occupancy forecasts
+start_occupancy_sampling()
 
 @app.route('/health')
 def health_check():
     return {
-        'status': 'healthy',
+        'status': 'degraded' if upstream_breakers.any_open() else 'healthy',
         'service': 'CADILLAC EV CIS AI Services',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'upstreams': upstream_breakers.snapshot(),
+        'tco_history': tco_history.stats()
     }
 
 @app.route('/', defaults={'path': ''})
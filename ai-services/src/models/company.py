@@ -0,0 +1,20 @@
+import json
+from datetime import datetime
+
+from src.models.user import db
+
+
+class CompanyRecord(db.Model):
+    """Company fetched from ZEFIX or bulk-loaded, kept for local name search"""
+    __tablename__ = 'company_records'
+
+    uid = db.Column(db.String(20), primary_key=True)
+    name = db.Column(db.String(255), nullable=False)
+    data = db.Column(db.Text, nullable=False)
+    fetched_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CompanyRecord {self.uid} {self.name}>'
+
+    def to_dict(self):
+        return json.loads(self.data)
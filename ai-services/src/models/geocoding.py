@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from src.models.user import db
+
+
+class GeocodedAddress(db.Model):
+    """Persistent geocoding result, keyed on the normalized address"""
+    __tablename__ = 'geocoded_addresses'
+
+    address_key = db.Column(db.String(255), primary_key=True)
+    found = db.Column(db.Boolean, nullable=False, default=False)
+    lat = db.Column(db.Float)
+    lng = db.Column(db.Float)
+    label = db.Column(db.String(255))
+    source = db.Column(db.String(40), nullable=False, default='swisstopo')
+    geocoded_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<GeocodedAddress {self.address_key}>'
+
+    def to_dict(self):
+        return {
+            'found': self.found,
+            'lat': self.lat,
+            'lng': self.lng,
+            'label': self.label,
+            'source': self.source,
+            'geocoded_at': self.geocoded_at.isoformat() if self.geocoded_at else None
+        }
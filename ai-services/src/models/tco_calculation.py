@@ -0,0 +1,49 @@
+import uuid
+from datetime import datetime
+
+from src.models.user import db
+
+
+class TcoCalculation(db.Model):
+    """Computed /api/tco/calculate result, kept for analytics (tco_calculations in the CIS schema)"""
+    __tablename__ = 'tco_calculations'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    calculation_id = db.Column(db.String(20), nullable=False, index=True)
+    customer_id = db.Column(db.String(36))
+    vehicle_id = db.Column(db.String(36))
+    canton = db.Column(db.String(2), nullable=False)
+    duration_years = db.Column(db.Integer, nullable=False)
+    annual_kilometers = db.Column(db.Integer, nullable=False)
+    charging_mix = db.Column(db.JSON, nullable=False)
+    one_time_costs = db.Column(db.JSON, nullable=False)
+    annual_costs = db.Column(db.JSON, nullable=False)
+    energy_costs = db.Column(db.JSON, nullable=False)
+    depreciation = db.Column(db.JSON, nullable=False)
+    savings = db.Column(db.JSON)
+    total_tco = db.Column(db.Numeric(12, 2), nullable=False)
+    tco_per_month = db.Column(db.Numeric(10, 2), nullable=False)
+    tco_per_kilometer = db.Column(db.Numeric(6, 3), nullable=False)
+    calculation_date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    created_by = db.Column(db.String(36))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<TcoCalculation {self.calculation_id}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'calculation_id': self.calculation_id,
+            'customer_id': self.customer_id,
+            'vehicle_id': self.vehicle_id,
+            'canton': self.canton,
+            'duration_years': self.duration_years,
+            'annual_kilometers': self.annual_kilometers,
+            'total_tco': float(self.total_tco),
+            'tco_per_month': float(self.tco_per_month),
+            'tco_per_kilometer': float(self.tco_per_kilometer),
+            'savings': self.savings,
+            'calculation_date': self.calculation_date.isoformat() if self.calculation_date else None
+        }
@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime, timedelta
 import random
 import json
+from src.services.canton_reference import DEFAULT_REGIONAL_PROFILE, get_canton_table
+from src.services.financing_optimizer import INCOME_RANGES, max_monthly_payment as affordable_monthly_payment
+from src.services.reverse_geocoder import get_reverse_geocoder
 
 insights_bp = Blueprint('customer_insights', __name__)
 
@@ -38,7 +41,7 @@ def generate_customer_insights(customer, income_bracket):
     """Generate AI-powered customer insights"""
     
     age = customer.get('age', 35)
-    canton = customer.get('canton', 'ZH')
+    canton = customer.get('canton') or _canton_from_coordinates(customer) or 'ZH'
     customer_type = customer.get('customerType', 'private')
     
     # Demographic insights
@@ -94,39 +97,16 @@ def get_age_group(age):
             'preferences': ['ease_of_use', 'comfort', 'service_quality']
         }
 
+def _canton_from_coordinates(customer):
+    """Derive the canton from the customer's address coordinates, if present"""
+    coordinates = customer.get('coordinates') or {}
+    return get_reverse_geocoder().canton_at(coordinates.get('lat'), coordinates.get('lng'))
+
 def get_regional_preferences(canton):
     """Get regional preferences based on Swiss canton"""
-    regional_data = {
-        'ZH': {
-            'urban_density': 'high',
-            'charging_infrastructure': 'excellent',
-            'environmental_consciousness': 'high',
-            'luxury_market': 'strong',
-            'preferences': ['technology', 'efficiency', 'urban_mobility']
-        },
-        'GE': {
-            'urban_density': 'high',
-            'charging_infrastructure': 'excellent',
-            'environmental_consciousness': 'very_high',
-            'luxury_market': 'very_strong',
-            'preferences': ['luxury', 'environmental_impact', 'international_appeal']
-        },
-        'BE': {
-            'urban_density': 'medium',
-            'charging_infrastructure': 'good',
-            'environmental_consciousness': 'high',
-            'luxury_market': 'medium',
-            'preferences': ['reliability', 'practicality', 'value']
-        }
-    }
-    
-    return regional_data.get(canton, {
-        'urban_density': 'medium',
-        'charging_infrastructure': 'good',
-        'environmental_consciousness': 'medium',
-        'luxury_market': 'medium',
-        'preferences': ['reliability', 'value', 'practicality']
-    })
+    canton_info = get_canton_table().get(canton)
+    profile = canton_info.regional_profile if canton_info else DEFAULT_REGIONAL_PROFILE
+    return {**profile, 'preferences': list(profile['preferences'])}
 
 def get_customer_segment(customer_type, income_bracket, age):
     """Determine customer segment"""
@@ -189,17 +169,12 @@ def predict_vehicle_preferences(demographic_insights):
 def generate_financial_profile(income_bracket, age, customer_type):
     """Generate financial profile and recommendations"""
     
-    income_ranges = {
-        'low': (50000, 80000),
-        'medium': (80000, 120000),
-        'high': (120000, 200000),
-        'very_high': (200000, 500000)
-    }
+    income_ranges = INCOME_RANGES
     
     estimated_income = random.randint(*income_ranges.get(income_bracket, (80000, 120000)))
     
-    # Calculate affordability
-    max_monthly_payment = estimated_income * 0.15 / 12  # 15% of gross income
+    # Calculate affordability (15% of gross income)
+    max_monthly_payment = affordable_monthly_payment(estimated_income)
     recommended_down_payment = max(10000, estimated_income * 0.1)  # 10% of income or 10k minimum
     
     financing_options = []
@@ -1,10 +1,32 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 import requests
 import json
 from datetime import datetime
 import random
 import os
 import logging
+import threading
+import time
+import numpy as np
+from src.services.canton_reference import get_canton_table
+from src.services.charging_store import ChargingStationStore
+from src.services.company_index import CompanyDirectory
+from src.services.circuit_breaker import CLOSED, CircuitBreakerRegistry, CircuitOpenError, StaleCache
+from src.services.deadline import DeadlineExceeded, call_timeout, deadline_expired, deadline_scope
+from src.services.cost_matrix import (
+    CantonArrays, CostMatrixCache, VehicleSpec, compute_cost_matrix, load_vehicle_catalog
+)
+from src.services.swiss_validation import (
+    NegativeCache, format_uid, normalize_phones, validate_postal_code as validate_swiss_postal_code,
+    validate_postal_codes, validate_uid, validate_uids
+)
+from src.services.station_clusters import StationClusterIndex
+from src.services.station_sources import configured_feeds, fetch_feeds, merge_stations
+from src.services.electricity_tariffs import electricity_price as resolve_electricity_price
+from src.services.geocoding import GeocodingService
+from src.services.occupancy_history import SWISS_TIMEZONE, OccupancyHistory, hour_of_week
+from src.services.reverse_geocoder import get_reverse_geocoder
+from src.services.route_corridor import decode_polyline, is_cached_route, route_geometry, segment_lengths_km
 
 swiss_bp = Blueprint('swiss_data', __name__)
 
@@ -20,6 +42,52 @@ SWISS_APIS = {
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# National charging station dataset, held once per worker in columnar form
+station_store = ChargingStationStore()
+station_clusters = StationClusterIndex(station_store)
+STATION_STORE_REFRESH_SECONDS = 300
+STATION_STORE_RETRY_SECONDS = 60
+MAX_CORRIDOR_WIDTH_KM = 50
+STATION_FEED_TIMEOUT_SECONDS = 5
+# Outcome of the last fetch per charging feed: station count, None if it failed
+station_feed_status = {}
+# When the last live load succeeded; after a failed refresh that data is kept and marked stale
+station_store_live_at = None
+station_store_stale = False
+# Availability sampled on a fixed schedule (start_occupancy_sampling), for hour-of-week occupancy forecasts
+occupancy_history = OccupancyHistory()
+OCCUPANCY_SAMPLE_SECONDS = 300
+MAX_OCCUPANCY_RECENT_SAMPLES = 576
+
+# Canton × vehicle cost matrices for the dealer heatmap
+vehicle_catalog = load_vehicle_catalog()
+cost_matrix_cache = CostMatrixCache()
+DEFAULT_MATRIX_MILEAGES = (10000, 15000, 20000, 30000)
+DEFAULT_MATRIX_YEARS = (3, 5, 8)
+MAX_MATRIX_AXIS_VALUES = 12
+MAX_REVERSE_GEOCODE_BATCH = 100000
+
+# Address geocoding through swisstopo with a persistent cache
+geocoding_service = GeocodingService()
+MAX_GEOCODE_BATCH = 1000
+
+# Local company-name search over fetched and bulk-loaded ZEFIX records
+company_directory = CompanyDirectory()
+MAX_COMPANY_SEARCH_RESULTS = 50
+MIN_COMPANY_REFRESH_QUERY = 3
+
+# Identifiers that upstream registries reported as unknown
+negative_cache = NegativeCache()
+MAX_VALIDATION_BATCH = 100000
+
+# Fast-fail for the public Swiss APIs, with the last good answers to fall back on
+upstream_breakers = CircuitBreakerRegistry()
+openplz_responses = StaleCache()
+_station_store_lock = threading.Lock()
+_station_reload_lock = threading.Lock()
+_station_store_expires_at = 0.0
+_station_refresh_thread = None
+
 @swiss_bp.route('/company-lookup', methods=['POST'])
 def company_lookup():
     """
@@ -48,40 +116,42 @@ def company_lookup():
         }
         
         if uid_number:
-            # Clean UID format (remove CHE- prefix and dots)
-            clean_uid = uid_number.replace('CHE-', '').replace('.', '').replace(' ', '')
-            params['uid'] = clean_uid
+            # Reject malformed UIDs locally, before calling ZEFIX
+            uid_check = validate_uid(uid_number)
+            if not uid_check['valid']:
+                return jsonify({
+                    'success': False,
+                    'error': uid_check['error'],
+                    'validation_error': True
+                }), 400
+            if negative_cache.get(('uid', uid_check['digits'])):
+                return jsonify({
+                    'success': True,
+                    'companies': [],
+                    'total_results': 0,
+                    'source': 'Swiss Federal Commercial Registry (ZEFIX), cached negative result',
+                    'timestamp': datetime.now().isoformat(),
+                    'query': {
+                        'uid_number': uid_number,
+                        'company_name': company_name
+                    }
+                })
+            params['uid'] = uid_check['digits']
         elif company_name:
             params['name'] = company_name
             
         logger.info(f"Calling ZEFIX API with params: {params}")
         
-        response = requests.get(zefix_url, params=params, timeout=10)
+        response = _upstream_get('zefix', zefix_url, params, 10)
         
         if response.status_code == 200:
             zefix_data = response.json()
             
-            for firm in zefix_data.get('list', []):
-                # Transform ZEFIX data to our standard format
-                company = {
-                    "uid": firm.get('uid', ''),
-                    "name": firm.get('name', ''),
-                    "legal_form": firm.get('legalForm', ''),
-                    "status": 'active' if firm.get('status') == 'ACTIVE' else 'inactive',
-                    "address": {
-                        "street": firm.get('address', {}).get('street', ''),
-                        "postal_code": firm.get('address', {}).get('swissZipCode', ''),
-                        "city": firm.get('address', {}).get('city', ''),
-                        "canton": _get_canton_abbreviation(firm.get('address', {}).get('canton', ''))
-                    },
-                    "industry": firm.get('purpose', ''),
-                    "founded_date": firm.get('sogcDate', ''),
-                    "registration_date": firm.get('registryOfCommerceDate', ''),
-                    "last_updated": firm.get('lastUpdate', ''),
-                    "ehraid": firm.get('ehraid', ''),
-                    "language": firm.get('language', 'DE')
-                }
-                results.append(company)
+            # Transform ZEFIX data to our standard format
+            results = [_parse_zefix_firm(firm) for firm in zefix_data.get('list', [])]
+            _index_companies(results)
+            if uid_number and not results:
+                negative_cache.add(('uid', params['uid']), 'UID not found in ZEFIX')
         
             return jsonify({
                 'success': True,
@@ -104,7 +174,13 @@ def company_lookup():
                 'timestamp': datetime.now().isoformat()
             }), 503
             
-    except requests.exceptions.RequestException as e:
+    except CircuitOpenError as e:
+        logger.warning(f"ZEFIX circuit open, answering from the local index: {str(e)}")
+        return _company_lookup_local_fallback(uid_number, company_name, e)
+    except (DeadlineExceeded, requests.exceptions.RequestException) as e:
+        if _deadline_hit(e):
+            logger.warning("ZEFIX lookup ran out of request budget, answering from the local index")
+            return _company_lookup_local_fallback(uid_number, company_name, e)
         logger.error(f"ZEFIX API request error: {str(e)}")
         return jsonify({
             'success': False,
@@ -120,21 +196,234 @@ def company_lookup():
             'error': str(e)
         }), 500
 
+def _deadline_hit(error):
+    """Whether an outbound call failed because the request budget is spent"""
+    return isinstance(error, DeadlineExceeded) or (
+        isinstance(error, requests.exceptions.Timeout) and deadline_expired()
+    )
+
+def _upstream_get(upstream, url, params=None, timeout=10):
+    """GET against a Swiss upstream through its circuit breaker"""
+    request_timeout = call_timeout(timeout)
+    breaker = upstream_breakers.get(upstream)
+    breaker.acquire()
+    try:
+        response = requests.get(url, params=params, timeout=request_timeout)
+    except requests.exceptions.RequestException as e:
+        # Running out of our own budget says nothing about the upstream
+        if _deadline_hit(e):
+            breaker.release()
+        else:
+            breaker.record_failure(type(e).__name__)
+        raise
+    except Exception:
+        breaker.release()
+        raise
+    if response.status_code >= 500:
+        breaker.record_failure(f'HTTP {response.status_code}')
+    else:
+        breaker.record_success()
+    return response
+
+def _company_lookup_local_fallback(uid_number, company_name, error):
+    """Best local answer for a company lookup when ZEFIX cannot be asked in time"""
+    circuit_open = isinstance(error, CircuitOpenError)
+    if uid_number:
+        uid = validate_uid(uid_number).get('uid')
+        company_directory.ensure_loaded()
+        company = company_directory.index.get(uid) if uid else None
+        companies = [company] if company else []
+    else:
+        companies = company_directory.search(company_name, 20)
+    result = {
+        'success': bool(companies),
+        'companies': companies,
+        'total_results': len(companies),
+        'source': 'Local company index (ZEFIX), ' + (
+            'ZEFIX temporarily unavailable' if circuit_open else 'request deadline reached'
+        ),
+        'timestamp': datetime.now().isoformat(),
+        'query': {
+            'uid_number': uid_number,
+            'company_name': company_name
+        }
+    }
+    if circuit_open:
+        result.update({'stale': True, 'circuit_open': True, 'retry_after': round(error.retry_after)})
+        return jsonify(result), 200 if companies else 503
+    result['deadline_exceeded'] = True
+    return jsonify(result), 200 if companies else 504
+
+def _parse_zefix_firm(firm):
+    """Transform a ZEFIX firm into our standard company format"""
+    return {
+        "uid": firm.get('uid', ''),
+        "name": firm.get('name', ''),
+        "legal_form": firm.get('legalForm', ''),
+        "status": 'active' if firm.get('status') == 'ACTIVE' else 'inactive',
+        "address": {
+            "street": firm.get('address', {}).get('street', ''),
+            "postal_code": firm.get('address', {}).get('swissZipCode', ''),
+            "city": firm.get('address', {}).get('city', ''),
+            "canton": _get_canton_abbreviation(firm.get('address', {}).get('canton', ''))
+        },
+        "industry": firm.get('purpose', ''),
+        "founded_date": firm.get('sogcDate', ''),
+        "registration_date": firm.get('registryOfCommerceDate', ''),
+        "last_updated": firm.get('lastUpdate', ''),
+        "ehraid": firm.get('ehraid', ''),
+        "language": firm.get('language', 'DE')
+    }
+
+def _fetch_zefix_companies(company_name):
+    """Name search against ZEFIX, used to refresh the local company index"""
+    response = _upstream_get('zefix', f"{SWISS_APIS['zefix']}/firm/search.json", {
+        'offset': 0,
+        'maxEntries': 50,
+        'activeOnly': 'true',
+        'name': company_name
+    }, 10)
+    response.raise_for_status()
+    return [_parse_zefix_firm(firm) for firm in response.json().get('list', [])]
+
+def _index_companies(companies):
+    """Keep every fetched firm in the local search index"""
+    try:
+        company_directory.store(companies)
+    except Exception as e:
+        logger.warning(f"Storing companies in the local index failed: {str(e)}")
+
+@swiss_bp.route('/company-search', methods=['GET'])
+def company_search():
+    """
+    Company-name autocomplete from the local index; ZEFIX is only queried in
+    the background when the local results are missing or outdated
+    """
+    try:
+        query = request.args.get('q', '').strip()
+        limit = max(1, min(request.args.get('limit', 10, type=int), MAX_COMPANY_SEARCH_RESULTS))
+        
+        if not query:
+            return jsonify({
+                'success': False,
+                'error': 'q is required'
+            }), 400
+            
+        companies = company_directory.search(query, limit)
+        refresh_scheduled = False
+        if len(query) >= MIN_COMPANY_REFRESH_QUERY and company_directory.is_stale(companies):
+            refresh_scheduled = company_directory.refresh_in_background(
+                current_app._get_current_object(), query, _fetch_zefix_companies
+            )
+        
+        return jsonify({
+            'success': True,
+            'companies': companies,
+            'total_results': len(companies),
+            'indexed_companies': len(company_directory.index),
+            'refresh_scheduled': refresh_scheduled,
+            'source': 'Local company index (ZEFIX)',
+            'query': query
+        })
+        
+    except Exception as e:
+        logger.error(f"Company search error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@swiss_bp.route('/company-search/bulk-load', methods=['POST'])
+def bulk_load_companies():
+    """
+    Bulk-load company records (standard company format) into the local index
+    """
+    try:
+        data = request.get_json()
+        companies = data.get('companies', [])
+        
+        if not isinstance(companies, list) or not companies:
+            return jsonify({
+                'success': False,
+                'error': 'companies must be a non-empty list'
+            }), 400
+            
+        # Only records with a valid UID check digit are indexed
+        uid_checks = validate_uids([str(company.get('uid', '')) for company in companies])
+        valid_companies = [
+            {**company, 'uid': format_uid(digits)}
+            for company, digits, valid in zip(companies, uid_checks['digits'], uid_checks['valid'])
+            if valid
+        ]
+        
+        company_directory.ensure_loaded()
+        stored = company_directory.store(valid_companies)
+        
+        return jsonify({
+            'success': True,
+            'stored': stored,
+            'skipped': len(companies) - stored,
+            'invalid_uids': int((~uid_checks['valid']).sum()),
+            'indexed_companies': len(company_directory.index)
+        })
+        
+    except Exception as e:
+        logger.error(f"Company bulk load error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 def _get_canton_abbreviation(canton_name):
     """Convert canton name to abbreviation"""
-    canton_mapping = {
-        'Zürich': 'ZH', 'Bern': 'BE', 'Luzern': 'LU', 'Uri': 'UR', 'Schwyz': 'SZ',
-        'Obwalden': 'OW', 'Nidwalden': 'NW', 'Glarus': 'GL', 'Zug': 'ZG',
-        'Freiburg': 'FR', 'Solothurn': 'SO', 'Basel-Stadt': 'BS', 'Basel-Landschaft': 'BL',
-        'Schaffhausen': 'SH', 'Appenzell Ausserrhoden': 'AR', 'Appenzell Innerrhoden': 'AI',
-        'St. Gallen': 'SG', 'Graubünden': 'GR', 'Aargau': 'AG', 'Thurgau': 'TG',
-        'Tessin': 'TI', 'Waadt': 'VD', 'Wallis': 'VS', 'Neuenburg': 'NE', 'Genf': 'GE',
-        'Jura': 'JU'
-    }
-    return canton_mapping.get(canton_name, canton_name)
+    return get_canton_table().code_for_name(canton_name) or canton_name
 
 
 
+@swiss_bp.route('/validate/batch', methods=['POST'])
+def validate_batch():
+    """
+    Validate UIDs, postal codes and phone numbers locally, without network calls
+    """
+    try:
+        data = request.get_json()
+        uids = data.get('uids', [])
+        postal_codes = data.get('postal_codes', [])
+        phones = data.get('phones', [])
+        
+        if len(uids) + len(postal_codes) + len(phones) > MAX_VALIDATION_BATCH:
+            return jsonify({
+                'success': False,
+                'error': f'At most {MAX_VALIDATION_BATCH} values can be validated per request'
+            }), 400
+            
+        uid_checks = validate_uids([str(uid) for uid in uids])
+        postal_valid = validate_postal_codes(postal_codes)
+        normalized_phones = normalize_phones([str(phone) for phone in phones])
+        
+        return jsonify({
+            'success': True,
+            'uids': [
+                {'input': uid, 'valid': bool(valid), 'normalized': format_uid(digits) if valid else None}
+                for uid, digits, valid in zip(uids, uid_checks['digits'], uid_checks['valid'])
+            ],
+            'postal_codes': [
+                {'input': code, 'valid': bool(valid)}
+                for code, valid in zip(postal_codes, postal_valid)
+            ],
+            'phones': [
+                {'input': phone, 'valid': normalized is not None, 'normalized': normalized}
+                for phone, normalized in zip(phones, normalized_phones)
+            ]
+        })
+        
+    except Exception as e:
+        logger.error(f"Batch validation error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @swiss_bp.route('/credit-check', methods=['POST'])
 def credit_check():
     """
@@ -260,6 +549,14 @@ def get_postal_codes():
         results = []
         
         if postal_code:
+            postal_check = validate_swiss_postal_code(postal_code)
+            if not postal_check['valid']:
+                return jsonify({
+                    'success': False,
+                    'error': postal_check['error'],
+                    'validation_error': True
+                }), 400
+                
             # Search by postal code
             openplz_url = f"{SWISS_APIS['openplz']}/Localities"
             params = {'postalCode': postal_code}
@@ -268,7 +565,7 @@ def get_postal_codes():
             # Search by canton
             openplz_url = f"{SWISS_APIS['openplz']}/Cantons/{canton}/Localities"
             params = {}
-        if city:
+            if city:
                 params['name'] = city
         elif city:
             # Search by city name
@@ -281,7 +578,16 @@ def get_postal_codes():
             
         logger.info(f"Calling OpenPLZ API: {openplz_url} with params: {params}")
         
-        response = requests.get(openplz_url, params=params, timeout=10)
+        cache_key = (openplz_url, tuple(sorted(params.items())))
+        query = {
+            'canton': canton,
+            'city': city,
+            'postal_code': postal_code
+        }
+        try:
+            response = _upstream_get('openplz', openplz_url, params, 10)
+        except CircuitOpenError as e:
+            return _postal_codes_stale_response(cache_key, query, e)
         
         if response.status_code == 200:
             openplz_data = response.json()
@@ -321,17 +627,14 @@ def get_postal_codes():
                     }
                     results.append(postal_data)
                     
+            openplz_responses.put(cache_key, results)
             return jsonify({
                 'success': True,
                 'postal_data': results,
                 'total': len(results),
                 'source': 'Swiss OpenPLZ API',
                 'timestamp': datetime.now().isoformat(),
-                'query': {
-                    'canton': canton,
-                    'city': city,
-                    'postal_code': postal_code
-                }
+                'query': query
             })
         else:
             logger.error(f"OpenPLZ API error: {response.status_code} - {response.text}")
@@ -343,7 +646,15 @@ def get_postal_codes():
                 'timestamp': datetime.now().isoformat()
             }), 503
             
-    except requests.exceptions.RequestException as e:
+    except (DeadlineExceeded, requests.exceptions.RequestException) as e:
+        if _deadline_hit(e):
+            return jsonify({
+                'success': False,
+                'error': 'Request deadline reached before the Swiss OpenPLZ postal service answered',
+                'deadline_exceeded': True,
+                'retry_suggested': True,
+                'timestamp': datetime.now().isoformat()
+            }), 504
         logger.error(f"OpenPLZ API request error: {str(e)}")
         return jsonify({
             'success': False,
@@ -359,6 +670,30 @@ def get_postal_codes():
             'error': str(e)
         }), 500
 
+def _postal_codes_stale_response(cache_key, query, error):
+    """Last good OpenPLZ answer while its circuit is open, else fail fast"""
+    cached = openplz_responses.get(cache_key)
+    if cached is None:
+        return jsonify({
+            'success': False,
+            'error': 'Swiss OpenPLZ postal service is temporarily unavailable. Please try again later.',
+            'service_unavailable': True,
+            'circuit_open': True,
+            'retry_after': round(error.retry_after),
+            'timestamp': datetime.now().isoformat()
+        }), 503
+    age, results = cached
+    return jsonify({
+        'success': True,
+        'postal_data': results,
+        'total': len(results),
+        'source': 'Swiss OpenPLZ API (cached)',
+        'stale': True,
+        'cached_age_seconds': int(age.total_seconds()),
+        'timestamp': datetime.now().isoformat(),
+        'query': query
+    })
+
 @swiss_bp.route('/postal-codes/validate', methods=['POST'])
 def validate_postal_code():
     """
@@ -376,22 +711,59 @@ def validate_postal_code():
                 'error': 'Postal code is required'
             }), 400
             
-        # Swiss postal code format validation (4 digits)
-        if not postal_code.isdigit() or len(postal_code) != 4:
-        return jsonify({
-            'success': True,
+        # Swiss postal code format and range validation, no network call needed
+        postal_check = validate_swiss_postal_code(postal_code)
+        if not postal_check['valid']:
+            return jsonify({
+                'success': True,
                 'valid': False,
-                'error': 'Swiss postal codes must be exactly 4 digits',
+                'error': postal_check['error'],
                 'format_error': True
             })
             
+        negative_key = ('postal_code', postal_code, city.strip().lower())
+        if negative_cache.get(negative_key):
+            return jsonify({
+                'success': True,
+                'valid': False,
+                'postal_code': postal_code,
+                'error': 'Postal code not found in Swiss postal system',
+                'cached': True
+            })
+            
         # Validate against OpenPLZ API
         openplz_url = f"{SWISS_APIS['openplz']}/Localities"
         params = {'postalCode': postal_code}
         if city:
             params['name'] = city
             
-        response = requests.get(openplz_url, params=params, timeout=10)
+        cache_key = ('validate', postal_code, city.strip().lower())
+        try:
+            response = _upstream_get('openplz', openplz_url, params, 10)
+        except (CircuitOpenError, DeadlineExceeded, requests.exceptions.Timeout) as e:
+            if not isinstance(e, CircuitOpenError) and not _deadline_hit(e):
+                raise
+            flag = 'circuit_open' if isinstance(e, CircuitOpenError) else 'deadline_exceeded'
+            cached = openplz_responses.get(cache_key)
+            if cached is not None:
+                return jsonify({
+                    'success': True,
+                    'valid': True,
+                    'postal_code': postal_code,
+                    'localities': cached[1],
+                    'source': 'Swiss OpenPLZ API (cached)',
+                    'stale': True,
+                    flag: True
+                })
+            # The format check passed, but the code is unverified
+            return jsonify({
+                'success': True,
+                'valid': True,
+                'verified': False,
+                'postal_code': postal_code,
+                flag: True,
+                'source': 'Local format validation'
+            })
         
         if response.status_code == 200:
             localities = response.json()
@@ -409,6 +781,7 @@ def validate_postal_code():
                             "commune": locality.get('commune', {}).get('name', '')
                         })
                         
+                openplz_responses.put(cache_key, matching_localities)
                 return jsonify({
                     'success': True,
                     'valid': True,
@@ -417,6 +790,7 @@ def validate_postal_code():
                     'source': 'Swiss OpenPLZ API'
                 })
             else:
+                negative_cache.add(negative_key, 'Postal code not found in Swiss postal system')
                 return jsonify({
                     'success': True,
                     'valid': False,
@@ -442,7 +816,160 @@ def validate_postal_code():
             'error': str(e)
         }), 500
 
+@swiss_bp.route('/reverse-geocode', methods=['GET'])
+def reverse_geocode():
+    """
+    Resolve coordinates to canton, commune and postal code from local boundary data
+    """
+    try:
+        lat = request.args.get('lat', type=float)
+        lng = request.args.get('lng', type=float)
+        
+        if lat is None or lng is None:
+            return jsonify({
+                'success': False,
+                'error': 'lat and lng are required'
+            }), 400
+            
+        geocoder = get_reverse_geocoder()
+        if not geocoder.available:
+            return _reverse_geocoder_unavailable()
+            
+        location = geocoder.reverse(lat, lng)
+        
+        return jsonify({
+            'success': True,
+            'found': any(location.values()),
+            'coordinates': {'lat': lat, 'lng': lng},
+            'location': location,
+            'source': 'swisstopo boundaries (offline)'
+        })
+        
+    except Exception as e:
+        logger.error(f"Reverse geocoding error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@swiss_bp.route('/reverse-geocode/batch', methods=['POST'])
+def reverse_geocode_batch():
+    """
+    Tag a batch of coordinates ([lat, lng] pairs or {lat, lng} objects) with
+    canton, commune and postal code
+    """
+    try:
+        data = request.get_json()
+        coordinates = data.get('coordinates', [])
+        
+        if not coordinates or len(coordinates) > MAX_REVERSE_GEOCODE_BATCH:
+            return jsonify({
+                'success': False,
+                'error': f'coordinates must contain 1 to {MAX_REVERSE_GEOCODE_BATCH} points'
+            }), 400
+            
+        geocoder = get_reverse_geocoder()
+        if not geocoder.available:
+            return _reverse_geocoder_unavailable()
+            
+        try:
+            points = np.array([
+                (point['lat'], point['lng']) if isinstance(point, dict) else tuple(point)
+                for point in coordinates
+            ], dtype=np.float64).reshape(len(coordinates), 2)
+        except (KeyError, TypeError, ValueError):
+            return jsonify({
+                'success': False,
+                'error': 'Each coordinate must be [lat, lng] or {"lat": ..., "lng": ...}'
+            }), 400
+            
+        results = geocoder.reverse_many(points[:, 0], points[:, 1])
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'total': len(results),
+            'resolved': sum(1 for result in results if any(result.values())),
+            'source': 'swisstopo boundaries (offline)'
+        })
+        
+    except Exception as e:
+        logger.error(f"Batch reverse geocoding error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@swiss_bp.route('/geocode', methods=['GET'])
+def geocode_address():
+    """
+    Geocode a Swiss address to coordinates (swisstopo, cached)
+    """
+    try:
+        address = request.args.get('address', '')
+        
+        if not address.strip():
+            return jsonify({
+                'success': False,
+                'error': 'address is required'
+            }), 400
+            
+        result = geocoding_service.geocode(address)
+        
+        return jsonify({
+            'success': 'error' not in result,
+            **result,
+            'source': 'swisstopo'
+        }), 503 if 'error' in result else 200
+        
+    except Exception as e:
+        logger.error(f"Geocoding error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@swiss_bp.route('/geocode/batch', methods=['POST'])
+def geocode_addresses():
+    """
+    Geocode a batch of Swiss addresses; duplicates are resolved once and
+    uncached addresses are queried concurrently
+    """
+    try:
+        data = request.get_json()
+        addresses = data.get('addresses', [])
+        
+        if not addresses or len(addresses) > MAX_GEOCODE_BATCH or not all(isinstance(a, str) for a in addresses):
+            return jsonify({
+                'success': False,
+                'error': f'addresses must be a list of 1 to {MAX_GEOCODE_BATCH} strings'
+            }), 400
+            
+        results = geocoding_service.geocode_many(addresses)
+        
+        return jsonify({
+            'success': True,
+            'results': results,
+            'total': len(results),
+            'found': sum(1 for result in results if result['found']),
+            'from_cache': sum(1 for result in results if result.get('cached')),
+            'failed': sum(1 for result in results if 'error' in result),
+            'source': 'swisstopo'
+        })
+        
+    except Exception as e:
+        logger.error(f"Batch geocoding error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
+def _reverse_geocoder_unavailable():
+    return jsonify({
+        'success': False,
+        'error': 'Boundary data is not installed. Reverse geocoding is unavailable.',
+        'service_unavailable': True
+    }), 503
 
 @swiss_bp.route('/charging-stations', methods=['GET'])
 def get_charging_stations():
@@ -458,80 +985,38 @@ def get_charging_stations():
         lat = request.args.get('lat', type=float)
         lng = request.args.get('lng', type=float)
         radius = request.args.get('radius', 50, type=int)  # Radius in km
+        address = request.args.get('address', '')
+        forecast_at = _parse_forecast_time(request.args.get('at'))
+        if forecast_at is None:
+            return jsonify({
+                'success': False,
+                'error': 'at must be an ISO 8601 date and time'
+            }), 400
         
-        results = []
-        
-        # Try multiple sources for comprehensive charging station data
-        charging_sources = []
+        # Nearest-station search around a customer address
+        if address and (lat is None or lng is None):
+            located = geocoding_service.geocode(address)
+            if located['found']:
+                lat, lng = located['lat'], located['lng']
         
-        # Source 1: Try ich-tanke-strom.ch API (Swiss Federal Energy Office)
-        try:
-            ich_tanke_url = "https://api.ich-tanke-strom.ch/stations"
-            params = {}
-            if canton:
-                params['canton'] = canton
-            if city:
-                params['city'] = city
-                
-            response = requests.get(ich_tanke_url, params=params, timeout=5)
-            if response.status_code == 200:
-                ich_tanke_data = response.json()
-                for station in ich_tanke_data.get('stations', []):
-                    charging_sources.append(_parse_ich_tanke_station(station))
-        except Exception as e:
-            logger.info(f"ich-tanke-strom API not available: {str(e)}")
-        
-        # Source 2: Static reference data for Swiss charging networks (when API unavailable)
-        if not charging_sources:  # Only use static data if no real API data available
-            static_stations = _get_static_charging_reference(canton, city, charging_type)
-            results.extend(static_stations)
-        
-        # Add real data if available
-        results.extend(charging_sources)
-        
-        # Apply filters
-        filtered_results = []
-        for station in results:
-            # Filter by power
-            if power_min > 0:
-                max_power = max([cp.get('power_kw', 0) for cp in station.get('charging_points', [])])
-                if max_power < power_min:
-                    continue
-            
-            # Filter by charging type
-            if charging_type and charging_type != 'all':
-                station_types = [cp.get('type', '').lower() for cp in station.get('charging_points', [])]
-                if charging_type == 'fast' and not any(cp.get('power_kw', 0) >= 50 for cp in station.get('charging_points', [])):
-                    continue
-                elif charging_type == 'normal' and not any(cp.get('power_kw', 0) < 50 for cp in station.get('charging_points', [])):
-                    continue
-                elif charging_type == 'tesla' and 'tesla' not in station.get('operator', '').lower():
-                    continue
-            
-            # Filter by availability
-            if available_only:
-                available_points = [cp for cp in station.get('charging_points', []) if cp.get('available', False)]
-                if not available_points:
-                    continue
-            
-            # Filter by location if coordinates provided
-            if lat is not None and lng is not None:
-                station_lat = station.get('coordinates', {}).get('lat')
-                station_lng = station.get('coordinates', {}).get('lng')
-                if station_lat and station_lng:
-                    distance = _calculate_distance(lat, lng, station_lat, station_lng)
-                    if distance > radius:
-                        continue
-                    station['distance_km'] = round(distance, 1)
-            
-            filtered_results.append(station)
+        _refresh_station_store()
+        live_data = station_store.source == 'live'
         
-        # Sort by distance if coordinates provided
-        if lat is not None and lng is not None:
-            filtered_results.sort(key=lambda x: x.get('distance_km', float('inf')))
+        # Vectorized filtering on the columnar store, dicts only for returned rows
+        filtered_results = station_store.query(
+            canton=canton,
+            city=city,
+            charging_type=charging_type,
+            power_min=power_min,
+            available_only=available_only,
+            lat=lat,
+            lng=lng,
+            radius_km=radius
+        )
+        _attach_occupancy_forecast(filtered_results, forecast_at)
         
         # Determine data source and warning messages
-        if not charging_sources and not filtered_results:
+        if not live_data and not filtered_results:
             return jsonify({
                 'success': False,
                 'error': 'Charging station services are currently unavailable. Please try again later.',
@@ -542,10 +1027,13 @@ def get_charging_stations():
         
         source = 'Swiss Charging Networks + Federal Energy Office'
         warning = None
+        data_state = _station_data_state()
         
-        if not charging_sources and filtered_results:
+        if not live_data and filtered_results:
             source = 'Reference Data (Limited - APIs unavailable)'
             warning = 'Real-time charging station data is currently unavailable. Showing reference locations only. Actual availability and pricing may differ.'
+        elif data_state['stale']:
+            warning = f"Charging station data could not be refreshed. Showing the data from {data_state['last_live_update']}; availability may have changed."
 
         return jsonify({
             'success': True,
@@ -559,7 +1047,10 @@ def get_charging_stations():
                 'available_only': available_only,
                 'radius_km': radius if lat and lng else None
             },
+            'search_location': _search_location(lat, lng),
             'source': source,
+            'data_sources': station_feed_status,
+            **data_state,
             'warning': warning,
             'timestamp': datetime.now().isoformat()
         })
@@ -571,6 +1062,343 @@ def get_charging_stations():
             'error': str(e)
         }), 500
 
+@swiss_bp.route('/charging-stations/<station_id>/occupancy', methods=['GET'])
+def get_station_occupancy(station_id):
+    """
+    Typical availability of one charging station by hour of week, with the
+    forecast for a given time and the most recent samples
+    """
+    try:
+        forecast_at = _parse_forecast_time(request.args.get('at'))
+        if forecast_at is None:
+            return jsonify({
+                'success': False,
+                'error': 'at must be an ISO 8601 date and time'
+            }), 400
+        recent_limit = max(0, min(request.args.get('recent', 24, type=int), MAX_OCCUPANCY_RECENT_SAMPLES))
+        
+        profile = occupancy_history.weekly_profile(station_id)
+        if profile is None:
+            return jsonify({
+                'success': False,
+                'error': f'No occupancy history for station {station_id}'
+            }), 404
+            
+        probability, samples = occupancy_history.predict([station_id], forecast_at)
+        return jsonify({
+            'success': True,
+            'station_id': station_id,
+            'forecast': {
+                'at': forecast_at.isoformat(),
+                'hour_of_week': hour_of_week(forecast_at),
+                'free_probability': None if np.isnan(probability[0]) else round(float(probability[0]), 3),
+                'samples': int(samples[0])
+            },
+            'weekly_profile': profile,
+            'recent_samples': occupancy_history.recent(station_id, recent_limit) if recent_limit else [],
+            'timezone': 'Europe/Zurich',
+            'snapshots_collected': occupancy_history.samples
+        })
+        
+    except Exception as e:
+        logger.error(f"Station occupancy error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _parse_forecast_time(value):
+    """Forecast time from an ISO string (Swiss local time if no offset), now if absent; None if invalid"""
+    if not value:
+        return datetime.now(SWISS_TIMEZONE)
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=SWISS_TIMEZONE)
+
+def _attach_occupancy_forecast(stations, forecast_at):
+    """Add the hour-of-week occupancy forecast to station results"""
+    probability, samples = occupancy_history.predict([station.get('id') for station in stations], forecast_at)
+    hour = hour_of_week(forecast_at)
+    for station, p, n in zip(stations, probability, samples):
+        if np.isnan(p):
+            station['occupancy_forecast'] = None
+            continue
+        station['occupancy_forecast'] = {
+            'hour_of_week': hour,
+            'free_probability': round(float(p), 3),
+            'expected_free_connectors': round(float(p) * len(station.get('charging_points') or []), 1),
+            'samples': int(n)
+        }
+
+def _sample_occupancy():
+    """Record the current availability of every station in the occupancy history"""
+    try:
+        columns = station_store.snapshot()
+        station_ids = [station_store.station_id(i, columns) for i in range(columns.size)]
+        occupancy_history.record(station_ids, columns.connector_count, columns.available_count)
+    except Exception as e:
+        logger.warning(f"Occupancy sampling failed: {str(e)}")
+
+def _scheduled_occupancy_sample():
+    """Reload the live station data and sample it; stale or reference data is not sampled"""
+    try:
+        _refresh_station_store(force=True)
+    except Exception as e:
+        logger.warning(f"Scheduled station refresh failed: {str(e)}")
+    if station_store.source == 'live' and not station_store_stale:
+        _sample_occupancy()
+
+def start_occupancy_sampling(interval_seconds=OCCUPANCY_SAMPLE_SECONDS):
+    """Sample charging station availability periodically, independent of request traffic"""
+    def run():
+        while True:
+            _scheduled_occupancy_sample()
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=run, name='occupancy-sampling', daemon=True)
+    thread.start()
+    return thread
+
+@swiss_bp.route('/charging-stations/corridor', methods=['GET', 'POST'])
+def get_corridor_charging_stations():
+    """
+    Get charging stations along a route corridor, ordered by distance along the route
+    """
+    try:
+        data = request.get_json(silent=True) or request.args
+        
+        polyline = data.get('polyline')
+        origin = data.get('origin', '')
+        destination = data.get('destination', '')
+        corridor_km = min(float(data.get('corridor_km', 5)), MAX_CORRIDOR_WIDTH_KM)
+        if not corridor_km > 0:
+            raise ValueError('corridor_km must be greater than 0')
+        charging_type = data.get('type', '')
+        power_min = float(data.get('power_min', 0))
+        available_only = str(data.get('available_only', 'false')).lower() == 'true'
+        
+        if polyline:
+            path = decode_polyline(polyline) if isinstance(polyline, str) else [tuple(point) for point in polyline]
+            route_source = 'polyline'
+        elif origin and destination:
+            path = route_geometry(origin, destination)
+            if path is None:
+                return jsonify({
+                    'success': False,
+                    'error': f'No route geometry available for {origin} - {destination}. Please provide a polyline.'
+                }), 404
+            route_source = 'cached_route' if is_cached_route(origin, destination) else 'direct_line'
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Either polyline or origin and destination must be provided'
+            }), 400
+        
+        if len(path) < 2:
+            return jsonify({
+                'success': False,
+                'error': 'Route must contain at least two points'
+            }), 400
+        
+        _refresh_station_store()
+        stations = station_store.query_corridor(
+            path, corridor_km,
+            charging_type=charging_type,
+            power_min=power_min,
+            available_only=available_only
+        )
+        
+        warning = None
+        data_state = _station_data_state()
+        if station_store.source != 'live':
+            warning = 'Real-time charging station data is currently unavailable. Showing reference locations only. Actual availability and pricing may differ.'
+        elif data_state['stale']:
+            warning = f"Charging station data could not be refreshed. Showing the data from {data_state['last_live_update']}; availability may have changed."
+        
+        return jsonify({
+            'success': True,
+            'charging_stations': stations,
+            'total': len(stations),
+            'route': {
+                'origin': origin or None,
+                'destination': destination or None,
+                'geometry_source': route_source,
+                'points': len(path),
+                'length_km': round(float(segment_lengths_km(np.asarray(path, dtype=float)).sum()), 1)
+            },
+            'filters_applied': {
+                'corridor_km': corridor_km,
+                'charging_type': charging_type,
+                'power_min': power_min,
+                'available_only': available_only
+            },
+            **data_state,
+            'warning': warning,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except (TypeError, ValueError) as e:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid corridor parameters: {str(e)}'
+        }), 400
+    except Exception as e:
+        logger.error(f"Corridor charging stations lookup error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@swiss_bp.route('/charging-stations/clusters', methods=['GET'])
+def get_charging_station_clusters():
+    """
+    Get precomputed charging station clusters for a map viewport and zoom level
+    """
+    try:
+        bbox_param = request.args.get('bbox', '')
+        zoom = request.args.get('zoom', type=int)
+        
+        try:
+            bbox = [float(value) for value in bbox_param.split(',')]
+        except ValueError:
+            bbox = []
+        if len(bbox) != 4 or zoom is None:
+            return jsonify({
+                'success': False,
+                'error': 'bbox (west,south,east,north) and zoom are required'
+            }), 400
+        
+        _refresh_station_store()
+        clusters = station_clusters.clusters(bbox, zoom)
+        
+        return jsonify({
+            'success': True,
+            'clusters': clusters,
+            'total': len(clusters),
+            'stations_in_view': sum(cluster['count'] for cluster in clusters),
+            'zoom': zoom,
+            'bbox': bbox,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Charging station clusters error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _refresh_station_store(force=False):
+    """Reload the national station dataset into the columnar store when it is stale
+
+    Requests keep serving the current store while a due refresh runs in the background;
+    only a store that has never been loaded is filled in the request path.
+    """
+    global _station_refresh_thread
+    
+    if not force and time.monotonic() < _station_store_expires_at:
+        return
+    
+    if force or station_store.source is None:
+        _reload_station_store(force)
+        return
+    
+    with _station_store_lock:
+        if _station_refresh_thread is not None and _station_refresh_thread.is_alive():
+            return
+        _station_refresh_thread = threading.Thread(
+            target=_reload_station_store, name='station-refresh', daemon=True
+        )
+        _station_refresh_thread.start()
+
+def _reload_station_store(force=False):
+    """Fetch the national station dataset and swap it into the store"""
+    global _station_store_expires_at, station_store_live_at, station_store_stale
+    
+    with _station_reload_lock:
+        if not force and time.monotonic() < _station_store_expires_at:
+            return
+        
+        # The refresh is shared by every request, so it runs on its own budget rather than
+        # the triggering request's; running out of request time is not a failed refresh
+        with deadline_scope(None):
+            live_stations = _fetch_charging_stations()
+        if live_stations:
+            _fill_missing_cantons(live_stations)
+            station_store.load(live_stations, source='live')
+            station_store_live_at = datetime.now()
+            station_store_stale = False
+            _station_store_expires_at = time.monotonic() + STATION_STORE_REFRESH_SECONDS
+        else:
+            if station_store_live_at is not None:
+                # Keep serving the last live dataset rather than the much smaller reference list
+                station_store_stale = True
+            else:
+                # Static reference data for Swiss charging networks (when API unavailable)
+                station_store.load(_get_static_charging_reference('', '', ''), source='reference')
+            _station_store_expires_at = time.monotonic() + STATION_STORE_RETRY_SECONDS
+
+def _station_data_state():
+    """Freshness of the station store for API responses"""
+    return {
+        'stale': station_store_stale,
+        'circuit_open': any(upstream_breakers.get(feed.name).state != CLOSED for feed in configured_feeds()),
+        'last_live_update': station_store_live_at.isoformat() if station_store_live_at else None
+    }
+
+def _fill_missing_cantons(stations):
+    """Derive the canton from coordinates for stations delivered without one"""
+    geocoder = get_reverse_geocoder()
+    missing = [
+        station for station in stations
+        if not station.get('canton') and station['coordinates'].get('lat') is not None
+        and station['coordinates'].get('lng') is not None
+    ]
+    if not missing or not geocoder.available:
+        return
+    
+    results = geocoder.reverse_many(
+        [station['coordinates']['lat'] for station in missing],
+        [station['coordinates']['lng'] for station in missing]
+    )
+    for station, result in zip(missing, results):
+        station['canton'] = result.get('canton') or ''
+
+def _search_location(lat, lng):
+    """Canton/commune of a radius search centre, when boundary data is installed"""
+    geocoder = get_reverse_geocoder()
+    if lat is None or lng is None or not geocoder.available:
+        return None
+    return geocoder.reverse(lat, lng)
+
+def _fetch_charging_stations():
+    """Fetch every configured charging feed concurrently and merge them into one site list"""
+    global station_feed_status
+    
+    feeds = configured_feeds()
+    results = fetch_feeds(feeds, _fetch_station_feed, STATION_FEED_TIMEOUT_SECONDS)
+    station_feed_status = {name: len(stations) if stations is not None else None
+                           for name, stations in results.items()}
+    # Feeds come back keyed by name; merge in configured priority order
+    return merge_stations([results[feed.name] for feed in feeds if results[feed.name]])
+
+def _fetch_station_feed(feed):
+    """Stations of one feed (ich-tanke-strom.ch or an operator feed in the same format)"""
+    try:
+        response = _upstream_get(feed.name, feed.url, timeout=STATION_FEED_TIMEOUT_SECONDS)
+        if response.status_code == 200:
+            stations = [_parse_ich_tanke_station(station) for station in response.json().get('stations', [])]
+            if feed.name != 'ich_tanke':
+                for station in stations:
+                    station['source'] = feed.name
+            return stations
+        logger.info(f"Charging feed {feed.name} answered {response.status_code}")
+    except Exception as e:
+        logger.info(f"Charging feed {feed.name} not available: {str(e)}")
+    return None
+
 @swiss_bp.route('/charging-stations/networks', methods=['GET'])
 def get_charging_networks():
     """
@@ -693,30 +1521,12 @@ def _get_static_charging_reference(canton, city, charging_type):
     ]
     
     # Filter by location
-        if canton:
+    if canton:
         stations = [s for s in stations if s['canton'].lower() == canton.lower()]
-        if city:
+    if city:
         stations = [s for s in stations if city.lower() in s['city'].lower()]
-        
-    return stations
 
-def _calculate_distance(lat1, lng1, lat2, lng2):
-    """Calculate distance between two coordinates in kilometers"""
-    import math
-    
-    # Haversine formula
-    R = 6371  # Earth's radius in kilometers
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lng = math.radians(lng2 - lng1)
-    
-    a = (math.sin(delta_lat / 2) ** 2 + 
-         math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lng / 2) ** 2)
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-    
-    return R * c
+    return stations
 
 @swiss_bp.route('/ev-incentives/calculate', methods=['POST'])
 def calculate_ev_incentives():
@@ -750,7 +1560,7 @@ def calculate_ev_incentives():
         business_use = customer_data.get('business_use', False)
         
         # Get canton data
-        canton_info = _get_canton_data(canton)
+        canton_info = get_canton_table().get(canton)
         if not canton_info:
             return jsonify({
                 'success': False,
@@ -797,26 +1607,29 @@ def compare_ev_incentives():
             # Default to major cantons if none specified
             cantons = ['ZH', 'BE', 'GE', 'VD', 'BS', 'TI']
             
-        # Calculate for each canton
-        comparison_results = []
+        canton_table = get_canton_table()
+        canton_infos = [canton_table.get(canton) for canton in cantons]
+        canton_infos = [canton_info for canton_info in canton_infos if canton_info]
         
-        for canton in cantons:
-            canton_info = _get_canton_data(canton.upper())
-            if not canton_info:
-                continue
-                
-            calculations = _calculate_comprehensive_ev_costs(
-                canton_info, vehicle_data, customer_data,
-                vehicle_data.get('purchase_price', 70000),
-                vehicle_data.get('power_kw', 255),
-                vehicle_data.get('weight_kg', 2234),
-                customer_data.get('annual_mileage', 15000),
-                customer_data.get('years_ownership', 5)
+        # Calculate all cantons in one vectorized pass
+        purchase_price = vehicle_data.get('purchase_price', 70000)
+        years_ownership = customer_data.get('years_ownership', 5)
+        matrix = compute_cost_matrix(
+            CantonArrays(canton_infos),
+            [_vehicle_spec(vehicle_data, purchase_price, vehicle_data.get('power_kw', 255),
+                           vehicle_data.get('weight_kg', 2234))],
+            [customer_data.get('annual_mileage', 15000)], [years_ownership]
+        )
+        
+        comparison_results = []
+        for index, canton_info in enumerate(canton_infos):
+            calculations = _ev_cost_breakdown(
+                matrix, index, canton_info, vehicle_data, purchase_price, years_ownership
             )
             
             comparison_results.append({
-                'canton': canton.upper(),
-                'canton_name': canton_info['name'],
+                'canton': canton_info.code,
+                'canton_name': canton_info.name,
                 'total_cost_5_years': calculations['total_cost_5_years'],
                 'annual_savings': calculations['annual_savings'],
                 'tax_benefits': calculations['tax_benefits'],
@@ -853,52 +1666,19 @@ def get_canton_incentives():
     Get EV incentive information for all Swiss cantons
     """
     try:
-        cantons_incentives = []
-        
-        # Swiss cantons with their EV incentive data
-        canton_data = {
-            'ZH': {'name': 'Zürich', 'ev_tax_discount': 100, 'ev_tax_discount_years': 8},
-            'BE': {'name': 'Bern', 'ev_tax_discount': 90, 'ev_tax_discount_years': 5},
-            'LU': {'name': 'Luzern', 'ev_tax_discount': 50, 'ev_tax_discount_years': None},
-            'BS': {'name': 'Basel-Stadt', 'ev_tax_discount': 100, 'ev_tax_discount_years': 5},
-            'BL': {'name': 'Basel-Landschaft', 'ev_tax_discount': 75, 'ev_tax_discount_years': None},
-            'GE': {'name': 'Genf', 'ev_tax_discount': 75, 'ev_tax_discount_years': None},
-            'VD': {'name': 'Waadt', 'ev_tax_discount': 80, 'ev_tax_discount_years': None},
-            'TI': {'name': 'Tessin', 'ev_tax_discount': 50, 'ev_tax_discount_years': None},
-            'SG': {'name': 'St. Gallen', 'ev_tax_discount': 60, 'ev_tax_discount_years': None},
-            'AG': {'name': 'Aargau', 'ev_tax_discount': 50, 'ev_tax_discount_years': 3},
-            'FR': {'name': 'Freiburg', 'ev_tax_discount': 70, 'ev_tax_discount_years': None},
-            'SO': {'name': 'Solothurn', 'ev_tax_discount': 60, 'ev_tax_discount_years': None},
-            'SH': {'name': 'Schaffhausen', 'ev_tax_discount': 80, 'ev_tax_discount_years': 5},
-            'ZG': {'name': 'Zug', 'ev_tax_discount': 90, 'ev_tax_discount_years': 5},
-            'NE': {'name': 'Neuenburg', 'ev_tax_discount': 85, 'ev_tax_discount_years': 5},
-            'JU': {'name': 'Jura', 'ev_tax_discount': 70, 'ev_tax_discount_years': None},
-            'VS': {'name': 'Wallis', 'ev_tax_discount': 60, 'ev_tax_discount_years': None}
-        }
-        
-        for canton_code, info in canton_data.items():
-            canton_full_info = _get_canton_data(canton_code)
-            
-            incentive_info = {
-                'canton': canton_code,
-                'name': info['name'],
-                'ev_tax_discount_percent': info['ev_tax_discount'],
-                'ev_tax_discount_years': info['ev_tax_discount_years'],
-                'discount_type': 'permanent' if info['ev_tax_discount_years'] is None else 'temporary',
-                'additional_benefits': [],
-                'registration_fee': canton_full_info.get('registration_fee', 50) if canton_full_info else 50,
-                'attractiveness_score': _calculate_attractiveness_score(info)
+        cantons_incentives = [
+            {
+                'canton': canton.code,
+                'name': canton.name,
+                'ev_tax_discount_percent': canton.ev_tax_discount,
+                'ev_tax_discount_years': canton.ev_tax_discount_years,
+                'discount_type': canton.discount_type,
+                'additional_benefits': list(canton.additional_benefits),
+                'registration_fee': canton.registration_fee,
+                'attractiveness_score': canton.attractiveness_score
             }
-            
-            # Add additional benefits based on canton
-            if canton_code in ['ZH', 'BS', 'GE']:
-                incentive_info['additional_benefits'].append('Free public parking in some areas')
-            if canton_code in ['ZH', 'BE', 'BS']:
-                incentive_info['additional_benefits'].append('Access to bus lanes')
-            if canton_code in ['GE', 'VD']:
-                incentive_info['additional_benefits'].append('Reduced highway vignette fees')
-                
-            cantons_incentives.append(incentive_info)
+            for canton in get_canton_table()
+        ]
         
         # Sort by attractiveness score
         cantons_incentives.sort(key=lambda x: x['attractiveness_score'], reverse=True)
@@ -920,63 +1700,123 @@ def get_canton_incentives():
             'error': str(e)
         }), 500
 
-def _get_canton_data(canton_code):
-    """Get detailed canton data"""
-    canton_data = {
-        'ZH': {'name': 'Zürich', 'vehicle_tax_calculation_method': 'COMBINED', 'vehicle_tax_factor_power': 1.5,
-               'vehicle_tax_factor_weight': 0.05, 'ev_tax_discount': 100, 'ev_tax_discount_years': 8,
-               'registration_fee': 50, 'license_plate_fee': 25, 'average_electricity_price_per_kwh': 0.21},
-        'BE': {'name': 'Bern', 'vehicle_tax_calculation_method': 'WEIGHT', 'vehicle_tax_factor_weight': 0.11,
-               'ev_tax_discount': 90, 'ev_tax_discount_years': 5, 'registration_fee': 45, 'license_plate_fee': 30,
-               'average_electricity_price_per_kwh': 0.19},
-        'BS': {'name': 'Basel-Stadt', 'vehicle_tax_calculation_method': 'COMBINED', 'vehicle_tax_factor_power': 1.5,
-               'vehicle_tax_factor_weight': 0.05, 'ev_tax_discount': 100, 'ev_tax_discount_years': 5,
-               'registration_fee': 55, 'license_plate_fee': 35, 'average_electricity_price_per_kwh': 0.22},
-        'GE': {'name': 'Genf', 'vehicle_tax_calculation_method': 'COMBINED', 'vehicle_tax_factor_power': 1.2,
-               'vehicle_tax_factor_weight': 0.08, 'ev_tax_discount': 75, 'ev_tax_discount_years': None,
-               'registration_fee': 60, 'license_plate_fee': 40, 'average_electricity_price_per_kwh': 0.20}
+@swiss_bp.route('/ev-incentives/matrix', methods=['GET'])
+def get_ev_incentive_matrix():
+    """
+    Cost of every vehicle variant in every canton for several annual mileages
+    and ownership horizons (dealer "best canton" heatmap)
+    """
+    try:
+        mileages = _parse_number_list(request.args.get('mileages'), DEFAULT_MATRIX_MILEAGES, float)
+        years = _parse_number_list(request.args.get('years'), DEFAULT_MATRIX_YEARS, int)
+        if mileages is None or years is None:
+            return jsonify({
+                'success': False,
+                'error': f'mileages and years must be comma-separated lists of up to {MAX_MATRIX_AXIS_VALUES} positive numbers'
+            }), 400
+        
+        matrix, cached = cost_matrix_cache.get(
+            get_canton_table(), vehicle_catalog, mileages, years, _build_incentive_matrix
+        )
+        
+        return jsonify({
+            'success': True,
+            **matrix,
+            'cached': cached,
+            'timestamp': datetime.now().isoformat(),
+            'disclaimer': 'Calculations are estimates based on current regulations. Please verify with local authorities.'
+        })
+        
+    except Exception as e:
+        logger.error(f"EV incentive matrix error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+def _parse_number_list(value, default, cast):
+    """Parse a comma-separated query parameter; None if it is invalid"""
+    if not value:
+        return tuple(default)
+    try:
+        numbers = tuple(sorted({cast(part) for part in value.split(',') if part.strip()}))
+    except ValueError:
+        return None
+    if not numbers or len(numbers) > MAX_MATRIX_AXIS_VALUES or numbers[0] <= 0:
+        return None
+    return numbers
+
+def _build_incentive_matrix(canton_table, vehicles, mileages, years):
+    """Serializable heatmap payload for the full canton × vehicle tensor"""
+    cantons = list(canton_table)
+    matrix = compute_cost_matrix(CantonArrays(cantons), vehicles, mileages, years)
+    best = matrix.best_canton()
+    
+    return {
+        'reference_version': CostMatrixCache.version(canton_table, vehicles),
+        'cantons': [{'canton': canton.code, 'name': canton.name} for canton in cantons],
+        'vehicles': [vehicle.model for vehicle in vehicles],
+        'annual_mileages': list(mileages),
+        'years_ownership': list(years),
+        # [canton][vehicle][mileage][years]
+        'total_cost': np.round(matrix.total_cost, 2).tolist(),
+        'energy_cost': np.round(matrix.energy_cost, 2).tolist(),
+        # [canton][vehicle][years], independent of mileage
+        'tax_savings': np.round(matrix.tax_savings[:, :, 0, :], 2).tolist(),
+        # [vehicle][mileage][years]
+        'best_canton': np.array(matrix.cantons)[best].tolist()
     }
-    return canton_data.get(canton_code)
+
+def _vehicle_spec(vehicle_data, purchase_price, power_kw, weight_kg):
+    return VehicleSpec(
+        model=vehicle_data.get('model', 'custom'),
+        purchase_price=purchase_price,
+        power_kw=power_kw,
+        weight_kg=weight_kg,
+        efficiency_kwh_100km=vehicle_data.get('efficiency_kwh_100km', 22)
+    )
 
 def _calculate_comprehensive_ev_costs(canton_info, vehicle_data, customer_data, 
                                     purchase_price, power_kw, weight_kg, 
                                     annual_mileage, years_ownership):
     """Calculate comprehensive EV costs and incentives"""
+    # Commune tariff where the customer's postal code or commune is known
+    electricity_price, tariff = resolve_electricity_price(
+        customer_data.get('postal_code'), customer_data.get('commune'), canton_info
+    )
+    matrix = compute_cost_matrix(
+        CantonArrays([canton_info], electricity_prices=[electricity_price]),
+        [_vehicle_spec(vehicle_data, purchase_price, power_kw, weight_kg)],
+        [annual_mileage], [years_ownership]
+    )
+    return _ev_cost_breakdown(matrix, 0, canton_info, vehicle_data, purchase_price, years_ownership,
+                              electricity_price, tariff)
+
+def _ev_cost_breakdown(matrix, index, canton_info, vehicle_data, purchase_price, years_ownership,
+                       electricity_price=None, tariff=None):
+    """Response breakdown for one canton of a single-vehicle cost matrix"""
     
-    # Base vehicle tax calculation
-    base_annual_tax = _calculate_base_vehicle_tax(canton_info, power_kw, weight_kg)
-    
-    # Apply EV discount
-    ev_discount_percent = canton_info.get('ev_tax_discount', 0)
-    ev_discount_years = canton_info.get('ev_tax_discount_years')
-    
-    # Calculate tax savings
-    annual_tax_saving = base_annual_tax * (ev_discount_percent / 100)
-    
-    if ev_discount_years:
-        total_tax_savings = annual_tax_saving * min(years_ownership, ev_discount_years)
-        # After discount period, pay full tax
-        remaining_years = max(0, years_ownership - ev_discount_years)
-        total_tax_cost = remaining_years * base_annual_tax
-    else:
-        # Permanent discount
-        total_tax_savings = annual_tax_saving * years_ownership
-        total_tax_cost = (base_annual_tax - annual_tax_saving) * years_ownership
+    # Vehicle tax and EV discount
+    base_annual_tax = float(matrix.base_annual_tax[index, 0])
+    annual_tax_saving = float(matrix.annual_tax_saving[index, 0])
+    total_tax_savings = float(matrix.tax_savings[index, 0, 0, 0])
+    ev_discount_percent = canton_info.ev_tax_discount
+    ev_discount_years = canton_info.ev_tax_discount_years
     
     # Registration and license costs
-    registration_cost = canton_info.get('registration_fee', 50)
-    license_plate_cost = canton_info.get('license_plate_fee', 25)
+    registration_cost = canton_info.registration_fee
+    license_plate_cost = canton_info.license_plate_fee
     
     # Energy costs
     efficiency = vehicle_data.get('efficiency_kwh_100km', 22)
-    electricity_price = canton_info.get('average_electricity_price_per_kwh', 0.20)
-    annual_energy_kwh = (annual_mileage / 100) * efficiency
-    annual_energy_cost = annual_energy_kwh * electricity_price
-    total_energy_cost = annual_energy_cost * years_ownership
+    if electricity_price is None:
+        electricity_price = canton_info.average_electricity_price_per_kwh
+        tariff = {'source': 'canton', 'canton': canton_info.code}
+    annual_energy_kwh = float(matrix.annual_energy_kwh[0, 0])
+    annual_energy_cost = float(matrix.annual_energy_cost[index, 0, 0])
+    total_energy_cost = float(matrix.energy_cost[index, 0, 0, 0])
     
-    # Total cost calculation
-    total_cost_5_years = (purchase_price + registration_cost + license_plate_cost + 
-                         total_tax_cost + total_energy_cost)
+    total_cost_5_years = float(matrix.total_cost[index, 0, 0, 0])
     
     # Savings compared to paying full tax
     total_savings_vs_ice = total_tax_savings
@@ -1005,6 +1845,7 @@ def _calculate_comprehensive_ev_costs(canton_info, vehicle_data, customer_data,
         'energy_analysis': {
             'annual_consumption_kwh': annual_energy_kwh,
             'electricity_price_per_kwh': electricity_price,
+            'tariff': tariff,
             'total_energy_cost_5_years': total_energy_cost,
             'cost_per_100km': (efficiency * electricity_price)
         },
@@ -1015,35 +1856,3 @@ def _calculate_comprehensive_ev_costs(canton_info, vehicle_data, customer_data,
             'canton_rank': 'high' if ev_discount_percent >= 80 else 'medium' if ev_discount_percent >= 50 else 'low'
         }
     }
-
-def _calculate_base_vehicle_tax(canton_info, power_kw, weight_kg):
-    """Calculate base vehicle tax before EV discounts"""
-    method = canton_info.get('vehicle_tax_calculation_method', 'COMBINED')
-    
-    if method == 'POWER':
-        factor = canton_info.get('vehicle_tax_factor_power', 2.0)
-        return power_kw * factor
-    elif method == 'WEIGHT':
-        factor = canton_info.get('vehicle_tax_factor_weight', 0.1)
-        return weight_kg * factor
-    elif method == 'COMBINED':
-        power_factor = canton_info.get('vehicle_tax_factor_power', 1.5)
-        weight_factor = canton_info.get('vehicle_tax_factor_weight', 0.05)
-        return (power_kw * power_factor) + (weight_kg * weight_factor)
-    else:
-        # Flat rate
-        return canton_info.get('vehicle_tax_base_fee', 300)
-
-def _calculate_attractiveness_score(canton_info):
-    """Calculate attractiveness score for EV incentives"""
-    discount = canton_info.get('ev_tax_discount', 0)
-    years = canton_info.get('ev_tax_discount_years')
-    
-    score = discount
-    if years is None:  # Permanent discount gets bonus
-        score += 20
-    elif years >= 5:   # Long-term discount gets smaller bonus
-        score += 10
-    
-    return min(score, 100)
-
@@ -1,22 +1,64 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import datetime
 import math
+import time
+from src.services.canton_reference import get_canton_table
+from src.services.cash_flow_schedule import (
+    STREAM_FORMATS, build_schedule, check_balloon, csv_lines, ndjson_lines, schedule_rows, stream_schedules
+)
+from src.services.cost_matrix import load_vehicle_catalog
+from src.services.electricity_tariffs import electricity_price as resolve_electricity_price
+from src.services.energy_simulation import EnergyScenario, normalize_charging_mix, simulate_energy_year
+from src.services.financing_optimizer import max_monthly_payment, optimize_financing
+from src.services.fleet_tco import FLEET_COLUMNS, compute_fleet, fleet_summary
+from src.services.residual_values import get_residual_table
+from src.services.tco_breakeven import solve_break_even, vehicle_pairs
+from src.services.tco_cache import calculation_id, create_result_cache, etag, parameters_hash
+from src.services.tco_engine import (
+    BASE_ANNUAL_INSURANCE, DEFAULT_EV_POWER_KW, DEFAULT_EV_WEIGHT_KG, DEFAULT_ICE, EV_ANNUAL_MAINTENANCE, HOME_CHARGER_COST,
+    ICE_ANNUAL_MAINTENANCE, SWISS_CONSTANTS, canton_code, compute_tco, merge_parameters, pack_tco_inputs,
+    result_rows
+)
+from src.services.tco_history import create_write_behind
+from src.services.tco_risk import DEFAULT_TRIALS, simulate_tco
+from src.services.tco_sensitivity import DEFAULT_VARIATION, sensitivity_analysis
 
 tco_bp = Blueprint('tco_calculator', __name__)
 
-# Swiss-specific constants
-SWISS_CONSTANTS = {
-    'electricity_price_per_kwh': 0.21,  # CHF per kWh (average Swiss price)
-    'gasoline_price_per_liter': 1.65,   # CHF per liter
-    'co2_tax_per_liter': 0.096,         # CHF per liter CO2 tax
-    'road_tax_ice': 300,                # CHF per year for ICE vehicles
-    'road_tax_ev': 0,                   # CHF per year for EVs (most cantons)
-    'insurance_factor_ev': 0.95,        # EVs typically 5% cheaper to insure
-    'maintenance_factor_ev': 0.6,       # EVs need 40% less maintenance
-    'depreciation_rate_ev': 0.15,       # 15% per year
-    'depreciation_rate_ice': 0.18,      # 18% per year
+# Mock Swiss EV incentives data (purchase rebates and programmes not in the canton table)
+SWISS_INCENTIVES = {
+    'ZH': {
+        'purchase_rebate': 0,
+        'tax_exemptions': ['road_tax_5_years'],
+        'charging_incentives': ['home_charger_subsidy_500'],
+        'parking_benefits': ['free_public_parking_2_years']
+    },
+    'BE': {
+        'purchase_rebate': 2000,
+        'tax_exemptions': ['road_tax_3_years'],
+        'charging_incentives': ['home_charger_subsidy_1000'],
+        'parking_benefits': ['reduced_parking_fees']
+    },
+    'GE': {
+        'purchase_rebate': 3000,
+        'tax_exemptions': ['road_tax_permanent'],
+        'charging_incentives': ['free_public_charging_1_year'],
+        'parking_benefits': ['free_public_parking_permanent']
+    }
 }
 
+MAX_SCENARIOS = 10000
+MAX_SCHEDULES = 1000
+
+# Memoized /calculate results by canonical parameter hash
+tco_results = create_result_cache()
+
+# Write-behind history of served results (tco_calculations), started by main.py
+tco_history = create_write_behind()
+
+# Active catalog variants for batch break-even (database/seeds/02_vehicles.sql)
+vehicle_catalog = load_vehicle_catalog()
+
 @tco_bp.route('/calculate', methods=['POST'])
 def calculate_tco():
     """
@@ -25,6 +67,17 @@ def calculate_tco():
     try:
         data = request.get_json()
         
+        # Identical inputs (after normalization) give the same id, ETag and cached result
+        digest = parameters_hash(data)
+        cached = tco_results.get(digest)
+        if cached is not None:
+            # Every served calculation goes to the history, cached and 304 answers included
+            _record_history(cached, data)
+        if request.if_none_match.contains(etag(digest)):
+            return _not_modified(digest)
+        if cached is not None:
+            return _tco_response(cached, digest, cache_hit=True)
+        
         # Vehicle configuration
         vehicle = data.get('vehicle', {})
         comparison_vehicle = data.get('comparison_vehicle', {})
@@ -32,17 +85,23 @@ def calculate_tco():
         # Usage parameters
         annual_mileage = data.get('annual_mileage', 15000)
         calculation_period = data.get('calculation_period_years', 5)
-        canton = data.get('canton', 'ZH')
+        canton = canton_code(data)
+        postal_code = data.get('postal_code')
+        commune = data.get('commune')
         
         # Financial parameters
         purchase_price = vehicle.get('purchase_price', 85200)
         down_payment = data.get('down_payment', 20000)
         financing_rate = data.get('financing_rate', 0.039)
         
+        # Optional hourly energy simulation instead of one flat kWh price
+        energy_options = _energy_options(data) if data.get('energy_mode') == 'detailed' else None
+        
         # Calculate EV costs
         ev_costs = calculate_ev_costs(
             purchase_price, annual_mileage, calculation_period, 
-            canton, down_payment, financing_rate, vehicle
+            canton, down_payment, financing_rate, vehicle,
+            postal_code=postal_code, commune=commune, energy_options=energy_options
         )
         
         # Calculate ICE comparison if provided
@@ -66,14 +125,17 @@ def calculate_tco():
             }
         
         result = {
-            'calculation_id': f"TCO-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+            'calculation_id': calculation_id(digest),
             'parameters': {
                 'annual_mileage': annual_mileage,
                 'calculation_period_years': calculation_period,
                 'canton': canton,
+                'postal_code': postal_code,
+                'commune': commune,
                 'purchase_price': purchase_price,
                 'down_payment': down_payment,
-                'financing_rate': financing_rate
+                'financing_rate': financing_rate,
+                'energy_mode': 'detailed' if energy_options else 'flat'
             },
             'ev_costs': ev_costs,
             'ice_costs': ice_costs,
@@ -81,19 +143,77 @@ def calculate_tco():
             'calculated_at': datetime.now().isoformat(),
             'currency': 'CHF'
         }
+        tco_results.put(digest, result)
+        _record_history(result, data)
         
-        return jsonify({
-            'success': True,
-            'tco_calculation': result
-        })
+        return _tco_response(result, digest, cache_hit=False)
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def calculate_ev_costs(purchase_price, annual_mileage, years, canton, down_payment, rate, vehicle):
+@tco_bp.route('/calculations/<calc_id>', methods=['GET'])
+def get_tco_calculation(calc_id):
+    """
+    Previously calculated TCO result by calculation_id (while cached)
+    """
+    digest = calc_id[len('TCO-'):] if calc_id.startswith('TCO-') else calc_id
+    result = tco_results.get_by_id(f'TCO-{digest}')
+    if result is None:
+        return jsonify({
+            'success': False,
+            'error': 'Calculation not found or expired, recalculate via POST /calculate'
+        }), 404
+    if request.if_none_match.contains(digest):
+        return _not_modified(digest)
+    return _tco_response(result, digest, cache_hit=True)
+
+def _tco_response(result, digest, cache_hit):
+    response = jsonify({
+        'success': True,
+        'tco_calculation': result
+    })
+    response.set_etag(etag(digest))
+    response.headers['X-Cache'] = 'HIT' if cache_hit else 'MISS'
+    return response
+
+def _record_history(result, data):
+    """Queue a served result for the tco_calculations history, written behind the request"""
+    vehicle = data.get('vehicle') or {}
+    tco_history.submit(result, customer_id=data.get('customer_id'), vehicle_id=vehicle.get('id'))
+
+def _not_modified(digest):
+    response = Response(status=304)
+    response.set_etag(etag(digest))
+    return response
+
+def _energy_options(data):
+    """Parameters of the detailed energy simulation from a TCO request"""
+    home_tariff = data.get('home_tariff') or {}
+    options = {
+        'charging_mix': normalize_charging_mix(data.get('charging_mix')),
+        'home_high_price': home_tariff.get('high'),
+        'home_low_price': home_tariff.get('low'),
+        'public_price': data.get('public_charging_price'),
+        'fast_price': data.get('fast_charging_price'),
+        'smart_charging': bool(data.get('smart_charging', False)),
+        'wallbox_power_kw': data.get('wallbox_power_kw')
+    }
+    for key, value in options.items():
+        if key not in ('charging_mix', 'smart_charging') and value is not None:
+            if not isinstance(value, (int, float)) or value <= 0:
+                raise ValueError(f'{key} must be a positive number')
+    return {key: value for key, value in options.items() if value is not None}
+
+def calculate_ev_costs(purchase_price, annual_mileage, years, canton, down_payment, rate, vehicle,
+                       postal_code=None, commune=None, energy_options=None):
     """Calculate EV-specific costs"""
     
     # Vehicle specifications
@@ -105,28 +225,53 @@ def calculate_ev_costs(purchase_price, annual_mileage, years, canton, down_payme
     monthly_payment = calculate_monthly_payment(loan_amount, rate, years)
     total_financing = monthly_payment * 12 * years
     
-    # Energy costs
-    annual_energy_consumption = (annual_mileage / 100) * consumption_kwh_100km
-    annual_energy_cost = annual_energy_consumption * SWISS_CONSTANTS['electricity_price_per_kwh']
+    canton_info = get_canton_table().get(canton)
+    
+    # Energy costs (commune tariff, else canton average, else Swiss average)
+    electricity_price, tariff = resolve_electricity_price(
+        postal_code, commune, canton_info, SWISS_CONSTANTS['electricity_price_per_kwh']
+    )
+    simulation = None
+    if energy_options is not None:
+        # Hourly year: charging mix, time-of-use home tariff, winter uplift, charging losses
+        simulation = simulate_energy_year(EnergyScenario(
+            annual_km=annual_mileage,
+            consumption_kwh_100km=consumption_kwh_100km,
+            **{'home_high_price': electricity_price, **energy_options}
+        ))
+        annual_energy_consumption = simulation['grid_kwh']
+        annual_energy_cost = simulation['total_cost']
+    else:
+        annual_energy_consumption = (annual_mileage / 100) * consumption_kwh_100km
+        annual_energy_cost = annual_energy_consumption * electricity_price
     total_energy_cost = annual_energy_cost * years
     
     # Charging infrastructure (home charger installation)
-    home_charger_cost = 2500  # CHF for installation
+    home_charger_cost = HOME_CHARGER_COST
     
     # Maintenance costs (EVs need less maintenance)
-    annual_maintenance = 800  # CHF per year for EV
+    annual_maintenance = EV_ANNUAL_MAINTENANCE
     total_maintenance = annual_maintenance * years
     
     # Insurance (slightly cheaper for EVs)
-    annual_insurance = 1200 * SWISS_CONSTANTS['insurance_factor_ev']
+    annual_insurance = BASE_ANNUAL_INSURANCE * SWISS_CONSTANTS['insurance_factor_ev']
     total_insurance = annual_insurance * years
     
-    # Taxes and fees
-    annual_road_tax = SWISS_CONSTANTS['road_tax_ev']
-    total_road_tax = annual_road_tax * years
+    # Taxes and fees (canton base tax with the EV discount schedule applied)
+    if canton_info:
+        base_road_tax = canton_info.base_tax(
+            vehicle.get('power_kw', DEFAULT_EV_POWER_KW), vehicle.get('weight_kg', DEFAULT_EV_WEIGHT_KG)
+        )
+        total_road_tax = base_road_tax * (years - canton_info.discounted_years(years))
+        annual_road_tax = total_road_tax / years
+    else:
+        annual_road_tax = SWISS_CONSTANTS['road_tax_ev']
+        total_road_tax = annual_road_tax * years
     
-    # Depreciation
-    residual_value = purchase_price * math.pow(1 - SWISS_CONSTANTS['depreciation_rate_ev'], years)
+    # Depreciation (residual value curve of the model by age and mileage)
+    residual_value = get_residual_table().residual_value(
+        purchase_price, years, annual_mileage, vehicle.get('model'), 'ev'
+    )
     depreciation = purchase_price - residual_value
     
     # Total costs
@@ -145,9 +290,12 @@ def calculate_ev_costs(purchase_price, annual_mileage, years, canton, down_payme
         },
         'energy_costs': {
             'annual_consumption_kwh': annual_energy_consumption,
+            'electricity_price_per_kwh': electricity_price,
+            'tariff': tariff,
             'annual_cost': annual_energy_cost,
             'total': total_energy_cost,
-            'cost_per_km': annual_energy_cost / annual_mileage
+            'cost_per_km': annual_energy_cost / annual_mileage,
+            'simulation': simulation
         },
         'infrastructure_costs': {
             'home_charger': home_charger_cost
@@ -191,19 +339,25 @@ def calculate_ice_costs(purchase_price, annual_mileage, years, canton, down_paym
     total_fuel_cost = annual_fuel_cost * years
     
     # Maintenance costs (ICE vehicles need more maintenance)
-    annual_maintenance = 1200  # CHF per year for ICE
+    annual_maintenance = ICE_ANNUAL_MAINTENANCE
     total_maintenance = annual_maintenance * years
     
     # Insurance
-    annual_insurance = 1200
+    annual_insurance = BASE_ANNUAL_INSURANCE
     total_insurance = annual_insurance * years
     
-    # Taxes and fees
-    annual_road_tax = SWISS_CONSTANTS['road_tax_ice']
+    # Taxes and fees (canton base tax when the vehicle specification is known)
+    canton_info = get_canton_table().get(canton)
+    if canton_info and 'power_kw' in vehicle and 'weight_kg' in vehicle:
+        annual_road_tax = canton_info.base_tax(vehicle['power_kw'], vehicle['weight_kg'])
+    else:
+        annual_road_tax = SWISS_CONSTANTS['road_tax_ice']
     total_road_tax = annual_road_tax * years
     
-    # Depreciation
-    residual_value = purchase_price * math.pow(1 - SWISS_CONSTANTS['depreciation_rate_ice'], years)
+    # Depreciation (residual value curve of the model by age and mileage)
+    residual_value = get_residual_table().residual_value(
+        purchase_price, years, annual_mileage, vehicle.get('model'), 'ice'
+    )
     depreciation = purchase_price - residual_value
     
     # Total costs
@@ -262,44 +416,362 @@ def calculate_monthly_payment(principal, annual_rate, years):
 def calculate_scenarios():
     """
     Calculate multiple TCO scenarios for comparison
+    
+    All scenarios are packed into parameter arrays and evaluated in one
+    vectorized pass of the TCO engine.
     """
     try:
+        started = time.perf_counter()
         data = request.get_json()
         base_params = data.get('base_parameters', {})
         scenarios = data.get('scenarios', [])
         
-        results = []
+        if not isinstance(scenarios, list) or not all(isinstance(s, dict) for s in scenarios):
+            raise ValueError('scenarios must be a list of objects')
+        if len(scenarios) > MAX_SCENARIOS:
+            raise ValueError(f'At most {MAX_SCENARIOS} scenarios per request')
+        
+        # Merge base parameters with scenario-specific parameters
+        scenario_params = [merge_parameters(base_params, scenario) for scenario in scenarios]
+        inputs = pack_tco_inputs(scenario_params)
+        tco_results = list(result_rows(inputs, compute_tco(inputs)))
         
-        for scenario in scenarios:
-            # Merge base parameters with scenario-specific parameters
-            scenario_params = {**base_params, **scenario}
-            
-            # Calculate TCO for this scenario
-            tco_result = calculate_tco_internal(scenario_params)
-            
-            results.append({
+        results = [
+            {
                 'scenario_name': scenario.get('name', 'Unnamed Scenario'),
-                'parameters': scenario_params,
+                'parameters': params,
                 'tco_result': tco_result
-            })
+            }
+            for scenario, params, tco_result in zip(scenarios, scenario_params, tco_results)
+        ]
+        
+        summary = {'scenario_count': len(results)}
+        if results:
+            ev_totals = [r['ev_costs']['total_cost'] for r in tco_results]
+            summary['lowest_ev_cost_scenario'] = results[ev_totals.index(min(ev_totals))]['scenario_name']
+            savings = [(r['savings']['total_savings'], i) for i, r in enumerate(tco_results) if r['savings']]
+            if savings:
+                summary['highest_savings_scenario'] = results[max(savings)[1]]['scenario_name']
+        summary['compute_ms'] = round((time.perf_counter() - started) * 1000, 2)
         
         return jsonify({
             'success': True,
             'scenarios': results,
+            'summary': summary,
+            'calculated_at': datetime.now().isoformat()
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@tco_bp.route('/simulate', methods=['POST'])
+def simulate_tco_risk():
+    """
+    Monte Carlo spread of the TCO comparison
+    
+    Takes the /calculate parameters plus trials, seed and per-input
+    uncertainty overrides; returns P5/P50/P95 costs and the probability that
+    the EV is cheaper than the comparison vehicle.
+    """
+    try:
+        data = request.get_json()
+        params = {key: value for key, value in data.items() if key not in ('trials', 'seed', 'uncertainty')}
+        
+        simulation = simulate_tco(
+            params,
+            trials=data.get('trials', DEFAULT_TRIALS),
+            seed=data.get('seed'),
+            uncertainty=data.get('uncertainty')
+        )
+        
+        return jsonify({
+            'success': True,
+            'simulation': simulation,
+            'parameters': params,
+            'calculated_at': datetime.now().isoformat(),
+            'currency': 'CHF'
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@tco_bp.route('/sensitivity', methods=['POST'])
+def calculate_sensitivity():
+    """
+    Tornado analysis of what drives the EV savings
+    
+    Takes the /calculate parameters plus the relative variation (default
+    0.10 = ±10 %) and returns the savings delta per input, ranked by swing.
+    """
+    try:
+        data = request.get_json()
+        params = {key: value for key, value in data.items() if key != 'variation'}
+        
+        analysis = sensitivity_analysis(params, data.get('variation', DEFAULT_VARIATION))
+        
+        return jsonify({
+            'success': True,
+            'sensitivity': analysis,
+            'parameters': params,
+            'calculated_at': datetime.now().isoformat(),
+            'currency': 'CHF'
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@tco_bp.route('/break-even', methods=['POST'])
+def calculate_break_even():
+    """
+    Break-even annual mileage, electricity price or holding period
+    
+    Solves for the /calculate parameters, or with "catalog": true for every
+    catalog EV against each of "comparison_vehicles" (default: the
+    comparison_vehicle of the request).
+    """
+    try:
+        data = request.get_json()
+        solve_for = data.get('solve_for', 'annual_mileage')
+        params = {key: value for key, value in data.items()
+                  if key not in ('solve_for', 'catalog', 'comparison_vehicles')}
+        
+        if data.get('catalog'):
+            comparisons = data.get('comparison_vehicles') or [params.get('comparison_vehicle') or DEFAULT_ICE]
+            if not isinstance(comparisons, list) or not all(isinstance(c, dict) for c in comparisons):
+                raise ValueError('comparison_vehicles must be a list of objects')
+            base = {key: value for key, value in params.items() if key not in ('vehicle', 'comparison_vehicle')}
+            parameter_sets = vehicle_pairs(vehicle_catalog, comparisons, base)
+        else:
+            parameter_sets = [params]
+        
+        solutions = solve_break_even(pack_tco_inputs(parameter_sets), solve_for)
+        for params_used, solution in zip(parameter_sets, solutions):
+            solution['vehicle'] = params_used.get('vehicle', {}).get('model')
+            solution['comparison_vehicle'] = params_used.get('comparison_vehicle')
+        
+        return jsonify({
+            'success': True,
+            'break_even': solutions if data.get('catalog') else solutions[0],
             'calculated_at': datetime.now().isoformat()
         })
         
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@tco_bp.route('/schedule', methods=['POST'])
+def generate_schedule():
+    """
+    Month-by-month cash-flow and amortization schedule
+    
+    Takes the /calculate parameters plus vehicle_type (ev/ice), product
+    (finance/lease/cash), balloon and include_resale. With "vehicles" (a
+    list of parameter overrides) one schedule per vehicle is produced.
+    format=csv or format=ndjson (body or query string) streams the rows
+    instead of returning one JSON document.
+    """
+    try:
+        data = request.get_json()
+        fmt = request.args.get('format') or data.get('format', 'json')
+        options = {
+            'vehicle_type': data.get('vehicle_type', 'ev'),
+            'product': data.get('product', 'finance'),
+            'balloon': data.get('balloon'),
+            'include_resale': bool(data.get('include_resale', True))
+        }
+        params = {key: value for key, value in data.items()
+                  if key not in ('format', 'vehicles', 'vehicle_type', 'product', 'balloon', 'include_resale')}
+        vehicles = data.get('vehicles')
+        
+        if fmt != 'json' and fmt not in STREAM_FORMATS:
+            raise ValueError(f"format must be json, {', '.join(STREAM_FORMATS)}")
+        if vehicles is not None:
+            if not isinstance(vehicles, list) or not all(isinstance(v, dict) for v in vehicles):
+                raise ValueError('vehicles must be a list of objects')
+            if len(vehicles) > MAX_SCHEDULES:
+                raise ValueError(f'At most {MAX_SCHEDULES} vehicles per request')
+            parameter_sets = [merge_parameters(params, vehicle) for vehicle in vehicles]
+        else:
+            parameter_sets = [params]
+        
+        # Validate everything before the first byte is streamed
+        first = build_schedule(parameter_sets[0], **options) if parameter_sets else None
+        check_balloon(pack_tco_inputs(parameter_sets), options['vehicle_type'], options['product'],
+                      options['balloon'])
+        
+        if fmt in STREAM_FORMATS:
+            return Response(
+                stream_with_context(stream_schedules(parameter_sets, fmt, **options)),
+                mimetype=STREAM_FORMATS[fmt],
+                headers={'Content-Disposition': f'attachment; filename=tco-schedule.{fmt}'}
+            )
+        
+        schedules = [first] + [build_schedule(p, **options) for p in parameter_sets[1:]] if first else []
+        return jsonify({
+            'success': True,
+            'schedules': [
+                {'summary': schedule['summary'], 'months': list(schedule_rows(schedule))}
+                for schedule in schedules
+            ],
+            'calculated_at': datetime.now().isoformat(),
+            'currency': 'CHF'
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@tco_bp.route('/fleet', methods=['POST'])
+def calculate_fleet_tco():
+    """
+    Fleet TCO for business customers
+    
+    "vehicles" lists one parameter override per fleet vehicle (model,
+    annual_mileage, canton, financing terms, ...) on top of
+    "base_parameters". format=csv or format=ndjson (body or query string)
+    streams one row per vehicle followed by the fleet totals.
+    """
+    try:
+        started = time.perf_counter()
+        data = request.get_json()
+        fmt = request.args.get('format') or data.get('format', 'json')
+        base_params = data.get('base_parameters', {})
+        vehicles = data.get('vehicles')
+        
+        if fmt != 'json' and fmt not in STREAM_FORMATS:
+            raise ValueError(f"format must be json, {', '.join(STREAM_FORMATS)}")
+        if not isinstance(vehicles, list) or not all(isinstance(v, dict) for v in vehicles):
+            raise ValueError('vehicles must be a list of objects')
+        
+        rows = compute_fleet([merge_parameters(base_params, vehicle) for vehicle in vehicles])
+        summary = fleet_summary(rows, started)
+        
+        if fmt == 'ndjson':
+            lines = ndjson_lines([*rows, {'summary': summary}])
+        elif fmt == 'csv':
+            totals = {'vehicle_index': 'total', 'ev_total_cost': summary['ev_total_cost'],
+                      'ev_annual_cost': summary['ev_annual_cost'], 'ev_cost_per_km': summary['ev_cost_per_km'],
+                      'ev_monthly_payment': summary['ev_monthly_payments'],
+                      'ice_total_cost': summary['ice_total_cost'], 'savings': summary['total_savings']}
+            lines = csv_lines([*rows, totals], FLEET_COLUMNS)
+        else:
+            return jsonify({
+                'success': True,
+                'fleet': {'vehicles': rows, 'summary': summary},
+                'calculated_at': datetime.now().isoformat(),
+                'currency': 'CHF'
+            })
+        
+        return Response(
+            stream_with_context(lines),
+            mimetype=STREAM_FORMATS[fmt],
+            headers={'Content-Disposition': f'attachment; filename=fleet-tco.{fmt}'}
+        )
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def calculate_tco_internal(params):
-    """Internal TCO calculation function"""
-    # This would contain the same logic as the main calculate_tco function
-    # but structured to work with internal calls
-    pass
+@tco_bp.route('/financing/optimize', methods=['POST'])
+def optimize_financing_options():
+    """
+    Best financing options for a vehicle within the customer's budget
+    
+    Evaluates down_payments × terms_months × products (finance, lease,
+    cash) over the calculation period and returns the Pareto set of monthly
+    payment vs total cost among the options within max_monthly_payment
+    (given, or 15 % of annual_income / the middle of income_bracket).
+    """
+    try:
+        data = request.get_json()
+        vehicle = data.get('vehicle', {})
+        
+        # Same validation as the TCO engine
+        inputs = pack_tco_inputs([data])
+        limit = data.get('max_monthly_payment')
+        if limit is None:
+            limit = max_monthly_payment(data.get('annual_income'), data.get('income_bracket'))
+        for name, value in (('max_monthly_payment', limit), ('lease_rate', data.get('lease_rate')),
+                            ('max_down_payment', data.get('max_down_payment'))):
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0):
+                raise ValueError(f'{name} must be a non-negative number')
+        
+        optimization = optimize_financing(
+            purchase_price=float(inputs.purchase_price[0]),
+            financing_rate=float(inputs.financing_rate[0]),
+            horizon_months=int(round(float(inputs.years[0]) * 12)),
+            lease_rate=data.get('lease_rate'),
+            monthly_limit=limit,
+            down_payments=data.get('down_payments'),
+            terms_months=data.get('terms_months'),
+            products=data.get('products'),
+            max_down_payment=data.get('max_down_payment'),
+            annual_mileage=float(inputs.annual_mileage[0]),
+            residual_curve=int(inputs.ev_residual_curve[0])
+        )
+        
+        return jsonify({
+            'success': True,
+            'financing': {**optimization, 'vehicle': vehicle.get('model')},
+            'calculated_at': datetime.now().isoformat(),
+            'currency': 'CHF'
+        })
+        
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
 @tco_bp.route('/incentives', methods=['GET'])
 def get_swiss_incentives():
@@ -309,32 +781,10 @@ def get_swiss_incentives():
     try:
         canton = request.args.get('canton', '')
         
-        # Mock Swiss EV incentives data
-        incentives = {
-            'ZH': {
-                'purchase_rebate': 0,
-                'tax_exemptions': ['road_tax_5_years'],
-                'charging_incentives': ['home_charger_subsidy_500'],
-                'parking_benefits': ['free_public_parking_2_years']
-            },
-            'BE': {
-                'purchase_rebate': 2000,
-                'tax_exemptions': ['road_tax_3_years'],
-                'charging_incentives': ['home_charger_subsidy_1000'],
-                'parking_benefits': ['reduced_parking_fees']
-            },
-            'GE': {
-                'purchase_rebate': 3000,
-                'tax_exemptions': ['road_tax_permanent'],
-                'charging_incentives': ['free_public_charging_1_year'],
-                'parking_benefits': ['free_public_parking_permanent']
-            }
-        }
-        
-        if canton and canton in incentives:
-            result = {canton: incentives[canton]}
+        if canton and canton in SWISS_INCENTIVES:
+            result = {canton: SWISS_INCENTIVES[canton]}
         else:
-            result = incentives
+            result = SWISS_INCENTIVES
         
         return jsonify({
             'success': True,
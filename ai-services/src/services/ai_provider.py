@@ -13,6 +13,7 @@ from datetime import datetime
 import openai
 import httpx
 from config import config
+from src.services.deadline import call_timeout, deadline_expired
 
 logger = logging.getLogger(__name__)
 
@@ -41,8 +42,11 @@ class AIProviderService:
         """
         prompt = self._create_customer_analysis_prompt(customer_data, vehicle_preferences)
         
-        # Try providers in priority order
+        # Try providers in priority order, while the request budget lasts
         for provider in self.provider_priority:
+            if deadline_expired():
+                logger.warning("Request deadline reached, skipping remaining AI providers")
+                break
             if provider in self.available_providers:
                 try:
                     result = await self._call_ai_provider(provider, prompt)
@@ -53,7 +57,11 @@ class AIProviderService:
                     continue
         
         # Fallback to mock response if all providers fail
-        return self._generate_mock_analysis(customer_data, vehicle_preferences)
+        result = self._generate_mock_analysis(customer_data, vehicle_preferences)
+        if deadline_expired():
+            result['metadata']['note'] = "Mock response - request deadline reached before an AI provider answered"
+            result['metadata']['deadline_exceeded'] = True
+        return result
     
     async def _call_ai_provider(self, provider: str, prompt: str) -> Optional[Dict]:
         """Call specific AI provider"""
@@ -72,7 +80,7 @@ class AIProviderService:
             
             client = OpenAI(api_key=config.openai.api_key)
             
-            response = client.chat.completions.create(
+            response = client.with_options(timeout=call_timeout(30.0)).chat.completions.create(
                 model=config.openai.model,
                 messages=[
                     {"role": "system", "content": "You are a CADILLAC EV sales consultant expert in the Swiss market. Provide detailed, professional analysis and recommendations."},
@@ -112,7 +120,7 @@ class AIProviderService:
                     "https://api.deepseek.com/v1/chat/completions",
                     headers=headers,
                     json=data,
-                    timeout=30.0
+                    timeout=call_timeout(30.0)
                 )
                 
                 if response.status_code == 200:
@@ -156,7 +164,7 @@ class AIProviderService:
                     url,
                     headers=headers,
                     json=data,
-                    timeout=30.0
+                    timeout=call_timeout(30.0)
                 )
                 
                 if response.status_code == 200:
@@ -0,0 +1,270 @@
+"""
+Canton Reference Table
+======================
+
+Immutable reference data for all 26 Swiss cantons, loaded once at startup from
+database/seeds/01_cantons.sql (or the cantons table when CANTON_DATA_SOURCE is
+set to "database").
+
+Derived values used on hot paths are precomputed per canton: the linear base
+vehicle tax coefficients, the EV tax discount schedule by ownership year and
+the incentive attractiveness score.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+from src.services.seed_data import load_seed_rows
+
+logger = logging.getLogger(__name__)
+
+CANTON_SEED_FILE = '01_cantons.sql'
+MAX_SCHEDULE_YEARS = 30
+
+# Defaults used by the tax formulas when a factor is missing
+DEFAULT_POWER_FACTOR = 2.0
+DEFAULT_WEIGHT_FACTOR = 0.1
+DEFAULT_FLAT_RATE = 300
+
+ADDITIONAL_BENEFITS = {
+    'ZH': ('Free public parking in some areas', 'Access to bus lanes'),
+    'BS': ('Free public parking in some areas', 'Access to bus lanes'),
+    'GE': ('Free public parking in some areas', 'Reduced highway vignette fees'),
+    'BE': ('Access to bus lanes',),
+    'VD': ('Reduced highway vignette fees',),
+}
+
+DEFAULT_REGIONAL_PROFILE = {
+    'urban_density': 'medium',
+    'charging_infrastructure': 'good',
+    'environmental_consciousness': 'medium',
+    'luxury_market': 'medium',
+    'preferences': ['reliability', 'value', 'practicality']
+}
+
+REGIONAL_PROFILES = {
+    'ZH': {
+        'urban_density': 'high',
+        'charging_infrastructure': 'excellent',
+        'environmental_consciousness': 'high',
+        'luxury_market': 'strong',
+        'preferences': ['technology', 'efficiency', 'urban_mobility']
+    },
+    'GE': {
+        'urban_density': 'high',
+        'charging_infrastructure': 'excellent',
+        'environmental_consciousness': 'very_high',
+        'luxury_market': 'very_strong',
+        'preferences': ['luxury', 'environmental_impact', 'international_appeal']
+    },
+    'BE': {
+        'urban_density': 'medium',
+        'charging_infrastructure': 'good',
+        'environmental_consciousness': 'high',
+        'luxury_market': 'medium',
+        'preferences': ['reliability', 'practicality', 'value']
+    }
+}
+
+
+@dataclass(frozen=True)
+class Canton:
+    """Reference data and precomputed tax figures for one canton"""
+    code: str
+    name: str
+    vehicle_tax_calculation_method: str
+    vehicle_tax_factor_power: float
+    vehicle_tax_factor_weight: float
+    vehicle_tax_base_fee: float
+    ev_tax_discount: float
+    ev_tax_discount_years: Optional[int]
+    registration_fee: float
+    license_plate_fee: float
+    average_electricity_price_per_kwh: float
+
+    # Base tax = tax_flat + tax_per_kw * power_kw + tax_per_kg * weight_kg
+    tax_flat: float = 0.0
+    tax_per_kw: float = 0.0
+    tax_per_kg: float = 0.0
+    # Discounted fraction of the base tax for ownership years 1..MAX_SCHEDULE_YEARS
+    discount_schedule: Tuple[float, ...] = ()
+    # cumulative_discount[y] = sum of the schedule over the first y years
+    cumulative_discount: Tuple[float, ...] = ()
+    attractiveness_score: int = 0
+    additional_benefits: Tuple[str, ...] = ()
+    regional_profile: Mapping = field(default_factory=lambda: MappingProxyType(DEFAULT_REGIONAL_PROFILE))
+
+    @property
+    def discount_type(self) -> str:
+        return 'permanent' if self.ev_tax_discount_years is None else 'temporary'
+
+    def base_tax(self, power_kw: float, weight_kg: float) -> float:
+        """Annual vehicle tax before EV discounts (works on scalars and NumPy arrays)"""
+        return self.tax_flat + self.tax_per_kw * power_kw + self.tax_per_kg * weight_kg
+
+    def discounted_years(self, years: int) -> float:
+        """Years of full tax waived over an ownership period (discount-weighted)"""
+        years = max(0, int(years))
+        if years <= MAX_SCHEDULE_YEARS:
+            return self.cumulative_discount[years]
+        return self.cumulative_discount[-1] + self.discount_schedule[-1] * (years - MAX_SCHEDULE_YEARS)
+
+    def as_dict(self) -> Dict:
+        return {
+            'code': self.code,
+            'name': self.name,
+            'vehicle_tax_calculation_method': self.vehicle_tax_calculation_method,
+            'vehicle_tax_factor_power': self.vehicle_tax_factor_power,
+            'vehicle_tax_factor_weight': self.vehicle_tax_factor_weight,
+            'vehicle_tax_base_fee': self.vehicle_tax_base_fee,
+            'ev_tax_discount': self.ev_tax_discount,
+            'ev_tax_discount_years': self.ev_tax_discount_years,
+            'registration_fee': self.registration_fee,
+            'license_plate_fee': self.license_plate_fee,
+            'average_electricity_price_per_kwh': self.average_electricity_price_per_kwh
+        }
+
+
+def _tax_coefficients(method: str, power_factor: float, weight_factor: float, base_fee: float):
+    """Express each canton's tax method as flat + per-kW + per-kg coefficients"""
+    if method == 'POWER':
+        return 0.0, power_factor or DEFAULT_POWER_FACTOR, 0.0
+    if method == 'WEIGHT':
+        return 0.0, 0.0, weight_factor or DEFAULT_WEIGHT_FACTOR
+    if method == 'COMBINED':
+        return 0.0, power_factor, weight_factor
+    return base_fee or DEFAULT_FLAT_RATE, 0.0, 0.0
+
+
+def _attractiveness_score(discount: float, years: Optional[int]) -> int:
+    score = discount
+    if years is None:  # Permanent discount gets bonus
+        score += 20
+    elif years >= 5:   # Long-term discount gets smaller bonus
+        score += 10
+    return int(min(score, 100))
+
+
+def build_canton(row: Dict) -> Canton:
+    """Build a Canton with its precomputed values from a seed/DB row"""
+    code = row['abbreviation']
+    method = row['vehicle_tax_calculation_method']
+    discount = float(row['ev_tax_discount'] or 0)
+    discount_years = row['ev_tax_discount_years']
+    discount_years = int(discount_years) if discount_years is not None else None
+
+    tax_flat, tax_per_kw, tax_per_kg = _tax_coefficients(
+        method, float(row['vehicle_tax_factor_power'] or 0),
+        float(row['vehicle_tax_factor_weight'] or 0), float(row['vehicle_tax_base_fee'] or 0)
+    )
+
+    schedule = tuple(
+        discount / 100 if discount_years is None or year <= discount_years else 0.0
+        for year in range(1, MAX_SCHEDULE_YEARS + 1)
+    )
+    cumulative = [0.0]
+    for fraction in schedule:
+        cumulative.append(cumulative[-1] + fraction)
+
+    return Canton(
+        code=code,
+        name=row['name'],
+        vehicle_tax_calculation_method=method,
+        vehicle_tax_factor_power=float(row['vehicle_tax_factor_power'] or 0),
+        vehicle_tax_factor_weight=float(row['vehicle_tax_factor_weight'] or 0),
+        vehicle_tax_base_fee=float(row['vehicle_tax_base_fee'] or 0),
+        ev_tax_discount=discount,
+        ev_tax_discount_years=discount_years,
+        registration_fee=float(row['registration_fee']),
+        license_plate_fee=float(row['license_plate_fee']),
+        average_electricity_price_per_kwh=float(row['average_electricity_price_per_kwh']),
+        tax_flat=tax_flat,
+        tax_per_kw=tax_per_kw,
+        tax_per_kg=tax_per_kg,
+        discount_schedule=schedule,
+        cumulative_discount=tuple(cumulative),
+        attractiveness_score=_attractiveness_score(discount, discount_years),
+        additional_benefits=ADDITIONAL_BENEFITS.get(code, ()),
+        regional_profile=MappingProxyType(REGIONAL_PROFILES.get(code, DEFAULT_REGIONAL_PROFILE))
+    )
+
+
+class CantonTable:
+    """Immutable lookup of all cantons by code, with a content version"""
+
+    def __init__(self, rows: List[Dict]):
+        cantons = [build_canton(row) for row in rows]
+        self._by_code = MappingProxyType({canton.code: canton for canton in cantons})
+        self._by_name = MappingProxyType({canton.name.lower(): canton.code for canton in cantons})
+        self.version = hashlib.sha1(
+            json.dumps(sorted(rows, key=lambda row: row['abbreviation']), sort_keys=True, default=str).encode()
+        ).hexdigest()[:12]
+
+    def __len__(self) -> int:
+        return len(self._by_code)
+
+    def __iter__(self) -> Iterator[Canton]:
+        return iter(self._by_code.values())
+
+    def __contains__(self, code) -> bool:
+        return isinstance(code, str) and code.upper() in self._by_code
+
+    def get(self, code: str) -> Optional[Canton]:
+        return self._by_code.get((code or '').upper())
+
+    def codes(self) -> List[str]:
+        return list(self._by_code)
+
+    def code_for_name(self, name: str) -> Optional[str]:
+        return self._by_name.get((name or '').lower())
+
+
+def _load_rows_from_database(url: str) -> List[Dict]:
+    from sqlalchemy import create_engine, text
+
+    engine = create_engine(url)
+    try:
+        with engine.connect() as connection:
+            result = connection.execute(text(
+                "SELECT name, abbreviation, vehicle_tax_calculation_method, vehicle_tax_factor_power, "
+                "vehicle_tax_factor_weight, vehicle_tax_base_fee, ev_tax_discount, ev_tax_discount_years, "
+                "registration_fee, license_plate_fee, average_electricity_price_per_kwh FROM cantons"
+            ))
+            return [dict(row._mapping) for row in result]
+    finally:
+        engine.dispose()
+
+
+def load_canton_table() -> CantonTable:
+    """Load the canton table from the configured source"""
+    if os.getenv('CANTON_DATA_SOURCE', 'seed').lower() == 'database':
+        try:
+            rows = _load_rows_from_database(os.environ['DATABASE_URL'])
+            if rows:
+                return CantonTable(rows)
+        except Exception as e:
+            logger.warning(f"Loading cantons from database failed, using seed data: {str(e)}")
+    return CantonTable(load_seed_rows(CANTON_SEED_FILE, 'cantons'))
+
+
+_table_lock = threading.Lock()
+_canton_table = load_canton_table()
+
+
+def get_canton_table() -> CantonTable:
+    """The current canton table (loaded once at startup)"""
+    return _canton_table
+
+
+def reload_canton_table() -> CantonTable:
+    """Reload the reference data, e.g. after the cantons table was updated"""
+    global _canton_table
+    with _table_lock:
+        _canton_table = load_canton_table()
+    return _canton_table
@@ -0,0 +1,238 @@
+"""
+Cash-flow Schedule
+==================
+
+Month-by-month ownership cash flows for a TCO parameter set: loan or lease
+payment split into interest and principal, outstanding balance, energy,
+maintenance, insurance and road tax, plus the one-off flows (down payment,
+home charger, balloon) and the resale value at the end.
+
+Products:
+
+- finance: annuity loan over the holding period, optionally with a balloon
+  paid at the end; the car is sold at its residual value
+- lease: the balloon defaults to the residual value (at most the financed
+  amount) and the car is returned at the end instead of paying it (no
+  balloon, no resale)
+- cash: the full price is paid upfront; the car is sold at the end
+
+Payments come from cached annuity growth tables ((1 + r)^k per month count
+and rate), balances and cumulative flows from NumPy cumulative sums, so a
+schedule costs a handful of array operations whatever its length. Schedules
+are exposed as column arrays and as row iterators that can be streamed as
+CSV or NDJSON.
+"""
+
+import csv
+import io
+import json
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, Mapping, Optional, Sequence
+
+import numpy as np
+
+from src.services.canton_reference import MAX_SCHEDULE_YEARS
+from src.services.tco_engine import (
+    BASE_ANNUAL_INSURANCE, EV_ANNUAL_MAINTENANCE, HOME_CHARGER_COST, ICE_ANNUAL_MAINTENANCE, SWISS_CONSTANTS,
+    TcoInputs, compute_tco, pack_tco_inputs
+)
+
+PRODUCTS = ('finance', 'lease', 'cash')
+STREAM_FORMATS = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+VEHICLE_TYPES = ('ev', 'ice')
+SCHEDULE_COLUMNS = (
+    'month', 'year', 'payment', 'interest', 'principal', 'balance', 'energy', 'maintenance', 'insurance',
+    'road_tax', 'one_off', 'resale', 'total', 'cumulative'
+)
+
+
+@lru_cache(maxsize=1024)
+def annuity_growth(monthly_rate: float, months: int) -> np.ndarray:
+    """(1 + r)^k for k = 0..months (read-only, shared between schedules)"""
+    growth = np.power(1.0 + monthly_rate, np.arange(months + 1, dtype=np.float64))
+    growth.flags.writeable = False
+    return growth
+
+
+def payment_plan(principal: float, annual_rate: float, months: int, balloon: float = 0.0) -> Dict[str, np.ndarray]:
+    """Monthly payment, interest, principal and end-of-month balance of an annuity with balloon"""
+    rate = annual_rate / 12
+    if months <= 0 or principal <= 0:
+        zeros = np.zeros(max(months, 0))
+        return {'payment': zeros, 'interest': zeros, 'principal': zeros, 'balance': zeros}
+
+    growth = annuity_growth(rate, months)
+    if rate == 0:
+        payment = (principal - balloon) / months
+        balance = principal - payment * np.arange(1, months + 1)
+    else:
+        # Rounded to the Rappen like calculate_monthly_payment
+        payment = round((principal - balloon / growth[-1]) * rate * growth[-1] / (growth[-1] - 1), 2)
+        balance = principal * growth[1:] - payment * (growth[1:] - 1) / rate
+    balance[-1] = balloon                           # the last payment absorbs the rounding
+    previous = np.concatenate([[principal], balance[:-1]])
+    interest = previous * rate
+    repaid = previous - balance
+    return {'payment': interest + repaid, 'interest': interest, 'principal': repaid, 'balance': balance}
+
+
+def _monthly_road_tax(inputs: TcoInputs, vehicle_type: str, months: int) -> np.ndarray:
+    """Road tax per month; the EV discount schedule applies per ownership year"""
+    year = np.arange(months) // 12
+    if vehicle_type == 'ice':
+        return np.full(months, inputs.ice_road_tax[0] / 12)
+    cantons, row = inputs.cantons, inputs.canton_index[0]
+    cumulative = cantons.cumulative_discount[row]
+    discount = np.where(year < MAX_SCHEDULE_YEARS,
+                        cumulative[np.minimum(year + 1, MAX_SCHEDULE_YEARS)] -
+                        cumulative[np.minimum(year, MAX_SCHEDULE_YEARS)],
+                        cantons.final_discount[row])
+    return inputs.ev_base_road_tax[0] * (1 - discount) / 12
+
+
+def check_balloon(inputs: TcoInputs, vehicle_type: str = 'ev', product: str = 'finance',
+                  balloon: Optional[float] = None) -> None:
+    """Reject an explicit balloon above the financed amount of any parameter set"""
+    if balloon is None or product == 'cash':
+        return
+    price = inputs.purchase_price if vehicle_type == 'ev' else inputs.ice_purchase_price
+    over = np.flatnonzero(balloon > price - inputs.down_payment)
+    if over.size:
+        vehicle = f' of vehicle {over[0]}' if len(price) > 1 else ''
+        raise ValueError(f'balloon cannot exceed the financed amount{vehicle}')
+
+
+def build_schedule(params: Mapping, vehicle_type: str = 'ev', product: str = 'finance',
+                   balloon: Optional[float] = None, include_resale: bool = True) -> Dict:
+    """Column arrays (month 0 = delivery) and a summary for one parameter set"""
+    if vehicle_type not in VEHICLE_TYPES:
+        raise ValueError(f"vehicle_type must be one of {', '.join(VEHICLE_TYPES)}")
+    if product not in PRODUCTS:
+        raise ValueError(f"product must be one of {', '.join(PRODUCTS)}")
+    if balloon is not None and (isinstance(balloon, bool) or not isinstance(balloon, (int, float)) or balloon < 0):
+        raise ValueError('balloon must be a non-negative number')
+
+    inputs = pack_tco_inputs([params])
+    check_balloon(inputs, vehicle_type, product, balloon)
+    result = compute_tco(inputs)
+    ev = vehicle_type == 'ev'
+    months = int(round(float(inputs.years[0]) * 12))
+    price = float(inputs.purchase_price[0] if ev else inputs.ice_purchase_price[0])
+    down_payment = float(inputs.down_payment[0])
+    residual = float(result.ev_residual_value[0] if ev else result.ice_residual_value[0])
+
+    if product == 'cash':
+        down_payment, principal, balloon = price, 0.0, 0.0
+    else:
+        principal = price - down_payment
+        if balloon is None:
+            # A large down payment leaves less to finance than the residual value
+            balloon = max(min(residual, principal), 0.0) if product == 'lease' else 0.0
+        balloon = float(balloon)
+    plan = payment_plan(principal, float(inputs.financing_rate[0]), months, balloon)
+
+    rows = months + 1
+    columns = {name: np.zeros(rows) for name in SCHEDULE_COLUMNS}
+    columns['month'] = np.arange(rows)
+    columns['year'] = np.concatenate([[0], np.arange(months) // 12 + 1])
+    for name in ('payment', 'interest', 'principal', 'balance'):
+        columns[name][1:] = plan[name]
+    columns['balance'][0] = principal
+    annual_energy = float(result.ev_annual_energy_cost[0] if ev else result.ice_annual_fuel_cost[0])
+    columns['energy'][1:] = annual_energy / 12
+    columns['maintenance'][1:] = (EV_ANNUAL_MAINTENANCE if ev else ICE_ANNUAL_MAINTENANCE) / 12
+    columns['insurance'][1:] = BASE_ANNUAL_INSURANCE * (SWISS_CONSTANTS['insurance_factor_ev'] if ev else 1) / 12
+    columns['road_tax'][1:] = _monthly_road_tax(inputs, vehicle_type, months)
+    columns['one_off'][0] = down_payment + (HOME_CHARGER_COST if ev else 0)
+    if product != 'lease':
+        columns['one_off'][-1] += balloon
+        if include_resale:
+            columns['resale'][-1] = -residual
+    columns['total'] = (columns['payment'] + columns['energy'] + columns['maintenance'] + columns['insurance'] +
+                        columns['road_tax'] + columns['one_off'] + columns['resale'])
+    columns['cumulative'] = np.cumsum(columns['total'])
+
+    summary = {
+        'vehicle_type': vehicle_type,
+        'product': product,
+        'months': months,
+        'purchase_price': price,
+        'down_payment': down_payment,
+        'financed_amount': round(principal, 2),
+        'monthly_payment': round(float(plan['payment'][0]), 2) if months and principal > 0 else 0.0,
+        'balloon': round(balloon, 2),
+        'residual_value': round(residual, 2),
+        'total_interest': round(float(plan['interest'].sum()), 2),
+        'total_cash_outflow': round(float(columns['total'].sum() - columns['resale'].sum()), 2),
+        'net_cost': round(float(columns['cumulative'][-1]), 2)
+    }
+    return {'columns': columns, 'summary': summary}
+
+
+def schedule_rows(schedule: Mapping, extra: Optional[Mapping] = None) -> Iterator[Dict]:
+    """Rows of a schedule, amounts rounded to the Rappen"""
+    columns = schedule['columns']
+    values = [columns[name].astype(int).tolist() if name in ('month', 'year')
+              else np.round(columns[name], 2).tolist() for name in SCHEDULE_COLUMNS]
+    for row in zip(*values):
+        yield {**(extra or {}), **dict(zip(SCHEDULE_COLUMNS, row))}
+
+
+def ndjson_lines(rows: Iterable[Mapping]) -> Iterator[str]:
+    """One JSON object per line"""
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def csv_lines(rows: Iterable[Mapping], fieldnames: Sequence[str]) -> Iterator[str]:
+    """CSV text chunks, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(fieldnames), extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() > 16384:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _combined_summary(summaries: Sequence[Mapping]) -> Dict:
+    totals = ('financed_amount', 'total_interest', 'total_cash_outflow', 'net_cost', 'residual_value')
+    return {
+        'schedules': len(summaries),
+        'rows': sum(summary['months'] + 1 for summary in summaries),
+        **{name: round(sum(summary[name] for summary in summaries), 2) for name in totals}
+    }
+
+
+def stream_schedules(parameter_sets: Sequence[Mapping], fmt: str, **options) -> Iterator[str]:
+    """CSV or NDJSON text of many schedules, built one at a time, with a combined summary at the end
+
+    Rows carry the schedule index; CSV ends with a "total" row of the summed
+    amounts, NDJSON with a summary object.
+    """
+    summaries = []
+    sums = dict.fromkeys(SCHEDULE_COLUMNS[2:], 0.0)
+
+    def rows():
+        for index, params in enumerate(parameter_sets):
+            schedule = build_schedule(params, **options)
+            summaries.append(schedule['summary'])
+            for name in sums:
+                if name not in ('balance', 'cumulative'):
+                    sums[name] += float(schedule['columns'][name].sum())
+            yield from schedule_rows(schedule, {'schedule': index})
+
+    if fmt == 'ndjson':
+        yield from ndjson_lines(rows())
+        yield json.dumps({'summary': _combined_summary(summaries)}) + '\n'
+    else:
+        fieldnames = ('schedule',) + SCHEDULE_COLUMNS
+        yield from csv_lines(rows(), fieldnames)
+        total_row = {'schedule': 'total', **{name: round(value, 2) for name, value in sums.items()
+                                             if name not in ('balance', 'cumulative')}}
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=list(fieldnames)).writerow(total_row)
+        yield buffer.getvalue()
@@ -0,0 +1,392 @@
+"""
+Charging Station Store
+======================
+
+Columnar in-memory representation of Swiss EV charging stations.
+
+Stations are held as NumPy arrays (coordinates, power, connector counts) plus a
+packed connector table and an interned string pool for operators, cantons and
+other repeated values. Filters run as vectorized masks and station dicts are
+only materialized for the rows that are actually returned.
+"""
+
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.services.route_corridor import match_corridor
+
+FAST_CHARGING_THRESHOLD_KW = 50
+EARTH_RADIUS_KM = 6371.0
+
+# Spatial grid index: cells of GRID_CELL_DEGREES, keyed row-major over the globe
+GRID_CELL_DEGREES = 0.1
+GRID_COLUMNS = int(360 / GRID_CELL_DEGREES)
+
+# Optional string-valued station fields, stored as codes into the string pool
+STRING_FIELDS = (
+    'id', 'name', 'address', 'canton', 'city', 'operator', 'pricing',
+    'amenities', 'payment_methods', 'network', 'status', 'source',
+    'last_updated', 'note', 'sources'
+)
+
+# Fields whose values are lists in the station dict (interned as tuples)
+LIST_FIELDS = ('amenities', 'payment_methods', 'sources')
+
+# Low-cardinality fields used by the string filters
+FILTER_FIELDS = ('canton', 'city', 'operator')
+
+
+class _StringPool:
+    """Intern table mapping repeated values to int32 codes
+
+    While loading, values live in a dict for deduplication. ``freeze`` then packs
+    all strings into a single UTF-8 buffer with an offset array, so a loaded pool
+    costs a few bytes per distinct string instead of a Python object each.
+    """
+
+    def __init__(self):
+        self._values: List = []
+        self._codes: Dict = {}
+        self._buffer = b''
+        self._offsets = np.zeros(1, dtype=np.int32)
+        self._objects: Dict[int, tuple] = {}
+
+    def intern(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._values)
+            self._codes[value] = code
+            self._values.append(value)
+        return code
+
+    def freeze(self) -> None:
+        """Pack the interned strings into one buffer and drop the lookup dict"""
+        encoded = []
+        for code, value in enumerate(self._values):
+            if isinstance(value, str):
+                encoded.append(value.encode('utf-8'))
+            else:
+                self._objects[code] = value
+                encoded.append(b'')
+        self._buffer = b''.join(encoded)
+        self._offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+        np.cumsum([len(item) for item in encoded], out=self._offsets[1:])
+        self._values = []
+        self._codes = None
+
+    def get(self, code: int):
+        """Return the value for a code (strings are decoded on demand)"""
+        value = self._objects.get(code)
+        if value is not None:
+            return value
+        return self._buffer[self._offsets[code]:self._offsets[code + 1]].decode('utf-8')
+
+    def nbytes(self) -> int:
+        return (sys.getsizeof(self._buffer) + self._offsets.nbytes +
+                sum(sys.getsizeof(value) for value in self._objects.values()))
+
+
+class _Columns:
+    """Immutable snapshot of the station columns"""
+
+    def __init__(self, pool: _StringPool, size: int, connector_size: int):
+        self.pool = pool
+        self.size = size
+
+        self.lat = np.full(size, np.nan, dtype=np.float32)
+        self.lng = np.full(size, np.nan, dtype=np.float32)
+        self.max_power_kw = np.zeros(size, dtype=np.float32)
+        self.min_power_kw = np.zeros(size, dtype=np.float32)
+        self.connector_count = np.zeros(size, dtype=np.uint16)
+        self.available_count = np.zeros(size, dtype=np.uint16)
+        self.open_24_7 = np.full(size, -1, dtype=np.int8)
+        self.strings = {field: np.full(size, -1, dtype=np.int32) for field in STRING_FIELDS}
+        self.distinct = {field: np.empty(0, dtype=np.int32) for field in FILTER_FIELDS}
+
+        # Packed connector table (CSR layout, station i owns offsets[i]:offsets[i+1])
+        self.connector_offsets = np.zeros(size + 1, dtype=np.int32)
+        self.connector_type = np.full(connector_size, -1, dtype=np.int32)
+        self.connector_power_kw = np.zeros(connector_size, dtype=np.float32)
+        self.connector_available = np.zeros(connector_size, dtype=np.bool_)
+        self.connector_id = np.full(connector_size, -1, dtype=np.int32)
+
+        # Grid index: station indices sorted by grid cell key
+        self.grid_keys = np.empty(0, dtype=np.int64)
+        self.grid_index = np.empty(0, dtype=np.int32)
+
+    def nbytes(self) -> int:
+        arrays = [
+            self.lat, self.lng, self.max_power_kw, self.min_power_kw,
+            self.connector_count, self.available_count, self.open_24_7,
+            self.connector_offsets, self.connector_type, self.connector_power_kw,
+            self.connector_available, self.connector_id, self.grid_keys, self.grid_index
+        ]
+        arrays.extend(self.strings.values())
+        return sum(array.nbytes for array in arrays)
+
+
+class ChargingStationStore:
+    """Columnar charging station store with vectorized filtering"""
+
+    def __init__(self, stations: Optional[Iterable[Dict]] = None):
+        self._lock = threading.Lock()
+        self._columns = _Columns(_StringPool(), 0, 0)
+        self.version = 0
+        self.source = None
+        if stations is not None:
+            self.load(stations)
+
+    def __len__(self) -> int:
+        return self._columns.size
+
+    def load(self, stations: Iterable[Dict], source: Optional[str] = None) -> None:
+        """Replace the store contents with the given station dicts"""
+        stations = list(stations)
+        connectors = [station.get('charging_points') or [] for station in stations]
+        columns = _Columns(_StringPool(), len(stations), sum(len(c) for c in connectors))
+        pool = columns.pool
+
+        offset = 0
+        for i, (station, points) in enumerate(zip(stations, connectors)):
+            coordinates = station.get('coordinates') or {}
+            if coordinates.get('lat') is not None and coordinates.get('lng') is not None:
+                columns.lat[i] = coordinates['lat']
+                columns.lng[i] = coordinates['lng']
+
+            for field in STRING_FIELDS:
+                value = station.get(field)
+                if value is None:
+                    continue
+                if field in LIST_FIELDS:
+                    value = tuple(value)
+                columns.strings[field][i] = pool.intern(value)
+
+            if '24_7' in station:
+                columns.open_24_7[i] = 1 if station['24_7'] else 0
+
+            columns.connector_offsets[i] = offset
+            for point in points:
+                power = point.get('power_kw', 0) or 0
+                columns.connector_type[offset] = pool.intern(point.get('type', ''))
+                columns.connector_power_kw[offset] = power
+                columns.connector_available[offset] = bool(point.get('available', False))
+                if point.get('connector_id') is not None:
+                    columns.connector_id[offset] = pool.intern(str(point['connector_id']))
+                offset += 1
+
+        columns.connector_offsets[len(stations)] = offset
+        pool.freeze()
+        for field in FILTER_FIELDS:
+            codes = columns.strings[field]
+            columns.distinct[field] = np.unique(codes[codes >= 0])
+        counts = np.diff(columns.connector_offsets)
+        columns.connector_count[:] = counts
+        if offset:
+            starts = columns.connector_offsets[:-1][counts > 0]
+            has_points = counts > 0
+            columns.max_power_kw[has_points] = np.maximum.reduceat(columns.connector_power_kw, starts)
+            columns.min_power_kw[has_points] = np.minimum.reduceat(columns.connector_power_kw, starts)
+            columns.available_count[has_points] = np.add.reduceat(
+                columns.connector_available.astype(np.uint16), starts
+            )
+
+        located = np.flatnonzero(~np.isnan(columns.lat))
+        keys = _grid_keys(columns.lat[located], columns.lng[located])
+        order = np.argsort(keys, kind='stable')
+        columns.grid_keys = keys[order]
+        columns.grid_index = located[order].astype(np.int32)
+
+        with self._lock:
+            self._columns = columns
+            self.source = source
+            self.version += 1
+
+    def query(self, canton: str = '', city: str = '', charging_type: str = '',
+              power_min: float = 0, available_only: bool = False,
+              lat: Optional[float] = None, lng: Optional[float] = None,
+              radius_km: Optional[float] = None) -> List[Dict]:
+        """Filter the store and materialize matching stations, nearest first when located"""
+        columns = self._columns
+        mask = self._filter_mask(columns, canton, city, charging_type, power_min, available_only)
+        indices = np.flatnonzero(mask)
+
+        if lat is None or lng is None:
+            return self._materialize(columns, indices)
+
+        distances = self._distances_km(columns, lat, lng, indices)
+        located = ~np.isnan(distances)
+        if radius_km is not None:
+            # Stations without coordinates are kept, as they cannot be ruled out
+            keep = ~located | (distances <= radius_km)
+            indices, distances, located = indices[keep], distances[keep], located[keep]
+
+        order = np.argsort(np.where(located, distances, np.inf), kind='stable')
+        stations = self._materialize(columns, indices[order])
+        for station, distance, has_location in zip(stations, distances[order], located[order]):
+            if has_location:
+                station['distance_km'] = round(float(distance), 1)
+        return stations
+
+    def query_corridor(self, polyline, width_km: float, canton: str = '', city: str = '',
+                       charging_type: str = '', power_min: float = 0,
+                       available_only: bool = False) -> List[Dict]:
+        """Stations within ``width_km`` of a route polyline, ordered along the route"""
+        columns = self._columns
+        indices, offsets, along = match_corridor(
+            polyline, width_km,
+            lambda *bbox: self._bbox_indices(columns, *bbox),
+            columns.lat, columns.lng
+        )
+
+        mask = self._filter_mask(columns, canton, city, charging_type, power_min, available_only)
+        keep = mask[indices]
+        indices, offsets, along = indices[keep], offsets[keep], along[keep]
+
+        order = np.argsort(along, kind='stable')
+        stations = self._materialize(columns, indices[order])
+        for station, offset, position in zip(stations, offsets[order], along[order]):
+            station['distance_from_route_km'] = round(float(offset), 1)
+            station['distance_along_route_km'] = round(float(position), 1)
+        return stations
+
+    def filter_mask(self, canton: str = '', city: str = '', charging_type: str = '',
+                    power_min: float = 0, available_only: bool = False) -> np.ndarray:
+        """Build a boolean mask of stations matching the given filters"""
+        return self._filter_mask(self._columns, canton, city, charging_type, power_min, available_only)
+
+    def materialize(self, indices: Iterable[int]) -> List[Dict]:
+        """Build station dicts for the selected rows only"""
+        return self._materialize(self._columns, indices)
+
+    def snapshot(self) -> _Columns:
+        """Current column snapshot (replaced, never mutated, on reload)"""
+        return self._columns
+
+    def station_id(self, index: int, columns: Optional[_Columns] = None) -> Optional[str]:
+        """Station id of a row without materializing the whole station"""
+        columns = columns or self._columns
+        code = columns.strings['id'][index]
+        return columns.pool.get(code) if code >= 0 else None
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the columns and the string pool"""
+        columns = self._columns
+        return columns.nbytes() + columns.pool.nbytes()
+
+    @classmethod
+    def _filter_mask(cls, columns: _Columns, canton: str, city: str, charging_type: str,
+                     power_min: float, available_only: bool) -> np.ndarray:
+        mask = np.ones(columns.size, dtype=np.bool_)
+
+        if canton:
+            mask &= cls._string_match(columns, 'canton', lambda s: s.lower() == canton.lower())
+        if city:
+            mask &= cls._string_match(columns, 'city', lambda s: city.lower() in s.lower())
+
+        if power_min > 0:
+            mask &= columns.max_power_kw >= power_min
+
+        if charging_type and charging_type != 'all':
+            has_points = columns.connector_count > 0
+            if charging_type == 'fast':
+                mask &= has_points & (columns.max_power_kw >= FAST_CHARGING_THRESHOLD_KW)
+            elif charging_type == 'normal':
+                mask &= has_points & (columns.min_power_kw < FAST_CHARGING_THRESHOLD_KW)
+            elif charging_type == 'tesla':
+                mask &= cls._string_match(columns, 'operator', lambda s: 'tesla' in s.lower())
+
+        if available_only:
+            mask &= columns.available_count > 0
+
+        return mask
+
+    @staticmethod
+    def _bbox_indices(columns: _Columns, min_lat: float, min_lng: float,
+                      max_lat: float, max_lng: float) -> np.ndarray:
+        """Stations inside a bounding box, looked up through the grid index"""
+        if not len(columns.grid_keys):
+            return np.empty(0, dtype=np.int64)
+
+        row_min, col_min = _grid_cell(min_lat, min_lng)
+        row_max, col_max = _grid_cell(max_lat, max_lng)
+        rows = np.arange(row_min, row_max + 1, dtype=np.int64)
+        starts = np.searchsorted(columns.grid_keys, rows * GRID_COLUMNS + col_min, side='left')
+        stops = np.searchsorted(columns.grid_keys, rows * GRID_COLUMNS + col_max, side='right')
+
+        candidates = np.concatenate([columns.grid_index[a:b] for a, b in zip(starts, stops)])
+        lat, lng = columns.lat[candidates], columns.lng[candidates]
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lng >= min_lng) & (lng <= max_lng)
+        return candidates[inside].astype(np.int64)
+
+    @staticmethod
+    def _distances_km(columns: _Columns, lat: float, lng: float, indices: np.ndarray) -> np.ndarray:
+        """Haversine distance from a point to the selected stations (NaN without coordinates)"""
+        station_lat = np.radians(columns.lat[indices].astype(np.float64))
+        station_lng = np.radians(columns.lng[indices].astype(np.float64))
+        lat_rad = np.radians(lat)
+
+        a = (np.sin((station_lat - lat_rad) / 2) ** 2 +
+             np.cos(lat_rad) * np.cos(station_lat) * np.sin((station_lng - np.radians(lng)) / 2) ** 2)
+        return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    @staticmethod
+    def _materialize(columns: _Columns, indices: Iterable[int]) -> List[Dict]:
+        pool = columns.pool
+        stations = []
+
+        for i in indices:
+            station = {}
+            for field in STRING_FIELDS:
+                code = columns.strings[field][i]
+                if code >= 0:
+                    value = pool.get(code)
+                    station[field] = list(value) if field in LIST_FIELDS else value
+
+            if np.isnan(columns.lat[i]):
+                station['coordinates'] = {'lat': None, 'lng': None}
+            else:
+                station['coordinates'] = {
+                    'lat': round(float(columns.lat[i]), 6),
+                    'lng': round(float(columns.lng[i]), 6)
+                }
+
+            charging_points = []
+            for j in range(columns.connector_offsets[i], columns.connector_offsets[i + 1]):
+                point = {
+                    'type': pool.get(columns.connector_type[j]),
+                    'power_kw': float(columns.connector_power_kw[j]),
+                    'available': bool(columns.connector_available[j])
+                }
+                if columns.connector_id[j] >= 0:
+                    point['connector_id'] = pool.get(columns.connector_id[j])
+                charging_points.append(point)
+            station['charging_points'] = charging_points
+
+            if columns.open_24_7[i] >= 0:
+                station['24_7'] = bool(columns.open_24_7[i])
+
+            stations.append(station)
+
+        return stations
+
+    @staticmethod
+    def _string_match(columns: _Columns, field: str, predicate) -> np.ndarray:
+        """Evaluate a predicate once per distinct value, then broadcast via codes"""
+        pool = columns.pool
+        matching = [code for code in columns.distinct[field].tolist() if predicate(pool.get(code))]
+        return np.isin(columns.strings[field], matching)
+
+
+def _grid_cell(lat, lng):
+    """Grid row/column for coordinates (scalars or arrays)"""
+    row = np.floor((np.asarray(lat, dtype=np.float64) + 90) / GRID_CELL_DEGREES).astype(np.int64)
+    col = np.floor((np.asarray(lng, dtype=np.float64) + 180) / GRID_CELL_DEGREES).astype(np.int64)
+    return row, np.clip(col, 0, GRID_COLUMNS - 1)
+
+
+def _grid_keys(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    row, col = _grid_cell(lat, lng)
+    return row * GRID_COLUMNS + col
@@ -0,0 +1,197 @@
+"""
+Upstream Circuit Breakers
+=========================
+
+Per-upstream circuit breakers for the public Swiss APIs (ZEFIX, OpenPLZ,
+ich-tanke-strom).
+
+A breaker is closed while the upstream answers. After a run of consecutive
+failures (connection errors, timeouts, 5xx) it opens, and calls are rejected
+immediately with CircuitOpenError instead of waiting for the timeout. Once
+the reset timeout has passed it turns half-open and lets a limited number of
+probe calls through: a successful probe closes it again, a failed one re-opens
+it. Independently of the state, each breaker caps the number of calls in flight
+(a bulkhead), so a slow upstream cannot tie up every worker thread before the
+breaker has tripped.
+
+StaleCache keeps the last good answer per query so callers can serve it while
+a breaker is open.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Hashable, Optional, Tuple
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT_SECONDS = 30.0
+HALF_OPEN_MAX_CALLS = 1
+MAX_CONCURRENT_CALLS = 8
+STALE_CACHE_MAX_ENTRIES = 5000
+
+
+class CircuitOpenError(Exception):
+    """The upstream is considered down; the call was not attempted"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit for '{name}' is open, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker with half-open probes and a concurrency cap"""
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD,
+                 reset_timeout: float = RESET_TIMEOUT_SECONDS, half_open_max_calls: int = HALF_OPEN_MAX_CALLS,
+                 max_concurrent_calls: int = MAX_CONCURRENT_CALLS):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.max_concurrent_calls = max_concurrent_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._in_flight = 0
+        self._probes = 0
+        self.stats = {'calls': 0, 'successes': 0, 'failures': 0, 'rejected': 0}
+        self.last_failure: Optional[str] = None
+        self.last_state_change = datetime.utcnow()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def _advance(self) -> None:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state: str) -> None:
+        self._state = state
+        self._probes = 0
+        self.last_state_change = datetime.utcnow()
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CLOSED:
+            self._failures = 0
+
+    def _retry_after(self) -> float:
+        if self._state == OPEN:
+            return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+        return 0.0
+
+    def acquire(self) -> None:
+        """Reserve a call slot or raise CircuitOpenError"""
+        with self._lock:
+            self._advance()
+            if self._state == OPEN:
+                self.stats['rejected'] += 1
+                raise CircuitOpenError(self.name, self._retry_after())
+            if self._state == HALF_OPEN and self._probes >= self.half_open_max_calls:
+                self.stats['rejected'] += 1
+                raise CircuitOpenError(self.name, self.reset_timeout)
+            if self._in_flight >= self.max_concurrent_calls:
+                self.stats['rejected'] += 1
+                raise CircuitOpenError(self.name, 0.0)
+            if self._state == HALF_OPEN:
+                self._probes += 1
+            self._in_flight += 1
+            self.stats['calls'] += 1
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self.stats['successes'] += 1
+            self._failures = 0
+            if self._state != CLOSED:
+                self._transition(CLOSED)
+
+    def record_failure(self, reason: str = '') -> None:
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            self.stats['failures'] += 1
+            self._failures += 1
+            self.last_failure = reason or None
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._transition(OPEN)
+
+    def release(self) -> None:
+        """Give back a slot for a call whose outcome says nothing about the upstream"""
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            self._advance()
+            return {
+                'state': self._state,
+                'consecutive_failures': self._failures,
+                'in_flight': self._in_flight,
+                'retry_after_seconds': round(self._retry_after(), 1),
+                'last_failure': self.last_failure,
+                'last_state_change': self.last_state_change.isoformat(),
+                **self.stats
+            }
+
+
+class CircuitBreakerRegistry:
+    """Breakers by upstream name, created on first use"""
+
+    def __init__(self, **defaults):
+        self.defaults = defaults
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            if name not in self._breakers:
+                self._breakers[name] = CircuitBreaker(name, **self.defaults)
+            return self._breakers[name]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.snapshot() for name, breaker in sorted(breakers.items())}
+
+    def any_open(self) -> bool:
+        return any(breaker.state != CLOSED for breaker in list(self._breakers.values()))
+
+
+class StaleCache:
+    """Bounded LRU of the last good upstream answer per query"""
+
+    def __init__(self, max_entries: int = STALE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[datetime, object]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._entries[key] = (datetime.utcnow(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Tuple[timedelta, object]]:
+        """(age, value) of the last good answer, None if there is none"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return datetime.utcnow() - entry[0], entry[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
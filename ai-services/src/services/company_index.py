@@ -0,0 +1,260 @@
+"""
+Company Name Search Index
+=========================
+
+Local fuzzy search over every company fetched from ZEFIX or bulk-loaded.
+
+Names are folded (case, diacritics and German umlaut spellings, so "Müller",
+"Mueller" and "Muller" match) and stripped of legal forms ("AG", "GmbH",
+"SA", ...). Each folded word is split into boundary-padded trigrams; an
+inverted index maps trigrams to document ids and queries are ranked with
+BM25, with a boost for names that start with the typed text. Records are
+persisted in the company_records table and the index is rebuilt from it on
+first use.
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+import unicodedata
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.models.company import CompanyRecord
+from src.models.user import db
+
+logger = logging.getLogger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+PREFIX_BOOST = 1.5
+COMPANY_REFRESH_AGE = timedelta(days=30)
+COMPACT_DEAD_RATIO = 0.2
+
+LEGAL_FORMS = {
+    'ag', 'gmbh', 'sa', 'sarl', 'sagl', 'srl', 'kg', 'klg', 'co', 'cie', 'ltd', 'inc', 'llc', 'plc',
+    'se', 'spa', 'gesmbh', 'genossenschaft', 'cooperative', 'stiftung', 'fondation', 'verein', 'association',
+}
+
+_UMLAUT_SPELLINGS = re.compile(r'(?<=[a-z])(ae|oe|ue)')
+_COMPOUND_LEGAL_FORMS = re.compile(r'\bsa ?rl\b|\bs ?a ?g ?l\b')
+
+
+def fold_text(text: str) -> str:
+    """Lowercase, strip diacritics and fold ae/oe/ue spellings to their vowel"""
+    text = unicodedata.normalize('NFKD', text or '').casefold()
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = text.replace('ß', 'ss').replace('.', '')
+    text = re.sub(r'[^0-9a-z]+', ' ', text)
+    return _UMLAUT_SPELLINGS.sub(lambda match: match.group(1)[0], text)
+
+
+def fold_company_name(name: str) -> List[str]:
+    """Folded words of a company name without legal-form tokens"""
+    words = _COMPOUND_LEGAL_FORMS.sub(' ', fold_text(name)).split()
+    stripped = [word for word in words if word not in LEGAL_FORMS]
+    return stripped or words
+
+
+def name_grams(words: Iterable[str]) -> List[str]:
+    """Boundary-padded trigrams plus a one-letter prefix gram per word"""
+    grams = []
+    for word in words:
+        padded = f'${word}$'
+        grams.append(padded[:2])
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class CompanySearchIndex:
+    """Trigram inverted index with BM25 ranking"""
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self._records: List[Optional[Dict]] = []
+        self._folded: List[str] = []
+        self._lengths = array('f')
+        self._alive = array('b')
+        self._postings: Dict[str, array] = {}
+        self._doc_by_uid: Dict[str, int] = {}
+        self._total_length = 0.0
+        self._dead = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_by_uid)
+
+    def __contains__(self, uid) -> bool:
+        return uid in self._doc_by_uid
+
+    def add(self, company: Dict) -> None:
+        """Add or replace a company (keyed by UID)"""
+        with self._lock:
+            self._add(company)
+
+    def _add(self, company: Dict) -> None:
+        uid = company.get('uid') or company.get('name', '')
+        previous = self._doc_by_uid.get(uid)
+        words = fold_company_name(company.get('name', ''))
+        folded = ' '.join(words)
+
+        if previous is not None:
+            if self._folded[previous] == folded:
+                self._records[previous] = company
+                return
+            self._remove(previous)
+
+        doc = len(self._records)
+        grams = name_grams(words)
+        self._records.append(company)
+        self._folded.append(folded)
+        self._lengths.append(len(grams))
+        self._alive.append(1)
+        self._total_length += len(grams)
+        self._doc_by_uid[uid] = doc
+        for gram in grams:
+            self._postings.setdefault(gram, array('i')).append(doc)
+
+        if self._dead > COMPACT_DEAD_RATIO * max(len(self._records), 1):
+            self._compact()
+
+    def _remove(self, doc: int) -> None:
+        self._records[doc] = None
+        self._alive[doc] = 0
+        self._total_length -= self._lengths[doc]
+        self._dead += 1
+
+    def _compact(self) -> None:
+        records = [record for record in self._records if record is not None]
+        self._clear()
+        for record in records:
+            self._add(record)
+
+    def get(self, uid: str) -> Optional[Dict]:
+        doc = self._doc_by_uid.get(uid)
+        return self._records[doc] if doc is not None else None
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """Best matching companies with their relevance score"""
+        words = fold_company_name(query)
+        with self._lock:
+            if not words or not self._doc_by_uid:
+                return []
+            return self._search(words, limit)
+
+    def _search(self, words: List[str], limit: int) -> List[Dict]:
+
+        doc_count = len(self._records)
+        live = len(self._doc_by_uid)
+        lengths = np.frombuffer(self._lengths, dtype=np.float32)
+        average_length = self._total_length / live
+        scores = np.zeros(doc_count)
+
+        for gram, query_tf in Counter(name_grams(words)).items():
+            postings = self._postings.get(gram)
+            if postings is None:
+                continue
+            docs, tf = np.unique(np.frombuffer(postings, dtype=np.int32), return_counts=True)
+            idf = math.log(1 + (live - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / average_length)
+            scores[docs] += query_tf * idf * tf * (self.k1 + 1) / (tf + norm)
+
+        if self._dead:
+            scores *= np.frombuffer(self._alive, dtype=np.int8)
+
+        # Re-rank a shortlist with the typeahead prefix boost
+        shortlist_size = min(doc_count, limit * 5)
+        shortlist = np.argpartition(-scores, shortlist_size - 1)[:shortlist_size]
+        prefix = ' '.join(words)
+        ranked = []
+        for doc in shortlist:
+            if scores[doc] <= 0:
+                continue
+            score = scores[doc] * (PREFIX_BOOST if self._folded[doc].startswith(prefix) else 1.0)
+            ranked.append((score, int(doc)))
+        ranked.sort(key=lambda item: (-item[0], self._folded[item[1]]))
+
+        return [{**self._records[doc], 'match_score': round(score, 3)} for score, doc in ranked[:limit]]
+
+
+class CompanyDirectory:
+    """Persisted company records with the search index built on top"""
+
+    def __init__(self):
+        self.index = CompanySearchIndex()
+        self._fetched_at: Dict[str, datetime] = {}
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def ensure_loaded(self) -> None:
+        """Build the index from the company_records table (once per process)"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for record in CompanyRecord.query.all():
+                self.index.add(record.to_dict())
+                self._fetched_at[record.uid] = record.fetched_at
+            self._loaded = True
+
+    def store(self, companies: Iterable[Dict]) -> int:
+        """Persist companies and add them to the index"""
+        now = datetime.utcnow()
+        count = 0
+        with self._lock:
+            for company in companies:
+                uid = company.get('uid')
+                if not uid or not company.get('name'):
+                    continue
+                db.session.merge(CompanyRecord(
+                    uid=uid, name=company['name'][:255], data=json.dumps(company), fetched_at=now
+                ))
+                self.index.add(company)
+                self._fetched_at[uid] = now
+                count += 1
+            db.session.commit()
+        return count
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        self.ensure_loaded()
+        return self.index.search(query, limit)
+
+    def is_stale(self, companies: List[Dict]) -> bool:
+        """Whether a result set needs an upstream refresh (empty or outdated)"""
+        if not companies:
+            return True
+        oldest = min(self._fetched_at.get(company.get('uid'), datetime.min) for company in companies)
+        return datetime.utcnow() - oldest > COMPANY_REFRESH_AGE
+
+    def refresh_in_background(self, app, query: str, fetch: Callable[[str], List[Dict]]) -> bool:
+        """Fetch a query from upstream without blocking the caller; False if already running"""
+        key = ' '.join(fold_company_name(query))
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                with app.app_context():
+                    self.store(fetch(query))
+            except Exception as e:
+                logger.warning(f"Company index refresh for '{query}' failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, daemon=True).start()
+        return True
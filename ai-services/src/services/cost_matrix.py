@@ -0,0 +1,178 @@
+"""
+Canton Cost Matrix
+==================
+
+Vectorized EV ownership cost kernel across cantons, vehicles, annual mileages
+and ownership horizons.
+
+All canton coefficients are laid out as arrays, so the total cost, tax savings
+and energy cost for every canton × vehicle × mileage × horizon combination are
+computed in one broadcast pass. The same kernel backs single-canton incentive
+calculations (a 1×1×1×1 matrix) and the dealer heatmap (the full tensor).
+"""
+
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.services.canton_reference import MAX_SCHEDULE_YEARS, CantonTable
+from src.services.seed_data import load_seed_rows
+
+VEHICLE_SEED_FILE = '02_vehicles.sql'
+MAX_MATRIX_CACHE_ENTRIES = 32
+
+
+@dataclass(frozen=True)
+class VehicleSpec:
+    """The vehicle inputs the cost kernel needs"""
+    model: str
+    purchase_price: float
+    power_kw: float
+    weight_kg: float
+    efficiency_kwh_100km: float
+
+
+def load_vehicle_catalog() -> Tuple[VehicleSpec, ...]:
+    """Active vehicle variants from database/seeds/02_vehicles.sql"""
+    return tuple(
+        VehicleSpec(
+            model=f"{row['model_name']} {row['model_variant']}",
+            purchase_price=float(row['base_price_chf']),
+            power_kw=float(row['power_kw']),
+            weight_kg=float(row['weight_kg']),
+            efficiency_kwh_100km=float(row['energy_consumption_kwh_100km'])
+        )
+        for row in load_seed_rows(VEHICLE_SEED_FILE, 'vehicles')
+        if row.get('is_active', True)
+    )
+
+
+class CantonArrays:
+    """Canton coefficients of a CantonTable as aligned NumPy arrays"""
+
+    def __init__(self, cantons: Sequence, electricity_prices: Optional[Sequence[float]] = None):
+        self.cantons = tuple(cantons)
+        self.codes = [canton.code for canton in self.cantons]
+        column = lambda name: np.array([getattr(canton, name) for canton in self.cantons], dtype=np.float64)
+
+        self.tax_flat = column('tax_flat')
+        self.tax_per_kw = column('tax_per_kw')
+        self.tax_per_kg = column('tax_per_kg')
+        self.discount = column('ev_tax_discount') / 100
+        self.registration_fee = column('registration_fee')
+        self.license_plate_fee = column('license_plate_fee')
+        # Canton averages unless more specific (e.g. commune) prices are given
+        self.electricity_price = (np.asarray(electricity_prices, dtype=np.float64) if electricity_prices is not None
+                                  else column('average_electricity_price_per_kwh'))
+        self.cumulative_discount = np.array(
+            [canton.cumulative_discount for canton in self.cantons], dtype=np.float64
+        ).reshape(len(self.cantons), MAX_SCHEDULE_YEARS + 1)
+        self.final_discount = np.array(
+            [canton.discount_schedule[-1] if canton.discount_schedule else 0.0 for canton in self.cantons]
+        )
+
+    def discounted_years(self, years: np.ndarray) -> np.ndarray:
+        """(canton, horizon) discount-weighted years of waived tax"""
+        years = np.maximum(years.astype(np.int64), 0)
+        within = np.minimum(years, MAX_SCHEDULE_YEARS)
+        beyond = np.maximum(years - MAX_SCHEDULE_YEARS, 0)
+        return self.cumulative_discount[:, within] + self.final_discount[:, None] * beyond[None, :]
+
+
+@dataclass
+class CostMatrix:
+    """Kernel output; cost arrays are indexed [canton, vehicle, mileage, horizon]"""
+    cantons: List[str]
+    mileages: np.ndarray
+    years: np.ndarray
+    base_annual_tax: np.ndarray      # (canton, vehicle)
+    annual_tax_saving: np.ndarray    # (canton, vehicle)
+    annual_energy_kwh: np.ndarray    # (vehicle, mileage)
+    annual_energy_cost: np.ndarray   # (canton, vehicle, mileage)
+    initial_cost: np.ndarray         # (canton, vehicle)
+    tax_savings: np.ndarray          # (canton, vehicle, 1, horizon)
+    energy_cost: np.ndarray          # (canton, vehicle, mileage, horizon)
+    total_cost: np.ndarray           # (canton, vehicle, mileage, horizon)
+
+    def best_canton(self) -> np.ndarray:
+        """Index of the cheapest canton per (vehicle, mileage, horizon)"""
+        return self.total_cost.argmin(axis=0)
+
+
+def compute_cost_matrix(cantons: CantonArrays, vehicles: Sequence[VehicleSpec],
+                        mileages: Sequence[float], years: Sequence[int]) -> CostMatrix:
+    """Compute every canton × vehicle × mileage × horizon cost in one pass"""
+    mileages = np.asarray(mileages, dtype=np.float64)
+    years = np.asarray(years, dtype=np.int64)
+    price = np.array([v.purchase_price for v in vehicles], dtype=np.float64)
+    power = np.array([v.power_kw for v in vehicles], dtype=np.float64)
+    weight = np.array([v.weight_kg for v in vehicles], dtype=np.float64)
+    efficiency = np.array([v.efficiency_kwh_100km for v in vehicles], dtype=np.float64)
+
+    base_tax = (cantons.tax_flat[:, None] + cantons.tax_per_kw[:, None] * power[None, :] +
+                cantons.tax_per_kg[:, None] * weight[None, :])
+    annual_tax_saving = base_tax * cantons.discount[:, None]
+
+    tax_savings = base_tax[:, :, None] * cantons.discounted_years(years)[:, None, :]
+    tax_cost = base_tax[:, :, None] * years[None, None, :] - tax_savings
+
+    annual_energy_kwh = mileages[None, :] / 100 * efficiency[:, None]
+    annual_energy_cost = annual_energy_kwh[None, :, :] * cantons.electricity_price[:, None, None]
+    energy_cost = annual_energy_cost[..., None] * years[None, None, None, :]
+
+    initial_cost = price[None, :] + (cantons.registration_fee + cantons.license_plate_fee)[:, None]
+    total_cost = initial_cost[:, :, None, None] + tax_cost[:, :, None, :] + energy_cost
+
+    return CostMatrix(
+        cantons=list(cantons.codes),
+        mileages=mileages,
+        years=years,
+        base_annual_tax=base_tax,
+        annual_tax_saving=annual_tax_saving,
+        annual_energy_kwh=annual_energy_kwh,
+        annual_energy_cost=annual_energy_cost,
+        initial_cost=initial_cost,
+        tax_savings=tax_savings[:, :, None, :],
+        energy_cost=energy_cost,
+        total_cost=total_cost
+    )
+
+
+class CostMatrixCache:
+    """Full-catalog cost matrices, kept until the canton table or catalog changes"""
+
+    def __init__(self, max_entries: int = MAX_MATRIX_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: Dict[Tuple, Dict] = {}
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def version(table: CantonTable, vehicles: Sequence[VehicleSpec]) -> str:
+        catalog = hashlib.sha1(json.dumps([list(v.__dict__.values()) for v in vehicles]).encode()).hexdigest()[:12]
+        return f'{table.version}-{catalog}'
+
+    def get(self, table: CantonTable, vehicles: Sequence[VehicleSpec],
+            mileages: Tuple[float, ...], years: Tuple[int, ...], build) -> Tuple[Dict, bool]:
+        """Return (entry, cache_hit); ``build(table, vehicles, mileages, years)`` fills misses"""
+        version = self.version(table, vehicles)
+        key = (mileages, years)
+        with self._lock:
+            if self._version != version:
+                self._entries.clear()
+                self._version = version
+            entry = self._entries.get(key)
+        if entry is not None:
+            return entry, True
+
+        entry = build(table, vehicles, mileages, years)
+        with self._lock:
+            if self._version == version:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key] = entry
+        return entry, False
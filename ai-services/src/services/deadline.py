@@ -0,0 +1,134 @@
+"""
+Request Deadlines
+=================
+
+A request-scoped time budget shared by every outbound call a request makes.
+
+The deadline is set when a request starts, either from the caller's
+X-Request-Timeout-Ms header (or Envoy's x-envoy-expected-rq-timeout-ms) or
+from a per-route default. It is kept in a context variable, so helpers and
+the AI providers can ask for the remaining budget without passing it
+around. call_timeout() returns the per-call timeout capped to what is left
+and raises DeadlineExceeded once the budget is spent, so callers can fall
+back immediately instead of pinning a worker for a client that has already
+given up.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Optional
+
+DEADLINE_HEADERS = ('X-Request-Timeout-Ms', 'x-envoy-expected-rq-timeout-ms')
+DEFAULT_REQUEST_BUDGET_SECONDS = 9.0
+MAX_REQUEST_BUDGET_SECONDS = 120.0
+# Below this a network call cannot complete in time, so it is not started
+MIN_CALL_BUDGET_SECONDS = 0.05
+
+# Blueprint or endpoint name -> budget in seconds (endpoint entries win)
+ROUTE_BUDGETS: Dict[str, float] = {
+    'swiss_data': 9.0,                           # backend calls us with a 10 s timeout
+    'swiss_data.compare_ev_incentives': 18.0,    # backend allows twice the default
+    'ai_services': 60.0,
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget is spent"""
+
+
+class Deadline:
+    """Absolute point in (monotonic) time by which a request must finish"""
+
+    def __init__(self, budget_seconds: float):
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() < MIN_CALL_BUDGET_SECONDS
+
+    def timeout(self, default: float) -> float:
+        """Per-call timeout capped to the remaining budget"""
+        remaining = self.remaining()
+        if remaining < MIN_CALL_BUDGET_SECONDS:
+            raise DeadlineExceeded(f'Request deadline of {self.budget:.1f}s exceeded')
+        return min(default, remaining)
+
+
+_current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar('request_deadline', default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def call_timeout(default: float) -> float:
+    """Timeout for one outbound call: the default, capped to the request's remaining budget"""
+    deadline = _current_deadline.get()
+    return deadline.timeout(default) if deadline else default
+
+
+def deadline_expired() -> bool:
+    deadline = _current_deadline.get()
+    return bool(deadline and deadline.expired)
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]):
+    """Make a deadline current for the enclosed code"""
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def propagate_deadline(function: Callable) -> Callable:
+    """Bind the caller's deadline to a function that will run on a worker thread"""
+    deadline = _current_deadline.get()
+
+    @wraps(function)
+    def run(*args, **kwargs):
+        with deadline_scope(deadline):
+            return function(*args, **kwargs)
+    return run
+
+
+def budget_from_headers(headers, default: float) -> float:
+    """Requested budget in seconds, falling back to the route default"""
+    for header in DEADLINE_HEADERS:
+        value = headers.get(header)
+        if value:
+            try:
+                return min(max(float(value) / 1000, 0.0), MAX_REQUEST_BUDGET_SECONDS)
+            except ValueError:
+                continue
+    return default
+
+
+def route_budget(endpoint: Optional[str]) -> float:
+    if endpoint in ROUTE_BUDGETS:
+        return ROUTE_BUDGETS[endpoint]
+    blueprint = (endpoint or '').rsplit('.', 1)[0]
+    return ROUTE_BUDGETS.get(blueprint, DEFAULT_REQUEST_BUDGET_SECONDS)
+
+
+def init_request_deadlines(app) -> None:
+    """Start a deadline for every request handled by a Flask app"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_deadline():
+        budget = budget_from_headers(request.headers, route_budget(request.endpoint))
+        g.deadline_token = _current_deadline.set(Deadline(budget))
+
+    @app.teardown_request
+    def _end_deadline(exception=None):
+        token = g.pop('deadline_token', None)
+        if token is not None:
+            _current_deadline.reset(token)
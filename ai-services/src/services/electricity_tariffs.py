@@ -0,0 +1,239 @@
+"""
+Electricity Tariffs
+===================
+
+Municipality-level household electricity prices (ElCom) for energy cost
+calculations, replacing the canton and national averages where a customer's
+postal code or commune is known.
+
+Tariffs are read from CSV files in TARIFF_DATA_DIR (or database/tariffs):
+
+    tariffs.csv       columns: bfs_number, commune, canton, operator, category,
+                      year, total_rp_per_kwh   (ElCom tariff export)
+    postal_codes.csv  columns: postal_code, bfs_number   (locality directory)
+
+Only the latest year per commune is kept; communes served by several
+operators get the mean of their tariffs. Prices live in a float array indexed
+by BFS commune number and postal codes map to communes through an int array
+indexed by the code itself, so a lookup is two array reads.
+
+refresh_tariff_table() downloads a new tariffs.csv from ELCOM_TARIFF_URL,
+replaces the file atomically and swaps the in-memory table;
+start_tariff_refresh() runs it periodically in a daemon thread.
+"""
+
+import csv
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+TARIFF_DATA_DIR_ENV = 'TARIFF_DATA_DIR'
+TARIFF_URL_ENV = 'ELCOM_TARIFF_URL'
+# ElCom reference household H4: 5-room flat, 4'500 kWh per year
+DEFAULT_CATEGORY = 'H4'
+MAX_BFS_NUMBER = 10000
+MAX_POSTAL_CODE = 10000
+TARIFF_REFRESH_SECONDS = 24 * 3600
+TARIFF_DOWNLOAD_TIMEOUT_SECONDS = 60
+
+
+def _fold(name: str) -> str:
+    text = unicodedata.normalize('NFKD', name or '').casefold()
+    return ' '.join(''.join(c for c in text if not unicodedata.combining(c)).split())
+
+
+class TariffTable:
+    """Array-backed commune and postal code tariff lookup"""
+
+    def __init__(self, rows=(), postal_codes=(), category: str = DEFAULT_CATEGORY):
+        self.category = category
+        self.prices = np.full(MAX_BFS_NUMBER, np.nan, dtype=np.float64)    # CHF per kWh
+        self.years = np.zeros(MAX_BFS_NUMBER, dtype=np.int16)
+        self.commune_by_postal = np.full(MAX_POSTAL_CODE, -1, dtype=np.int32)
+        self.communes: Dict[int, Dict] = {}
+        self._by_name: Dict[str, int] = {}
+
+        latest = defaultdict(list)
+        for row in rows:
+            if (row.get('category') or category).strip().upper() != category:
+                continue
+            bfs_number, year = int(row['bfs_number']), int(row['year'])
+            if not 0 < bfs_number < MAX_BFS_NUMBER:
+                continue
+            entries = latest[bfs_number]
+            if entries and entries[0]['year'] > year:
+                continue
+            if entries and entries[0]['year'] < year:
+                entries.clear()
+            entries.append({'year': year, 'row': row, 'price': float(row['total_rp_per_kwh']) / 100})
+
+        for bfs_number, entries in latest.items():
+            first = entries[0]['row']
+            self.prices[bfs_number] = sum(entry['price'] for entry in entries) / len(entries)
+            self.years[bfs_number] = entries[0]['year']
+            self.communes[bfs_number] = {
+                'bfs_number': bfs_number,
+                'commune': first.get('commune', ''),
+                'canton': first.get('canton', ''),
+                'operators': sorted({entry['row'].get('operator', '') for entry in entries})
+            }
+            self._by_name.setdefault(_fold(first.get('commune', '')), bfs_number)
+
+        for row in postal_codes:
+            postal_code, bfs_number = int(row['postal_code']), int(row['bfs_number'])
+            # A postal code spanning several communes maps to the first one listed
+            if 0 <= postal_code < MAX_POSTAL_CODE and self.commune_by_postal[postal_code] < 0:
+                self.commune_by_postal[postal_code] = bfs_number
+
+        self.version = hashlib.sha1(
+            category.encode() + self.prices.tobytes() + self.commune_by_postal.tobytes()
+        ).hexdigest()[:12]
+
+    def __len__(self) -> int:
+        return len(self.communes)
+
+    @property
+    def available(self) -> bool:
+        return bool(self.communes)
+
+    def commune_number(self, postal_code=None, commune=None) -> Optional[int]:
+        """BFS number from a commune (number or name) or a postal code"""
+        if commune not in (None, ''):
+            text = str(commune).strip()
+            if text.isdigit():
+                return int(text)
+            if _fold(text) in self._by_name:
+                return self._by_name[_fold(text)]
+        text = str(postal_code or '').strip()
+        if text.isdigit() and int(text) < MAX_POSTAL_CODE:
+            number = int(self.commune_by_postal[int(text)])
+            return number if number >= 0 else None
+        return None
+
+    def lookup(self, postal_code=None, commune=None) -> Optional[Dict]:
+        """Tariff of the commune a postal code or commune refers to, None if unknown"""
+        number = self.commune_number(postal_code, commune)
+        if number is None or not 0 < number < MAX_BFS_NUMBER or np.isnan(self.prices[number]):
+            return None
+        return {
+            'price_per_kwh': round(float(self.prices[number]), 4),
+            'year': int(self.years[number]),
+            'category': self.category,
+            **self.communes[number]
+        }
+
+
+def tariff_directory() -> Optional[Path]:
+    """Locate the tariff files (env override or database/tariffs)"""
+    candidates = [Path(os.environ[TARIFF_DATA_DIR_ENV])] if os.getenv(TARIFF_DATA_DIR_ENV) else []
+    here = Path(__file__).resolve()
+    candidates.extend(parent / 'database' / 'tariffs' for parent in here.parents[2:4])
+    for candidate in candidates:
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+def _read_csv(path: Path):
+    with open(path, encoding='utf-8-sig', newline='') as csv_file:
+        return list(csv.DictReader(csv_file))
+
+
+def load_tariff_table(directory: Optional[Path] = None) -> TariffTable:
+    """Load the tariff files; an empty table if they are missing"""
+    directory = directory or tariff_directory()
+    if directory is None or not (Path(directory) / 'tariffs.csv').is_file():
+        logger.info("No tariff data found, energy costs use canton averages")
+        return TariffTable()
+    postal_path = Path(directory) / 'postal_codes.csv'
+    try:
+        return TariffTable(
+            _read_csv(Path(directory) / 'tariffs.csv'),
+            _read_csv(postal_path) if postal_path.is_file() else ()
+        )
+    except Exception as e:
+        logger.warning(f"Loading tariff data failed: {str(e)}")
+        return TariffTable()
+
+
+_tariff_lock = threading.Lock()
+_tariff_table: Optional[TariffTable] = None
+
+
+def get_tariff_table() -> TariffTable:
+    """The shared tariff table (files are read on first use)"""
+    global _tariff_table
+    if _tariff_table is None:
+        with _tariff_lock:
+            if _tariff_table is None:
+                _tariff_table = load_tariff_table()
+    return _tariff_table
+
+
+def refresh_tariff_table(url: Optional[str] = None, directory: Optional[Path] = None) -> bool:
+    """Download tariffs.csv, replace the local copy and swap the shared table"""
+    global _tariff_table
+    url = url or os.getenv(TARIFF_URL_ENV)
+    directory = Path(directory or tariff_directory() or Path(__file__).resolve().parents[3] / 'database' / 'tariffs')
+    if not url:
+        return False
+
+    response = requests.get(url, timeout=TARIFF_DOWNLOAD_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    table = TariffTable(list(csv.DictReader(io.StringIO(response.content.decode('utf-8-sig')))),
+                        _read_csv(directory / 'postal_codes.csv') if (directory / 'postal_codes.csv').is_file() else ())
+    if not table.available:
+        raise ValueError(f'No {DEFAULT_CATEGORY} tariffs in the downloaded data')
+
+    directory.mkdir(parents=True, exist_ok=True)
+    staging = directory / 'tariffs.csv.download'
+    staging.write_bytes(response.content)
+    os.replace(staging, directory / 'tariffs.csv')
+    with _tariff_lock:
+        _tariff_table = table
+    logger.info(f"Electricity tariffs refreshed: {len(table)} communes")
+    return True
+
+
+def start_tariff_refresh(interval_seconds: float = TARIFF_REFRESH_SECONDS) -> Optional[threading.Thread]:
+    """Refresh the tariffs periodically when ELCOM_TARIFF_URL is configured"""
+    if not os.getenv(TARIFF_URL_ENV):
+        return None
+
+    def run():
+        # With a local copy at hand the first download waits one interval
+        if get_tariff_table().available:
+            time.sleep(interval_seconds)
+        while True:
+            try:
+                refresh_tariff_table()
+            except Exception as e:
+                logger.warning(f"Electricity tariff refresh failed: {str(e)}")
+            time.sleep(interval_seconds)
+
+    thread = threading.Thread(target=run, name='tariff-refresh', daemon=True)
+    thread.start()
+    return thread
+
+
+def electricity_price(postal_code=None, commune=None, canton_info=None,
+                      default: Optional[float] = None) -> Tuple[Optional[float], Dict]:
+    """Most specific known price: commune tariff, then canton average, then the default"""
+    tariff = get_tariff_table().lookup(postal_code, commune) if (postal_code or commune) else None
+    if tariff:
+        return tariff['price_per_kwh'], {'source': 'commune', **tariff}
+    if canton_info is not None:
+        return canton_info.average_electricity_price_per_kwh, {'source': 'canton', 'canton': canton_info.code}
+    return default, {'source': 'national'}
@@ -0,0 +1,191 @@
+"""
+Financing Optimizer
+===================
+
+Grid search over down payment × term × product (finance, lease, cash) for a
+vehicle price, filtered by the customer's affordability limit (monthly
+payment at most AFFORDABILITY_SHARE of gross income, as in the customer
+financial profile) and reduced to the Pareto set of monthly payment vs total
+cost.
+
+All options are compared over the same ownership horizon (the TCO
+calculation period); total cost is what the car costs the customer over it:
+
+- finance: down payment + payments made within the horizon + the balance
+  still owed at its end − resale value at its end
+- lease: down payment + payments, pro-rated to the horizon (a shorter lease
+  is renewed on the same terms, a longer one counts for its share)
+- cash: price − resale value at the end of the horizon; offered only when
+  the customer's available funds (max_down_payment) cover the price
+
+Every combination is one element of flat NumPy arrays, so grids of tens of
+thousands of options evaluate in a few milliseconds.
+"""
+
+import time
+from numbers import Real
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from src.services.residual_values import get_residual_table
+
+# Gross income ranges by bracket (CHF per year) and the share of it a monthly payment may take
+INCOME_RANGES = {
+    'low': (50000, 80000),
+    'medium': (80000, 120000),
+    'high': (120000, 200000),
+    'very_high': (200000, 500000)
+}
+AFFORDABILITY_SHARE = 0.15
+
+PRODUCTS = ('finance', 'lease', 'cash')
+DEFAULT_TERMS_MONTHS = (12, 24, 36, 48, 60, 72, 84)
+DEFAULT_DOWN_PAYMENT_SHARES = tuple(np.round(np.arange(0, 0.51, 0.05), 2))
+MAX_GRID_SIZE = 200000
+
+
+def max_monthly_payment(annual_income: Optional[float] = None, income_bracket: Optional[str] = None) -> Optional[float]:
+    """Affordability limit from an income, or from the middle of an income bracket"""
+    if annual_income is not None and (isinstance(annual_income, bool) or not isinstance(annual_income, Real)
+                                      or not annual_income >= 0):
+        raise ValueError('annual_income must be a non-negative number')
+    if annual_income is None and income_bracket is not None:
+        if income_bracket not in INCOME_RANGES:
+            raise ValueError(f"income_bracket must be one of {', '.join(INCOME_RANGES)}")
+        annual_income = sum(INCOME_RANGES[income_bracket]) / 2
+    if annual_income is None:
+        return None
+    return annual_income * AFFORDABILITY_SHARE / 12
+
+
+def _axis(spec, default: Sequence[float], name: str) -> np.ndarray:
+    """Grid axis from a list or a {"min", "max", "step"} range"""
+    if spec is None:
+        values = np.asarray(default, dtype=np.float64)
+    elif isinstance(spec, Mapping):
+        try:
+            start, stop, step = float(spec['min']), float(spec['max']), float(spec['step'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f'{name} range needs numeric min, max and step')
+        if step <= 0 or stop < start:
+            raise ValueError(f'{name} range needs min <= max and a positive step')
+        values = np.arange(start, stop + step / 2, step)
+    elif isinstance(spec, list) and spec and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in spec):
+        values = np.asarray(spec, dtype=np.float64)
+    else:
+        raise ValueError(f'{name} must be a non-empty list of numbers or a min/max/step range')
+    if (values < 0).any():
+        raise ValueError(f'{name} must not be negative')
+    return np.unique(values)
+
+
+def _annuity(principal: np.ndarray, monthly_rate: np.ndarray, months: np.ndarray, balloon: np.ndarray) -> np.ndarray:
+    growth = np.power(1 + monthly_rate, months)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        payment = (principal - balloon / growth) * monthly_rate * growth / (growth - 1)
+    return np.where(monthly_rate == 0, (principal - balloon) / months, payment)
+
+
+def optimize_financing(purchase_price: float, financing_rate: float, horizon_months: int,
+                       lease_rate: Optional[float] = None, monthly_limit: Optional[float] = None,
+                       down_payments=None, terms_months=None, products: Optional[Sequence[str]] = None,
+                       max_down_payment: Optional[float] = None, annual_mileage: float = 15000,
+                       residual_curve: Optional[int] = None) -> Dict:
+    """Evaluate the grid and return the affordable Pareto set of monthly payment vs total cost
+
+    Resale and lease residual values follow ``residual_curve`` of the
+    residual value table (the generic EV curve by default) at ``annual_mileage``.
+    """
+    started = time.perf_counter()
+    if products is None:
+        products = [p for p in PRODUCTS if p != 'cash' or (max_down_payment is not None and
+                                                         max_down_payment >= purchase_price)]
+    products = list(products)
+    if not products or any(product not in PRODUCTS for product in products):
+        raise ValueError(f"products must be a list of {', '.join(PRODUCTS)}")
+    lease_rate = financing_rate if lease_rate is None else lease_rate
+
+    # Down payments are CHF amounts; the default grid is 0-50 % of the price
+    down = _axis(down_payments, np.asarray(DEFAULT_DOWN_PAYMENT_SHARES) * purchase_price, 'down_payments')
+    down = down[down < purchase_price]
+    terms = _axis(terms_months, DEFAULT_TERMS_MONTHS, 'terms_months')
+    terms = np.round(terms[terms >= 1])
+    if not len(down) or not len(terms):
+        raise ValueError('The grid has no valid down payment or term')
+
+    loan_products = [p for p in products if p != 'cash']
+    size = len(loan_products) * len(down) * len(terms) + ('cash' in products)
+    if size > MAX_GRID_SIZE:
+        raise ValueError(f'The grid has {size} combinations, at most {MAX_GRID_SIZE} are allowed')
+
+    # Flat grid: loan products × down payments × terms, then one cash purchase
+    product_index, down_grid, term_grid = (axis.ravel() for axis in np.meshgrid(
+        np.array([PRODUCTS.index(p) for p in loan_products], dtype=np.int64), down, terms, indexing='ij'))
+    if 'cash' in products:
+        product_index = np.append(product_index, PRODUCTS.index('cash'))
+        down_grid = np.append(down_grid, float(purchase_price))
+        term_grid = np.append(term_grid, 0.0)
+
+    is_lease = product_index == PRODUCTS.index('lease')
+    is_cash = product_index == PRODUCTS.index('cash')
+    horizon = float(horizon_months)
+    residuals = get_residual_table()
+    curve = residuals.generic['ev'] if residual_curve is None else residual_curve
+    resale = purchase_price * float(residuals.residual_share(curve, horizon, annual_mileage))
+    lease_residual = purchase_price * residuals.residual_share(curve, term_grid, annual_mileage)
+    principal = np.where(is_cash, 0.0, purchase_price - down_grid)
+    balloon = np.where(is_lease, np.minimum(lease_residual, principal), 0.0)
+    rate = np.where(is_lease, lease_rate, financing_rate) / 12
+    months = np.maximum(term_grid, 1)
+    payment = np.where(is_cash, 0.0, np.round(_annuity(principal, rate, months, balloon), 2))
+
+    # Loan balance still owed when the horizon ends before the term
+    paid_months = np.minimum(months, horizon)
+    growth = np.power(1 + rate, paid_months)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        balance = np.where(rate == 0, principal - payment * paid_months,
+                           principal * growth - payment * (growth - 1) / rate)
+    balance = np.where((months > horizon) & ~is_cash, np.maximum(balance, 0.0), 0.0)
+
+    finance_cost = down_grid + payment * paid_months + balance - resale
+    lease_cost = (down_grid + payment * months) * horizon / months
+    total_cost = np.where(is_cash, purchase_price - resale, np.where(is_lease, lease_cost, finance_cost))
+    interest = np.where(is_cash, 0.0, payment * months + balloon - principal)
+
+    affordable = np.ones(len(payment), dtype=bool)
+    if monthly_limit is not None:
+        affordable &= payment <= monthly_limit
+    if max_down_payment is not None:
+        affordable &= down_grid <= max_down_payment
+
+    # Pareto set: sort by payment then cost, keep options cheaper than every lower-payment option
+    candidates = np.flatnonzero(affordable)
+    order = candidates[np.lexsort((total_cost[candidates], payment[candidates]))]
+    best_before = np.concatenate([[np.inf], np.minimum.accumulate(total_cost[order])[:-1]])
+    pareto = order[total_cost[order] < best_before - 0.005]
+
+    def option(i: int) -> Dict:
+        return {
+            'product': PRODUCTS[product_index[i]],
+            'down_payment': round(float(down_grid[i]), 2),
+            'term_months': int(term_grid[i]) if not is_cash[i] else None,
+            'monthly_payment': round(float(payment[i]), 2),
+            'total_cost': round(float(total_cost[i]), 2),
+            'interest': round(float(interest[i]), 2),
+            'balloon': round(float(balloon[i]), 2)
+        }
+
+    options = [option(i) for i in pareto]
+    return {
+        'purchase_price': purchase_price,
+        'horizon_months': int(horizon),
+        'resale_value': round(resale, 2),
+        'max_monthly_payment': round(monthly_limit, 2) if monthly_limit is not None else None,
+        'combinations': int(len(payment)),
+        'affordable': int(affordable.sum()),
+        'pareto': options,
+        'lowest_total_cost': min(options, key=lambda o: o['total_cost']) if options else None,
+        'lowest_monthly_payment': options[0] if options else None,
+        'compute_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
@@ -0,0 +1,107 @@
+"""
+Fleet TCO
+=========
+
+Per-vehicle and aggregate TCO for business fleet deals (customer segment
+"business_fleet"): every fleet vehicle has its own model, mileage, canton,
+holding period and financing terms, all evaluated by one pass of the
+vectorized TCO engine.
+
+Fleets above FLEET_SHARD_THRESHOLD vehicles are split into chunks that run in
+the shared TCO process pool when one is configured (parameter packing is the
+per-vehicle Python work). Rows come back as dicts ready for JSON, CSV or
+NDJSON output; the summary is computed from the same arrays.
+"""
+
+import time
+from typing import Dict, List, Mapping, Sequence
+
+import numpy as np
+
+from src.services.tco_engine import canton_code, compute_tco, pack_tco_inputs
+from src.services.tco_risk import process_pool
+
+MAX_FLEET_VEHICLES = 20000
+FLEET_SHARD_THRESHOLD = 5000
+FLEET_CHUNK_SIZE = 2500
+
+FLEET_COLUMNS = (
+    'vehicle_index', 'name', 'model', 'canton', 'annual_mileage', 'calculation_period_years',
+    'ev_total_cost', 'ev_annual_cost', 'ev_cost_per_km', 'ev_monthly_payment', 'ev_energy_total',
+    'ev_road_tax_total', 'ev_residual_value', 'ice_total_cost', 'ice_annual_cost', 'savings'
+)
+
+
+def fleet_rows(parameter_sets: Sequence[Mapping], offset: int = 0) -> List[Dict]:
+    """Per-vehicle result rows (ICE columns empty where no comparison vehicle was given)"""
+    inputs = pack_tco_inputs(parameter_sets)
+    result = compute_tco(inputs)
+    years = inputs.years
+    comparison = inputs.has_comparison
+    ice_total = np.where(comparison, np.round(result.ice_total_cost, 2), np.nan)
+
+    columns = [
+        np.round(result.ev_total_cost, 2).tolist(),
+        np.round(result.ev_total_cost / years, 2).tolist(),
+        np.round(result.ev_total_cost / (inputs.annual_mileage * years), 4).tolist(),
+        np.round(result.ev_monthly_payment, 2).tolist(),
+        np.round(result.ev_energy_total, 2).tolist(),
+        np.round(result.ev_road_tax_total, 2).tolist(),
+        np.round(result.ev_residual_value, 2).tolist(),
+        [None if np.isnan(v) else v for v in ice_total.tolist()],
+        [None if not c else v for c, v in zip(comparison.tolist(), np.round(result.ice_total_cost / years, 2).tolist())],
+        [None if not c else v for c, v in zip(comparison.tolist(), np.round(result.savings, 2).tolist())],
+    ]
+    rows = []
+    for i, (params, values) in enumerate(zip(parameter_sets, zip(*columns))):
+        vehicle = params.get('vehicle') or {}
+        rows.append(dict(zip(FLEET_COLUMNS, (
+            offset + i, params.get('name'), vehicle.get('model'), canton_code(params),
+            inputs.annual_mileage[i].item(), inputs.years[i].item(), *values
+        ))))
+    return rows
+
+
+def compute_fleet(parameter_sets: Sequence[Mapping], executor=None) -> List[Dict]:
+    """Rows of the whole fleet, chunked over the process pool for large fleets"""
+    if not parameter_sets:
+        raise ValueError('vehicles must contain at least one vehicle')
+    if len(parameter_sets) > MAX_FLEET_VEHICLES:
+        raise ValueError(f'At most {MAX_FLEET_VEHICLES} vehicles per fleet')
+    if len(parameter_sets) > FLEET_SHARD_THRESHOLD:
+        executor = executor or process_pool()
+    if executor is None or len(parameter_sets) <= FLEET_SHARD_THRESHOLD:
+        return fleet_rows(parameter_sets)
+
+    # Validate up front so a bad vehicle fails the request, not a worker
+    pack_tco_inputs(parameter_sets)
+    chunks = [(list(parameter_sets[start:start + FLEET_CHUNK_SIZE]), start)
+              for start in range(0, len(parameter_sets), FLEET_CHUNK_SIZE)]
+    futures = [executor.submit(fleet_rows, chunk, start) for chunk, start in chunks]
+    return [row for future in futures for row in future.result()]
+
+
+def fleet_summary(rows: Sequence[Mapping], started: float) -> Dict:
+    """Fleet totals and a per-canton breakdown"""
+    compared = [row for row in rows if row['savings'] is not None]
+    ev_total = sum(row['ev_total_cost'] for row in rows)
+    distance = sum(row['annual_mileage'] * row['calculation_period_years'] for row in rows)
+    by_canton: Dict[str, Dict] = {}
+    for row in rows:
+        canton = by_canton.setdefault(row['canton'], {'vehicles': 0, 'ev_total_cost': 0.0})
+        canton['vehicles'] += 1
+        canton['ev_total_cost'] += row['ev_total_cost']
+
+    return {
+        'vehicles': len(rows),
+        'ev_total_cost': round(ev_total, 2),
+        'ev_annual_cost': round(sum(row['ev_annual_cost'] for row in rows), 2),
+        'ev_monthly_payments': round(sum(row['ev_monthly_payment'] for row in rows), 2),
+        'ev_cost_per_km': round(ev_total / distance, 4) if distance else None,
+        'vehicles_compared': len(compared),
+        'ice_total_cost': round(sum(row['ice_total_cost'] for row in compared), 2) if compared else None,
+        'total_savings': round(sum(row['savings'] for row in compared), 2) if compared else None,
+        'by_canton': {code: {**values, 'ev_total_cost': round(values['ev_total_cost'], 2)}
+                      for code, values in sorted(by_canton.items())},
+        'compute_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
@@ -0,0 +1,187 @@
+"""
+Address Geocoding
+=================
+
+Address → coordinates through the swisstopo SearchServer, behind a persistent
+cache keyed on the normalized address (table geocoded_addresses).
+
+Batches are normalized and deduplicated first, answered from the cache in one
+query, and only the remaining addresses are sent upstream, concurrently. New
+answers are stored in one commit, row by row when a concurrent request stored
+one of the addresses first; a failed cache write never fails the lookup. The
+upstream base URL is configurable (SWISSTOPO_API_URL) so tests and local
+development can point it at a stand-in server.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+import requests
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from src.models.geocoding import GeocodedAddress
+from src.models.user import db
+from src.services.deadline import DeadlineExceeded, call_timeout, propagate_deadline
+
+logger = logging.getLogger(__name__)
+
+SWISSTOPO_API_URL = 'https://api3.geo.admin.ch/rest/services'
+GEOCODE_MAX_WORKERS = 8
+GEOCODE_TIMEOUT_SECONDS = 5
+FOUND_TTL = timedelta(days=365)
+NOT_FOUND_TTL = timedelta(days=7)
+MAX_KEY_LENGTH = 255
+CACHE_QUERY_CHUNK = 500
+
+_TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def normalize_address(address: str) -> str:
+    """Canonical form of an address used as cache key"""
+    text = unicodedata.normalize('NFKC', address or '').casefold()
+    text = re.sub(r'str\.', 'strasse ', text)
+    text = re.sub(r'\bch-(?=\d{4}\b)', '', text)
+    text = re.sub(r'[,;]', ' ', text)
+    text = ' '.join(text.split())
+    if len(text) > MAX_KEY_LENGTH:
+        text = text[:MAX_KEY_LENGTH - 41] + '#' + hashlib.sha1(text.encode()).hexdigest()
+    return text
+
+
+class SwisstopoGeocoder:
+    """Minimal client for the swisstopo location search"""
+
+    source = 'swisstopo'
+
+    def __init__(self, base_url: Optional[str] = None, timeout: float = GEOCODE_TIMEOUT_SECONDS):
+        base_url = base_url or os.getenv('SWISSTOPO_API_URL') or SWISSTOPO_API_URL
+        self.url = f"{base_url.rstrip('/')}/api/SearchServer"
+        self.timeout = timeout
+
+    def geocode(self, address: str) -> Optional[Dict]:
+        """Best match for an address, None if swisstopo knows no such location"""
+        response = requests.get(self.url, params={
+            'searchText': address,
+            'type': 'locations',
+            'origins': 'address,zipcode',
+            'limit': 1,
+            'sr': 4326
+        }, timeout=call_timeout(self.timeout))
+        response.raise_for_status()
+
+        results = response.json().get('results', [])
+        if not results:
+            return None
+        attrs = results[0].get('attrs', {})
+        return {
+            'lat': float(attrs['lat']),
+            'lng': float(attrs['lon']),
+            'label': _TAG_PATTERN.sub('', attrs.get('label', ''))
+        }
+
+
+class GeocodingService:
+    """Cached, deduplicating, concurrent address geocoding"""
+
+    def __init__(self, geocoder: Optional[SwisstopoGeocoder] = None, max_workers: int = GEOCODE_MAX_WORKERS):
+        self.geocoder = geocoder or SwisstopoGeocoder()
+        self.max_workers = max_workers
+
+    def geocode(self, address: str) -> Dict:
+        return self.geocode_many([address])[0]
+
+    def geocode_many(self, addresses: Sequence[str]) -> List[Dict]:
+        """Geocode addresses; results keep the input order (duplicates included)"""
+        keys = [normalize_address(address) for address in addresses]
+        queries = {}
+        for address, key in zip(addresses, keys):
+            if key:
+                queries.setdefault(key, address)
+
+        results = self._cached(list(queries))
+        misses = [key for key in queries if key not in results]
+        if misses:
+            results.update(self._fetch({key: queries[key] for key in misses}))
+
+        output = []
+        for address, key in zip(addresses, keys):
+            if not key:
+                output.append({'address': address, 'normalized': key, 'found': False, 'error': 'Empty address'})
+            else:
+                output.append({'address': address, 'normalized': key, **results[key]})
+        return output
+
+    def _cached(self, keys: List[str]) -> Dict[str, Dict]:
+        now = datetime.utcnow()
+        cached = {}
+        for start in range(0, len(keys), CACHE_QUERY_CHUNK):
+            chunk = keys[start:start + CACHE_QUERY_CHUNK]
+            for entry in GeocodedAddress.query.filter(GeocodedAddress.address_key.in_(chunk)):
+                if now - entry.geocoded_at < (FOUND_TTL if entry.found else NOT_FOUND_TTL):
+                    cached[entry.address_key] = {
+                        'found': entry.found, 'lat': entry.lat, 'lng': entry.lng,
+                        'label': entry.label, 'cached': True
+                    }
+        return cached
+
+    def _fetch(self, queries: Dict[str, str]) -> Dict[str, Dict]:
+        """Query upstream concurrently and persist definitive answers"""
+        def lookup(item):
+            key, address = item
+            try:
+                return key, self.geocoder.geocode(address), None
+            except DeadlineExceeded:
+                return key, None, 'Request deadline reached'
+            except Exception as e:
+                logger.warning(f"Geocoding failed for '{address}': {str(e)}")
+                return key, None, str(e)
+
+        workers = max(1, min(self.max_workers, len(queries)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            answers = list(executor.map(propagate_deadline(lookup), queries.items()))
+
+        results = {}
+        entries = []
+        for key, match, error in answers:
+            if error:
+                results[key] = {'found': False, 'lat': None, 'lng': None, 'label': None, 'cached': False,
+                                'error': error if error == 'Request deadline reached' else 'Geocoding service unavailable'}
+                continue
+            match = match or {}
+            entries.append(GeocodedAddress(
+                address_key=key, found=bool(match), lat=match.get('lat'), lng=match.get('lng'),
+                label=match.get('label'), source=self.geocoder.source, geocoded_at=datetime.utcnow()
+            ))
+            results[key] = {'found': bool(match), 'lat': match.get('lat'), 'lng': match.get('lng'),
+                            'label': match.get('label'), 'cached': False}
+        self._store(entries)
+        return results
+
+    def _store(self, entries: List[GeocodedAddress]) -> None:
+        """Persist answers in one commit, row by row when a concurrent request stored the same address"""
+        try:
+            for entry in entries:
+                db.session.merge(entry)
+            db.session.commit()
+            return
+        except IntegrityError:
+            db.session.rollback()
+        except SQLAlchemyError as e:
+            # The answers are still returned, only the cache misses them
+            db.session.rollback()
+            logger.warning(f"Storing {len(entries)} geocoding results failed: {str(e)}")
+            return
+
+        for entry in entries:
+            try:
+                db.session.merge(entry)
+                db.session.commit()
+            except SQLAlchemyError as e:
+                db.session.rollback()
+                logger.info(f"Geocoding result for '{entry.address_key}' not stored: {str(e)}")
@@ -0,0 +1,181 @@
+"""
+Charging Occupancy History
+==========================
+
+Sampled availability per charging station and an hour-of-week predictor for
+"how busy is this charger usually at 18:00 on Friday?".
+
+Every sample is one snapshot of the whole station store: the share of free
+connectors per station. Samples land in two fixed-size NumPy structures:
+
+- a ring buffer of the last RING_SAMPLES snapshots (uint8, one row per
+  snapshot, one column per station) for recent history
+- an hour-of-week profile (168 bins per station) holding a running mean of
+  the free share, downsampled from every snapshot; once a bin has seen enough
+  samples the mean becomes exponential (PROFILE_MIN_ALPHA) so the profile
+  follows changing habits
+
+Memory depends only on the number of tracked stations (capped at
+MAX_TRACKED_STATIONS), never on how long we collect. Predictions shrink
+sparse bins toward the station's overall mean and are computed for a whole
+result page at once.
+"""
+
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+SWISS_TIMEZONE = ZoneInfo('Europe/Zurich')
+HOURS_PER_WEEK = 168
+RING_SAMPLES = 576                 # 48 h at one snapshot per 5 minutes
+MAX_TRACKED_STATIONS = 50000
+PROFILE_MIN_ALPHA = 0.01           # ~6 weeks of 5-minute samples per bin
+PRIOR_SAMPLES = 3.0
+FREE_SCALE = 200                   # uint8 encoding of the free share, 0.5 % steps
+MISSING = 255
+MAX_BIN_COUNT = np.iinfo(np.uint16).max
+
+
+def hour_of_week(when: datetime) -> int:
+    """Monday 00:00-01:00 Swiss local time is 0, Sunday 23:00-24:00 is 167"""
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    local = when.astimezone(SWISS_TIMEZONE)
+    return local.weekday() * 24 + local.hour
+
+
+class OccupancyHistory:
+    """Bounded per-station availability history with hour-of-week profiles"""
+
+    def __init__(self, ring_samples: int = RING_SAMPLES, max_stations: int = MAX_TRACKED_STATIONS):
+        self.ring_samples = ring_samples
+        self.max_stations = max_stations
+        self._lock = threading.Lock()
+        self._rows: Dict[str, int] = {}
+        self._ring = np.full((ring_samples, 0), MISSING, dtype=np.uint8)
+        self._ring_times = np.zeros(ring_samples, dtype=np.int64)   # epoch seconds, 0 = empty slot
+        self._head = 0
+        self._profile = np.zeros((0, HOURS_PER_WEEK), dtype=np.float32)
+        self._counts = np.zeros((0, HOURS_PER_WEEK), dtype=np.uint16)
+        self.samples = 0
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def _grow(self, size: int) -> None:
+        capacity = self._profile.shape[0]
+        if size <= capacity:
+            return
+        capacity = min(self.max_stations, max(size, capacity * 2, 64))
+        ring = np.full((self.ring_samples, capacity), MISSING, dtype=np.uint8)
+        ring[:, :self._ring.shape[1]] = self._ring
+        profile = np.zeros((capacity, HOURS_PER_WEEK), dtype=np.float32)
+        profile[:len(self._profile)] = self._profile
+        counts = np.zeros((capacity, HOURS_PER_WEEK), dtype=np.uint16)
+        counts[:len(self._counts)] = self._counts
+        self._ring, self._profile, self._counts = ring, profile, counts
+
+    def _lookup(self, station_ids: Sequence[Optional[str]], create: bool = False) -> np.ndarray:
+        """Row per station id, -1 for unknown ids (or ids beyond the tracking cap)"""
+        rows = np.full(len(station_ids), -1, dtype=np.int64)
+        for i, station_id in enumerate(station_ids):
+            if station_id is None:
+                continue
+            row = self._rows.get(station_id)
+            if row is None and create and len(self._rows) < self.max_stations:
+                row = self._rows[station_id] = len(self._rows)
+            if row is not None:
+                rows[i] = row
+        if create:
+            self._grow(len(self._rows))
+        return rows
+
+    def record(self, station_ids: Sequence[Optional[str]], connector_count: np.ndarray,
+               available_count: np.ndarray, when: Optional[datetime] = None) -> int:
+        """Add one availability snapshot; returns the number of stations sampled"""
+        when = when or datetime.now(timezone.utc)
+        connector_count = np.asarray(connector_count, dtype=np.float32)
+        available_count = np.asarray(available_count, dtype=np.float32)
+
+        with self._lock:
+            rows = self._lookup(station_ids, create=True)
+            keep = (rows >= 0) & (connector_count > 0)
+            rows = rows[keep]
+            free = np.clip(available_count[keep] / connector_count[keep], 0.0, 1.0)
+            # Duplicate ids within one snapshot: the last one wins
+            rows, last = np.unique(rows[::-1], return_index=True)
+            free = free[::-1][last]
+
+            slot = self._head
+            self._ring[slot] = MISSING
+            self._ring[slot, rows] = np.rint(free * FREE_SCALE).astype(np.uint8)
+            self._ring_times[slot] = int(when.timestamp())
+            self._head = (slot + 1) % self.ring_samples
+
+            hour = hour_of_week(when)
+            counts = self._counts[rows, hour].astype(np.float32)
+            alpha = np.maximum(1.0 / (counts + 1.0), PROFILE_MIN_ALPHA)
+            self._profile[rows, hour] += (free - self._profile[rows, hour]) * alpha
+            self._counts[rows, hour] = np.minimum(counts + 1, MAX_BIN_COUNT).astype(np.uint16)
+            self.samples += 1
+            return len(rows)
+
+    def _smoothed(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Per-bin free share shrunk toward the station mean, and bin sample counts"""
+        profile = self._profile[rows]
+        counts = self._counts[rows].astype(np.float32)
+        total = counts.sum(axis=1, keepdims=True)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            station_mean = (profile * counts).sum(axis=1, keepdims=True) / total
+            smoothed = (profile * counts + station_mean * PRIOR_SAMPLES) / (counts + PRIOR_SAMPLES)
+        smoothed[np.broadcast_to(total == 0, smoothed.shape)] = np.nan
+        return smoothed, counts
+
+    def predict(self, station_ids: Sequence[Optional[str]], when: datetime) -> Tuple[np.ndarray, np.ndarray]:
+        """Expected share of free connectors at a time, NaN where a station has no history"""
+        with self._lock:
+            rows = self._lookup(station_ids)
+            known = rows >= 0
+            probability = np.full(len(station_ids), np.nan, dtype=np.float32)
+            samples = np.zeros(len(station_ids), dtype=np.int64)
+            if known.any():
+                smoothed, counts = self._smoothed(rows[known])
+                hour = hour_of_week(when)
+                probability[known] = smoothed[:, hour]
+                samples[known] = counts[:, hour]
+            return probability, samples
+
+    def weekly_profile(self, station_id: str) -> Optional[Dict]:
+        """7 × 24 grid (Monday first) of expected free shares and sample counts"""
+        with self._lock:
+            row = self._rows.get(station_id)
+            if row is None:
+                return None
+            smoothed, counts = self._smoothed(np.array([row]))
+        probability = np.round(smoothed[0].reshape(7, 24).astype(np.float64), 3)
+        return {
+            'free_probability': [[None if np.isnan(p) else float(p) for p in day] for day in probability],
+            'samples': counts[0].reshape(7, 24).astype(int).tolist()
+        }
+
+    def recent(self, station_id: str, limit: int = RING_SAMPLES) -> List[Dict]:
+        """Latest raw samples of one station, oldest first"""
+        with self._lock:
+            row = self._rows.get(station_id)
+            if row is None:
+                return []
+            order = (np.arange(self.ring_samples) + self._head) % self.ring_samples
+            values = self._ring[order, row]
+            times = self._ring_times[order]
+        present = (values != MISSING) & (times > 0)
+        return [
+            {'time': datetime.fromtimestamp(int(t), SWISS_TIMEZONE).isoformat(),
+             'free_share': round(float(v) / FREE_SCALE, 3)}
+            for t, v in zip(times[present][-limit:], values[present][-limit:])
+        ]
+
+    def memory_bytes(self) -> int:
+        return self._ring.nbytes + self._ring_times.nbytes + self._profile.nbytes + self._counts.nbytes
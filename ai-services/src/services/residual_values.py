@@ -0,0 +1,166 @@
+"""
+Residual Values
+===============
+
+Residual value curves per model and variant by vehicle age and annual
+mileage, replacing the flat per-year depreciation rates of the TCO
+calculation.
+
+Curves come from database/seeds/05_residual_values.sql (table
+residual_value_curves): one row per curve and mileage band with the share of
+the purchase price left after 1-6, 8 and 10 years. A curve belongs to a model
+(all variants), to one variant of a model, or is the generic curve of a
+powertrain (ev / ice) used for unknown models.
+
+At startup every curve is interpolated once onto a month × mileage band grid
+(share 1 at month 0, linear between the anchor years, the last annual rate
+continued up to MAX_AGE_MONTHS), so a lookup is four array reads and a
+bilinear blend, vectorized over any number of parameter sets.
+"""
+
+import hashlib
+import json
+import re
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.services.seed_data import load_seed_rows
+
+RESIDUAL_SEED_FILE = '05_residual_values.sql'
+POWERTRAINS = ('ev', 'ice')
+MAX_AGE_MONTHS = 240
+
+_AGE_COLUMN = re.compile(r'residual_(\d+)y$')
+
+
+def _fold(name: str) -> str:
+    return ' '.join(str(name).upper().split())
+
+
+class ResidualValueTable:
+    """Precomputed residual shares, one (month, mileage band) grid per curve"""
+
+    def __init__(self, rows: Sequence[Mapping]):
+        curves: Dict[Tuple, Dict[float, List[Tuple[int, float]]]] = {}
+        for row in rows:
+            powertrain = str(row['powertrain']).lower()
+            if powertrain not in POWERTRAINS:
+                raise ValueError(f"Unknown powertrain '{row['powertrain']}' in residual value curves")
+            key = (powertrain, row.get('model_name'), row.get('model_variant'))
+            anchors = sorted((int(match.group(1)), float(value)) for column, value in row.items()
+                             if (match := _AGE_COLUMN.match(column)) and value is not None)
+            curves.setdefault(key, {})[float(row['annual_km'])] = anchors
+        for powertrain in POWERTRAINS:
+            if (powertrain, None, None) not in curves:
+                raise ValueError(f'Residual value curves need a generic {powertrain} curve')
+
+        self.keys = list(curves)
+        self.bands = np.array(sorted({band for bands in curves.values() for band in bands}), dtype=np.float64)
+        months = np.arange(MAX_AGE_MONTHS + 1, dtype=np.float64)
+        self.shares = np.empty((len(self.keys), len(months), len(self.bands)))
+        for index, key in enumerate(self.keys):
+            by_band = curves[key]
+            own_bands = np.array(sorted(by_band))
+            grid = np.array([self._monthly(by_band[band], months) for band in own_bands])
+            # Bands a curve has no row for are interpolated from its neighbouring bands
+            position = np.interp(self.bands, own_bands, np.arange(len(own_bands), dtype=np.float64))
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, len(own_bands) - 1)
+            weight = position - lower
+            self.shares[index] = (grid[lower] * (1 - weight)[:, None] + grid[upper] * weight[:, None]).T
+        self.shares.flags.writeable = False
+
+        self._by_name: Dict[str, Dict[str, int]] = {powertrain: {} for powertrain in POWERTRAINS}
+        for index, (powertrain, model, variant) in enumerate(self.keys):
+            if model is None:
+                continue
+            names = self._by_name[powertrain]
+            for name in (model, model.split(' ', 1)[-1]):
+                names[_fold(f'{name} {variant}' if variant else name)] = index
+        self.generic = {powertrain: self.keys.index((powertrain, None, None)) for powertrain in POWERTRAINS}
+        self.version = hashlib.sha1(json.dumps(
+            [[list(key), sorted(bands.items())] for key, bands in curves.items()], default=str
+        ).encode()).hexdigest()[:12]
+
+    @staticmethod
+    def _monthly(anchors: Sequence[Tuple[int, float]], months: np.ndarray) -> np.ndarray:
+        ages = np.array([0.0] + [age * 12.0 for age, _ in anchors])
+        shares = np.array([1.0] + [share for _, share in anchors])
+        monthly = np.interp(months, ages, shares)
+        # Beyond the last anchor the last segment's annual rate continues
+        last_rate = (shares[-1] / shares[-2]) ** (12 / (ages[-1] - ages[-2]))
+        beyond = months > ages[-1]
+        monthly[beyond] = shares[-1] * last_rate ** ((months[beyond] - ages[-1]) / 12)
+        return monthly
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def curve_index(self, model: Optional[str], powertrain: str) -> int:
+        """Curve of a model name ("CADILLAC LYRIQ Sport", "LYRIQ", ...), generic when unknown
+
+        Trailing words are dropped until a variant or model curve matches, so
+        variants without their own curve use the model curve.
+        """
+        names = self._by_name[powertrain]
+        if isinstance(model, str):
+            words = _fold(model).split(' ')
+            while words and words != ['']:
+                index = names.get(' '.join(words))
+                if index is not None:
+                    return index
+                words.pop()
+        return self.generic[powertrain]
+
+    def describe(self, index: int) -> Dict:
+        powertrain, model, variant = self.keys[index]
+        return {'powertrain': powertrain, 'model': model, 'variant': variant}
+
+    def residual_share(self, curves, months, annual_km) -> np.ndarray:
+        """Share of the purchase price left after ``months`` at ``annual_km`` per year (arrays broadcast)"""
+        curves, months, annual_km = np.broadcast_arrays(
+            np.asarray(curves, dtype=np.int64), np.asarray(months, dtype=np.float64),
+            np.asarray(annual_km, dtype=np.float64)
+        )
+        age = np.clip(months, 0, MAX_AGE_MONTHS)
+        month = np.minimum(age.astype(np.int64), MAX_AGE_MONTHS - 1)
+        age_weight = age - month
+        band = np.interp(annual_km, self.bands, np.arange(len(self.bands), dtype=np.float64))
+        lower = np.minimum(band.astype(np.int64), max(len(self.bands) - 2, 0))
+        upper = np.minimum(lower + 1, len(self.bands) - 1)
+        band_weight = band - lower
+
+        shares = self.shares
+        early = shares[curves, month, lower] * (1 - band_weight) + shares[curves, month, upper] * band_weight
+        late = shares[curves, month + 1, lower] * (1 - band_weight) + shares[curves, month + 1, upper] * band_weight
+        return early * (1 - age_weight) + late * age_weight
+
+    def residual_value(self, purchase_price: float, years: float, annual_km: float,
+                       model: Optional[str] = None, powertrain: str = 'ev') -> float:
+        """Residual value of one vehicle"""
+        share = self.residual_share(self.curve_index(model, powertrain), years * 12, annual_km)
+        return purchase_price * float(share)
+
+
+def load_residual_table() -> ResidualValueTable:
+    """Residual value curves from the seed data"""
+    return ResidualValueTable(load_seed_rows(RESIDUAL_SEED_FILE, 'residual_value_curves'))
+
+
+_table_lock = threading.Lock()
+_residual_table = load_residual_table()
+
+
+def get_residual_table() -> ResidualValueTable:
+    """The residual value curves (loaded once at startup)"""
+    return _residual_table
+
+
+def reload_residual_table() -> ResidualValueTable:
+    """Reload the curves, e.g. after the seed data was updated"""
+    global _residual_table
+    with _table_lock:
+        _residual_table = load_residual_table()
+    return _residual_table
@@ -0,0 +1,291 @@
+"""
+Reverse Geocoder
+================
+
+Offline lat/lng → canton / commune / postal code lookup on boundary polygons.
+
+Boundaries are read from GeoJSON files (WGS84) in GEODATA_DIR, e.g. exported
+from swisstopo swissBOUNDARIES3D and the official locality directory:
+
+    cantons.geojson       properties: code, name
+    communes.geojson      properties: bfs_number, name, canton
+    postal_codes.geojson  properties: postal_code, locality
+
+Each layer is indexed on a regular grid. Cells that no boundary edge touches
+are classified once at load time, so most points resolve with a single array
+lookup. Points in boundary cells are tested against their cell's candidate
+polygons with an even-odd ray cast over only the edges of the cell's latitude
+band, vectorized over all point/candidate pairs of a batch.
+"""
+
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+GEODATA_DIR_ENV = 'GEODATA_DIR'
+GRID_CELL_DEGREES = 0.02
+MAX_EDGES_PER_CHUNK = 2_000_000
+
+# Layer name -> (file, properties kept, property used as the compact label)
+LAYERS = {
+    'canton': ('cantons.geojson', ('code', 'name'), 'code'),
+    'commune': ('communes.geojson', ('bfs_number', 'name', 'canton'), 'name'),
+    'postal_code': ('postal_codes.geojson', ('postal_code', 'locality'), 'postal_code'),
+}
+
+_BOUNDARY_CELL = -2
+
+
+def _geometry_rings(geometry: Dict) -> List[np.ndarray]:
+    """All rings (exteriors and holes) of a Polygon or MultiPolygon as (lng, lat) arrays"""
+    if geometry['type'] == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        return []
+    return [np.asarray(ring, dtype=np.float64)[:, :2] for polygon in polygons for ring in polygon if len(ring) >= 3]
+
+
+def _expand_ranges(start: np.ndarray, stop: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """For inclusive ranges [start, stop], return (range index, value) for every member"""
+    counts = stop - start + 1
+    owner = np.repeat(np.arange(len(start)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    return owner, start[owner] + offsets
+
+
+class PolygonLayer:
+    """Grid-indexed polygons of one boundary layer"""
+
+    def __init__(self, name: str, properties: Sequence[Dict], rings: Sequence[Sequence[np.ndarray]],
+                 label: Optional[str] = None, cell_degrees: float = GRID_CELL_DEGREES):
+        self.name = name
+        self.properties = list(properties)
+        self.label = label
+        self.cell = cell_degrees
+
+        # Flatten every ring into edges, dropping horizontal ones (they never cross a ray)
+        x1, y1, x2, y2, owner = [], [], [], [], []
+        for feature, feature_rings in enumerate(rings):
+            for ring in feature_rings:
+                if not np.array_equal(ring[0], ring[-1]):
+                    ring = np.vstack([ring, ring[:1]])
+                x1.append(ring[:-1, 0]); y1.append(ring[:-1, 1])
+                x2.append(ring[1:, 0]); y2.append(ring[1:, 1])
+                owner.append(np.full(len(ring) - 1, feature, dtype=np.int64))
+
+        x1, y1, x2, y2 = (np.concatenate(part) if part else np.empty(0) for part in (x1, y1, x2, y2))
+        owner = np.concatenate(owner) if owner else np.empty(0, dtype=np.int64)
+        sloped = y1 != y2
+        self.x1, self.y1, self.x2, self.y2, self.edge_owner = x1[sloped], y1[sloped], x2[sloped], y2[sloped], owner[sloped]
+        self.dx_dy = (self.x2 - self.x1) / (self.y2 - self.y1)
+
+        # Horizontal edges still bound cells, so they count when marking boundary cells
+        self._build_grid(len(self.properties), np.minimum(x1, x2), np.maximum(x1, x2),
+                         np.minimum(y1, y2), np.maximum(y1, y2), owner)
+
+    def __len__(self) -> int:
+        return len(self.properties)
+
+    def _build_grid(self, feature_count: int, xmin, xmax, ymin, ymax, owner) -> None:
+        if not len(self.x1):
+            self.origin, self.cols, self.rows = (0.0, 0.0), 0, 0
+            self.cell_interior = np.empty(0, dtype=np.int64)
+            return
+
+        self.origin = (float(xmin.min()), float(ymin.min()))
+        self.cols = int((xmax.max() - self.origin[0]) // self.cell) + 1
+        self.rows = int((ymax.max() - self.origin[1]) // self.cell) + 1
+        self.feature_count = feature_count
+
+        # Edges per (latitude band, feature): everything a ray from a point in that band can cross
+        edge, row = _expand_ranges(self._row(np.minimum(self.y1, self.y2)), self._row(np.maximum(self.y1, self.y2)))
+        band_key = row * feature_count + self.edge_owner[edge]
+        order = np.argsort(band_key, kind='stable')
+        self.band_edges = edge[order]
+        self.band_ptr = np.searchsorted(band_key[order], np.arange(self.rows * feature_count + 1))
+
+        # Candidate features per cell from feature bounding boxes
+        box = np.full((4, feature_count), np.inf)
+        box[2:] = -np.inf
+        np.minimum.at(box[0], owner, xmin)
+        np.minimum.at(box[1], owner, ymin)
+        np.maximum.at(box[2], owner, xmax)
+        np.maximum.at(box[3], owner, ymax)
+        present = np.flatnonzero(np.isfinite(box[0]))
+        feature_rows, row = _expand_ranges(self._row(box[1, present]), self._row(box[3, present]))
+        span, col = _expand_ranges(self._col(box[0, present])[feature_rows], self._col(box[2, present])[feature_rows])
+        cell_keys = row[span] * self.cols + col
+        order = np.argsort(cell_keys, kind='stable')
+        self.cell_candidates = present[feature_rows[span]][order]
+        self.cell_ptr = np.searchsorted(cell_keys[order], np.arange(self.rows * self.cols + 1))
+
+        # Cells touched by an edge bounding box need exact tests, all others are uniform
+        edge, row = _expand_ranges(self._row(ymin), self._row(ymax))
+        span, col = _expand_ranges(self._col(xmin)[edge], self._col(xmax)[edge])
+        touched = np.zeros(self.rows * self.cols, dtype=np.bool_)
+        touched[row[span] * self.cols + col] = True
+
+        self.cell_interior = np.full(self.rows * self.cols, -1, dtype=np.int64)
+        self.cell_interior[touched] = _BOUNDARY_CELL
+        uniform = np.flatnonzero(~touched & (np.diff(self.cell_ptr) > 0))
+        centre_x = self.origin[0] + (uniform % self.cols + 0.5) * self.cell
+        centre_y = self.origin[1] + (uniform // self.cols + 0.5) * self.cell
+        self.cell_interior[uniform] = self._locate_exact(centre_x, centre_y, uniform)
+
+    def _col(self, x):
+        return ((np.asarray(x) - self.origin[0]) // self.cell).astype(np.int64)
+
+    def _row(self, y):
+        return ((np.asarray(y) - self.origin[1]) // self.cell).astype(np.int64)
+
+    def locate(self, lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+        """Feature index containing each point, -1 where no polygon does"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        result = np.full(len(lat), -1, dtype=np.int64)
+        if not self.rows or not len(lat):
+            return result
+
+        col, row = self._col(np.nan_to_num(lng, nan=-1e9)), self._row(np.nan_to_num(lat, nan=-1e9))
+        inside_grid = np.flatnonzero((col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows))
+        cells = row[inside_grid] * self.cols + col[inside_grid]
+        result[inside_grid] = self.cell_interior[cells]
+
+        boundary = result[inside_grid] == _BOUNDARY_CELL
+        points = inside_grid[boundary]
+        result[points] = self._locate_exact(lng[points], lat[points], cells[boundary])
+        return result
+
+    def _locate_exact(self, x: np.ndarray, y: np.ndarray, cells: np.ndarray) -> np.ndarray:
+        """Even-odd ray cast of points against the candidate polygons of their cells"""
+        result = np.full(len(x), -1, dtype=np.int64)
+        if not len(x):
+            return result
+
+        point, slot = _expand_ranges(self.cell_ptr[cells], self.cell_ptr[cells + 1] - 1)
+        feature = self.cell_candidates[slot]
+        band = (cells[point] // self.cols) * self.feature_count + feature
+        edge_start, edge_count = self.band_ptr[band], self.band_ptr[band + 1] - self.band_ptr[band]
+
+        # Process point/candidate pairs in chunks of bounded edge work
+        bounds = np.searchsorted(np.cumsum(edge_count), np.arange(MAX_EDGES_PER_CHUNK, edge_count.sum(), MAX_EDGES_PER_CHUNK))
+        for pairs in np.split(np.arange(len(point)), np.unique(bounds)):
+            if not len(pairs):
+                continue
+            pair, position = _expand_ranges(edge_start[pairs], edge_start[pairs] + edge_count[pairs] - 1)
+            edges = self.band_edges[position]
+            px, py = x[point[pairs]][pair], y[point[pairs]][pair]
+            crosses = (((self.y1[edges] > py) != (self.y2[edges] > py)) &
+                       (px < self.x1[edges] + (py - self.y1[edges]) * self.dx_dy[edges]))
+            inside = np.bincount(pair, weights=crosses, minlength=len(pairs)) % 2 == 1
+            result[point[pairs][inside]] = feature[pairs][inside]
+        return result
+
+    def record(self, index: int) -> Optional[Dict]:
+        return dict(self.properties[index]) if index >= 0 else None
+
+    @classmethod
+    def from_geojson(cls, name: str, collection: Dict, keep: Sequence[str], label: Optional[str] = None,
+                     cell_degrees: float = GRID_CELL_DEGREES) -> 'PolygonLayer':
+        properties, rings = [], []
+        for feature in collection.get('features', []):
+            feature_rings = _geometry_rings(feature.get('geometry') or {'type': None})
+            if not feature_rings:
+                continue
+            source = feature.get('properties') or {}
+            properties.append({key: source.get(key) for key in keep})
+            rings.append(feature_rings)
+        return cls(name, properties, rings, label=label, cell_degrees=cell_degrees)
+
+
+class ReverseGeocoder:
+    """Canton, commune and postal code lookup over the loaded boundary layers"""
+
+    def __init__(self, layers: Optional[Dict[str, PolygonLayer]] = None):
+        self.layers = dict(layers or {})
+
+    @property
+    def available(self) -> bool:
+        return bool(self.layers)
+
+    def reverse(self, lat: float, lng: float) -> Dict[str, Optional[Dict]]:
+        """Full properties of every layer's polygon containing one point"""
+        return {
+            name: layer.record(int(layer.locate(np.array([lat]), np.array([lng]))[0]))
+            for name, layer in self.layers.items()
+        }
+
+    def locate_many(self, lat: Sequence[float], lng: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Feature indices per layer for a batch of points (-1 = not found)"""
+        lat, lng = np.asarray(lat, dtype=np.float64), np.asarray(lng, dtype=np.float64)
+        return {name: layer.locate(lat, lng) for name, layer in self.layers.items()}
+
+    def reverse_many(self, lat: Sequence[float], lng: Sequence[float]) -> List[Dict[str, Optional[str]]]:
+        """Compact labels (canton code, commune name, postal code) for a batch of points"""
+        indices = self.locate_many(lat, lng)
+        labels = {
+            name: [self.layers[name].properties[i][self.layers[name].label] if i >= 0 else None for i in found]
+            for name, found in indices.items()
+        }
+        return [{name: labels[name][i] for name in labels} for i in range(len(lat))]
+
+    def canton_at(self, lat: float, lng: float) -> Optional[str]:
+        layer = self.layers.get('canton')
+        if layer is None or lat is None or lng is None:
+            return None
+        found = layer.record(int(layer.locate(np.array([lat]), np.array([lng]))[0]))
+        return found['code'] if found else None
+
+
+def geodata_directory() -> Optional[Path]:
+    """Locate the boundary files (env override or database/geodata)"""
+    candidates = [Path(os.environ[GEODATA_DIR_ENV])] if os.getenv(GEODATA_DIR_ENV) else []
+    here = Path(__file__).resolve()
+    candidates.extend(parent / 'database' / 'geodata' for parent in here.parents[2:4])
+    for candidate in candidates:
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+def load_reverse_geocoder(directory: Optional[Path] = None) -> ReverseGeocoder:
+    """Load whichever boundary layers are present; missing layers are skipped"""
+    directory = directory or geodata_directory()
+    layers = {}
+    if directory is None:
+        logger.info("No boundary data found, reverse geocoding is disabled")
+        return ReverseGeocoder()
+
+    for name, (filename, keep, label) in LAYERS.items():
+        path = Path(directory) / filename
+        if not path.is_file():
+            continue
+        try:
+            with open(path, encoding='utf-8') as geojson_file:
+                layers[name] = PolygonLayer.from_geojson(name, json.load(geojson_file), keep, label)
+        except Exception as e:
+            logger.warning(f"Loading boundary layer {filename} failed: {str(e)}")
+    return ReverseGeocoder(layers)
+
+
+_geocoder_lock = threading.Lock()
+_reverse_geocoder: Optional[ReverseGeocoder] = None
+
+
+def get_reverse_geocoder() -> ReverseGeocoder:
+    """The shared reverse geocoder (boundary files are indexed on first use)"""
+    global _reverse_geocoder
+    if _reverse_geocoder is None:
+        with _geocoder_lock:
+            if _reverse_geocoder is None:
+                _reverse_geocoder = load_reverse_geocoder()
+    return _reverse_geocoder
@@ -0,0 +1,222 @@
+"""
+Route Corridor Geometry
+=======================
+
+Helpers for finding charging stations along a driving route: polyline decoding,
+cached route geometries for common Swiss corridors and a buffered-segment match
+that prunes stations with per-chunk segment bounding boxes.
+"""
+
+from functools import lru_cache
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+KM_PER_DEGREE = 111.195  # Great-circle km per degree of latitude (R = 6371 km)
+EARTH_RADIUS_KM = 6371.0
+SEGMENTS_PER_CHUNK = 32
+
+# Reference coordinates for route endpoints (lat, lng)
+SWISS_CITY_COORDINATES = {
+    'zurich': (47.3769, 8.5417),
+    'bern': (46.9480, 7.4474),
+    'basel': (47.5596, 7.5886),
+    'geneve': (46.2044, 6.1432),
+    'lausanne': (46.5197, 6.6323),
+    'luzern': (47.0502, 8.3093),
+    'lugano': (46.0037, 8.9511),
+    'bellinzona': (46.1946, 9.0244),
+    'chur': (46.8499, 9.5329),
+    'st. gallen': (47.4245, 9.3767),
+    'winterthur': (47.4988, 8.7237),
+    'zug': (47.1662, 8.5155),
+    'sion': (46.2331, 7.3606),
+    'neuchatel': (46.9900, 6.9293),
+    'fribourg': (46.8065, 7.1620),
+    'aarau': (47.3925, 8.0442),
+    'schaffhausen': (47.6973, 8.6349),
+    'thun': (46.7580, 7.6280),
+}
+
+CITY_ALIASES = {
+    'zürich': 'zurich', 'genf': 'geneve', 'genève': 'geneve', 'geneva': 'geneve',
+    'lucerne': 'luzern', 'berne': 'bern', 'bâle': 'basel', 'st gallen': 'st. gallen',
+    'neuchâtel': 'neuchatel', 'neuenburg': 'neuchatel', 'freiburg': 'fribourg',
+}
+
+# Motorway waypoints for frequently requested corridors, keyed by endpoint pair
+ROUTE_WAYPOINTS = {
+    ('zurich', 'lugano'): [
+        (47.3769, 8.5417), (47.1662, 8.5155), (47.0490, 8.5470), (46.8805, 8.6440),
+        (46.6640, 8.5860), (46.5290, 8.6090), (46.3880, 8.8440), (46.1946, 9.0244),
+        (46.0037, 8.9511)
+    ],
+    ('basel', 'lugano'): [
+        (47.5596, 7.5886), (47.3500, 7.9070), (47.0502, 8.3093), (46.9730, 8.3810),
+        (46.8805, 8.6440), (46.6640, 8.5860), (46.5290, 8.6090), (46.3880, 8.8440),
+        (46.1946, 9.0244), (46.0037, 8.9511)
+    ],
+    ('zurich', 'bern'): [
+        (47.3769, 8.5417), (47.4110, 8.2770), (47.3925, 8.0442), (47.2760, 7.8170),
+        (47.0860, 7.6360), (46.9480, 7.4474)
+    ],
+    ('zurich', 'geneve'): [
+        (47.3769, 8.5417), (47.3925, 8.0442), (47.2760, 7.8170), (46.9480, 7.4474),
+        (46.8065, 7.1620), (46.5840, 6.8860), (46.5197, 6.6323), (46.3830, 6.2350),
+        (46.2044, 6.1432)
+    ],
+    ('zurich', 'chur'): [
+        (47.3769, 8.5417), (47.2250, 8.8170), (47.1240, 9.0680), (47.0310, 9.4370),
+        (46.8499, 9.5329)
+    ],
+    ('bern', 'sion'): [
+        (46.9480, 7.4474), (46.7580, 7.6280), (46.5670, 7.6530), (46.3150, 7.6300),
+        (46.2331, 7.3606)
+    ],
+}
+
+
+def normalize_city(name: str) -> str:
+    """Normalize a city name to the key used in SWISS_CITY_COORDINATES"""
+    key = ' '.join(name.strip().lower().split())
+    return CITY_ALIASES.get(key, key)
+
+
+@lru_cache(maxsize=256)
+def route_geometry(origin: str, destination: str) -> Optional[Tuple[Tuple[float, float], ...]]:
+    """
+    Return a cached route polyline between two Swiss cities.
+
+    Known corridors use their motorway waypoints (in either direction), other
+    city pairs fall back to the direct line between the city centres.
+    """
+    origin_key, destination_key = normalize_city(origin), normalize_city(destination)
+    if origin_key not in SWISS_CITY_COORDINATES or destination_key not in SWISS_CITY_COORDINATES:
+        return None
+
+    if (origin_key, destination_key) in ROUTE_WAYPOINTS:
+        return tuple(ROUTE_WAYPOINTS[(origin_key, destination_key)])
+    if (destination_key, origin_key) in ROUTE_WAYPOINTS:
+        return tuple(reversed(ROUTE_WAYPOINTS[(destination_key, origin_key)]))
+
+    return (SWISS_CITY_COORDINATES[origin_key], SWISS_CITY_COORDINATES[destination_key])
+
+
+def is_cached_route(origin: str, destination: str) -> bool:
+    """Whether a city pair has stored motorway waypoints"""
+    pair = (normalize_city(origin), normalize_city(destination))
+    return pair in ROUTE_WAYPOINTS or pair[::-1] in ROUTE_WAYPOINTS
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> List[Tuple[float, float]]:
+    """Decode an encoded polyline (Google polyline algorithm) into (lat, lng) pairs
+
+    Raises ValueError for characters outside the encoding and truncated input.
+    """
+    coordinates = []
+    index = lat = lng = 0
+    factor = 10 ** precision
+
+    while index < len(encoded):
+        deltas = []
+        for _ in range(2):
+            result = shift = 0
+            while True:
+                if index >= len(encoded):
+                    raise ValueError('polyline is truncated')
+                byte = ord(encoded[index]) - 63
+                if not 0 <= byte < 64:
+                    raise ValueError(f'polyline contains an invalid character at position {index}')
+                index += 1
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coordinates.append((lat / factor, lng / factor))
+
+    return coordinates
+
+
+def segment_lengths_km(path: np.ndarray) -> np.ndarray:
+    """Haversine length of each polyline segment"""
+    lat = np.radians(path[:, 0])
+    lng = np.radians(path[:, 1])
+    a = (np.sin(np.diff(lat) / 2) ** 2 +
+         np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lng) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def match_corridor(path: Sequence, width_km: float,
+                   candidates_in_bbox: Callable[[float, float, float, float], np.ndarray],
+                   station_lat: np.ndarray, station_lng: np.ndarray
+                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Find stations within ``width_km`` of a polyline.
+
+    Segments are processed in chunks; each chunk's bounding box, buffered by the
+    corridor width, selects candidate stations from the spatial index, and only
+    those candidates are measured against the chunk's segments.
+
+    Returns station indices, their distance from the route and their distance
+    along the route (both in km).
+    """
+    path = np.asarray(path, dtype=np.float64)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+    if len(path) < 2:
+        return empty
+
+    lengths = segment_lengths_km(path)
+    route_offsets = np.concatenate(([0.0], np.cumsum(lengths)))
+
+    found_indices, found_offsets, found_along = [], [], []
+    for start in range(0, len(path) - 1, SEGMENTS_PER_CHUNK):
+        stop = min(start + SEGMENTS_PER_CHUNK, len(path) - 1)
+        chunk = path[start:stop + 1]
+
+        max_abs_lat = np.abs(chunk[:, 0]).max()
+        pad_lat = width_km / KM_PER_DEGREE
+        pad_lng = width_km / (KM_PER_DEGREE * max(np.cos(np.radians(max_abs_lat)), 1e-6))
+        candidates = candidates_in_bbox(
+            chunk[:, 0].min() - pad_lat, chunk[:, 1].min() - pad_lng,
+            chunk[:, 0].max() + pad_lat, chunk[:, 1].max() + pad_lng
+        )
+        if len(candidates) == 0:
+            continue
+
+        # Local equirectangular projection around the chunk (km)
+        x_scale = KM_PER_DEGREE * np.cos(np.radians(chunk[:, 0].mean()))
+        seg_x, seg_y = chunk[:, 1] * x_scale, chunk[:, 0] * KM_PER_DEGREE
+        ax, ay = seg_x[:-1], seg_y[:-1]
+        dx, dy = np.diff(seg_x), np.diff(seg_y)
+        seg_len_sq = np.maximum(dx * dx + dy * dy, 1e-12)
+
+        px = station_lng[candidates].astype(np.float64)[:, None] * x_scale
+        py = station_lat[candidates].astype(np.float64)[:, None] * KM_PER_DEGREE
+        t = np.clip(((px - ax) * dx + (py - ay) * dy) / seg_len_sq, 0.0, 1.0)
+        distances = np.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+        nearest = distances.argmin(axis=1)
+        rows = np.arange(len(candidates))
+        offsets = distances[rows, nearest]
+        within = offsets <= width_km
+
+        segment = start + nearest[within]
+        found_indices.append(candidates[within])
+        found_offsets.append(offsets[within])
+        found_along.append(route_offsets[segment] + t[rows, nearest][within] * lengths[segment])
+
+    if not found_indices:
+        return empty
+
+    indices = np.concatenate(found_indices)
+    offsets = np.concatenate(found_offsets)
+    along = np.concatenate(found_along)
+
+    # A station can match several chunks; keep its closest approach to the route
+    order = np.lexsort((offsets, indices))
+    indices, offsets, along = indices[order], offsets[order], along[order]
+    first = np.concatenate(([True], indices[1:] != indices[:-1]))
+    return indices[first], offsets[first], along[first]
@@ -0,0 +1,68 @@
+"""
+Seed Data Loader
+================
+
+Reads the reference rows shipped in database/seeds/*.sql so the AI services use
+the same canton and vehicle data as the database, without needing a database
+connection at startup.
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+SEED_DIR_ENV = 'SEED_DATA_DIR'
+
+_INSERT_PATTERN = re.compile(r"INSERT\s+INTO\s+(\w+)\s*\((.*?)\)\s*VALUES(.*?);", re.IGNORECASE | re.DOTALL)
+_TUPLE_PATTERN = re.compile(r"\(([^()]*)\)", re.DOTALL)
+_VALUE_PATTERN = re.compile(r"'((?:[^']|'')*)'|(NULL|true|false)|(-?\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def seed_directory() -> Optional[Path]:
+    """Locate database/seeds (env override, container layout or repository layout)"""
+    candidates = []
+    if os.getenv(SEED_DIR_ENV):
+        candidates.append(Path(os.environ[SEED_DIR_ENV]))
+
+    here = Path(__file__).resolve()
+    candidates.extend(parent / 'database' / 'seeds' for parent in here.parents[2:4])
+
+    for candidate in candidates:
+        if candidate.is_dir():
+            return candidate
+    return None
+
+
+def _parse_value(match):
+    text, keyword, number = match.groups()
+    if text is not None:
+        return text.replace("''", "'")
+    if keyword is not None:
+        return {'null': None, 'true': True, 'false': False}[keyword.lower()]
+    return float(number) if '.' in number else int(number)
+
+
+def parse_seed_inserts(sql: str, table: str) -> List[Dict]:
+    """Parse the rows of all INSERT statements for a table into dicts"""
+    sql = '\n'.join(line for line in sql.splitlines() if not line.lstrip().startswith('--'))
+    rows = []
+    for insert in _INSERT_PATTERN.finditer(sql):
+        if insert.group(1).lower() != table.lower():
+            continue
+        columns = [column.strip() for column in insert.group(2).split(',')]
+        for values in _TUPLE_PATTERN.finditer(insert.group(3)):
+            parsed = [_parse_value(match) for match in _VALUE_PATTERN.finditer(values.group(1))]
+            if len(parsed) != len(columns):
+                raise ValueError(f"Seed row for {table} has {len(parsed)} values, expected {len(columns)}")
+            rows.append(dict(zip(columns, parsed)))
+    return rows
+
+
+def load_seed_rows(filename: str, table: str) -> List[Dict]:
+    """Load rows for a table from a seed file in database/seeds"""
+    directory = seed_directory()
+    if directory is None:
+        raise FileNotFoundError(f"Seed directory not found (set {SEED_DIR_ENV})")
+    with open(directory / filename, encoding='utf-8') as seed_file:
+        return parse_seed_inserts(seed_file.read(), table)
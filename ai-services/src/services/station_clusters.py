@@ -0,0 +1,232 @@
+"""
+Charging Station Clusters
+=========================
+
+Hierarchical, per-zoom-level clusters of charging stations for map display.
+
+Stations are projected to Web Mercator and bucketed into a quadtree grid whose
+cells are CLUSTER_RADIUS_PX wide at each zoom level. The finest level is built
+from the stations, every coarser level from its children, so each zoom is a
+precomputed array of cluster aggregates. When the station store changes only
+the cells that actually changed are propagated up the hierarchy.
+"""
+
+import threading
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from src.services.charging_store import FAST_CHARGING_THRESHOLD_KW
+
+MIN_ZOOM = 0
+MAX_ZOOM = 16
+TILE_SIZE_PX = 256
+CLUSTER_RADIUS_PX = 64
+MAX_CLUSTERS_PER_RESPONSE = 500
+
+# Cells per axis at zoom z is 2 ** (z + LEVEL_OFFSET)
+LEVEL_OFFSET = int(np.log2(TILE_SIZE_PX // CLUSTER_RADIUS_PX))
+
+AGGREGATE_FIELDS = ('count', 'sum_x', 'sum_y', 'max_power_kw', 'fast_count', 'available_count', 'representative')
+
+
+def _cells_per_axis(zoom: int) -> int:
+    return 1 << (zoom + LEVEL_OFFSET)
+
+
+def _mercator(lat: np.ndarray, lng: np.ndarray):
+    """Project coordinates to the unit Web Mercator square"""
+    lat = np.clip(lat.astype(np.float64), -85.05112878, 85.05112878)
+    x = (lng.astype(np.float64) + 180.0) / 360.0
+    sin_lat = np.sin(np.radians(lat))
+    y = 0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)
+    return np.clip(x, 0.0, 1.0 - 1e-12), np.clip(y, 0.0, 1.0 - 1e-12)
+
+
+def _unmercator(x: np.ndarray, y: np.ndarray):
+    lng = x * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * y))))
+    return lat, lng
+
+
+class _Level:
+    """Cluster aggregates of one zoom level, sorted by cell key"""
+
+    def __init__(self, keys: np.ndarray, **fields):
+        self.keys = keys
+        for name in AGGREGATE_FIELDS:
+            setattr(self, name, fields[name])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def take(self, selector) -> '_Level':
+        return _Level(self.keys[selector], **{name: getattr(self, name)[selector] for name in AGGREGATE_FIELDS})
+
+    @staticmethod
+    def concat(levels: Sequence['_Level']) -> '_Level':
+        keys = np.concatenate([level.keys for level in levels])
+        order = np.argsort(keys, kind='stable')
+        fields = {name: np.concatenate([getattr(level, name) for level in levels])[order] for name in AGGREGATE_FIELDS}
+        return _Level(keys[order], **fields)
+
+
+def _aggregate(keys: np.ndarray, count, sum_x, sum_y, max_power, fast, available, representative) -> _Level:
+    """Reduce rows sharing a cell key into one cluster per key"""
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    size = len(unique_keys)
+
+    max_power_kw = np.zeros(size, dtype=np.float32)
+    np.maximum.at(max_power_kw, inverse, max_power)
+    rep = np.full(size, -1, dtype=np.int64)
+    np.maximum.at(rep, inverse, representative)
+
+    return _Level(
+        unique_keys,
+        count=np.bincount(inverse, weights=count, minlength=size).astype(np.int64),
+        sum_x=np.bincount(inverse, weights=sum_x, minlength=size),
+        sum_y=np.bincount(inverse, weights=sum_y, minlength=size),
+        max_power_kw=max_power_kw,
+        fast_count=np.bincount(inverse, weights=fast, minlength=size).astype(np.int64),
+        available_count=np.bincount(inverse, weights=available, minlength=size).astype(np.int64),
+        representative=rep
+    )
+
+
+def _parent_keys(keys: np.ndarray, child_zoom: int) -> np.ndarray:
+    child_cells = _cells_per_axis(child_zoom)
+    ix, iy = keys % child_cells, keys // child_cells
+    return (iy >> 1) * (child_cells >> 1) + (ix >> 1)
+
+
+def _aggregate_children(children: _Level, child_zoom: int) -> _Level:
+    return _aggregate(
+        _parent_keys(children.keys, child_zoom), children.count, children.sum_x, children.sum_y,
+        children.max_power_kw, children.fast_count, children.available_count, children.representative
+    )
+
+
+class StationClusterIndex:
+    """Per-zoom cluster hierarchy over a ChargingStationStore"""
+
+    def __init__(self, store, min_zoom: int = MIN_ZOOM, max_zoom: int = MAX_ZOOM):
+        self.store = store
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+        self._levels: Dict[int, _Level] = {}
+        self._columns = None
+        self._version = None
+        self._lock = threading.Lock()
+        self.last_refresh = {'mode': None, 'changed_cells': 0}
+
+    def refresh(self) -> None:
+        """Bring the hierarchy in line with the store, rebuilding only changed cells"""
+        if self._version == self.store.version:
+            return
+        with self._lock:
+            version = self.store.version
+            if self._version == version:
+                return
+
+            columns = self.store.snapshot()
+            leaf = self._build_leaf_level(columns)
+            previous = self._levels.get(self.max_zoom)
+            if previous is None:
+                self._levels = self._build_all(leaf)
+                self.last_refresh = {'mode': 'full', 'changed_cells': len(leaf)}
+            else:
+                changed = self._changed_keys(previous, leaf)
+                self._levels = self._propagate(leaf, changed)
+                self.last_refresh = {'mode': 'incremental', 'changed_cells': int(len(changed))}
+            self._columns = columns
+            self._version = version
+
+    def clusters(self, bbox: Sequence[float], zoom: int,
+                 limit: int = MAX_CLUSTERS_PER_RESPONSE) -> List[Dict]:
+        """Clusters intersecting a (west, south, east, north) bbox at a zoom level"""
+        self.refresh()
+        zoom = int(min(max(zoom, self.min_zoom), self.max_zoom))
+        level, columns = self._levels.get(zoom), self._columns
+        if level is None or not len(level):
+            return []
+
+        west, south, east, north = bbox
+        x0, y1 = _mercator(np.array([south]), np.array([west]))
+        x1, y0 = _mercator(np.array([north]), np.array([east]))
+        cells = _cells_per_axis(zoom)
+        ix, iy = level.keys % cells, level.keys // cells
+        in_view = ((ix >= int(x0[0] * cells)) & (ix <= int(x1[0] * cells)) &
+                   (iy >= int(y0[0] * cells)) & (iy <= int(y1[0] * cells)))
+        selected = level.take(np.flatnonzero(in_view))
+
+        # Keep the payload bounded even for oversized viewports
+        if len(selected) > limit:
+            selected = selected.take(np.argsort(-selected.count, kind='stable')[:limit])
+
+        lat, lng = _unmercator(selected.sum_x / selected.count, selected.sum_y / selected.count)
+        clusters = []
+        for i in range(len(selected)):
+            cluster = {
+                'lat': round(float(lat[i]), 5),
+                'lng': round(float(lng[i]), 5),
+                'count': int(selected.count[i]),
+                'max_power_kw': float(selected.max_power_kw[i]),
+                'fast_count': int(selected.fast_count[i]),
+                'available_count': int(selected.available_count[i])
+            }
+            if cluster['count'] == 1 and selected.representative[i] >= 0:
+                cluster['station_id'] = self.store.station_id(int(selected.representative[i]), columns)
+            clusters.append(cluster)
+        return clusters
+
+    def _build_leaf_level(self, columns) -> _Level:
+        located = np.flatnonzero(~np.isnan(columns.lat))
+        x, y = _mercator(columns.lat[located], columns.lng[located])
+        cells = _cells_per_axis(self.max_zoom)
+        keys = (y * cells).astype(np.int64) * cells + (x * cells).astype(np.int64)
+        return _aggregate(
+            keys, np.ones(len(located)), x, y,
+            columns.max_power_kw[located],
+            (columns.max_power_kw[located] >= FAST_CHARGING_THRESHOLD_KW).astype(np.float64),
+            (columns.available_count[located] > 0).astype(np.float64),
+            located.astype(np.int64)
+        )
+
+    def _build_all(self, leaf: _Level) -> Dict[int, _Level]:
+        levels = {self.max_zoom: leaf}
+        for zoom in range(self.max_zoom - 1, self.min_zoom - 1, -1):
+            levels[zoom] = _aggregate_children(levels[zoom + 1], zoom + 1)
+        return levels
+
+    def _propagate(self, leaf: _Level, changed: np.ndarray) -> Dict[int, _Level]:
+        levels = {self.max_zoom: leaf}
+        for zoom in range(self.max_zoom - 1, self.min_zoom - 1, -1):
+            children = levels[zoom + 1]
+            changed = np.unique(_parent_keys(changed, zoom + 1))
+            if not len(changed):
+                levels[zoom] = self._levels[zoom]
+                continue
+
+            stale = np.isin(self._levels[zoom].keys, changed)
+            affected = children.take(np.isin(_parent_keys(children.keys, zoom + 1), changed))
+            parts = [self._levels[zoom].take(~stale)]
+            if len(affected):
+                parts.append(_aggregate_children(affected, zoom + 1))
+            levels[zoom] = _Level.concat(parts)
+        return levels
+
+    @staticmethod
+    def _changed_keys(old: _Level, new: _Level) -> np.ndarray:
+        common, old_idx, new_idx = np.intersect1d(old.keys, new.keys, return_indices=True)
+        differs = np.zeros(len(common), dtype=np.bool_)
+        for name in AGGREGATE_FIELDS:
+            differs |= getattr(old, name)[old_idx] != getattr(new, name)[new_idx]
+        return np.concatenate([np.setxor1d(old.keys, new.keys), common[differs]])
+
+    def stats(self) -> Dict:
+        """Cluster counts per zoom level and details of the last refresh"""
+        return {
+            'zoom_levels': {zoom: len(level) for zoom, level in sorted(self._levels.items())},
+            'store_version': self._version,
+            'last_refresh': dict(self.last_refresh)
+        }
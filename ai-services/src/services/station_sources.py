@@ -0,0 +1,165 @@
+"""
+Charging Data Sources
+=====================
+
+Concurrent fan-out over every configured charging-station feed and spatial
+de-duplication of their results.
+
+The federal ich-tanke-strom dataset is always queried. Operator feeds are
+added through CHARGING_STATION_FEEDS ("name=url,name=url"), each answering
+with the same {"stations": [...]} document. All feeds are fetched at once and
+the wait is bounded by one shared timeout (capped to the request deadline),
+so a refresh takes as long as the slowest feed that answers in time instead
+of the sum of all of them.
+
+Feeds are merged in priority order (federal data first). A station is the
+same physical site as one already merged from another feed when the two are
+within SAME_SITE_RADIUS_M, or within SAME_OPERATOR_RADIUS_M and run by the
+same operator. Candidates are found through a spatial hash of ~100 m cells,
+so merging is linear in the number of stations. Duplicates collapse into one
+record: missing fields are filled in, connectors are merged per connector
+type and power, and every contributing feed is listed in "sources".
+"""
+
+import math
+import os
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+from src.services.deadline import propagate_deadline
+
+ICH_TANKE_URL = 'https://api.ich-tanke-strom.ch/stations'
+SAME_SITE_RADIUS_M = 25.0
+SAME_OPERATOR_RADIUS_M = 75.0
+METERS_PER_DEGREE = 111_320.0
+# Northern tip of Switzerland (47.81°N) rounded up; a degree of longitude is shortest there
+NORTHERN_LATITUDE = 48.0
+# Cell edge in degrees; ≥ SAME_OPERATOR_RADIUS_M in both directions up to NORTHERN_LATITUDE
+HASH_CELL_DEGREES = SAME_OPERATOR_RADIUS_M / (METERS_PER_DEGREE * math.cos(math.radians(NORTHERN_LATITUDE)))
+
+# Descriptive fields taken from a duplicate when the merged record lacks them
+FILL_FIELDS = ('name', 'address', 'canton', 'city', 'operator', 'pricing', 'network', '24_7')
+
+
+@dataclass(frozen=True)
+class StationFeed:
+    name: str
+    url: str
+
+
+def configured_feeds() -> List[StationFeed]:
+    """The federal feed plus the operator feeds from CHARGING_STATION_FEEDS"""
+    feeds = [StationFeed('ich_tanke', ICH_TANKE_URL)]
+    for entry in os.getenv('CHARGING_STATION_FEEDS', '').split(','):
+        name, separator, url = entry.partition('=')
+        if separator and name.strip() and url.strip():
+            feeds.append(StationFeed(name.strip(), url.strip()))
+    return feeds
+
+
+def fetch_feeds(feeds: Sequence[StationFeed], fetch: Callable[[StationFeed], List[Dict]],
+                timeout: float) -> Dict[str, Optional[List[Dict]]]:
+    """Query all feeds concurrently; feeds that fail or miss the timeout map to None"""
+    if not feeds:
+        return {}
+    executor = ThreadPoolExecutor(max_workers=len(feeds))
+    futures = {executor.submit(propagate_deadline(fetch), feed): feed for feed in feeds}
+    done, _ = wait(futures, timeout=timeout)
+    # Stragglers are not awaited; their own request timeouts end them
+    executor.shutdown(wait=False)
+
+    results = {}
+    for future, feed in futures.items():
+        if future in done and future.exception() is None:
+            results[feed.name] = future.result()
+        else:
+            results[feed.name] = None
+    return results
+
+
+def _operator_key(station: Dict) -> str:
+    words = (station.get('operator') or '').casefold().split()
+    return words[0] if words else ''
+
+
+def _distance_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Equirectangular distance, exact enough at site scale"""
+    x = (lng2 - lng1) * math.cos(math.radians((lat1 + lat2) / 2))
+    return math.hypot(x, lat2 - lat1) * METERS_PER_DEGREE
+
+
+def _same_site(a: Dict, b: Dict, distance: float) -> bool:
+    if distance <= SAME_SITE_RADIUS_M:
+        return True
+    operator = _operator_key(a)
+    return distance <= SAME_OPERATOR_RADIUS_M and bool(operator) and operator == _operator_key(b)
+
+
+def _merge_connectors(target: List[Dict], extra: List[Dict]) -> List[Dict]:
+    """Per (type, power) keep the larger connector list; a site seen by two feeds has the same plugs"""
+    groups = defaultdict(list)
+    for point in target:
+        groups[(point.get('type', ''), point.get('power_kw', 0) or 0)].append(point)
+    incoming = defaultdict(list)
+    for point in extra:
+        incoming[(point.get('type', ''), point.get('power_kw', 0) or 0)].append(point)
+
+    merged = list(target)
+    for key, points in incoming.items():
+        merged.extend(points[len(groups.get(key, ())):])
+    return merged
+
+
+def _merge_into(record: Dict, duplicate: Dict) -> None:
+    for field in FILL_FIELDS:
+        if record.get(field) in (None, '') and duplicate.get(field) not in (None, ''):
+            record[field] = duplicate[field]
+    if record.get('status') in (None, '', 'unknown') and duplicate.get('status'):
+        record['status'] = duplicate['status']
+    amenities = list(record.get('amenities') or [])
+    amenities.extend(a for a in duplicate.get('amenities') or [] if a not in amenities)
+    record['amenities'] = amenities
+    record['charging_points'] = _merge_connectors(record.get('charging_points') or [],
+                                                  duplicate.get('charging_points') or [])
+    record['sources'].append(duplicate.get('source', ''))
+
+
+def merge_stations(feeds: Sequence[List[Dict]]) -> List[Dict]:
+    """Merge station lists (highest priority first) into one list of physical sites"""
+    merged: List[Dict] = []
+    feeds_seen: List[set] = []
+    cells = defaultdict(list)
+
+    for feed_index, stations in enumerate(feeds):
+        for station in stations:
+            coordinates = station.get('coordinates') or {}
+            lat, lng = coordinates.get('lat'), coordinates.get('lng')
+            record = dict(station, sources=[station.get('source', '')])
+            if lat is None or lng is None:
+                merged.append(record)
+                feeds_seen.append({feed_index})
+                continue
+
+            row, col = int(math.floor(lat / HASH_CELL_DEGREES)), int(math.floor(lng / HASH_CELL_DEGREES))
+            best, best_distance = None, math.inf
+            # Only sites not yet reported by this feed can be duplicates; a feed lists each site once
+            for neighbour in ((row + dr, col + dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1)):
+                for candidate in cells.get(neighbour, ()):
+                    if feed_index in feeds_seen[candidate]:
+                        continue
+                    other = merged[candidate]['coordinates']
+                    distance = _distance_m(lat, lng, other['lat'], other['lng'])
+                    if distance < best_distance and _same_site(merged[candidate], station, distance):
+                        best, best_distance = candidate, distance
+
+            if best is None:
+                cells[(row, col)].append(len(merged))
+                merged.append(record)
+                feeds_seen.append({feed_index})
+            else:
+                _merge_into(merged[best], station)
+                feeds_seen[best].add(feed_index)
+
+    return merged
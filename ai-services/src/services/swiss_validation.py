@@ -0,0 +1,144 @@
+"""
+Swiss Identifier Validation
+===========================
+
+Deterministic, network-free checks for Swiss identifiers, applied before any
+upstream call (ZEFIX, OpenPLZ):
+
+- UID (CHE-123.456.789): format and mod-11 check digit
+- Postal codes: four digits within the Swiss/Liechtenstein range
+- Phone numbers: normalized to E.164 (+41 and nine national digits)
+
+Every check has a batch form; UID check digits and postal ranges are computed
+on NumPy arrays for the whole batch at once. A small TTL cache remembers values
+that upstream reported as unknown, so repeated lookups of the same value never
+reach the network again.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+UID_WEIGHTS = np.array([5, 4, 3, 2, 7, 6, 5, 4], dtype=np.int64)
+POSTAL_CODE_MIN = 1000
+POSTAL_CODE_MAX = 9699
+NEGATIVE_CACHE_TTL_SECONDS = 24 * 3600
+NEGATIVE_CACHE_MAX_ENTRIES = 50000
+
+# [0-9], not \d: other Unicode digits must be rejected as malformed, not reach the ASCII digit matrix
+_UID_PATTERN = re.compile(r'^(?:CHE)?([0-9]{9})$')
+_UID_SEPARATORS = re.compile(r'[\s.\-]')
+# +41 / 0041 with an optional "(0)" trunk prefix, or the national 0 prefix
+_PHONE_PATTERN = re.compile(r'^(?:\+41|0041)0?([1-9][0-9]{8})$|^0([1-9][0-9]{8})$')
+_PHONE_SEPARATORS = re.compile(r'[\s()./\-]')
+
+
+def _digits_matrix(values: Sequence[str], width: int) -> np.ndarray:
+    """(n, width) digit matrix of equal-length digit strings"""
+    if not len(values):
+        return np.empty((0, width), dtype=np.int64)
+    raw = np.frombuffer(''.join(values).encode('ascii'), dtype=np.uint8)
+    return (raw.reshape(len(values), width) - ord('0')).astype(np.int64)
+
+
+def normalize_uid(value: str) -> Optional[str]:
+    """The nine UID digits, or None if the value is not UID-shaped"""
+    match = _UID_PATTERN.match(_UID_SEPARATORS.sub('', (value or '').upper()))
+    return match.group(1) if match else None
+
+
+def format_uid(digits: str) -> str:
+    return f'CHE-{digits[:3]}.{digits[3:6]}.{digits[6:]}'
+
+
+def validate_uids(values: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Batch UID validation: normalized digits and a validity mask"""
+    digits = [normalize_uid(value) for value in values]
+    shaped = np.array([d is not None for d in digits], dtype=np.bool_)
+    valid = np.zeros(len(values), dtype=np.bool_)
+
+    if shaped.any():
+        matrix = _digits_matrix([d for d in digits if d is not None], 9)
+        check = (11 - (matrix[:, :8] @ UID_WEIGHTS) % 11) % 11
+        valid[shaped] = (check != 10) & (check == matrix[:, 8])
+
+    return {'digits': np.array([d or '' for d in digits], dtype=object), 'valid': valid}
+
+
+def validate_uid(value: str) -> Dict:
+    """Single UID check with a reason for rejection"""
+    digits = normalize_uid(value)
+    if digits is None:
+        return {'valid': False, 'error': 'UID must have the format CHE-123.456.789'}
+    if not validate_uids([digits])['valid'][0]:
+        return {'valid': False, 'uid': format_uid(digits), 'error': 'UID check digit is invalid'}
+    return {'valid': True, 'uid': format_uid(digits), 'digits': digits}
+
+
+def validate_postal_codes(values: Sequence) -> np.ndarray:
+    """Batch postal code check: four digits within the Swiss range"""
+    text = [str(value).strip() for value in values]
+    shaped = np.array([len(t) == 4 and t.isascii() and t.isdigit() for t in text], dtype=np.bool_)
+    numbers = np.array([int(t) if ok else 0 for t, ok in zip(text, shaped)], dtype=np.int64)
+    return shaped & (numbers >= POSTAL_CODE_MIN) & (numbers <= POSTAL_CODE_MAX)
+
+
+def validate_postal_code(value) -> Dict:
+    text = str(value or '').strip()
+    if not (text.isascii() and text.isdigit()) or len(text) != 4:
+        return {'valid': False, 'error': 'Swiss postal codes must be exactly 4 digits', 'format_error': True}
+    if not validate_postal_codes([text])[0]:
+        return {'valid': False, 'error': f'Swiss postal codes range from {POSTAL_CODE_MIN} to {POSTAL_CODE_MAX}',
+                'format_error': True}
+    return {'valid': True, 'postal_code': text}
+
+
+def normalize_phones(values: Sequence[str]) -> List[Optional[str]]:
+    """Batch phone normalization to +41XXXXXXXXX, None where not a Swiss number"""
+    normalized = []
+    for value in values:
+        match = _PHONE_PATTERN.match(_PHONE_SEPARATORS.sub('', value or ''))
+        normalized.append(f'+41{match.group(1) or match.group(2)}' if match else None)
+    return normalized
+
+
+def normalize_phone(value: str) -> Optional[str]:
+    return normalize_phones([value])[0]
+
+
+class NegativeCache:
+    """Bounded TTL set of values known to be invalid or unknown upstream"""
+
+    def __init__(self, ttl_seconds: float = NEGATIVE_CACHE_TTL_SECONDS,
+                 max_entries: int = NEGATIVE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+
+    def add(self, key: Hashable, reason: str) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, reason)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """The rejection reason if the key is known bad, else None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
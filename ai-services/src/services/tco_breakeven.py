@@ -0,0 +1,113 @@
+"""
+TCO Break-even Solver
+=====================
+
+"At what annual mileage, electricity price or holding period does the EV
+become cheaper than the comparison car?" for one or many vehicle pairs.
+
+- annual mileage and electricity price: the savings (ICE total minus EV
+  total) are affine in both, so two kernel evaluations per row give the exact
+  line and the root follows in closed form
+- holding period: financing, depreciation and the canton tax discount
+  schedule make the savings non-linear in time, so the first month with
+  non-negative savings is found by vectorized bisection over whole months
+
+All rows of a batch are solved together with the vectorized TCO engine.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from src.services.tco_engine import TcoInputs, compute_tco
+
+MAX_HOLDING_MONTHS = 240
+
+# Solvable quantity -> (TcoInputs column, unit)
+BREAK_EVEN_TARGETS = {
+    'annual_mileage': ('annual_mileage', 'km per year'),
+    'electricity_price': ('electricity_price', 'CHF per kWh'),
+    'holding_period': ('years', 'months'),
+}
+
+
+def _linear_root(inputs: TcoInputs, column: str):
+    """Root and slope of the savings as an affine function of one column"""
+    size = len(inputs)
+    current = getattr(inputs, column)
+    probe = np.where(current > 0, current * 2, current + 1)
+    batch = inputs.take(np.concatenate([np.arange(size), np.arange(size)]))
+    savings = compute_tco(batch.replace(**{column: np.concatenate([current, probe])})).savings
+    slope = (savings[size:] - savings[:size]) / (probe - current)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        root = current - savings[:size] / slope
+    root = np.where((slope != 0) & (root > 0), root, np.nan)
+    return root, slope, savings[:size]
+
+
+def _holding_period_root(inputs: TcoInputs):
+    """First whole month with EV savings >= 0, NaN when not reached within MAX_HOLDING_MONTHS"""
+    def savings_at(months: np.ndarray) -> np.ndarray:
+        return compute_tco(inputs.replace(years=months / 12)).savings
+
+    low = np.ones(len(inputs))
+    high = np.full(len(inputs), float(MAX_HOLDING_MONTHS))
+    at_low = savings_at(low) >= 0
+    reached = savings_at(high) >= 0
+    # Invariant for unsolved rows: savings < 0 at low, >= 0 at high
+    while True:
+        active = reached & ~at_low & (high - low > 1)
+        if not active.any():
+            break
+        middle = np.floor((low + high) / 2)
+        cheaper = savings_at(middle) >= 0
+        high = np.where(active & cheaper, middle, high)
+        low = np.where(active & ~cheaper, middle, low)
+
+    months = np.where(at_low, 1.0, np.where(reached, high, np.nan))
+    return months, np.ones(len(inputs)), compute_tco(inputs).savings
+
+
+def solve_break_even(inputs: TcoInputs, solve_for: str) -> List[Dict]:
+    """Break-even value of ``solve_for`` for every parameter set of ``inputs``"""
+    if solve_for not in BREAK_EVEN_TARGETS:
+        raise ValueError(f"solve_for must be one of {', '.join(BREAK_EVEN_TARGETS)}")
+    column, unit = BREAK_EVEN_TARGETS[solve_for]
+
+    if solve_for == 'holding_period':
+        root, slope, savings = _holding_period_root(inputs)
+        current = inputs.years * 12
+    else:
+        root, slope, savings = _linear_root(inputs, column)
+        current = getattr(inputs, column)
+
+    decimals = 4 if solve_for == 'electricity_price' else 0
+    rows = []
+    for value, rising, now, saving in zip(root.tolist(), (slope > 0).tolist(), current.tolist(), savings.tolist()):
+        solved = not np.isnan(value)
+        rows.append({
+            'solve_for': solve_for,
+            'break_even': (round(value, decimals) if decimals else int(np.ceil(value))) if solved else None,
+            'unit': unit,
+            # EV cheaper above or below the break-even value
+            'ev_cheaper': ('above' if rising else 'below') if solved else None,
+            'current_value': round(now, 4),
+            'current_savings': round(saving, 2)
+        })
+    return rows
+
+
+def vehicle_pairs(catalog: Sequence, comparison_vehicles: Sequence[Dict],
+                  base: Optional[Dict] = None) -> List[Dict]:
+    """/calculate parameter sets for every catalog EV × comparison vehicle pair"""
+    base = dict(base or {})
+    return [
+        {
+            **base,
+            'vehicle': {'model': ev.model, 'purchase_price': ev.purchase_price, 'consumption': ev.efficiency_kwh_100km,
+                        'power_kw': ev.power_kw, 'weight_kg': ev.weight_kg},
+            'comparison_vehicle': dict(comparison)
+        }
+        for ev in catalog
+        for comparison in comparison_vehicles
+    ]
@@ -0,0 +1,187 @@
+"""
+TCO Result Cache
+================
+
+Memoized /api/tco/calculate results keyed by a canonical hash of the request.
+
+The request is normalized first: /calculate defaults are filled in,
+integers and floats with the same value compare equal, strings are trimmed
+and canton codes upper-cased, and the result is serialized as sorted-key
+JSON. The hash of that text and the reference data version (canton table,
+tariff table, residual value curves and cost constants) becomes:
+
+- the stable calculation_id ("TCO-" + 16 hex digits)
+- the ETag (the same 16 digits), so a client repeating a request with If-None-Match gets 304
+- the cache key of a bounded in-process LRU, optionally backed by Redis
+  (TCO_CACHE_REDIS_URL) so the workers of a deployment share results
+
+A result is recomputed only when its inputs or the reference data change:
+a new canton, tariff or residual value table or changed constants give every
+request a new key.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from numbers import Real
+from typing import Any, Dict, Mapping, Optional
+
+from src.services.canton_reference import get_canton_table
+from src.services.electricity_tariffs import get_tariff_table
+from src.services.residual_values import get_residual_table
+from src.services import tco_engine
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_RESULTS = 2048
+REDIS_URL_ENV = 'TCO_CACHE_REDIS_URL'
+REDIS_KEY_PREFIX = 'tco:result:'
+REDIS_TTL_SECONDS = 7 * 24 * 3600
+
+
+def _normalize(value: Any, key: Optional[str] = None) -> Any:
+    if isinstance(value, Mapping):
+        return {str(k): _normalize(v, str(k)) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, Real):
+        return float(value)
+    if isinstance(value, str):
+        value = value.strip()
+        return value.upper() if key == 'canton' else value
+    return value
+
+
+def canonical_parameters(data: Mapping) -> Dict:
+    """/calculate request with defaults filled in and values normalized"""
+    params = _normalize(data or {})
+    for key, default in tco_engine.DEFAULT_PARAMETERS.items():
+        params.setdefault(key, _normalize(default, key))
+    params['vehicle'] = {**_normalize(tco_engine.DEFAULT_EV), **params.get('vehicle', {})}
+    if params.get('comparison_vehicle'):
+        params['comparison_vehicle'] = {**_normalize(tco_engine.DEFAULT_ICE), **params['comparison_vehicle']}
+    else:
+        params.pop('comparison_vehicle', None)
+    return params
+
+
+def reference_version() -> str:
+    """Version of everything besides the request that a TCO result depends on"""
+    constants = json.dumps([
+        tco_engine.SWISS_CONSTANTS, tco_engine.HOME_CHARGER_COST, tco_engine.EV_ANNUAL_MAINTENANCE,
+        tco_engine.ICE_ANNUAL_MAINTENANCE, tco_engine.BASE_ANNUAL_INSURANCE
+    ], sort_keys=True)
+    constants_version = hashlib.sha1(constants.encode()).hexdigest()[:12]
+    return (f'{get_canton_table().version}-{get_tariff_table().version}-{get_residual_table().version}-'
+            f'{constants_version}')
+
+
+def parameters_hash(data: Mapping) -> str:
+    """Hex digest of the canonical parameters and the reference version"""
+    canonical = json.dumps(canonical_parameters(data), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(f'{reference_version()}|{canonical}'.encode()).hexdigest()
+
+
+def etag(digest: str) -> str:
+    """Entity tag (unquoted) of a parameter hash"""
+    return digest[:16]
+
+
+def calculation_id(digest: str) -> str:
+    return f'TCO-{etag(digest)}'
+
+
+class TcoResultCache:
+    """Bounded LRU of results by parameter hash with an optional shared Redis tier"""
+
+    def __init__(self, max_entries: int = MAX_CACHED_RESULTS, redis_client=None,
+                 ttl_seconds: int = REDIS_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, Dict]' = OrderedDict()
+        self._ids: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, digest: str, result: Dict) -> None:
+        with self._lock:
+            self._entries[digest] = result
+            self._entries.move_to_end(digest)
+            self._ids[calculation_id(digest)] = digest
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._ids.pop(calculation_id(evicted), None)
+
+    def _redis_get(self, digest: str) -> Optional[Dict]:
+        if self.redis is None:
+            return None
+        try:
+            payload = self.redis.get(REDIS_KEY_PREFIX + calculation_id(digest))
+            return json.loads(payload) if payload else None
+        except Exception as e:
+            logger.warning(f"TCO cache read from Redis failed: {str(e)}")
+            return None
+
+    def get(self, digest: str) -> Optional[Dict]:
+        """Cached result of a parameter hash, from memory or Redis"""
+        with self._lock:
+            result = self._entries.get(digest)
+            if result is not None:
+                self._entries.move_to_end(digest)
+        if result is None:
+            result = self._redis_get(digest)
+            if result is not None:
+                self._remember(digest, result)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return result
+
+    def get_by_id(self, calc_id: str) -> Optional[Dict]:
+        """Cached result by calculation_id (memory first, then Redis)"""
+        with self._lock:
+            digest = self._ids.get(calc_id)
+            result = self._entries.get(digest) if digest else None
+        if result is not None or self.redis is None:
+            return result
+        try:
+            payload = self.redis.get(REDIS_KEY_PREFIX + calc_id)
+            return json.loads(payload) if payload else None
+        except Exception as e:
+            logger.warning(f"TCO cache read from Redis failed: {str(e)}")
+            return None
+
+    def put(self, digest: str, result: Dict) -> None:
+        self._remember(digest, result)
+        if self.redis is not None:
+            try:
+                self.redis.setex(REDIS_KEY_PREFIX + calculation_id(digest), self.ttl_seconds, json.dumps(result))
+            except Exception as e:
+                logger.warning(f"TCO cache write to Redis failed: {str(e)}")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'redis': self.redis is not None}
+
+
+def create_result_cache() -> TcoResultCache:
+    """Cache with the Redis tier when TCO_CACHE_REDIS_URL is configured"""
+    url = os.getenv(REDIS_URL_ENV)
+    client = None
+    if url:
+        try:
+            import redis
+            client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        except Exception as e:
+            logger.warning(f"TCO cache Redis tier disabled: {str(e)}")
+    return TcoResultCache(redis_client=client)
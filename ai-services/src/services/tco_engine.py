@@ -0,0 +1,396 @@
+"""
+TCO Engine
+==========
+
+Vectorized EV vs ICE total cost of ownership for many parameter sets at once.
+
+The parameter sets use the request format of /api/tco/calculate (vehicle,
+comparison_vehicle, annual_mileage, calculation_period_years, canton,
+postal_code, commune, down_payment, financing_rate). pack_tco_inputs() turns
+N of them into aligned parameter arrays and compute_tco() evaluates financing,
+energy, maintenance, insurance, road tax, depreciation and savings for all of
+them in one NumPy pass, using the same formulas and constants as
+calculate_ev_costs / calculate_ice_costs (energy at the flat kWh price).
+Residual values come from the per-model curves of residual_values, matched by
+vehicle.model and comparison_vehicle.model.
+
+Scenario analysis, risk simulation and sensitivity analysis work on the packed
+arrays directly: replace a column and compute again.
+"""
+
+import dataclasses
+import threading
+from dataclasses import dataclass
+from numbers import Real
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+from src.services.canton_reference import MAX_SCHEDULE_YEARS, CantonTable, get_canton_table
+from src.services.cost_matrix import CantonArrays
+from src.services.electricity_tariffs import electricity_price as resolve_electricity_price
+from src.services.residual_values import ResidualValueTable, get_residual_table
+
+# Swiss-specific constants
+SWISS_CONSTANTS = {
+    'electricity_price_per_kwh': 0.21,  # CHF per kWh (average Swiss price)
+    'gasoline_price_per_liter': 1.65,   # CHF per liter
+    'co2_tax_per_liter': 0.096,         # CHF per liter CO2 tax
+    'road_tax_ice': 300,                # CHF per year for ICE vehicles
+    'road_tax_ev': 0,                   # CHF per year for EVs (most cantons)
+    'insurance_factor_ev': 0.95,        # EVs typically 5% cheaper to insure
+    'maintenance_factor_ev': 0.6,       # EVs need 40% less maintenance
+}
+
+HOME_CHARGER_COST = 2500                # CHF for installation
+EV_ANNUAL_MAINTENANCE = 800             # CHF per year
+ICE_ANNUAL_MAINTENANCE = 1200           # CHF per year
+BASE_ANNUAL_INSURANCE = 1200            # CHF per year
+
+# Request defaults of /api/tco/calculate
+DEFAULT_PARAMETERS = {
+    'annual_mileage': 15000,
+    'calculation_period_years': 5,
+    'canton': 'ZH',
+    'down_payment': 20000,
+    'financing_rate': 0.039,
+}
+# Default EV specification for canton road tax (CADILLAC LYRIQ Luxury seed data)
+DEFAULT_EV_POWER_KW = 250
+DEFAULT_EV_WEIGHT_KG = 2235
+DEFAULT_EV = {'purchase_price': 85200, 'consumption': 18.5, 'power_kw': DEFAULT_EV_POWER_KW,
+              'weight_kg': DEFAULT_EV_WEIGHT_KG}
+DEFAULT_ICE = {'purchase_price': 75000, 'consumption': 8.5}
+
+
+def merge_parameters(base: Mapping, override: Mapping) -> Dict:
+    """Scenario parameters: override on top of base, vehicle dicts merged key by key"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            merged[key] = {**merged[key], **value}
+        else:
+            merged[key] = value
+    return merged
+
+
+def _number(source: Mapping, key: str, default, label: Optional[str] = None, minimum: float = 0.0,
+            strict: bool = False) -> float:
+    value = source.get(key)
+    if value is None:
+        return float(default)
+    if isinstance(value, bool) or not isinstance(value, Real):
+        raise ValueError(f'{label or key} must be a number')
+    if value < minimum or (strict and value == minimum):
+        raise ValueError(f"{label or key} must be {'greater than' if strict else 'at least'} {minimum:g}")
+    return float(value)
+
+
+def canton_code(params: Mapping) -> str:
+    """Upper-cased canton of a parameter set, the default canton when none is given"""
+    canton = params.get('canton')
+    return str(canton if canton is not None else DEFAULT_PARAMETERS['canton']).strip().upper()
+
+
+@dataclass(frozen=True)
+class TcoInputs:
+    """Packed TCO parameters, one array element per parameter set"""
+    purchase_price: np.ndarray
+    down_payment: np.ndarray
+    financing_rate: np.ndarray
+    years: np.ndarray
+    annual_mileage: np.ndarray
+    ev_consumption: np.ndarray          # kWh per 100 km
+    electricity_price: np.ndarray       # CHF per kWh
+    ev_base_road_tax: np.ndarray        # annual canton tax before the EV discount, 0 outside the table
+    canton_index: np.ndarray            # row in the CantonArrays of the table
+    ice_purchase_price: np.ndarray
+    ice_consumption: np.ndarray         # liters per 100 km
+    fuel_price: np.ndarray              # CHF per liter including CO2 tax
+    ice_road_tax: np.ndarray            # annual
+    ev_residual_curve: np.ndarray       # curve index in the ResidualValueTable
+    ice_residual_curve: np.ndarray
+    ev_residual_factor: np.ndarray      # multiplier on the curve value, 1 unless simulated
+    ice_residual_factor: np.ndarray
+    has_comparison: np.ndarray          # bool, an ICE comparison vehicle was given
+    cantons: CantonArrays
+    residuals: ResidualValueTable
+
+    def __len__(self) -> int:
+        return len(self.purchase_price)
+
+    def replace(self, **columns) -> 'TcoInputs':
+        """Copy with some columns replaced (scalars are broadcast)"""
+        size = len(self)
+        return dataclasses.replace(self, **{
+            name: np.broadcast_to(np.asarray(value, dtype=getattr(self, name).dtype), (size,))
+            for name, value in columns.items()
+        })
+
+    def take(self, indices) -> 'TcoInputs':
+        """Parameter sets at the given indices (repeats allowed)"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return dataclasses.replace(self, **{
+            field.name: getattr(self, field.name)[indices]
+            for field in dataclasses.fields(self) if field.name not in ('cantons', 'residuals')
+        })
+
+
+_arrays_lock = threading.Lock()
+_canton_arrays: Dict[str, CantonArrays] = {}
+
+
+def canton_arrays(table: CantonTable) -> CantonArrays:
+    """CantonArrays of the whole table, built once per table version"""
+    arrays = _canton_arrays.get(table.version)
+    if arrays is None:
+        arrays = CantonArrays(list(table))
+        with _arrays_lock:
+            _canton_arrays.clear()
+            _canton_arrays[table.version] = arrays
+    return arrays
+
+
+def pack_tco_inputs(parameter_sets: Sequence[Mapping], table: Optional[CantonTable] = None) -> TcoInputs:
+    """Validate parameter sets in the /calculate format and pack them into arrays"""
+    table = table or get_canton_table()
+    cantons = canton_arrays(table)
+    residuals = get_residual_table()
+    curves: Dict = {}
+    canton_rows = {code: row for row, code in enumerate(cantons.codes)}
+    fuel_price = SWISS_CONSTANTS['gasoline_price_per_liter'] + SWISS_CONSTANTS['co2_tax_per_liter']
+    prices: Dict = {}
+    defaults = DEFAULT_PARAMETERS
+
+    size = len(parameter_sets)
+    columns = {name: np.empty(size) for name in (
+        'purchase_price', 'down_payment', 'financing_rate', 'years', 'annual_mileage', 'ev_consumption',
+        'electricity_price', 'ev_power', 'ev_weight', 'ice_purchase_price', 'ice_consumption',
+        'ice_power', 'ice_weight'
+    )}
+    canton_index = np.zeros(size, dtype=np.int64)
+    in_table = np.zeros(size, dtype=bool)
+    ice_canton_tax = np.zeros(size, dtype=bool)
+    has_comparison = np.zeros(size, dtype=bool)
+    residual_curve = np.zeros((2, size), dtype=np.int64)
+
+    for i, params in enumerate(parameter_sets):
+        vehicle = params.get('vehicle') or {}
+        comparison = params.get('comparison_vehicle') or {}
+        columns['purchase_price'][i] = _number(vehicle, 'purchase_price', DEFAULT_EV['purchase_price'],
+                                               'vehicle.purchase_price')
+        columns['down_payment'][i] = _number(params, 'down_payment', defaults['down_payment'])
+        columns['financing_rate'][i] = _number(params, 'financing_rate', defaults['financing_rate'])
+        columns['years'][i] = _number(params, 'calculation_period_years', defaults['calculation_period_years'],
+                                      strict=True)
+        columns['annual_mileage'][i] = _number(params, 'annual_mileage', defaults['annual_mileage'], strict=True)
+        columns['ev_consumption'][i] = _number(vehicle, 'consumption', DEFAULT_EV['consumption'], 'vehicle.consumption')
+        columns['ev_power'][i] = _number(vehicle, 'power_kw', DEFAULT_EV['power_kw'], 'vehicle.power_kw')
+        columns['ev_weight'][i] = _number(vehicle, 'weight_kg', DEFAULT_EV['weight_kg'], 'vehicle.weight_kg')
+        columns['ice_purchase_price'][i] = _number(comparison, 'purchase_price', DEFAULT_ICE['purchase_price'],
+                                                   'comparison_vehicle.purchase_price')
+        columns['ice_consumption'][i] = _number(comparison, 'consumption', DEFAULT_ICE['consumption'],
+                                                'comparison_vehicle.consumption')
+        columns['ice_power'][i] = _number(comparison, 'power_kw', 0, 'comparison_vehicle.power_kw')
+        columns['ice_weight'][i] = _number(comparison, 'weight_kg', 0, 'comparison_vehicle.weight_kg')
+        has_comparison[i] = bool(comparison)
+        for row, (model, powertrain) in enumerate(((vehicle.get('model'), 'ev'), (comparison.get('model'), 'ice'))):
+            key = (model if isinstance(model, str) else None, powertrain)
+            if key not in curves:
+                curves[key] = residuals.curve_index(model, powertrain)
+            residual_curve[row, i] = curves[key]
+
+        row = canton_rows.get(canton_code(params))
+        if row is not None:
+            canton_index[i] = row
+            in_table[i] = True
+            ice_canton_tax[i] = 'power_kw' in comparison and 'weight_kg' in comparison
+
+        location = (row, params.get('postal_code'), params.get('commune'))
+        if location not in prices:
+            prices[location] = resolve_electricity_price(
+                location[1], location[2], cantons.cantons[row] if row is not None else None,
+                SWISS_CONSTANTS['electricity_price_per_kwh']
+            )[0]
+        columns['electricity_price'][i] = prices[location]
+
+    def base_tax(power, weight):
+        return (cantons.tax_flat[canton_index] + cantons.tax_per_kw[canton_index] * power +
+                cantons.tax_per_kg[canton_index] * weight)
+
+    return TcoInputs(
+        purchase_price=columns['purchase_price'],
+        down_payment=columns['down_payment'],
+        financing_rate=columns['financing_rate'],
+        years=columns['years'],
+        annual_mileage=columns['annual_mileage'],
+        ev_consumption=columns['ev_consumption'],
+        electricity_price=columns['electricity_price'],
+        ev_base_road_tax=np.where(in_table, base_tax(columns['ev_power'], columns['ev_weight']),
+                                  SWISS_CONSTANTS['road_tax_ev']),
+        canton_index=canton_index,
+        ice_purchase_price=columns['ice_purchase_price'],
+        ice_consumption=columns['ice_consumption'],
+        fuel_price=np.full(size, fuel_price),
+        ice_road_tax=np.where(ice_canton_tax, base_tax(columns['ice_power'], columns['ice_weight']),
+                              SWISS_CONSTANTS['road_tax_ice']),
+        ev_residual_curve=residual_curve[0],
+        ice_residual_curve=residual_curve[1],
+        ev_residual_factor=np.ones(size),
+        ice_residual_factor=np.ones(size),
+        has_comparison=has_comparison,
+        cantons=cantons,
+        residuals=residuals
+    )
+
+
+def monthly_payment(principal: np.ndarray, annual_rate: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Annuity payment per month, rounded to the Rappen like calculate_monthly_payment"""
+    payments = years * 12
+    monthly_rate = annual_rate / 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.power(1 + monthly_rate, payments)
+        annuity = np.round(principal * monthly_rate * growth / (growth - 1), 2)
+    return np.where(annual_rate == 0, principal / payments, annuity)
+
+
+@dataclass(frozen=True)
+class TcoResult:
+    """Kernel output, one element per parameter set"""
+    ev_monthly_payment: np.ndarray
+    ev_total_financing: np.ndarray
+    ev_interest_paid: np.ndarray
+    ev_annual_energy_kwh: np.ndarray
+    ev_annual_energy_cost: np.ndarray
+    ev_energy_total: np.ndarray
+    ev_maintenance_total: np.ndarray
+    ev_insurance_total: np.ndarray
+    ev_road_tax_total: np.ndarray
+    ev_residual_value: np.ndarray
+    ev_total_cost: np.ndarray
+    ice_monthly_payment: np.ndarray
+    ice_total_financing: np.ndarray
+    ice_interest_paid: np.ndarray
+    ice_annual_fuel_liters: np.ndarray
+    ice_annual_fuel_cost: np.ndarray
+    ice_fuel_total: np.ndarray
+    ice_maintenance_total: np.ndarray
+    ice_insurance_total: np.ndarray
+    ice_road_tax_total: np.ndarray
+    ice_residual_value: np.ndarray
+    ice_total_cost: np.ndarray
+    savings: np.ndarray                 # ICE total minus EV total
+
+    def __len__(self) -> int:
+        return len(self.ev_total_cost)
+
+
+def compute_tco(inputs: TcoInputs) -> TcoResult:
+    """EV and ICE costs of every parameter set in one pass"""
+    years = inputs.years
+    whole_years = np.maximum(years.astype(np.int64), 0)
+    cantons = inputs.cantons
+
+    ev_payment = monthly_payment(inputs.purchase_price - inputs.down_payment, inputs.financing_rate, years)
+    ev_financing = ev_payment * 12 * years
+    ev_energy_kwh = inputs.annual_mileage / 100 * inputs.ev_consumption
+    ev_energy_cost = ev_energy_kwh * inputs.electricity_price
+    ev_energy_total = ev_energy_cost * years
+    ev_maintenance = EV_ANNUAL_MAINTENANCE * years
+    ev_insurance = BASE_ANNUAL_INSURANCE * SWISS_CONSTANTS['insurance_factor_ev'] * years
+    discounted_years = (
+        cantons.cumulative_discount[inputs.canton_index, np.minimum(whole_years, MAX_SCHEDULE_YEARS)] +
+        cantons.final_discount[inputs.canton_index] * np.maximum(whole_years - MAX_SCHEDULE_YEARS, 0)
+    )
+    ev_road_tax = inputs.ev_base_road_tax * (years - discounted_years)
+    months = years * 12
+    ev_residual = inputs.purchase_price * np.minimum(
+        inputs.residuals.residual_share(inputs.ev_residual_curve, months, inputs.annual_mileage) *
+        inputs.ev_residual_factor, 1.0)
+    ev_total = (ev_financing + ev_energy_total + HOME_CHARGER_COST +
+                ev_maintenance + ev_insurance + ev_road_tax)
+
+    ice_payment = monthly_payment(inputs.ice_purchase_price - inputs.down_payment, inputs.financing_rate, years)
+    ice_financing = ice_payment * 12 * years
+    ice_liters = inputs.annual_mileage / 100 * inputs.ice_consumption
+    ice_fuel_cost = ice_liters * inputs.fuel_price
+    ice_fuel_total = ice_fuel_cost * years
+    ice_maintenance = ICE_ANNUAL_MAINTENANCE * years
+    ice_insurance = BASE_ANNUAL_INSURANCE * years
+    ice_road_tax = inputs.ice_road_tax * years
+    ice_residual = inputs.ice_purchase_price * np.minimum(
+        inputs.residuals.residual_share(inputs.ice_residual_curve, months, inputs.annual_mileage) *
+        inputs.ice_residual_factor, 1.0)
+    ice_total = ice_financing + ice_fuel_total + ice_maintenance + ice_insurance + ice_road_tax
+
+    return TcoResult(
+        ev_monthly_payment=ev_payment,
+        ev_total_financing=ev_financing,
+        ev_interest_paid=ev_financing - (inputs.purchase_price - inputs.down_payment),
+        ev_annual_energy_kwh=ev_energy_kwh,
+        ev_annual_energy_cost=ev_energy_cost,
+        ev_energy_total=ev_energy_total,
+        ev_maintenance_total=ev_maintenance,
+        ev_insurance_total=ev_insurance,
+        ev_road_tax_total=ev_road_tax,
+        ev_residual_value=ev_residual,
+        ev_total_cost=ev_total,
+        ice_monthly_payment=ice_payment,
+        ice_total_financing=ice_financing,
+        ice_interest_paid=ice_financing - (inputs.ice_purchase_price - inputs.down_payment),
+        ice_annual_fuel_liters=ice_liters,
+        ice_annual_fuel_cost=ice_fuel_cost,
+        ice_fuel_total=ice_fuel_total,
+        ice_maintenance_total=ice_maintenance,
+        ice_insurance_total=ice_insurance,
+        ice_road_tax_total=ice_road_tax,
+        ice_residual_value=ice_residual,
+        ice_total_cost=ice_total,
+        savings=ice_total - ev_total
+    )
+
+
+def _rounded(values: np.ndarray) -> List[float]:
+    return np.round(values, 2).tolist()
+
+
+def result_rows(inputs: TcoInputs, result: TcoResult) -> Iterator[Dict]:
+    """Per parameter set summaries (ICE and savings only where a comparison vehicle was given)"""
+    years = inputs.years
+    distance = inputs.annual_mileage * years
+    ev = zip(
+        _rounded(result.ev_total_cost), _rounded(result.ev_total_cost / years),
+        np.round(result.ev_total_cost / distance, 4).tolist(), _rounded(result.ev_monthly_payment),
+        _rounded(result.ev_total_financing), _rounded(result.ev_interest_paid),
+        inputs.electricity_price.tolist(), _rounded(result.ev_annual_energy_cost), _rounded(result.ev_energy_total),
+        _rounded(result.ev_maintenance_total), _rounded(result.ev_insurance_total),
+        _rounded(result.ev_road_tax_total), _rounded(result.ev_residual_value),
+        _rounded(inputs.purchase_price - result.ev_residual_value)
+    )
+    ice = zip(
+        _rounded(result.ice_total_cost), _rounded(result.ice_total_cost / years),
+        np.round(result.ice_total_cost / distance, 4).tolist(), _rounded(result.ice_monthly_payment),
+        _rounded(result.ice_total_financing), _rounded(result.ice_annual_fuel_cost), _rounded(result.ice_fuel_total),
+        _rounded(result.ice_maintenance_total), _rounded(result.ice_insurance_total),
+        _rounded(result.ice_road_tax_total), _rounded(result.ice_residual_value)
+    )
+    savings = zip(
+        _rounded(result.savings), _rounded(result.savings / years),
+        _rounded(result.ice_fuel_total - result.ev_energy_total),
+        _rounded(result.ice_maintenance_total - result.ev_maintenance_total),
+        _rounded(result.ice_road_tax_total - result.ev_road_tax_total)
+    )
+    keys_ev = ('total_cost', 'annual_cost', 'cost_per_km', 'monthly_payment', 'total_financing', 'interest_paid',
+               'electricity_price_per_kwh', 'annual_energy_cost', 'energy_total', 'maintenance_total',
+               'insurance_total', 'road_tax_total', 'residual_value', 'depreciation')
+    keys_ice = ('total_cost', 'annual_cost', 'cost_per_km', 'monthly_payment', 'total_financing',
+                'annual_fuel_cost', 'fuel_total', 'maintenance_total', 'insurance_total', 'road_tax_total',
+                'residual_value')
+    keys_savings = ('total_savings', 'annual_savings', 'fuel_savings', 'maintenance_savings', 'tax_savings')
+
+    for comparison, ev_values, ice_values, saving_values in zip(inputs.has_comparison.tolist(), ev, ice, savings):
+        yield {
+            'ev_costs': dict(zip(keys_ev, ev_values)),
+            'ice_costs': dict(zip(keys_ice, ice_values)) if comparison else None,
+            'savings': dict(zip(keys_savings, saving_values)) if comparison else None
+        }
@@ -0,0 +1,258 @@
+"""
+TCO History
+===========
+
+Write-behind persistence of served /api/tco/calculate results into the
+tco_calculations table for analytics. Every served calculation is one row:
+fresh results, cache hits and 304 revalidations (as long as the result is
+still cached) alike, so repeated calculations share a calculation_id. The
+row's calculation_date is when the result was served, not the calculated_at
+of the (possibly cached) result.
+
+The request path only puts the finished result on a bounded queue and never
+waits for the database. One background thread takes rows off the queue and
+bulk-inserts them with a single executemany INSERT per batch, flushing when
+TCO_HISTORY_BATCH_ROWS rows are collected or TCO_HISTORY_FLUSH_MS after the
+first row of a batch arrived, whichever comes first.
+
+Backpressure: when the database falls behind and the queue
+(TCO_HISTORY_QUEUE_SIZE rows) is full, new results wait at most
+ENQUEUE_TIMEOUT_SECONDS for a slot and are then dropped and counted, so a
+slow or unavailable database costs history rows, not request latency.
+
+submit() only queues results that fit the table: the canton must be one of
+the swiss_canton codes (the result is rejected and counted otherwise), and
+customer_id / vehicle_id, UUID foreign keys, are stored as NULL unless they
+are UUIDs. When a batch still violates a constraint it is rolled back and
+retried row by row, so only the offending rows are dropped and counted as
+failed.
+
+drain() (registered with atexit by init_app) stops accepting rows and writes
+everything still queued before the process exits.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+
+from src.models.tco_calculation import TcoCalculation
+from src.models.user import db
+from src.services.canton_reference import get_canton_table
+
+logger = logging.getLogger(__name__)
+
+BATCH_ROWS_ENV = 'TCO_HISTORY_BATCH_ROWS'
+FLUSH_MS_ENV = 'TCO_HISTORY_FLUSH_MS'
+QUEUE_SIZE_ENV = 'TCO_HISTORY_QUEUE_SIZE'
+DEFAULT_BATCH_ROWS = 500
+DEFAULT_FLUSH_MS = 200
+DEFAULT_QUEUE_SIZE = 10000
+ENQUEUE_TIMEOUT_SECONDS = 0.002
+IDLE_POLL_SECONDS = 0.1
+DRAIN_TIMEOUT_SECONDS = 10.0
+
+
+def _uuid_or_none(value) -> Optional[str]:
+    """Canonical form of a UUID reference, None for anything else"""
+    try:
+        return str(uuid.UUID(str(value))) if value else None
+    except ValueError:
+        return None
+
+
+def _canton_code(value) -> Optional[str]:
+    canton = get_canton_table().get(value) if isinstance(value, str) else None
+    return canton.code if canton else None
+
+
+def calculation_record(result: Mapping, customer_id: Optional[str] = None,
+                       vehicle_id: Optional[str] = None, served_at: Optional[datetime] = None) -> Dict:
+    """tco_calculations row of a /calculate result, dated when it was served (now by default)"""
+    parameters = result['parameters']
+    ev = result['ev_costs']
+    years = parameters['calculation_period_years']
+    energy = {key: value for key, value in ev['energy_costs'].items() if key != 'simulation'}
+    simulation = ev['energy_costs'].get('simulation')
+    canton = _canton_code(parameters['canton'])
+    if canton is None:
+        raise ValueError(f"Unknown canton '{parameters['canton']}'")
+    return {
+        'calculation_id': result['calculation_id'],
+        'customer_id': customer_id,
+        'vehicle_id': vehicle_id,
+        'canton': canton,
+        'duration_years': int(round(years)),
+        'annual_kilometers': int(round(parameters['annual_mileage'])),
+        'charging_mix': simulation['charging_mix'] if simulation else {},
+        'one_time_costs': {
+            'down_payment': ev['financing_costs']['down_payment'],
+            'home_charger': ev['infrastructure_costs']['home_charger']
+        },
+        'annual_costs': {
+            'energy': ev['energy_costs']['annual_cost'],
+            'maintenance': ev['maintenance_costs']['annual'],
+            'insurance': ev['insurance_costs']['annual'],
+            'road_tax': ev['taxes_fees']['annual_road_tax'],
+            'financing': ev['financing_costs']['monthly_payment'] * 12
+        },
+        'energy_costs': energy,
+        'depreciation': ev['depreciation'],
+        'savings': result.get('savings'),
+        'total_tco': round(ev['total_cost'], 2),
+        'tco_per_month': round(ev['total_cost'] / (years * 12), 2),
+        'tco_per_kilometer': round(ev['cost_per_km'], 3),
+        'calculation_date': served_at or datetime.utcnow()
+    }
+
+
+class TcoWriteBehind:
+    """Bounded queue of TCO results bulk-inserted by a background thread"""
+
+    def __init__(self, batch_rows: int = DEFAULT_BATCH_ROWS, flush_ms: float = DEFAULT_FLUSH_MS,
+                 queue_size: int = DEFAULT_QUEUE_SIZE, enqueue_timeout: float = ENQUEUE_TIMEOUT_SECONDS):
+        self.batch_rows = max(int(batch_rows), 1)
+        self.flush_interval = max(float(flush_ms), 0.0) / 1000
+        self.enqueue_timeout = enqueue_timeout
+        self._queue: 'queue.Queue[Tuple[Mapping, Optional[str], Optional[str], datetime]]' = queue.Queue(
+            maxsize=queue_size)
+        self._app = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.written = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+
+    def init_app(self, app) -> None:
+        """Start the writer thread for an app with the database configured"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._app = app
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name='tco-history', daemon=True)
+            self._thread.start()
+        atexit.register(self.drain)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stopping.is_set()
+
+    def submit(self, result: Mapping, customer_id: Optional[str] = None, vehicle_id: Optional[str] = None) -> bool:
+        """Queue a result without waiting for the database; False if not running, rejected or dropped"""
+        if not self.running:
+            return False
+        if _canton_code(result.get('parameters', {}).get('canton')) is None:
+            with self._lock:
+                self.rejected += 1
+            return False
+        customer_id, vehicle_id = _uuid_or_none(customer_id), _uuid_or_none(vehicle_id)
+        try:
+            self._queue.put((result, customer_id, vehicle_id, datetime.utcnow()), timeout=self.enqueue_timeout)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(f"TCO history queue full, {dropped} results dropped so far")
+            return False
+        with self._lock:
+            self.queued += 1
+        return True
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = [self._queue.get(timeout=IDLE_POLL_SECONDS)]
+            except queue.Empty:
+                if self._stopping.is_set():
+                    return
+                continue
+            # Collect up to batch_rows until the flush interval ends (no waiting while draining)
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_rows:
+                remaining = 0 if self._stopping.is_set() else deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[Mapping, Optional[str], Optional[str], datetime]]) -> None:
+        rows = []
+        for result, customer_id, vehicle_id, served_at in batch:
+            try:
+                rows.append(calculation_record(result, customer_id, vehicle_id, served_at))
+            except Exception as e:
+                logger.warning(f"Skipping TCO result {result.get('calculation_id')}: {str(e)}")
+        try:
+            written = self._insert(rows) if rows else 0
+            with self._lock:
+                self.written += written
+                self.failed += len(batch) - written
+                self.batches += 1
+        except Exception as e:
+            logger.warning(f"Writing {len(rows)} TCO results failed: {str(e)}")
+            with self._lock:
+                self.failed += len(batch)
+
+    def _insert(self, rows: List[Dict]) -> int:
+        """Insert rows in one statement, row by row if one violates a constraint; returns rows written"""
+        with self._app.app_context():
+            try:
+                db.session.execute(db.insert(TcoCalculation), rows)
+                db.session.commit()
+                return len(rows)
+            except IntegrityError:
+                db.session.rollback()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            written = 0
+            for row in rows:
+                try:
+                    db.session.execute(db.insert(TcoCalculation), [row])
+                    db.session.commit()
+                    written += 1
+                except IntegrityError as e:
+                    db.session.rollback()
+                    logger.warning(f"Dropping TCO result {row['calculation_id']}: {str(e.orig)}")
+            return written
+
+    def drain(self, timeout: float = DRAIN_TIMEOUT_SECONDS) -> int:
+        """Stop accepting results and write the queued ones; returns the rows left unwritten"""
+        self._stopping.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if not thread.is_alive():
+                self._thread = None
+        return self._queue.qsize()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'running': self.running, 'pending': self._queue.qsize(), 'queued': self.queued,
+                    'written': self.written, 'dropped': self.dropped, 'rejected': self.rejected,
+                    'failed': self.failed,
+                    'batches': self.batches}
+
+
+def create_write_behind() -> TcoWriteBehind:
+    """Writer with batch size, flush interval and queue size from the environment"""
+    return TcoWriteBehind(
+        batch_rows=int(os.getenv(BATCH_ROWS_ENV, DEFAULT_BATCH_ROWS) or DEFAULT_BATCH_ROWS),
+        flush_ms=float(os.getenv(FLUSH_MS_ENV, DEFAULT_FLUSH_MS) or DEFAULT_FLUSH_MS),
+        queue_size=int(os.getenv(QUEUE_SIZE_ENV, DEFAULT_QUEUE_SIZE) or DEFAULT_QUEUE_SIZE)
+    )
@@ -0,0 +1,175 @@
+"""
+TCO Risk Simulation
+===================
+
+Monte Carlo spread of the TCO comparison: "what if electricity gets 30 %
+dearer or I drive more?".
+
+Each trial draws the uncertain inputs around the customer's values and runs
+the vectorized TCO engine for all trials at once:
+
+- electricity and fuel prices: mean-preserving lognormal factors
+- annual mileage: normal factor, floored at 10 % of the planned mileage
+- depreciation (EV and ICE): normal shift of the annual depreciation rate on
+  top of the model's residual value curve
+- financing rate: normal around the offered rate, floored at 0
+
+The spread of each input can be overridden per request. Trials run in shards
+of SHARD_TRIALS with seeds spawned from one SeedSequence, so a seed gives the
+same result whether the shards run in this process or, for large runs with
+TCO_SIMULATION_PROCESSES set, in a process pool.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, Mapping, Optional
+
+import numpy as np
+
+from src.services.tco_engine import TcoInputs, compute_tco, pack_tco_inputs
+
+DEFAULT_TRIALS = 10000
+MAX_TRIALS = 100000
+SHARD_TRIALS = 25000
+PERCENTILES = (5, 50, 95)
+PROCESSES_ENV = 'TCO_SIMULATION_PROCESSES'
+MIN_MILEAGE_FACTOR = 0.1
+MAX_DEPRECIATION_SHIFT = 0.3
+
+# Spread per uncertain input: relative sigma for prices and mileage, absolute for rates
+DEFAULT_UNCERTAINTY = {
+    'electricity_price': 0.15,
+    'fuel_price': 0.12,
+    'annual_mileage': 0.20,
+    'depreciation_rate': 0.03,
+    'financing_rate': 0.01,
+}
+
+
+def uncertainty_spreads(overrides: Optional[Mapping] = None) -> Dict[str, float]:
+    """Default spreads with request overrides applied"""
+    spreads = dict(DEFAULT_UNCERTAINTY)
+    for name, value in (overrides or {}).items():
+        if name not in spreads:
+            raise ValueError(f"Unknown uncertain input '{name}', expected one of {', '.join(spreads)}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            raise ValueError(f'uncertainty.{name} must be a non-negative number')
+        spreads[name] = float(value)
+    return spreads
+
+
+def _lognormal_factor(rng: np.random.Generator, sigma: float, size: int) -> np.ndarray:
+    return rng.lognormal(-sigma ** 2 / 2, sigma, size) if sigma else np.ones(size)
+
+
+def sample_inputs(base: TcoInputs, spreads: Mapping[str, float], trials: int,
+                  rng: np.random.Generator) -> TcoInputs:
+    """Trial inputs drawn around the first parameter set of ``base``"""
+    inputs = base.take(np.zeros(trials, dtype=np.int64))
+    mileage_factor = np.maximum(rng.normal(1.0, spreads['annual_mileage'], trials), MIN_MILEAGE_FACTOR)
+    # Depreciation: an annual rate shift on top of the residual value curves
+    depreciation = spreads['depreciation_rate']
+
+    def residual_factor() -> np.ndarray:
+        shift = np.clip(rng.normal(0, depreciation, trials), -MAX_DEPRECIATION_SHIFT, MAX_DEPRECIATION_SHIFT)
+        return np.power(1 - shift, inputs.years)
+
+    return inputs.replace(
+        electricity_price=inputs.electricity_price * _lognormal_factor(rng, spreads['electricity_price'], trials),
+        fuel_price=inputs.fuel_price * _lognormal_factor(rng, spreads['fuel_price'], trials),
+        annual_mileage=inputs.annual_mileage * mileage_factor,
+        ev_residual_factor=residual_factor(),
+        ice_residual_factor=residual_factor(),
+        financing_rate=np.maximum(inputs.financing_rate + rng.normal(0, spreads['financing_rate'], trials), 0)
+    )
+
+
+def run_shard(params: Mapping, spreads: Mapping[str, float], seed: np.random.SeedSequence,
+              trials: int) -> Dict[str, np.ndarray]:
+    """Total and net (after resale) costs of one shard of trials"""
+    base = pack_tco_inputs([params])
+    inputs = sample_inputs(base, spreads, trials, np.random.default_rng(seed))
+    result = compute_tco(inputs)
+    return {
+        'ev_total_cost': result.ev_total_cost,
+        'ice_total_cost': result.ice_total_cost,
+        'ev_net_cost': result.ev_total_cost - result.ev_residual_value,
+        'ice_net_cost': result.ice_total_cost - result.ice_residual_value,
+    }
+
+
+_pool_lock = threading.Lock()
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def process_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared process pool for large runs, None unless TCO_SIMULATION_PROCESSES > 1"""
+    global _process_pool
+    processes = int(os.getenv(PROCESSES_ENV, '0') or 0)
+    if processes <= 1:
+        return None
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(max_workers=processes)
+    return _process_pool
+
+
+def _distribution(values: np.ndarray) -> Dict:
+    points = np.percentile(values, PERCENTILES)
+    return {
+        **{f'p{p}': round(float(v), 2) for p, v in zip(PERCENTILES, points)},
+        'mean': round(float(values.mean()), 2),
+        'std': round(float(values.std()), 2)
+    }
+
+
+def simulate_tco(params: Mapping, trials: int = DEFAULT_TRIALS, seed: Optional[int] = None,
+                 uncertainty: Optional[Mapping] = None, executor: Optional[Executor] = None) -> Dict:
+    """Percentiles of EV and ICE cost and the probability that the EV is cheaper"""
+    started = time.perf_counter()
+    if isinstance(trials, bool) or not isinstance(trials, int) or not 1 <= trials <= MAX_TRIALS:
+        raise ValueError(f'trials must be an integer between 1 and {MAX_TRIALS}')
+    if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int) or seed < 0):
+        raise ValueError('seed must be a non-negative integer')
+    spreads = uncertainty_spreads(uncertainty)
+    # Validates the parameters before any shard runs
+    has_comparison = bool(pack_tco_inputs([params]).has_comparison[0])
+
+    seed_sequence = np.random.SeedSequence(seed)
+    shard_sizes = [SHARD_TRIALS] * (trials // SHARD_TRIALS) + ([trials % SHARD_TRIALS] if trials % SHARD_TRIALS else [])
+    shard_seeds = seed_sequence.spawn(len(shard_sizes))
+    if executor is None and len(shard_sizes) > 1:
+        executor = process_pool()
+
+    if executor is not None and len(shard_sizes) > 1:
+        futures = [executor.submit(run_shard, dict(params), spreads, s, n) for s, n in zip(shard_seeds, shard_sizes)]
+        shards = [future.result() for future in futures]
+    else:
+        shards = [run_shard(params, spreads, s, n) for s, n in zip(shard_seeds, shard_sizes)]
+    costs = {name: np.concatenate([shard[name] for shard in shards]) for name in shards[0]}
+
+    result = {
+        'trials': trials,
+        'seed': seed_sequence.entropy,
+        'shards': len(shard_sizes),
+        'uncertainty': spreads,
+        'ev_total_cost': _distribution(costs['ev_total_cost']),
+        'ev_net_cost': _distribution(costs['ev_net_cost']),
+        'ice_total_cost': None,
+        'ice_net_cost': None,
+        'savings': None,
+        'probability_ev_cheaper': None,
+        'probability_ev_cheaper_net': None,
+    }
+    if has_comparison:
+        result.update({
+            'ice_total_cost': _distribution(costs['ice_total_cost']),
+            'ice_net_cost': _distribution(costs['ice_net_cost']),
+            'savings': _distribution(costs['ice_total_cost'] - costs['ev_total_cost']),
+            'probability_ev_cheaper': round(float(np.mean(costs['ev_total_cost'] < costs['ice_total_cost'])), 4),
+            'probability_ev_cheaper_net': round(float(np.mean(costs['ev_net_cost'] < costs['ice_net_cost'])), 4),
+        })
+    result['compute_ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
@@ -0,0 +1,90 @@
+"""
+TCO Sensitivity Analysis
+========================
+
+Tornado data for the TCO comparison: each input is moved down and up by the
+same relative variation and the resulting change of the EV savings (ICE total
+minus EV total) is ranked by its swing.
+
+The base case and all 2 × N perturbations are rows of one TcoInputs batch, so
+the whole analysis is a single call of the vectorized TCO engine.
+"""
+
+from typing import Dict, Mapping
+
+import numpy as np
+
+from src.services.tco_engine import SWISS_CONSTANTS, compute_tco, pack_tco_inputs
+
+DEFAULT_VARIATION = 0.10
+MAX_VARIATION = 0.9
+
+# Input name -> TcoInputs column it moves
+SENSITIVITY_INPUTS = {
+    'annual_mileage': 'annual_mileage',
+    'calculation_period_years': 'years',
+    'purchase_price': 'purchase_price',
+    'down_payment': 'down_payment',
+    'financing_rate': 'financing_rate',
+    'consumption': 'ev_consumption',
+    'electricity_price': 'electricity_price',
+    'gasoline_price': 'fuel_price',
+}
+
+
+def sensitivity_analysis(params: Mapping, variation: float = DEFAULT_VARIATION) -> Dict:
+    """Savings delta of every input at -variation and +variation, largest swing first"""
+    if isinstance(variation, bool) or not isinstance(variation, (int, float)) or not 0 < variation <= MAX_VARIATION:
+        raise ValueError(f'variation must be a number above 0 and at most {MAX_VARIATION}')
+
+    base = pack_tco_inputs([params])
+    names = list(SENSITIVITY_INPUTS)
+    batch = base.take(np.zeros(1 + 2 * len(names), dtype=np.int64))
+    columns = {}
+    values = {}
+    for k, name in enumerate(names):
+        column = SENSITIVITY_INPUTS[name]
+        current = columns.get(column, getattr(batch, column).copy())
+        base_value = float(current[0])
+        if name == 'gasoline_price':
+            # The CO2 tax per liter is fixed, only the pump price moves
+            step = SWISS_CONSTANTS['gasoline_price_per_liter'] * variation
+            values[name] = (SWISS_CONSTANTS['gasoline_price_per_liter'], -step, step)
+        else:
+            step = base_value * variation
+            values[name] = (base_value, -step, step)
+        current[1 + 2 * k] = base_value - step
+        current[2 + 2 * k] = base_value + step
+        columns[column] = current
+
+    result = compute_tco(batch.replace(**columns))
+    savings = result.savings
+    base_savings = float(savings[0])
+
+    drivers = []
+    for k, name in enumerate(names):
+        base_value, low_step, high_step = values[name]
+        low, high = float(savings[1 + 2 * k]), float(savings[2 + 2 * k])
+        drivers.append({
+            'parameter': name,
+            'base_value': round(base_value, 4),
+            'low_value': round(base_value + low_step, 4),
+            'high_value': round(base_value + high_step, 4),
+            'savings_low': round(low, 2),
+            'savings_high': round(high, 2),
+            'delta_low': round(low - base_savings, 2),
+            'delta_high': round(high - base_savings, 2),
+            'swing': round(abs(high - low), 2)
+        })
+    drivers.sort(key=lambda driver: driver['swing'], reverse=True)
+
+    return {
+        'variation': variation,
+        'base': {
+            'ev_total_cost': round(float(result.ev_total_cost[0]), 2),
+            'ice_total_cost': round(float(result.ice_total_cost[0]), 2),
+            'savings': round(base_savings, 2)
+        },
+        'comparison_vehicle_given': bool(base.has_comparison[0]),
+        'drivers': drivers
+    }
@@ -0,0 +1,164 @@
+"""
+Test Suite for Swiss Canton Reference Data
+
+Tests cover:
+1. Seed parsing for all 26 cantons
+2. Precomputed tax coefficients, discount schedules and scores
+3. Swiss data, TCO and insights paths reading from the shared table
+4. Vectorized canton × vehicle cost matrix and heatmap endpoint
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.services.canton_reference import get_canton_table
+from src.services.cost_matrix import CantonArrays, compute_cost_matrix, load_vehicle_catalog
+from src.services.seed_data import parse_seed_inserts
+from src.routes.swiss_data import swiss_bp
+from src.routes.tco_calculator import calculate_ev_costs
+from src.routes.customer_insights import generate_customer_insights, get_regional_preferences
+
+
+class TestCantonReferenceTable:
+    """Test suite for the canton reference table"""
+
+    @pytest.fixture
+    def table(self):
+        return get_canton_table()
+
+    def test_all_cantons_loaded(self, table):
+        """All 26 cantons are available by code and by name"""
+        assert len(table) == 26
+        assert table.get('zh').name == 'Zürich'
+        assert table.code_for_name('Graubünden') == 'GR'
+        assert table.get('XX') is None
+
+    def test_base_tax_coefficients(self, table):
+        """Each tax method maps to the equivalent linear formula"""
+        assert table.get('ZH').base_tax(250, 2235) == pytest.approx(250 * 1.5 + 2235 * 0.05)
+        assert table.get('BE').base_tax(250, 2235) == pytest.approx(2235 * 0.11)
+        assert table.get('LU').base_tax(250, 2235) == pytest.approx(250 * 2.32)
+        assert table.get('NW').base_tax(250, 2235) == pytest.approx(400)
+
+    def test_discount_schedule(self, table):
+        """Temporary discounts end after their period, permanent ones continue"""
+        aargau, geneva = table.get('AG'), table.get('GE')
+
+        assert aargau.discount_schedule[:4] == (0.5, 0.5, 0.5, 0.0)
+        assert aargau.discounted_years(10) == pytest.approx(1.5)
+        assert geneva.discounted_years(10) == pytest.approx(7.5)
+        assert geneva.discounted_years(40) == pytest.approx(30.0)
+        assert geneva.attractiveness_score == 95
+        assert table.get('ZH').attractiveness_score == 100
+
+    def test_table_is_immutable(self, table):
+        """Canton records cannot be modified at runtime"""
+        with pytest.raises(AttributeError):
+            table.get('ZH').ev_tax_discount = 0
+
+    def test_seed_parser_handles_nulls_and_quotes(self):
+        """Seed rows keep NULLs, numbers and escaped quotes"""
+        sql = """
+        -- comment (with parentheses)
+        INSERT INTO cantons (name, abbreviation, ev_tax_discount_years, registration_fee)
+        VALUES ('Val d''Anniviers', 'VX', NULL, 45.5), ('Other', 'OT', 3, 40);
+        """
+        rows = parse_seed_inserts(sql, 'cantons')
+
+        assert rows[0] == {'name': "Val d'Anniviers", 'abbreviation': 'VX',
+                           'ev_tax_discount_years': None, 'registration_fee': 45.5}
+        assert rows[1]['ev_tax_discount_years'] == 3
+
+
+class TestCantonTableConsumers:
+    """Swiss data, TCO and insights paths use the same canton data"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        return app.test_client()
+
+    def test_canton_incentives_cover_all_cantons(self, client):
+        data = client.get('/api/swiss/ev-incentives/cantons').get_json()
+
+        assert data['total_cantons'] == 26
+        scores = [c['attractiveness_score'] for c in data['cantons']]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_incentive_calculation_for_previously_missing_canton(self, client):
+        response = client.post('/api/swiss/ev-incentives/calculate', json={
+            'canton': 'GR', 'vehicle': {'power_kw': 250, 'weight_kg': 2235},
+            'customer': {'years_ownership': 5}
+        })
+        calculations = response.get_json()['calculations']
+
+        assert response.status_code == 200
+        assert calculations['annual_costs']['vehicle_tax_without_discount'] == pytest.approx(625)
+        assert calculations['tax_benefits']['total_tax_savings'] == pytest.approx(625 * 0.3 * 5)
+
+    def test_tco_uses_canton_electricity_price(self):
+        zurich = calculate_ev_costs(85200, 15000, 5, 'ZH', 20000, 0.039, {})
+        graubunden = calculate_ev_costs(85200, 15000, 5, 'GR', 20000, 0.039, {})
+
+        assert zurich['energy_costs']['annual_cost'] == pytest.approx(150 * 18.5 * 0.21)
+        assert graubunden['energy_costs']['annual_cost'] == pytest.approx(150 * 18.5 * 0.16)
+        assert zurich['taxes_fees']['total'] == 0
+
+    def test_regional_preferences(self):
+        assert get_regional_preferences('GE')['luxury_market'] == 'very_strong'
+        assert get_regional_preferences('UR')['urban_density'] == 'medium'
+
+    def test_empty_canton_defaults_to_zurich(self):
+        for canton in ('', None):
+            insights = generate_customer_insights({'canton': canton}, 'medium')
+            assert insights['demographic_insights']['regional_preferences'] == get_regional_preferences('ZH')
+
+
+class TestCostMatrix:
+    """Test suite for the vectorized canton × vehicle cost kernel"""
+
+    def test_matrix_matches_per_canton_formula(self):
+        """Every tensor entry equals the scalar cost formula"""
+        table, vehicles = get_canton_table(), load_vehicle_catalog()
+        matrix = compute_cost_matrix(CantonArrays(list(table)), vehicles, [10000, 25000], [3, 8, 35])
+
+        assert matrix.total_cost.shape == (26, len(vehicles), 2, 3)
+        for c, canton in enumerate(table):
+            for v, vehicle in enumerate(vehicles):
+                base_tax = canton.base_tax(vehicle.power_kw, vehicle.weight_kg)
+                for y, years in enumerate([3, 8, 35]):
+                    energy = 25000 / 100 * vehicle.efficiency_kwh_100km * canton.average_electricity_price_per_kwh * years
+                    expected = (vehicle.purchase_price + canton.registration_fee + canton.license_plate_fee +
+                                base_tax * (years - canton.discounted_years(years)) + energy)
+                    assert matrix.total_cost[c, v, 1, y] == pytest.approx(expected)
+
+    def test_matrix_endpoint_cached_until_reference_changes(self):
+        app = Flask(__name__)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        client = app.test_client()
+
+        first = client.get('/api/swiss/ev-incentives/matrix?mileages=15000,30000&years=5').get_json()
+        second = client.get('/api/swiss/ev-incentives/matrix?mileages=30000,15000&years=5').get_json()
+        invalid = client.get('/api/swiss/ev-incentives/matrix?years=-1')
+
+        assert len(first['total_cost']) == 26
+        assert len(first['best_canton']) == len(first['vehicles'])
+        assert second['cached'] is True
+        assert second['total_cost'] == first['total_cost']
+        assert invalid.status_code == 400
+
+    def test_compare_ranks_cantons(self):
+        app = Flask(__name__)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        data = app.test_client().post('/api/swiss/ev-incentives/compare', json={
+            'cantons': ['ZH', 'gr', 'XX', 'GE'], 'vehicle': {'power_kw': 250, 'weight_kg': 2235}
+        }).get_json()
+
+        costs = [c['total_cost_5_years'] for c in data['comparison']]
+        assert sorted(c['canton'] for c in data['comparison']) == ['GE', 'GR', 'ZH']
+        assert costs == sorted(costs)
@@ -0,0 +1,123 @@
+"""
+Test Suite for the Cash-flow Schedule
+
+Tests cover:
+1. Amortization consistency with the TCO engine
+2. Balloon, lease and cash products
+3. Per-year EV road tax discounts
+4. /api/tco/schedule JSON, CSV and NDJSON output
+"""
+
+import pytest
+import sys
+import os
+import csv
+import io
+import json
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import tco_bp
+from src.services.cash_flow_schedule import annuity_growth, build_schedule, payment_plan
+from src.services.tco_engine import compute_tco, pack_tco_inputs
+
+PARAMETERS = {'canton': 'BE', 'annual_mileage': 18000, 'calculation_period_years': 4}
+
+
+class TestCashFlowSchedule:
+    """Test suite for schedule generation"""
+
+    def test_matches_engine_totals(self):
+        schedule = build_schedule(PARAMETERS)
+        columns = schedule['columns']
+        result = compute_tco(pack_tco_inputs([PARAMETERS]))
+
+        assert len(columns['month']) == 49
+        assert columns['balance'][-1] == pytest.approx(0, abs=1e-6)
+        assert columns['principal'].sum() == pytest.approx(85200 - 20000)
+        assert columns['payment'].sum() == pytest.approx(result.ev_total_financing[0], abs=1)
+        assert columns['energy'].sum() == pytest.approx(result.ev_energy_total[0])
+        assert columns['road_tax'].sum() == pytest.approx(result.ev_road_tax_total[0])
+        assert columns['cumulative'][-1] == pytest.approx(schedule['summary']['net_cost'], abs=0.01)
+        assert schedule['summary']['monthly_payment'] == round(float(result.ev_monthly_payment[0]), 2)
+
+    def test_balloon_and_products(self):
+        plan = payment_plan(50000, 0.04, 36, balloon=20000)
+        assert plan['balance'][-1] == 20000
+        assert plan['payment'][0] < payment_plan(50000, 0.04, 36)['payment'][0]
+        assert payment_plan(36000, 0.0, 36)['payment'].tolist() == [1000.0] * 36
+
+        lease = build_schedule(PARAMETERS, product='lease')
+        assert lease['summary']['balloon'] == lease['summary']['residual_value']
+        assert lease['columns']['resale'].sum() == 0
+
+        cash = build_schedule(PARAMETERS, product='cash', vehicle_type='ice')
+        assert cash['columns']['one_off'][0] == 75000
+        assert cash['summary']['total_interest'] == 0
+        assert cash['columns']['resale'][-1] < 0
+
+        with pytest.raises(ValueError):
+            build_schedule(PARAMETERS, balloon=10 ** 6)
+        assert not annuity_growth(0.004, 12).flags.writeable
+
+    def test_lease_balloon_capped_by_large_down_payment(self):
+        params = {'down_payment': 50000, 'financing_rate': 0.04, 'calculation_period_years': 4}
+        lease = build_schedule(params, product='lease')
+
+        assert lease['summary']['residual_value'] > lease['summary']['financed_amount']
+        assert lease['summary']['balloon'] == lease['summary']['financed_amount'] == 85200 - 50000
+        assert lease['columns']['balance'][-1] == pytest.approx(35200)
+        with pytest.raises(ValueError):
+            build_schedule(params, product='lease', balloon=40000)
+
+    def test_road_tax_discount_by_year(self):
+        # Zürich waives the EV road tax for the first 8 years of ownership
+        params = {'canton': 'ZH', 'calculation_period_years': 10}
+        columns = build_schedule(params)['columns']
+        yearly = np.bincount(columns['year'].astype(int), weights=columns['road_tax'])[1:]
+        assert yearly[:8].sum() == 0 and yearly[8] > 0
+        assert yearly.sum() == pytest.approx(compute_tco(pack_tco_inputs([params])).ev_road_tax_total[0])
+
+
+class TestScheduleEndpoint:
+    """Test suite for /api/tco/schedule"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_json(self, client):
+        data = client.post('/api/tco/schedule', json={**PARAMETERS, 'product': 'lease'}).get_json()
+        assert data['schedules'][0]['summary']['product'] == 'lease'
+        assert data['schedules'][0]['months'][1]['month'] == 1
+
+    def test_streamed_fleet(self, client):
+        fleet = {**PARAMETERS, 'vehicles': [{'annual_mileage': 10000}, {'canton': 'GE', 'calculation_period_years': 3}]}
+
+        ndjson = client.post('/api/tco/schedule?format=ndjson', json=fleet)
+        lines = [json.loads(line) for line in ndjson.get_data(as_text=True).splitlines()]
+        assert ndjson.mimetype == 'application/x-ndjson'
+        assert len(lines) == 49 + 37 + 1
+        assert lines[-1]['summary']['schedules'] == 2
+
+        response = client.post('/api/tco/schedule', json={**fleet, 'format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        assert response.mimetype == 'text/csv'
+        assert rows[-1]['schedule'] == 'total'
+        assert float(rows[-1]['total']) == pytest.approx(lines[-1]['summary']['net_cost'], abs=0.05)
+
+    def test_invalid_request(self, client):
+        assert client.post('/api/tco/schedule', json={'product': 'barter'}).status_code == 400
+        assert client.post('/api/tco/schedule', json={'format': 'xml'}).status_code == 400
+
+    def test_balloon_checked_for_every_vehicle_before_streaming(self, client):
+        fleet = {'balloon': 50000, 'vehicles': [{}, {'down_payment': 60000}]}
+        for fmt in ('ndjson', 'csv', 'json'):
+            response = client.post(f'/api/tco/schedule?format={fmt}', json=fleet)
+            assert response.status_code == 400
+            assert response.get_json()['error'] == 'balloon cannot exceed the financed amount of vehicle 1'
@@ -0,0 +1,431 @@
+"""
+Test Suite for Swiss Charging Station Data
+
+Tests cover:
+1. Columnar station store filtering and materialization
+2. Memory footprint of the columnar representation
+3. Charging station API endpoint on top of the store, stale data on feed failures,
+   background refresh of a loaded store
+4. Route corridor search along polylines
+5. Per-zoom station clustering for the map
+6. Concurrent multi-feed fetch and spatial de-duplication
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.services.charging_store import ChargingStationStore
+from src.services.circuit_breaker import CircuitBreakerRegistry
+from src.services.route_corridor import decode_polyline, route_geometry
+from src.services.station_clusters import StationClusterIndex
+from src.services.station_sources import StationFeed, fetch_feeds, merge_stations
+from src.routes import swiss_data
+from src.routes.swiss_data import swiss_bp
+
+
+def make_station(index, canton='ZH', city='Zürich', operator='IONITY', lat=47.37, lng=8.54,
+                 powers=(350, 50), available=(True, False)):
+    """Build a station dict in the format used by the charging station API"""
+    return {
+        'id': f'CH-{index:05d}',
+        'name': f'{operator} {city} {index}',
+        'address': f'Bahnhofstrasse {index}, {city}',
+        'canton': canton,
+        'city': city,
+        'coordinates': {'lat': lat, 'lng': lng},
+        'charging_points': [
+            {'type': 'CCS', 'power_kw': power, 'available': free, 'connector_id': str(i + 1)}
+            for i, (power, free) in enumerate(zip(powers, available))
+        ],
+        'operator': operator,
+        'pricing': '0.79 CHF/kWh',
+        'amenities': ['shop', 'toilets'],
+        '24_7': True,
+        'status': 'operational',
+        'source': 'ich-tanke-strom.ch'
+    }
+
+
+class TestChargingStationStore:
+    """Test suite for the columnar charging station store"""
+
+    @pytest.fixture
+    def store(self):
+        return ChargingStationStore([
+            make_station(1, powers=(350, 50)),
+            make_station(2, canton='BE', city='Bern', lat=46.95, lng=7.44, powers=(22, 11), available=(False, False)),
+            make_station(3, canton='GE', city='Genève', operator='Tesla Supercharger', lat=46.2, lng=6.14, powers=(250,), available=(True,)),
+            make_station(4, city='Winterthur', lat=47.5, lng=8.72, powers=(11, 150), available=(False, True)),
+        ])
+
+    def test_materialize_round_trip(self, store):
+        """Materialized rows reproduce the original station dicts"""
+        original = make_station(1, powers=(350, 50))
+        station = store.materialize([0])[0]
+
+        assert station['id'] == original['id']
+        assert station['amenities'] == ['shop', 'toilets']
+        assert station['24_7'] is True
+        assert [cp['power_kw'] for cp in station['charging_points']] == [350, 50]
+        assert [cp['connector_id'] for cp in station['charging_points']] == ['1', '2']
+        assert station['coordinates']['lat'] == pytest.approx(47.37, abs=1e-5)
+
+    def test_charging_type_filters(self, store):
+        """fast/normal/tesla follow the per-connector rules"""
+        ids = lambda **kw: [s['id'] for s in store.query(**kw)]
+
+        assert ids(charging_type='fast') == ['CH-00001', 'CH-00003', 'CH-00004']
+        assert ids(charging_type='normal') == ['CH-00002', 'CH-00004']
+        assert ids(charging_type='tesla') == ['CH-00003']
+
+    def test_location_and_power_filters(self, store):
+        """Canton, city substring, power and availability combine as masks"""
+        assert len(store.query(canton='zh')) == 2
+        assert [s['id'] for s in store.query(city='winter')] == ['CH-00004']
+        assert [s['id'] for s in store.query(power_min=200)] == ['CH-00001', 'CH-00003']
+        assert 'CH-00002' not in [s['id'] for s in store.query(available_only=True)]
+
+    def test_radius_query_sorted_by_distance(self, store):
+        """Radius search returns nearest stations first with distances"""
+        stations = store.query(lat=47.5, lng=8.72, radius_km=50)
+
+        assert [s['id'] for s in stations] == ['CH-00004', 'CH-00001']
+        assert stations[0]['distance_km'] == 0.0
+        assert stations[1]['distance_km'] > 0
+
+    def test_memory_reduction(self):
+        """Columnar store is at least 10x smaller than the dict representation"""
+        def deep_size(obj):
+            size = sys.getsizeof(obj)
+            if isinstance(obj, dict):
+                size += sum(deep_size(k) + deep_size(v) for k, v in obj.items())
+            elif isinstance(obj, (list, tuple)):
+                size += sum(deep_size(v) for v in obj)
+            return size
+
+        operators = ['IONITY', 'Swisscharge', 'MOVE', 'Tesla Supercharger']
+        stations = [
+            make_station(i, operator=operators[i % 4], lat=46 + (i % 200) / 100, lng=6 + (i % 400) / 100,
+                         powers=(11, 22, 50, 150)[:1 + i % 4], available=(True, False, True, False)[:1 + i % 4])
+            for i in range(5000)
+        ]
+        store = ChargingStationStore(stations)
+
+        assert deep_size(stations) / store.memory_bytes() >= 10
+
+
+class TestChargingStationEndpoint:
+    """Test suite for /api/swiss/charging-stations"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        app = Flask(__name__)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        swiss_data._station_store_expires_at = 0.0
+        monkeypatch.setattr(swiss_data.station_store, 'source', None)
+        monkeypatch.setattr(swiss_data, 'station_store_live_at', None)
+        monkeypatch.setattr(swiss_data, 'station_store_stale', False)
+        return app.test_client()
+
+    def refresh(self, client):
+        """Trigger a due refresh and wait for the background reload to finish"""
+        client.get('/api/swiss/charging-stations')
+        swiss_data._station_refresh_thread.join(timeout=5)
+
+    def test_live_stations_filtered_from_store(self, client):
+        """Live data is loaded once into the store and filtered per request"""
+        live = [make_station(1), make_station(2, canton='BE', city='Bern', powers=(22,), available=(True,))]
+
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=live) as fetch:
+            first = client.get('/api/swiss/charging-stations?type=fast').get_json()
+            second = client.get('/api/swiss/charging-stations?canton=BE').get_json()
+
+        assert fetch.call_count == 1
+        assert first['success'] is True
+        assert [s['id'] for s in first['charging_stations']] == ['CH-00001']
+        assert [s['id'] for s in second['charging_stations']] == ['CH-00002']
+        assert first['warning'] is None
+
+    def test_reference_data_when_api_unavailable(self, client):
+        """Static reference stations are served with a warning when the API fails"""
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=[]):
+            data = client.get('/api/swiss/charging-stations').get_json()
+
+        assert data['success'] is True
+        assert data['total'] >= 1
+        assert data['warning'] is not None
+        assert data['stale'] is False and data['last_live_update'] is None
+
+    def test_live_data_kept_when_refresh_fails(self, client):
+        """A failed refresh keeps the last live stations and marks them stale"""
+        live = [make_station(1), make_station(2), make_station(3)]
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=live):
+            client.get('/api/swiss/charging-stations')
+
+        swiss_data._station_store_expires_at = 0.0
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=[]):
+            self.refresh(client)
+            data = client.get('/api/swiss/charging-stations').get_json()
+
+        assert [s['id'] for s in data['charging_stations']] == ['CH-00001', 'CH-00002', 'CH-00003']
+        assert data['stale'] is True and data['last_live_update'] is not None
+        assert data['source'] == 'Swiss Charging Networks + Federal Energy Office'
+        assert 'could not be refreshed' in data['warning']
+
+        swiss_data._station_store_expires_at = 0.0
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=live[:1]):
+            self.refresh(client)
+            data = client.get('/api/swiss/charging-stations').get_json()
+        assert data['total'] == 1 and data['stale'] is False and data['warning'] is None
+
+    def test_due_refresh_does_not_block_requests(self, client):
+        """A loaded store keeps answering while the due refresh waits on the feeds"""
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=[make_station(1)]):
+            client.get('/api/swiss/charging-stations')
+
+        release = threading.Event()
+
+        def slow_fetch():
+            release.wait(timeout=5)
+            return [make_station(1), make_station(2)]
+
+        swiss_data._station_store_expires_at = 0.0
+        with patch.object(swiss_data, '_fetch_charging_stations', side_effect=slow_fetch) as fetch:
+            served = [client.get('/api/swiss/charging-stations').get_json()['total'] for _ in range(3)]
+            release.set()
+            swiss_data._station_refresh_thread.join(timeout=5)
+            refreshed = client.get('/api/swiss/charging-stations').get_json()
+
+        assert served == [1, 1, 1]
+        assert fetch.call_count == 1
+        assert refreshed['total'] == 2
+
+    def test_circuit_open_reported(self, client, monkeypatch):
+        """An open breaker on a charging feed is reported with the stale data"""
+        monkeypatch.setattr(swiss_data, 'upstream_breakers', CircuitBreakerRegistry(failure_threshold=1))
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=[make_station(1)]):
+            client.get('/api/swiss/charging-stations')
+        swiss_data.upstream_breakers.get('ich_tanke').record_failure('timeout')
+
+        swiss_data._station_store_expires_at = 0.0
+        with patch.object(swiss_data.requests, 'get') as get:
+            self.refresh(client)
+            data = client.get('/api/swiss/charging-stations').get_json()
+
+        get.assert_not_called()
+        assert data['circuit_open'] is True and data['stale'] is True
+        assert [s['id'] for s in data['charging_stations']] == ['CH-00001']
+
+
+class TestRouteCorridor:
+    """Test suite for charging stations along a route corridor"""
+
+    @pytest.fixture
+    def store(self):
+        return ChargingStationStore([
+            make_station(1, city='Zug', lat=47.17, lng=8.52),
+            make_station(2, canton='TI', city='Bellinzona', lat=46.19, lng=9.03),
+            make_station(3, canton='UR', city='Andermatt', lat=46.636, lng=8.594, powers=(22,), available=(True,)),
+            make_station(4, canton='GE', city='Genève', lat=46.2, lng=6.14),
+            make_station(5, canton='TI', city='Lugano', lat=46.0, lng=8.95),
+        ])
+
+    def test_decode_polyline(self):
+        """Encoded polylines decode to lat/lng pairs"""
+        points = decode_polyline('_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+
+        assert points == [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+        for malformed in ('_p~iF~ps|U_', '_p~iF', '_p~iF~ps|U ', '_p~iF~ps|Ü'):
+            with pytest.raises(ValueError):
+                decode_polyline(malformed)
+
+    def test_cached_route_geometry_is_reversible(self):
+        """Known corridors are served from stored waypoints in both directions"""
+        forward = route_geometry('Zürich', 'Lugano')
+        backward = route_geometry('lugano', 'zurich')
+
+        assert len(forward) > 2
+        assert backward == tuple(reversed(forward))
+        assert route_geometry('Zürich', 'Atlantis') is None
+
+    def test_stations_ordered_along_route(self, store):
+        """Stations near the route come back in driving order, far ones are excluded"""
+        stations = store.query_corridor(route_geometry('Zürich', 'Lugano'), 10)
+
+        assert [s['city'] for s in stations] == ['Zug', 'Andermatt', 'Bellinzona', 'Lugano']
+        along = [s['distance_along_route_km'] for s in stations]
+        assert along == sorted(along)
+        assert all(s['distance_from_route_km'] <= 10 for s in stations)
+
+    def test_corridor_filters_and_long_polylines(self, store):
+        """Power filters apply and densified polylines give the same matches"""
+        coarse = route_geometry('Zürich', 'Lugano')
+        dense = []
+        for (lat1, lng1), (lat2, lng2) in zip(coarse[:-1], coarse[1:]):
+            dense.extend((lat1 + (lat2 - lat1) * k / 200, lng1 + (lng2 - lng1) * k / 200) for k in range(200))
+        dense.append(coarse[-1])
+
+        fast = store.query_corridor(dense, 10, charging_type='fast')
+
+        assert [s['city'] for s in fast] == ['Zug', 'Bellinzona', 'Lugano']
+
+    def test_corridor_endpoint(self, monkeypatch):
+        """The corridor endpoint resolves origin/destination to a cached route"""
+        app = Flask(__name__)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        swiss_data._station_store_expires_at = 0.0
+        monkeypatch.setattr(swiss_data.station_store, 'source', None)
+        live = [make_station(1, city='Zug', lat=47.17, lng=8.52), make_station(4, canton='GE', city='Genève', lat=46.2, lng=6.14)]
+
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=live):
+            response = app.test_client().post('/api/swiss/charging-stations/corridor', json={
+                'origin': 'Zürich', 'destination': 'Lugano', 'corridor_km': 5
+            })
+
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['route']['geometry_source'] == 'cached_route'
+        assert [s['city'] for s in data['charging_stations']] == ['Zug']
+
+        client = app.test_client()
+        truncated = client.post('/api/swiss/charging-stations/corridor', json={'polyline': '_p~iF~ps|U_'})
+        assert truncated.status_code == 400 and 'truncated' in truncated.get_json()['error']
+        for width in (-5, 0):
+            response = client.post('/api/swiss/charging-stations/corridor', json={
+                'origin': 'Zürich', 'destination': 'Lugano', 'corridor_km': width
+            })
+            assert response.status_code == 400
+
+
+class TestStationClusters:
+    """Test suite for hierarchical station clusters"""
+
+    SWITZERLAND = (5.9, 45.8, 10.5, 47.9)
+
+    @pytest.fixture
+    def stations(self):
+        return [
+            make_station(i, lat=45.9 + (i % 37) * 0.05, lng=6.0 + (i % 83) * 0.05,
+                         powers=(11, 150)[:1 + i % 2], available=(i % 3 == 0, True))
+            for i in range(2000)
+        ]
+
+    def test_counts_preserved_at_every_zoom(self, stations):
+        """Each zoom level partitions all stations into clusters"""
+        index = StationClusterIndex(ChargingStationStore(stations))
+
+        for zoom in (0, 5, 8, 12, 16):
+            clusters = index.clusters(self.SWITZERLAND, zoom, limit=100000)
+            assert sum(c['count'] for c in clusters) == len(stations)
+            assert max(c['max_power_kw'] for c in clusters) == 150
+
+    def test_payload_bounded_and_singletons_identified(self, stations):
+        """Coarse zooms return few clusters and single stations carry their id"""
+        index = StationClusterIndex(ChargingStationStore(stations))
+
+        assert len(index.clusters(self.SWITZERLAND, 5)) < 20
+        assert len(index.clusters(self.SWITZERLAND, 16, limit=50)) == 50
+        single = [c for c in index.clusters(self.SWITZERLAND, 16, limit=100000) if c['count'] == 1]
+        assert single and all(c['station_id'].startswith('CH-') for c in single)
+
+    def test_incremental_refresh_matches_full_rebuild(self, stations):
+        """Only changed cells are recomputed and the result equals a full build"""
+        store = ChargingStationStore(stations)
+        index = StationClusterIndex(store)
+        index.refresh()
+
+        updated = list(stations)
+        updated[10] = make_station(10, lat=47.0, lng=9.9, powers=(350,), available=(True,))
+        store.load(updated)
+
+        zoom_7 = index.clusters(self.SWITZERLAND, 7, limit=100000)
+        assert index.last_refresh['mode'] == 'incremental'
+        assert index.last_refresh['changed_cells'] <= 2
+
+        rebuilt = StationClusterIndex(ChargingStationStore(updated))
+        assert zoom_7 == rebuilt.clusters(self.SWITZERLAND, 7, limit=100000)
+
+    def test_clusters_endpoint(self, monkeypatch):
+        """The clusters endpoint validates bbox and zoom"""
+        app = Flask(__name__)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        swiss_data._station_store_expires_at = 0.0
+        monkeypatch.setattr(swiss_data.station_store, 'source', None)
+        client = app.test_client()
+
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=[make_station(1), make_station(2)]):
+            ok = client.get('/api/swiss/charging-stations/clusters?bbox=5.9,45.8,10.5,47.9&zoom=6')
+            bad = client.get('/api/swiss/charging-stations/clusters?zoom=6')
+
+        assert ok.get_json()['stations_in_view'] == 2
+        assert bad.status_code == 400
+
+
+class TestStationSources:
+    """Test suite for the charging feed fan-out and merge"""
+
+    def operator_feed(self, station, **changes):
+        return {**station, **changes, 'source': 'evpass'}
+
+    def test_same_site_from_two_feeds_collapses(self):
+        federal = [make_station(1, powers=(350, 50)), make_station(2, lat=47.38, lng=8.54)]
+        operator = [
+            # ~11 m away, one extra 350 kW plug and a 22 kW AC plug
+            self.operator_feed(make_station(9, lat=47.3701, lng=8.54, powers=(350, 350, 22),
+                                            available=(True, True, True)), address=''),
+            # 60 m away under the same operator, a different listing of station 2
+            self.operator_feed(make_station(8, lat=47.38054, lng=8.54)),
+            # Another operator 60 m away is a separate site
+            self.operator_feed(make_station(7, operator='Move', lat=47.37054, lng=8.54)),
+        ]
+
+        merged = merge_stations([federal, operator])
+
+        assert [s['id'] for s in merged] == ['CH-00001', 'CH-00002', 'CH-00007']
+        site = merged[0]
+        assert site['sources'] == ['ich-tanke-strom.ch', 'evpass']
+        assert site['address'] == 'Bahnhofstrasse 1, Zürich'
+        assert sorted(p['power_kw'] for p in site['charging_points']) == [22, 50, 350, 350]
+        assert merged[1]['sources'] == ['ich-tanke-strom.ch', 'evpass']
+
+    def test_same_operator_radius_near_northern_border(self):
+        # A degree of longitude is shortest at the top of Schaffhausen; ~74.9 m apart east-west
+        federal = [make_station(1, city='Schaffhausen', lat=47.8, lng=8.6399995)]
+        operator = [self.operator_feed(make_station(8, city='Schaffhausen', lat=47.8, lng=8.6410010))]
+
+        merged = merge_stations([federal, operator])
+
+        assert [s['sources'] for s in merged] == [['ich-tanke-strom.ch', 'evpass']]
+
+    def test_neighbouring_sites_in_one_feed_are_kept(self):
+        feed = [make_station(1), make_station(2, lat=47.37001)]
+        assert len(merge_stations([feed, []])) == 2
+
+    def test_feeds_fetched_concurrently_within_timeout(self):
+        delays = {'a': 0.2, 'b': 0.2, 'c': 0.2, 'slow': 2.0}
+
+        def fetch(feed):
+            time.sleep(delays[feed.name])
+            return [make_station(1)]
+
+        fast = [StationFeed(name, '') for name in 'abc']
+        started = time.perf_counter()
+        results = fetch_feeds(fast, fetch, timeout=1.0)
+        fast_elapsed = time.perf_counter() - started
+        started = time.perf_counter()
+        with_slow = fetch_feeds(fast + [StationFeed('slow', '')], fetch, timeout=0.5)
+        slow_elapsed = time.perf_counter() - started
+
+        # Latency is the slowest feed (0.2 s), not the sum, and the timeout caps stragglers
+        assert fast_elapsed < 0.45
+        assert slow_elapsed < 1.0
+        assert all(len(results[name]) == 1 for name in 'abc')
+        assert with_slow['slow'] is None
+        assert with_slow['a'] is not None
@@ -0,0 +1,140 @@
+"""
+Test Suite for Upstream Circuit Breakers
+
+Tests cover:
+1. Opening after consecutive failures and failing fast
+2. Half-open probes closing or re-opening the breaker
+3. Concurrency cap per upstream
+4. Stale answers and fast 503s from the Swiss data endpoints
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import requests
+from flask import Flask
+from src.models.user import db
+from src.routes import swiss_data
+from src.routes.swiss_data import swiss_bp
+from src.services.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, StaleCache
+)
+from src.services.company_index import CompanyDirectory
+from src.services.swiss_validation import NegativeCache
+
+
+class TestCircuitBreaker:
+    """Test suite for the breaker state machine"""
+
+    def fail(self, breaker, times=1):
+        for _ in range(times):
+            breaker.acquire()
+            breaker.record_failure('ConnectTimeout')
+
+    def test_opens_after_threshold_and_rejects(self):
+        breaker = CircuitBreaker('zefix', failure_threshold=3, reset_timeout=30)
+        self.fail(breaker, 2)
+        breaker.acquire()
+        breaker.record_success()
+        self.fail(breaker, 2)
+        assert breaker.state == CLOSED
+
+        self.fail(breaker)
+        assert breaker.state == OPEN
+        with pytest.raises(CircuitOpenError) as error:
+            breaker.acquire()
+        assert 0 < error.value.retry_after <= 30
+        assert breaker.snapshot()['rejected'] == 1
+
+    def test_half_open_probe(self):
+        breaker = CircuitBreaker('openplz', failure_threshold=1, reset_timeout=0)
+        self.fail(breaker)
+        assert breaker.state == HALF_OPEN
+
+        breaker.acquire()
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()          # only one probe at a time
+        breaker.record_failure()
+        assert breaker.snapshot()['state'] == HALF_OPEN   # re-opened, reset_timeout 0 → half-open again
+
+        breaker.acquire()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+
+    def test_concurrency_cap(self):
+        breaker = CircuitBreaker('ich_tanke', max_concurrent_calls=2)
+        breaker.acquire()
+        breaker.acquire()
+        with pytest.raises(CircuitOpenError):
+            breaker.acquire()
+        breaker.release()
+        breaker.acquire()
+        assert breaker.state == CLOSED
+
+    def test_stale_cache_is_bounded(self):
+        cache = StaleCache(max_entries=2)
+        for key in 'abc':
+            cache.put(key, key.upper())
+
+        assert cache.get('a') is None
+        assert cache.get('c')[1] == 'C'
+
+
+class TestSwissDataBreakers:
+    """Endpoints fail fast or serve stale data while a breaker is open"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(swiss_data, 'upstream_breakers', CircuitBreakerRegistry(failure_threshold=2))
+        monkeypatch.setattr(swiss_data, 'openplz_responses', StaleCache())
+        monkeypatch.setattr(swiss_data, 'negative_cache', NegativeCache())
+        monkeypatch.setattr(swiss_data, 'company_directory', CompanyDirectory())
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(app)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        with app.app_context():
+            db.create_all()
+            yield app.test_client()
+
+    def test_postal_codes_served_stale_then_fail_fast(self, client):
+        localities = [{'postalcode': '8001', 'name': 'Zürich', 'canton': {'shortName': 'ZH'}}]
+        ok = Mock(status_code=200, json=Mock(return_value=localities))
+        with patch.object(swiss_data.requests, 'get', return_value=ok):
+            fresh = client.get('/api/swiss/postal-codes?postal_code=8001').get_json()
+
+        with patch.object(swiss_data.requests, 'get', side_effect=requests.exceptions.ConnectTimeout) as get:
+            for _ in range(2):
+                assert client.get('/api/swiss/postal-codes?postal_code=3000').status_code == 503
+            stale = client.get('/api/swiss/postal-codes?postal_code=8001').get_json()
+            unknown = client.get('/api/swiss/postal-codes?postal_code=3000')
+
+        assert get.call_count == 2
+        assert stale['stale'] is True
+        assert stale['postal_data'] == fresh['postal_data']
+        assert unknown.status_code == 503
+        assert unknown.get_json()['circuit_open'] is True
+        assert swiss_data.upstream_breakers.snapshot()['openplz']['state'] == OPEN
+
+    def test_company_lookup_uses_local_index_while_open(self, client):
+        swiss_data.company_directory.store([{
+            'uid': 'CHE-100.000.006', 'name': 'Müller Garage AG', 'legal_form': '',
+            'status': 'active', 'address': {'city': 'Zürich'}
+        }])
+        down = Mock(status_code=502, text='Bad Gateway')
+        with patch.object(swiss_data.requests, 'get', return_value=down):
+            for _ in range(2):
+                client.post('/api/swiss/company-lookup', json={'company_name': 'Garage'})
+
+        with patch.object(swiss_data.requests, 'get') as get:
+            response = client.post('/api/swiss/company-lookup', json={'uid_number': 'CHE-100.000.006'})
+
+        data = response.get_json()
+        get.assert_not_called()
+        assert response.status_code == 200
+        assert data['circuit_open'] is True
+        assert data['companies'][0]['name'] == 'Müller Garage AG'
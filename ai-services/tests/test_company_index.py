@@ -0,0 +1,119 @@
+"""
+Test Suite for the Local Company Name Index
+
+Tests cover:
+1. Name folding (umlauts, diacritics, legal forms)
+2. Trigram/BM25 ranking and typo tolerance
+3. Persistence and the autocomplete/bulk-load endpoints
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.models.user import db
+from src.routes import swiss_data
+from src.routes.swiss_data import swiss_bp
+from src.services.company_index import CompanyDirectory, CompanySearchIndex, fold_company_name
+
+
+def make_company(uid, name, city='Zürich'):
+    return {'uid': uid, 'name': name, 'legal_form': '', 'status': 'active', 'address': {'city': city}}
+
+
+COMPANIES = [
+    make_company('CHE-100.000.006', 'Müller Garage AG'),
+    make_company('CHE-100.000.012', 'Garage du Lac Sàrl', 'Genève'),
+    make_company('CHE-100.000.029', 'Cadillac Europe GmbH'),
+    make_company('CHE-100.000.035', 'Mueller Treuhand GmbH'),
+    make_company('CHE-100.000.041', 'Autohaus Zürich-Nord AG'),
+]
+
+
+class TestNameFolding:
+    """Test suite for name normalization"""
+
+    def test_umlauts_diacritics_and_legal_forms(self):
+        assert fold_company_name('Müller Holding AG') == ['muller', 'holding']
+        assert fold_company_name('Mueller-Holding S.A.') == ['muller', 'holding']
+        assert fold_company_name('Garage du Lac S.à r.l.') == ['garage', 'du', 'lac']
+        assert fold_company_name('AG') == ['ag']
+
+
+class TestCompanySearchIndex:
+    """Test suite for ranking"""
+
+    @pytest.fixture
+    def index(self):
+        index = CompanySearchIndex()
+        for company in COMPANIES:
+            index.add(company)
+        return index
+
+    def test_spelling_variants_and_prefixes(self, index):
+        names = lambda query: [c['name'] for c in index.search(query, limit=2)]
+
+        assert names('mueller garage')[0] == 'Müller Garage AG'
+        assert set(names('Müller')) == {'Müller Garage AG', 'Mueller Treuhand GmbH'}
+        assert names('cadi')[0] == 'Cadillac Europe GmbH'
+        assert names('cadilac')[0] == 'Cadillac Europe GmbH'
+        assert names('Autohaus Zurich')[0] == 'Autohaus Zürich-Nord AG'
+
+    def test_replacing_a_record(self, index):
+        index.add(make_company('CHE-100.000.029', 'Cadillac Schweiz GmbH'))
+
+        assert len(index) == len(COMPANIES)
+        assert [c['uid'] for c in index.search('cadillac europe')][:1] == ['CHE-100.000.029']
+        assert index.search('cadillac')[0]['name'] == 'Cadillac Schweiz GmbH'
+
+
+class TestCompanySearchEndpoints:
+    """Test suite for /api/swiss/company-search"""
+
+    @pytest.fixture
+    def app(self):
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(app)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        with app.app_context():
+            db.create_all()
+            yield app
+
+    def test_bulk_load_then_autocomplete_from_index(self, app, monkeypatch):
+        monkeypatch.setattr(swiss_data, 'company_directory', CompanyDirectory())
+        client = app.test_client()
+
+        loaded = client.post('/api/swiss/company-search/bulk-load', json={'companies': COMPANIES}).get_json()
+        with patch.object(swiss_data, '_fetch_zefix_companies') as fetch:
+            data = client.get('/api/swiss/company-search?q=garage').get_json()
+            limited = [client.get(f'/api/swiss/company-search?q=garage&limit={limit}').get_json()
+                       for limit in (0, -5)]
+
+        assert loaded['stored'] == len(COMPANIES)
+        assert {c['name'] for c in data['companies'][:2]} == {'Müller Garage AG', 'Garage du Lac Sàrl'}
+        assert data['refresh_scheduled'] is False
+        fetch.assert_not_called()
+        assert [len(result['companies']) for result in limited] == [1, 1]
+
+        # A fresh process rebuilds the index from the persisted records
+        reloaded = CompanyDirectory()
+        assert reloaded.search('treuhand')[0]['uid'] == 'CHE-100.000.035'
+
+    def test_unknown_name_schedules_background_refresh(self, app, monkeypatch):
+        directory = CompanyDirectory()
+        monkeypatch.setattr(swiss_data, 'company_directory', directory)
+        upstream = [make_company('CHE-100.000.058', 'Zebra Mobility AG')]
+
+        with patch.object(swiss_data, '_fetch_zefix_companies', return_value=upstream), \
+                patch('src.services.company_index.threading.Thread') as thread:
+            data = app.test_client().get('/api/swiss/company-search?q=zebra').get_json()
+            thread.call_args.kwargs['target']()
+
+        assert data['companies'] == []
+        assert data['refresh_scheduled'] is True
+        assert directory.search('zebra')[0]['name'] == 'Zebra Mobility AG'
@@ -0,0 +1,137 @@
+"""
+Test Suite for Request Deadlines
+
+Tests cover:
+1. Budget from headers and per-route defaults
+2. Per-call timeouts capped to the remaining budget
+3. Propagation to worker threads
+4. Local fallbacks once the budget is spent, station refreshes on their own budget
+"""
+
+import pytest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import requests
+from flask import Flask
+from src.models.user import db
+from src.routes import swiss_data
+from src.routes.swiss_data import swiss_bp
+from src.services.circuit_breaker import CircuitBreakerRegistry
+from src.services.company_index import CompanyDirectory
+from src.services.deadline import (
+    Deadline, DeadlineExceeded, budget_from_headers, call_timeout, current_deadline,
+    deadline_scope, init_request_deadlines, propagate_deadline, route_budget
+)
+from src.services.swiss_validation import NegativeCache
+
+
+class TestDeadline:
+    """Test suite for the deadline primitives"""
+
+    def test_budget_from_headers(self):
+        assert budget_from_headers({'X-Request-Timeout-Ms': '2500'}, 9.0) == 2.5
+        assert budget_from_headers({'x-envoy-expected-rq-timeout-ms': '800'}, 9.0) == 0.8
+        assert budget_from_headers({'X-Request-Timeout-Ms': 'soon'}, 9.0) == 9.0
+        assert budget_from_headers({'X-Request-Timeout-Ms': '99999999'}, 9.0) == 120.0
+
+    def test_route_budget(self):
+        assert route_budget('swiss_data.company_lookup') == 9.0
+        assert route_budget('swiss_data.compare_ev_incentives') == 18.0
+        assert route_budget('ai_services.analyze_customer') == 60.0
+        assert route_budget(None) == 9.0
+
+    def test_call_timeout_capped_to_remaining_budget(self):
+        assert call_timeout(10) == 10
+        with deadline_scope(Deadline(2.0)):
+            assert 1.5 < call_timeout(10) <= 2.0
+            assert call_timeout(0.5) == 0.5
+        with deadline_scope(Deadline(0.0)):
+            with pytest.raises(DeadlineExceeded):
+                call_timeout(10)
+
+    def test_propagates_to_worker_threads(self):
+        deadline = Deadline(5.0)
+        with deadline_scope(deadline), ThreadPoolExecutor(max_workers=2) as executor:
+            bare = executor.submit(current_deadline).result()
+            bound = executor.submit(propagate_deadline(current_deadline)).result()
+
+        assert bare is None
+        assert bound is deadline
+
+
+class TestDeadlineFallbacks:
+    """Endpoints answer locally once the budget is spent"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(swiss_data, 'negative_cache', NegativeCache())
+        monkeypatch.setattr(swiss_data, 'company_directory', CompanyDirectory())
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(app)
+        init_request_deadlines(app)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        with app.app_context():
+            db.create_all()
+            yield app.test_client()
+
+    def test_request_timeout_header_caps_upstream_call(self, client):
+        with patch.object(swiss_data.requests, 'get', side_effect=requests.exceptions.ConnectionError) as get:
+            client.post('/api/swiss/company-lookup', json={'company_name': 'Garage'},
+                        headers={'X-Request-Timeout-Ms': '3000'})
+
+        assert 2.5 < get.call_args.kwargs['timeout'] <= 3.0
+
+    def test_company_lookup_falls_back_to_local_index(self, client):
+        swiss_data.company_directory.store([{
+            'uid': 'CHE-100.000.006', 'name': 'Müller Garage AG', 'legal_form': '',
+            'status': 'active', 'address': {'city': 'Zürich'}
+        }])
+
+        with patch.object(swiss_data.requests, 'get') as get:
+            response = client.post('/api/swiss/company-lookup', json={'company_name': 'Müller Garage'},
+                                   headers={'X-Request-Timeout-Ms': '0'})
+
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['deadline_exceeded'] is True
+        assert data['companies'][0]['uid'] == 'CHE-100.000.006'
+        get.assert_not_called()
+
+    def test_company_lookup_without_local_match_is_gateway_timeout(self, client):
+        with patch.object(swiss_data.requests, 'get'):
+            response = client.post('/api/swiss/company-lookup', json={'uid_number': 'CHE-116.281.710'},
+                                   headers={'X-Request-Timeout-Ms': '0'})
+
+        assert response.status_code == 504
+        assert response.get_json()['deadline_exceeded'] is True
+
+    def test_postal_code_validation_degrades_to_format_check(self, client):
+        with patch.object(swiss_data.requests, 'get') as get:
+            data = client.post('/api/swiss/postal-codes/validate', json={'postal_code': '8001'},
+                               headers={'X-Request-Timeout-Ms': '0'}).get_json()
+
+        assert data['valid'] is True
+        assert data['verified'] is False
+        assert data['deadline_exceeded'] is True
+        get.assert_not_called()
+
+    def test_station_refresh_runs_on_its_own_budget(self, client, monkeypatch):
+        monkeypatch.setattr(swiss_data, '_station_store_expires_at', 0.0)
+        monkeypatch.setattr(swiss_data.station_store, 'source', None)
+        monkeypatch.setattr(swiss_data, 'upstream_breakers', CircuitBreakerRegistry())
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"stations": []}'
+
+        with patch.object(swiss_data.requests, 'get', return_value=response) as get:
+            client.get('/api/swiss/charging-stations', headers={'X-Request-Timeout-Ms': '0'})
+
+        # The spent request budget neither skips the shared refresh nor shortens it
+        assert get.call_args.kwargs['timeout'] == swiss_data.STATION_FEED_TIMEOUT_SECONDS
+        assert swiss_data.upstream_breakers.get('ich_tanke').snapshot()['failures'] == 0
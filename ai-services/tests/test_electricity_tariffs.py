@@ -0,0 +1,122 @@
+"""
+Test Suite for Municipality Electricity Tariffs
+
+Tests cover:
+1. Loading ElCom rows (latest year, category, several operators)
+2. Postal code and commune lookups
+3. Fallback chain commune → canton → national average
+4. Energy costs in the TCO and incentive calculations
+5. Tariff refresh download
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from src.routes import swiss_data
+from src.routes.tco_calculator import calculate_ev_costs
+from src.services import electricity_tariffs
+from src.services.canton_reference import get_canton_table
+from src.services.electricity_tariffs import TariffTable, electricity_price, load_tariff_table, refresh_tariff_table
+
+TARIFF_CSV = """bfs_number,commune,canton,operator,category,year,total_rp_per_kwh
+261,Zürich,ZH,ewz,H4,2025,27.5
+261,Zürich,ZH,ewz,H4,2026,26.0
+261,Zürich,ZH,ewz,H7,2026,22.0
+351,Bern,BE,ewb,H4,2026,30.0
+351,Bern,BE,BKW,H4,2026,34.0
+"""
+
+POSTAL_CSV = """postal_code,bfs_number
+8001,261
+3011,351
+"""
+
+
+@pytest.fixture
+def tariff_dir(tmp_path):
+    (tmp_path / 'tariffs.csv').write_text(TARIFF_CSV, encoding='utf-8')
+    (tmp_path / 'postal_codes.csv').write_text(POSTAL_CSV, encoding='utf-8')
+    return tmp_path
+
+
+@pytest.fixture
+def tariffs(tariff_dir, monkeypatch):
+    table = load_tariff_table(tariff_dir)
+    monkeypatch.setattr(electricity_tariffs, '_tariff_table', table)
+    return table
+
+
+class TestTariffTable:
+    """Test suite for loading and lookups"""
+
+    def test_latest_year_and_operator_mean(self, tariffs):
+        zurich = tariffs.lookup(postal_code='8001')
+        bern = tariffs.lookup(commune='bern')
+
+        assert zurich['price_per_kwh'] == 0.26
+        assert zurich['year'] == 2026
+        assert bern['price_per_kwh'] == 0.32
+        assert bern['operators'] == ['BKW', 'ewb']
+        assert tariffs.lookup(commune='351') == bern
+
+    def test_unknown_locations(self, tariffs):
+        assert tariffs.lookup(postal_code='9999') is None
+        assert tariffs.lookup(postal_code='80a1') is None
+        assert tariffs.lookup(commune='Atlantis') is None
+        assert not TariffTable().available
+
+    def test_fallback_chain(self, tariffs):
+        zh = get_canton_table().get('ZH')
+
+        assert electricity_price('8001', None, zh)[1]['source'] == 'commune'
+        assert electricity_price('9999', None, zh) == (zh.average_electricity_price_per_kwh,
+                                                       {'source': 'canton', 'canton': 'ZH'})
+        assert electricity_price(None, None, None, 0.21) == (0.21, {'source': 'national'})
+
+
+class TestTariffsInCostCalculations:
+    """Energy costs use the commune tariff when a location is given"""
+
+    def test_tco_energy_cost(self, tariffs):
+        costs = calculate_ev_costs(85200, 15000, 5, 'BE', 20000, 0.039, {}, postal_code='3011')
+        canton_costs = calculate_ev_costs(85200, 15000, 5, 'BE', 20000, 0.039, {})
+
+        assert costs['energy_costs']['electricity_price_per_kwh'] == 0.32
+        assert costs['energy_costs']['annual_cost'] == pytest.approx(150 * 18.5 * 0.32)
+        assert canton_costs['energy_costs']['tariff']['source'] == 'canton'
+
+    def test_incentive_energy_cost(self, tariffs):
+        calculations = swiss_data._calculate_comprehensive_ev_costs(
+            get_canton_table().get('ZH'), {'efficiency_kwh_100km': 20}, {'commune': 'Zürich'},
+            70000, 255, 2234, 10000, 5
+        )
+
+        energy = calculations['energy_analysis']
+        assert energy['electricity_price_per_kwh'] == 0.26
+        assert energy['tariff']['commune'] == 'Zürich'
+        assert calculations['annual_costs']['energy_cost'] == pytest.approx(2000 * 0.26)
+
+
+class TestTariffRefresh:
+    """Test suite for the download job"""
+
+    def test_refresh_replaces_file_and_table(self, tariff_dir, tariffs, monkeypatch):
+        newer = TARIFF_CSV + "261,Zürich,ZH,ewz,H4,2027,24.0\n"
+        with patch.object(electricity_tariffs.requests, 'get',
+                          return_value=Mock(content=newer.encode(), raise_for_status=Mock())):
+            assert refresh_tariff_table('https://example.invalid/tariffs.csv', tariff_dir)
+
+        assert electricity_tariffs.get_tariff_table().lookup(postal_code='8001')['price_per_kwh'] == 0.24
+        assert load_tariff_table(tariff_dir).lookup(postal_code='8001')['year'] == 2027
+
+    def test_refresh_rejects_empty_download(self, tariff_dir, tariffs):
+        with patch.object(electricity_tariffs.requests, 'get',
+                          return_value=Mock(content=b'bfs_number,year\n', raise_for_status=Mock())):
+            with pytest.raises(ValueError):
+                refresh_tariff_table('https://example.invalid/tariffs.csv', tariff_dir)
+
+        assert (tariff_dir / 'tariffs.csv').read_text(encoding='utf-8') == TARIFF_CSV
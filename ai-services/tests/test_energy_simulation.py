@@ -0,0 +1,112 @@
+"""
+Test Suite for the Hourly Energy Simulation
+
+Tests cover:
+1. Charging mix normalization (tco_calculations.charging_mix format)
+2. Energy balance against the flat calculation
+3. Time-of-use tariffs, smart charging and winter uplift
+4. Simulation speed
+5. Detailed energy mode of /api/tco/calculate
+"""
+
+import pytest
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import tco_bp
+from src.services.energy_simulation import (
+    EnergyScenario, high_tariff_mask, normalize_charging_mix, simulate_energy_year
+)
+
+
+class TestEnergySimulation:
+    """Test suite for the 8,760-hour simulation"""
+
+    def test_charging_mix_normalization(self):
+        assert normalize_charging_mix({'homeCharging': 80, 'publicCharging': 15, 'fastCharging': 5}) == \
+            pytest.approx({'home': 0.8, 'public': 0.15, 'fast': 0.05})
+        assert normalize_charging_mix({'home': 1, 'fast': 1}) == {'home': 0.5, 'public': 0.0, 'fast': 0.5}
+        assert normalize_charging_mix(None)['home'] == 0.8
+        with pytest.raises(ValueError):
+            normalize_charging_mix({'home': 0})
+
+    def test_flat_home_tariff_matches_flat_calculation(self):
+        result = simulate_energy_year(EnergyScenario(
+            annual_km=15000, consumption_kwh_100km=20, home_high_price=0.30,
+            charging_mix={'home': 1}, winter_uplift=0
+        ))
+
+        assert result['consumed_kwh'] == pytest.approx(3000, rel=1e-6)
+        assert result['grid_kwh'] == pytest.approx(3000 / 0.9, rel=1e-4)
+        assert result['total_cost'] == pytest.approx(3000 / 0.9 * 0.30, rel=1e-4)
+        assert result['hours_simulated'] == 8760
+
+    def test_smart_charging_uses_low_tariff(self):
+        scenario = dict(annual_km=20000, consumption_kwh_100km=20, home_high_price=0.32, home_low_price=0.20,
+                        charging_mix={'home': 1}, year=2026)
+        plug_in = simulate_energy_year(EnergyScenario(**scenario))
+        smart = simulate_energy_year(EnergyScenario(**scenario, smart_charging=True))
+
+        assert smart['home_low_tariff_share'] == 1.0
+        assert plug_in['home_low_tariff_share'] < 0.5
+        assert smart['grid_kwh'] == pytest.approx(plug_in['grid_kwh'])
+        assert smart['total_cost'] < plug_in['total_cost']
+
+    def test_winter_months_cost_more(self):
+        result = simulate_energy_year(EnergyScenario(15000, 20, 0.30))
+
+        january, july = result['monthly_cost'][0], result['monthly_cost'][6]
+        assert january > july * 1.15
+        assert sum(result['monthly_cost']) == pytest.approx(result['total_cost'], abs=0.05)
+        assert set(result['by_channel']) == {'home', 'public', 'fast'}
+
+    def test_high_tariff_windows(self):
+        mask = high_tariff_mask(np.array([0, 5, 6]))
+        assert mask[0, 7] and not mask[0, 20]
+        assert mask[1, 12] and not mask[1, 13]
+        assert not mask[2].any()
+
+    def test_simulation_is_fast(self):
+        scenario = EnergyScenario(15000, 18.5, 0.30, 0.21, smart_charging=True)
+        simulate_energy_year(scenario)
+        started = time.perf_counter()
+        for _ in range(50):
+            simulate_energy_year(scenario)
+        assert (time.perf_counter() - started) / 50 < 0.010
+
+
+class TestDetailedEnergyMode:
+    """Test suite for energy_mode=detailed on /api/tco/calculate"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_detailed_mode(self, client):
+        request = {'canton': 'ZH', 'annual_mileage': 15000, 'vehicle': {'purchase_price': 85200}}
+        flat = client.post('/api/tco/calculate', json=request).get_json()['tco_calculation']
+        detailed = client.post('/api/tco/calculate', json={
+            **request, 'energy_mode': 'detailed',
+            'charging_mix': {'homeCharging': 80, 'publicCharging': 15, 'fastCharging': 5},
+            'home_tariff': {'high': 0.32, 'low': 0.20}, 'smart_charging': True
+        }).get_json()['tco_calculation']
+
+        energy = detailed['ev_costs']['energy_costs']
+        assert flat['ev_costs']['energy_costs']['simulation'] is None
+        assert detailed['parameters']['energy_mode'] == 'detailed'
+        assert energy['annual_cost'] == energy['simulation']['total_cost']
+        assert energy['simulation']['charging_mix'] == {'home': 0.8, 'public': 0.15, 'fast': 0.05}
+
+    def test_invalid_options_rejected(self, client):
+        response = client.post('/api/tco/calculate', json={
+            'energy_mode': 'detailed', 'home_tariff': {'high': -1}
+        })
+        assert response.status_code == 400
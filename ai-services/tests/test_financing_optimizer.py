@@ -0,0 +1,96 @@
+"""
+Test Suite for the Financing Optimizer
+
+Tests cover:
+1. Affordability limits and payment parity with calculate_monthly_payment
+2. Pareto set of monthly payment vs total cost
+3. /api/tco/financing/optimize responses, validation and latency
+"""
+
+import pytest
+import sys
+import os
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import calculate_monthly_payment, tco_bp
+from src.services.financing_optimizer import max_monthly_payment, optimize_financing
+
+
+class TestFinancingOptimizer:
+    """Test suite for the financing grid search"""
+
+    def test_affordability_limit(self):
+        assert max_monthly_payment(120000) == pytest.approx(1500)
+        assert max_monthly_payment(income_bracket='medium') == pytest.approx(1250)
+        assert max_monthly_payment() is None
+        with pytest.raises(ValueError):
+            max_monthly_payment(income_bracket='unknown')
+        for income in ('120000', -1, True, float('nan')):
+            with pytest.raises(ValueError):
+                max_monthly_payment(income)
+
+    def test_finance_payment_matches_tco(self):
+        result = optimize_financing(85200, 0.039, 60, down_payments=[20000], terms_months=[60],
+                                    products=['finance'])
+
+        option = result['pareto'][0]
+        assert result['combinations'] == 1
+        assert option['monthly_payment'] == calculate_monthly_payment(65200, 0.039, 5)
+        # Loan repaid within the horizon: cost is everything paid minus the resale value
+        assert option['total_cost'] == pytest.approx(20000 + option['monthly_payment'] * 60 - result['resale_value'],
+                                                     abs=0.01)
+
+    def test_pareto_set(self):
+        result = optimize_financing(85200, 0.039, 60, monthly_limit=1500)
+        options = result['pareto']
+        payments = [o['monthly_payment'] for o in options]
+        costs = [o['total_cost'] for o in options]
+
+        assert 0 < len(options) <= result['affordable'] < result['combinations']
+        assert all(payment <= 1500 for payment in payments)
+        # Every step to a higher payment buys a lower total cost
+        assert payments == sorted(payments) and costs == sorted(costs, reverse=True)
+        assert result['lowest_total_cost'] == options[-1]
+        assert 'cash' not in {o['product'] for o in options}
+
+        with_funds = optimize_financing(85200, 0.039, 60, max_down_payment=100000)
+        assert with_funds['lowest_monthly_payment']['product'] == 'cash'
+
+
+class TestFinancingEndpoint:
+    """Test suite for /api/tco/financing/optimize"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_large_grid(self, client):
+        started = time.perf_counter()
+        response = client.post('/api/tco/financing/optimize', json={
+            'vehicle': {'model': 'LYRIQ', 'purchase_price': 85200},
+            'income_bracket': 'high',
+            'down_payments': {'min': 0, 'max': 40000, 'step': 250},
+            'terms_months': {'min': 12, 'max': 96, 'step': 1}
+        })
+        elapsed = time.perf_counter() - started
+
+        data = response.get_json()['financing']
+        assert response.status_code == 200
+        assert data['combinations'] > 20000
+        assert data['max_monthly_payment'] == pytest.approx(2000)
+        assert data['vehicle'] == 'LYRIQ'
+        assert elapsed < 0.5
+
+    def test_invalid_grid(self, client):
+        assert client.post('/api/tco/financing/optimize', json={'terms_months': []}).status_code == 400
+        assert client.post('/api/tco/financing/optimize', json={'products': ['loan']}).status_code == 400
+        assert client.post('/api/tco/financing/optimize', json={
+            'down_payments': {'min': 0, 'max': 80000, 'step': 1}, 'terms_months': {'min': 1, 'max': 120, 'step': 1}
+        }).status_code == 400
+        assert client.post('/api/tco/financing/optimize', json={'annual_income': 'high'}).status_code == 400
+        assert client.post('/api/tco/financing/optimize', json={'annual_income': -50000}).status_code == 400
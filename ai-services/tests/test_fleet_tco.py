@@ -0,0 +1,108 @@
+"""
+Test Suite for Fleet TCO
+
+Tests cover:
+1. Per-vehicle rows matching the TCO engine and fleet totals
+2. Chunked computation over a process pool
+3. /api/tco/fleet JSON, CSV and NDJSON output and latency
+"""
+
+import pytest
+import sys
+import os
+import csv
+import io
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import tco_bp
+from src.services import fleet_tco
+from src.services.fleet_tco import compute_fleet, fleet_rows, fleet_summary
+from src.services.tco_engine import compute_tco, pack_tco_inputs
+
+CANTONS = ['ZH', 'BE', 'GE', 'VD', 'ZG']
+
+
+def fleet(size):
+    return [{'name': f'Car {i}', 'canton': CANTONS[i % 5], 'annual_mileage': 12000 + (i % 7) * 3000,
+             'calculation_period_years': 3 + i % 3, 'financing_rate': 0.02 + (i % 4) / 100,
+             'comparison_vehicle': {'purchase_price': 60000, 'consumption': 7.5}} for i in range(size)]
+
+
+class TestFleetTco:
+    """Test suite for the fleet computation"""
+
+    def test_rows_and_summary(self):
+        vehicles = fleet(20) + [{'canton': 'TI'}]
+        rows = fleet_rows(vehicles)
+        result = compute_tco(pack_tco_inputs(vehicles))
+        summary = fleet_summary(rows, time.perf_counter())
+
+        assert rows[3]['ev_total_cost'] == pytest.approx(result.ev_total_cost[3], abs=0.01)
+        assert rows[3]['savings'] == pytest.approx(result.savings[3], abs=0.01)
+        assert rows[-1]['savings'] is None and rows[-1]['ice_total_cost'] is None
+        assert summary['vehicles'] == 21 and summary['vehicles_compared'] == 20
+        assert summary['by_canton']['ZH']['vehicles'] == 4
+        assert summary['total_savings'] == pytest.approx(sum(r['savings'] for r in rows[:20]), abs=0.01)
+
+    def test_canton_buckets_normalized(self):
+        vehicles = [{'canton': 'zh'}, {'canton': 'ZH'}, {'canton': None}, {}, {'canton': ' be '}]
+        rows = fleet_rows(vehicles)
+        summary = fleet_summary(rows, time.perf_counter())
+
+        assert [row['canton'] for row in rows] == ['ZH'] * 4 + ['BE']
+        assert len({row['ev_total_cost'] for row in rows[:4]}) == 1
+        assert {code: values['vehicles'] for code, values in summary['by_canton'].items()} == {'BE': 1, 'ZH': 4}
+
+    def test_chunked_over_process_pool(self, monkeypatch):
+        monkeypatch.setattr(fleet_tco, 'FLEET_SHARD_THRESHOLD', 10)
+        monkeypatch.setattr(fleet_tco, 'FLEET_CHUNK_SIZE', 8)
+        vehicles = fleet(30)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            pooled = compute_fleet(vehicles, executor=executor)
+
+        assert pooled == fleet_rows(vehicles)
+        with pytest.raises(ValueError):
+            compute_fleet([])
+
+
+class TestFleetEndpoint:
+    """Test suite for /api/tco/fleet"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_500_vehicle_fleet(self, client):
+        client.post('/api/tco/fleet', json={'vehicles': fleet(5)})
+
+        started = time.perf_counter()
+        response = client.post('/api/tco/fleet', json={
+            'base_parameters': {'down_payment': 10000}, 'vehicles': fleet(500)
+        })
+        elapsed = time.perf_counter() - started
+
+        data = response.get_json()['fleet']
+        assert response.status_code == 200
+        assert data['summary']['vehicles'] == 500
+        assert elapsed < 1.0
+
+    def test_streamed_formats(self, client):
+        ndjson = client.post('/api/tco/fleet?format=ndjson', json={'vehicles': fleet(25)})
+        lines = [json.loads(line) for line in ndjson.get_data(as_text=True).splitlines()]
+        assert len(lines) == 26 and lines[-1]['summary']['vehicles'] == 25
+
+        response = client.post('/api/tco/fleet', json={'vehicles': fleet(25), 'format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        assert response.mimetype == 'text/csv'
+        assert rows[0]['name'] == 'Car 0' and rows[-1]['vehicle_index'] == 'total'
+
+    def test_invalid_fleet(self, client):
+        assert client.post('/api/tco/fleet', json={'vehicles': {}}).status_code == 400
+        assert client.post('/api/tco/fleet', json={'vehicles': [{'annual_mileage': -1}]}).status_code == 400
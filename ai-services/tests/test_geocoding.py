@@ -0,0 +1,153 @@
+"""
+Test Suite for Address Geocoding
+
+Tests cover:
+1. Address normalization used as cache key
+2. Persistent cache, deduplication and negative caching
+3. Cache writes racing with a concurrent request for the same address
+4. Batch geocoding endpoint against a local swisstopo stand-in
+"""
+
+import pytest
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.models.geocoding import GeocodedAddress
+from src.models.user import db
+from src.routes import swiss_data
+from src.routes.swiss_data import swiss_bp
+from src.services.geocoding import GeocodingService, SwisstopoGeocoder, normalize_address
+
+KNOWN_ADDRESSES = {
+    'bahnhofstrasse 1 8001 zürich': (47.3686, 8.5391),
+    'bundesplatz 3 3003 bern': (46.9466, 7.4440),
+}
+
+
+class SwisstopoStandIn(BaseHTTPRequestHandler):
+    """Answers /api/SearchServer like swisstopo for KNOWN_ADDRESSES"""
+    requests_seen = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        search_text = parse_qs(url.query)['searchText'][0]
+        SwisstopoStandIn.requests_seen.append(search_text)
+        match = KNOWN_ADDRESSES.get(normalize_address(search_text))
+        results = [{'attrs': {'lat': match[0], 'lon': match[1], 'label': f'<b>{search_text}</b>'}}] if match else []
+        body = json.dumps({'results': results}).encode()
+        self.send_response(200 if url.path == '/api/SearchServer' else 404)
+        self.send_header('Content-Type', 'application/json')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stand_in():
+    SwisstopoStandIn.requests_seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SwisstopoStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def app(stand_in):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    db.init_app(app)
+    app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+    with app.app_context():
+        db.create_all()
+        yield app
+
+
+class TestAddressNormalization:
+    """Test suite for cache keys"""
+
+    def test_equivalent_spellings_share_a_key(self):
+        assert normalize_address('Bahnhofstr. 1, CH-8001  Zürich') == 'bahnhofstrasse 1 8001 zürich'
+        assert normalize_address('BAHNHOFSTRASSE 1 8001 ZÜRICH') == 'bahnhofstrasse 1 8001 zürich'
+        assert normalize_address('Grossstraße 5') == normalize_address('grossstrasse 5')
+        assert normalize_address('   ') == ''
+
+
+class TestGeocodingService:
+    """Test suite for cached, deduplicated geocoding"""
+
+    def test_batch_dedupes_and_caches(self, app, stand_in):
+        service = GeocodingService(SwisstopoGeocoder(stand_in))
+        addresses = ['Bahnhofstrasse 1, 8001 Zürich', 'bahnhofstr. 1 8001 zürich',
+                     'Bundesplatz 3, 3003 Bern', 'Nowhere 99, 9999 Atlantis']
+
+        first = service.geocode_many(addresses)
+        second = service.geocode_many(addresses)
+
+        assert len(SwisstopoStandIn.requests_seen) == 3
+        assert [r['found'] for r in first] == [True, True, True, False]
+        assert first[0]['lat'] == pytest.approx(47.3686)
+        assert first[0]['label'] == 'Bahnhofstrasse 1, 8001 Zürich'
+        assert all(r['cached'] for r in second)
+        assert [r['lat'] for r in second] == [r['lat'] for r in first]
+
+    def test_upstream_errors_are_not_cached(self, app):
+        service = GeocodingService(SwisstopoGeocoder('http://127.0.0.1:9', timeout=0.5))
+
+        result = service.geocode('Bundesplatz 3, 3003 Bern')
+
+        assert result['found'] is False
+        assert 'error' in result
+        assert service._cached([result['normalized']]) == {}
+
+
+    def test_concurrent_insert_of_the_same_address(self, app, stand_in, monkeypatch):
+        service = GeocodingService(SwisstopoGeocoder(stand_in))
+        merge = db.session.merge
+
+        def racing_merge(entry):
+            merged = merge(entry)
+            if entry.address_key == 'bundesplatz 3 3003 bern':
+                # Another request stores the address between our lookup and our commit
+                with db.engine.begin() as connection:
+                    connection.execute(db.insert(GeocodedAddress), [{
+                        'address_key': entry.address_key, 'found': True, 'lat': 46.9, 'lng': 7.4,
+                        'label': 'Bundesplatz 3', 'source': 'swisstopo', 'geocoded_at': entry.geocoded_at
+                    }])
+            return merged
+
+        monkeypatch.setattr(db.session, 'merge', racing_merge)
+        results = service.geocode_many(['Bahnhofstrasse 1, 8001 Zürich', 'Bundesplatz 3, 3003 Bern'])
+        monkeypatch.undo()
+
+        assert [r['found'] for r in results] == [True, True]
+        assert results[1]['lat'] == pytest.approx(46.9466)
+        assert set(service._cached(['bahnhofstrasse 1 8001 zürich', 'bundesplatz 3 3003 bern'])) == {
+            'bahnhofstrasse 1 8001 zürich', 'bundesplatz 3 3003 bern'
+        }
+
+
+class TestGeocodingEndpoints:
+    """Test suite for /api/swiss/geocode"""
+
+    def test_batch_endpoint(self, app, stand_in, monkeypatch):
+        monkeypatch.setattr(swiss_data, 'geocoding_service', GeocodingService(SwisstopoGeocoder(stand_in)))
+        client = app.test_client()
+
+        data = client.post('/api/swiss/geocode/batch', json={
+            'addresses': ['Bundesplatz 3, 3003 Bern', 'Bundesplatz 3 3003 Bern', '']
+        }).get_json()
+        invalid = client.post('/api/swiss/geocode/batch', json={'addresses': []})
+
+        assert data['found'] == 2
+        assert data['failed'] == 1
+        assert len(SwisstopoStandIn.requests_seen) == 1
+        assert invalid.status_code == 400
@@ -0,0 +1,127 @@
+"""
+Test Suite for Charging Occupancy History
+
+Tests cover:
+1. Hour-of-week bins in Swiss local time
+2. Ring buffer wrap-around and bounded memory
+3. Profile predictions and shrinkage of sparse bins
+4. Forecast field on station results and the occupancy endpoint
+5. Scheduled sampling of live station data
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes import swiss_data
+from src.routes.swiss_data import swiss_bp
+from src.services.occupancy_history import SWISS_TIMEZONE, OccupancyHistory, hour_of_week
+
+# Friday 18:00 in Zürich
+FRIDAY_EVENING = datetime(2026, 10, 16, 18, 0, tzinfo=SWISS_TIMEZONE)
+
+
+class TestOccupancyHistory:
+    """Test suite for the ring buffer and hour-of-week profiles"""
+
+    def test_hour_of_week_uses_swiss_local_time(self):
+        assert hour_of_week(FRIDAY_EVENING) == 4 * 24 + 18
+        assert hour_of_week(datetime(2026, 10, 16, 16, 0, tzinfo=timezone.utc)) == 4 * 24 + 18
+        assert hour_of_week(datetime(2026, 10, 19, 0, 30, tzinfo=SWISS_TIMEZONE)) == 0
+
+    def test_ring_buffer_keeps_latest_samples(self):
+        history = OccupancyHistory(ring_samples=4)
+        for minute in range(6):
+            history.record(['A'], [4], [minute % 5], FRIDAY_EVENING + timedelta(minutes=5 * minute))
+
+        recent = history.recent('A')
+        assert [sample['free_share'] for sample in recent] == [0.5, 0.75, 1.0, 0.0]
+        assert history.recent('unknown') == []
+
+    def test_memory_is_bounded_by_stations_not_samples(self):
+        history = OccupancyHistory(ring_samples=8, max_stations=3)
+        ids = ['A', 'B', 'C', 'D']
+        for week in range(10):
+            history.record(ids, np.full(4, 2), np.ones(4), FRIDAY_EVENING + timedelta(weeks=week))
+        size = history.memory_bytes()
+        for week in range(10, 40):
+            history.record(ids, np.full(4, 2), np.ones(4), FRIDAY_EVENING + timedelta(weeks=week))
+
+        assert len(history) == 3
+        assert history.memory_bytes() == size
+
+    def test_predicts_busy_friday_evening(self):
+        history = OccupancyHistory()
+        for week in range(4):
+            friday = FRIDAY_EVENING + timedelta(weeks=week)
+            history.record(['A', 'B'], [4, 2], [1, 2], friday)
+            history.record(['A', 'B'], [4, 2], [4, 2], friday - timedelta(hours=12))
+
+        probability, samples = history.predict(['A', 'B', 'C'], FRIDAY_EVENING + timedelta(weeks=8))
+        assert probability[0] == pytest.approx(0.25 * 4 / 7 + 0.625 * 3 / 7)   # shrunk toward mean 0.625
+        assert probability[1] == pytest.approx(1.0)
+        assert np.isnan(probability[2])
+        assert list(samples) == [4, 4, 0]
+
+        profile = history.weekly_profile('A')
+        assert profile['samples'][4][18] == 4
+        assert profile['free_probability'][4][18] < profile['free_probability'][4][6]
+
+
+class TestOccupancyEndpoints:
+    """Test suite for the forecast field and /charging-stations/<id>/occupancy"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        history = OccupancyHistory()
+        history.record(['CH-00001'], [2], [0], FRIDAY_EVENING - timedelta(weeks=1))
+        monkeypatch.setattr(swiss_data, 'occupancy_history', history)
+        app = Flask(__name__)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        return app.test_client()
+
+    def test_forecast_field_on_station_results(self, client):
+        with patch.object(swiss_data, '_refresh_station_store'), \
+                patch.object(swiss_data.station_store, 'query', return_value=[
+                    {'id': 'CH-00001', 'charging_points': [{}, {}]}, {'id': 'CH-00002', 'charging_points': []}
+                ]):
+            data = client.get('/api/swiss/charging-stations?at=2026-10-23T18:15').get_json()
+
+        forecast = data['charging_stations'][0]['occupancy_forecast']
+        assert forecast['free_probability'] == 0.0
+        assert forecast['hour_of_week'] == 4 * 24 + 18
+        assert data['charging_stations'][1]['occupancy_forecast'] is None
+
+    def test_occupancy_endpoint(self, client):
+        data = client.get('/api/swiss/charging-stations/CH-00001/occupancy?at=2026-10-23T18:15').get_json()
+
+        assert data['forecast']['free_probability'] == 0.0
+        assert len(data['weekly_profile']['free_probability']) == 7
+        assert len(data['recent_samples']) == 1
+        assert client.get('/api/swiss/charging-stations/CH-99999/occupancy').status_code == 404
+        assert client.get('/api/swiss/charging-stations/CH-00001/occupancy?at=friday').status_code == 400
+
+    def test_scheduled_sampling_skips_stale_data(self, monkeypatch):
+        history = OccupancyHistory()
+        monkeypatch.setattr(swiss_data, 'occupancy_history', history)
+        monkeypatch.setattr(swiss_data, 'station_store_live_at', None)
+        monkeypatch.setattr(swiss_data, 'station_store_stale', False)
+        station = {'id': 'CH-00001', 'coordinates': {'lat': 47.37, 'lng': 8.54},
+                   'charging_points': [{'type': 'CCS', 'available': True}, {'type': 'CCS', 'available': False}]}
+
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=[station]) as fetch:
+            swiss_data._scheduled_occupancy_sample()
+            swiss_data._scheduled_occupancy_sample()
+        with patch.object(swiss_data, '_fetch_charging_stations', return_value=[]):
+            swiss_data._scheduled_occupancy_sample()
+
+        # Every tick reloads the feed, whether or not requests came in; the failed one adds no sample
+        assert fetch.call_count == 2
+        assert [sample['free_share'] for sample in history.recent('CH-00001')] == [0.5, 0.5]
@@ -0,0 +1,108 @@
+"""
+Test Suite for Residual Values
+
+Tests cover:
+1. Curve matching by model and variant with generic fallbacks
+2. Interpolation by age and mileage band
+3. Residual values in the TCO engine, /calculate and the fleet engine
+"""
+
+import pytest
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import calculate_ev_costs, calculate_ice_costs, tco_bp
+from src.services.fleet_tco import fleet_rows
+from src.services.residual_values import MAX_AGE_MONTHS, ResidualValueTable, get_residual_table
+from src.services.tco_engine import compute_tco, pack_tco_inputs
+
+
+def curve_rows(model=None, powertrain='ev', variant=None, shares=(0.8, 0.6)):
+    return [{'model_name': model, 'model_variant': variant, 'powertrain': powertrain, 'annual_km': km,
+             'residual_1y': shares[0] * factor, 'residual_2y': shares[1] * factor}
+            for km, factor in ((10000, 1.0), (30000, 0.5))]
+
+
+class TestResidualValueTable:
+    """Test suite for the residual value curves"""
+
+    def test_curve_matching(self):
+        table = get_residual_table()
+        lyriq = table.curve_index('CADILLAC LYRIQ', 'ev')
+
+        assert table.curve_index('LYRIQ', 'ev') == lyriq
+        assert table.curve_index('CADILLAC LYRIQ Luxury', 'ev') == lyriq
+        assert table.describe(table.curve_index('cadillac lyriq sport', 'ev'))['variant'] == 'Sport'
+        assert table.describe(table.curve_index('VISTIQ', 'ev'))['model'] == 'CADILLAC VISTIQ'
+        assert table.describe(table.curve_index('BMW X5 xDrive40i', 'ice'))['model'] == 'BMW X5'
+        assert table.curve_index('CADILLAC OPTIQ Standard', 'ev') == table.generic['ev']
+        assert table.curve_index('BMW X5', 'ev') == table.generic['ev']
+        assert table.curve_index(None, 'ice') == table.generic['ice']
+
+    def test_interpolation(self):
+        table = ResidualValueTable(curve_rows() + curve_rows(powertrain='ice'))
+
+        # Anchors, the month and mileage grid in between, and the continued rate beyond the last anchor
+        assert table.residual_share(0, [0, 12, 18, 24], 10000) == pytest.approx([1.0, 0.8, 0.7, 0.6])
+        assert table.residual_share(0, 12, [5000, 20000, 30000, 50000]) == pytest.approx([0.8, 0.6, 0.4, 0.4])
+        assert table.residual_share(0, 36, 10000) == pytest.approx(0.45)
+        assert table.residual_share(0, MAX_AGE_MONTHS + 60, 10000) == table.residual_share(0, MAX_AGE_MONTHS, 10000)
+
+        shares = get_residual_table().residual_share(0, np.arange(MAX_AGE_MONTHS + 1), 15000)
+        assert (np.diff(shares) <= 0).all()
+        with pytest.raises(ValueError):
+            ResidualValueTable(curve_rows())
+
+    def test_vectorized_lookup(self):
+        table = get_residual_table()
+        size = 200000
+        rng = np.random.default_rng(3)
+        curves = rng.integers(0, len(table), size)
+
+        started = time.perf_counter()
+        shares = table.residual_share(curves, rng.uniform(0, 120, size), rng.uniform(5000, 50000, size))
+        assert time.perf_counter() - started < 0.2
+        assert ((shares > 0) & (shares <= 1)).all()
+
+
+class TestResidualValuesInTco:
+    """Test suite for the residual values of the TCO calculations"""
+
+    def test_engine_matches_calculate(self):
+        vehicle = {'model': 'CADILLAC LYRIQ Sport', 'purchase_price': 96900}
+        comparison = {'model': 'Audi Q7', 'purchase_price': 90000, 'consumption': 9.0}
+        params = {'annual_mileage': 25000, 'calculation_period_years': 4, 'vehicle': vehicle,
+                  'comparison_vehicle': comparison}
+        result = compute_tco(pack_tco_inputs([params]))
+        ev = calculate_ev_costs(96900, 25000, 4, 'ZH', 20000, 0.039, vehicle)
+        ice = calculate_ice_costs(90000, 25000, 4, 'ZH', 20000, 0.039, comparison)
+
+        assert result.ev_residual_value[0] == pytest.approx(ev['depreciation']['residual_value'])
+        assert result.ice_residual_value[0] == pytest.approx(ice['depreciation']['residual_value'])
+        assert ev['depreciation']['residual_value'] == pytest.approx(
+            get_residual_table().residual_value(96900, 4, 25000, 'CADILLAC LYRIQ Sport'))
+
+    def test_models_and_mileage_in_fleet(self):
+        vehicles = [{'vehicle': {'model': model}, 'annual_mileage': mileage}
+                    for model in ('LYRIQ', 'VISTIQ', 'OPTIQ') for mileage in (10000, 40000)]
+        rows = fleet_rows(vehicles)
+        residual = [row['ev_residual_value'] for row in rows]
+
+        assert residual[0] > residual[1] and residual[2] > residual[3]
+        assert residual[2] > residual[0] > residual[4]
+
+    def test_calculate_endpoint(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        client = app.test_client()
+
+        low = client.post('/api/tco/calculate', json={'vehicle': {'model': 'VISTIQ'}, 'annual_mileage': 10000})
+        high = client.post('/api/tco/calculate', json={'vehicle': {'model': 'VISTIQ'}, 'annual_mileage': 40000})
+        residual = [r.get_json()['tco_calculation']['ev_costs']['depreciation']['residual_value'] for r in (low, high)]
+        assert low.status_code == 200 and residual[0] > residual[1]
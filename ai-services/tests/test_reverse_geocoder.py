@@ -0,0 +1,140 @@
+"""
+Test Suite for the Offline Reverse Geocoder
+
+Tests cover:
+1. Point-in-polygon lookup with holes, multipolygons and grid boundaries
+2. Batch lookups against a brute-force ray cast
+3. Loading boundary layers from GeoJSON files
+4. Reverse geocoding endpoints and canton tagging of charging stations
+"""
+
+import pytest
+import sys
+import os
+import json
+from unittest.mock import patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+import numpy as np
+from flask import Flask
+from src.services.reverse_geocoder import PolygonLayer, ReverseGeocoder, load_reverse_geocoder
+from src.routes import swiss_data
+from src.routes.swiss_data import swiss_bp
+
+
+def square(west, south, east, north):
+    return [[west, south], [east, south], [east, north], [west, north], [west, south]]
+
+
+def feature(properties, *polygons):
+    geometry = ({'type': 'Polygon', 'coordinates': polygons[0]} if len(polygons) == 1
+                else {'type': 'MultiPolygon', 'coordinates': list(polygons)})
+    return {'type': 'Feature', 'properties': properties, 'geometry': geometry}
+
+
+CANTONS = {
+    'type': 'FeatureCollection',
+    'features': [
+        # Zürich with a hole, Zug as an enclave in it, Schaffhausen in two parts
+        feature({'code': 'ZH', 'name': 'Zürich'}, [square(8.0, 47.0, 9.0, 47.7), square(8.4, 47.1, 8.6, 47.25)]),
+        feature({'code': 'ZG', 'name': 'Zug'}, [square(8.4, 47.1, 8.6, 47.25)]),
+        feature({'code': 'SH', 'name': 'Schaffhausen'}, [square(8.4, 47.7, 8.9, 47.8)], [square(8.9, 47.75, 9.0, 47.8)]),
+        feature({'code': 'BE', 'name': 'Bern'}, [[[7.0, 46.5], [8.0, 46.4], [8.0, 47.3], [7.3, 47.0], [7.0, 46.5]]]),
+    ]
+}
+
+
+def brute_force(lng, lat, rings):
+    inside = False
+    for ring in rings:
+        for (x1, y1), (x2, y2) in zip(ring[:-1], ring[1:]):
+            if (y1 > lat) != (y2 > lat) and lng < x1 + (lat - y1) * (x2 - x1) / (y2 - y1):
+                inside = not inside
+    return inside
+
+
+class TestPolygonLayer:
+    """Test suite for grid-indexed point-in-polygon lookup"""
+
+    @pytest.fixture
+    def layer(self):
+        return PolygonLayer.from_geojson('canton', CANTONS, ('code', 'name'), 'code')
+
+    def test_holes_enclaves_and_multipolygons(self, layer):
+        codes = lambda points: [layer.properties[i]['code'] if i >= 0 else None
+                                for i in layer.locate(*np.array(points).T)]
+
+        assert codes([(47.37, 8.54), (47.17, 8.5), (47.79, 8.95), (46.95, 7.45), (46.0, 9.5)]) == \
+            ['ZH', 'ZG', 'SH', 'BE', None]
+
+    def test_points_next_to_horizontal_edges(self, layer):
+        """Cells crossed only by horizontal boundary edges are still tested exactly"""
+        found = layer.locate(np.array([47.701, 47.699, 47.801]), np.array([8.3, 8.3, 8.5]))
+
+        assert [layer.properties[i]['code'] if i >= 0 else None for i in found] == [None, 'ZH', None]
+
+    def test_batch_matches_brute_force(self, layer):
+        rng = np.random.default_rng(7)
+        lat, lng = 46.3 + rng.random(5000) * 1.6, 6.9 + rng.random(5000) * 2.2
+        found = layer.locate(lat, lng)
+
+        rings = [[ring for polygon in ([f['geometry']['coordinates']] if f['geometry']['type'] == 'Polygon'
+                                        else f['geometry']['coordinates']) for ring in polygon]
+                 for f in CANTONS['features']]
+        for i in range(len(lat)):
+            expected = [k for k, feature_rings in enumerate(rings) if brute_force(lng[i], lat[i], feature_rings)]
+            assert found[i] == (expected[0] if expected else -1)
+
+
+class TestReverseGeocoder:
+    """Test suite for layer loading and the API endpoints"""
+
+    @pytest.fixture
+    def geocoder(self, tmp_path):
+        (tmp_path / 'cantons.geojson').write_text(json.dumps(CANTONS), encoding='utf-8')
+        (tmp_path / 'communes.geojson').write_text(json.dumps({'type': 'FeatureCollection', 'features': [
+            feature({'bfs_number': 261, 'name': 'Zürich', 'canton': 'ZH'}, [square(8.45, 47.32, 8.62, 47.43)])
+        ]}), encoding='utf-8')
+        return load_reverse_geocoder(tmp_path)
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        return app.test_client()
+
+    def test_loads_available_layers(self, geocoder):
+        assert sorted(geocoder.layers) == ['canton', 'commune']
+        assert geocoder.reverse(47.37, 8.54)['commune'] == {'bfs_number': 261, 'name': 'Zürich', 'canton': 'ZH'}
+        assert geocoder.reverse_many([47.37, 47.17], [8.54, 8.5]) == [
+            {'canton': 'ZH', 'commune': 'Zürich'}, {'canton': 'ZG', 'commune': None}
+        ]
+
+    def test_endpoints(self, client, geocoder):
+        with patch.object(swiss_data, 'get_reverse_geocoder', return_value=geocoder):
+            single = client.get('/api/swiss/reverse-geocode?lat=47.37&lng=8.54').get_json()
+            batch = client.post('/api/swiss/reverse-geocode/batch', json={
+                'coordinates': [[47.17, 8.5], {'lat': 46.95, 'lng': 7.45}, [40.0, 2.0]]
+            }).get_json()
+
+        assert single['location']['canton']['code'] == 'ZH'
+        assert [r['canton'] for r in batch['results']] == ['ZG', 'BE', None]
+        assert batch['resolved'] == 2
+
+    def test_unavailable_without_boundary_data(self, client):
+        with patch.object(swiss_data, 'get_reverse_geocoder', return_value=ReverseGeocoder()):
+            response = client.get('/api/swiss/reverse-geocode?lat=47.37&lng=8.54')
+
+        assert response.status_code == 503
+
+    def test_live_stations_without_canton_are_tagged(self, geocoder):
+        stations = [
+            {'canton': '', 'coordinates': {'lat': 47.17, 'lng': 8.5}},
+            {'canton': 'BE', 'coordinates': {'lat': 47.37, 'lng': 8.54}},
+            {'canton': '', 'coordinates': {'lat': None, 'lng': None}},
+        ]
+        with patch.object(swiss_data, 'get_reverse_geocoder', return_value=geocoder):
+            swiss_data._fill_missing_cantons(stations)
+
+        assert [station['canton'] for station in stations] == ['ZG', 'BE', '']
@@ -0,0 +1,124 @@
+"""
+Test Suite for Local Swiss Identifier Validation
+
+Tests cover:
+1. UID mod-11 check digits, postal code ranges and phone normalization
+2. Local rejection before ZEFIX/OpenPLZ calls
+3. Negative caching of values unknown upstream
+4. Batch validation endpoint
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import Mock, patch
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.models.user import db
+from src.routes import swiss_data
+from src.routes.swiss_data import swiss_bp
+from src.services.swiss_validation import (
+    NegativeCache, normalize_phones, normalize_uid, validate_postal_code, validate_postal_codes, validate_uid,
+    validate_uids
+)
+
+
+class TestValidators:
+    """Test suite for the deterministic validators"""
+
+    def test_uid_check_digit(self):
+        assert validate_uid('CHE-116.281.710') == {'valid': True, 'uid': 'CHE-116.281.710', 'digits': '116281710'}
+        assert validate_uid('che 116 281 711')['error'] == 'UID check digit is invalid'
+        assert validate_uid('CHE-116.281')['valid'] is False
+        assert list(validate_uids(['CHE-109.322.551', '116281710', 'CHE-105.805.080', ''])['valid']) == \
+            [True, True, False, False]
+
+    def test_non_ascii_digits_are_malformed(self):
+        assert normalize_uid('CHE-١٢٣.456.789') is None
+        assert validate_uid('CHE-١١٦.٢٨١.٧١٠')['error'] == 'UID must have the format CHE-123.456.789'
+        assert list(validate_uids(['CHE-116.281.710', 'CHE-١٢٣.456.789'])['valid']) == [True, False]
+        assert validate_postal_code('٨٠٠١')['error'] == 'Swiss postal codes must be exactly 4 digits'
+        assert normalize_phones(['079 ١٢٣ 45 67']) == [None]
+
+    def test_postal_codes(self):
+        assert list(validate_postal_codes(['8001', ' 3000', '0999', '9700', '80a1', 9658])) == \
+            [True, True, False, False, False, True]
+
+    def test_phone_normalization(self):
+        assert normalize_phones(['+41 79 123 45 67', '0041 (0)44 668 18 00', '079/123.45.67',
+                                 '+49 30 1234567', '044 668 18']) == \
+            ['+41791234567', '+41446681800', '+41791234567', None, None]
+
+    def test_negative_cache_expiry_and_bound(self):
+        cache = NegativeCache(ttl_seconds=60, max_entries=2)
+        cache.add('a', 'unknown')
+        cache.add('b', 'unknown')
+        cache.add('c', 'unknown')
+
+        assert cache.get('a') is None
+        assert cache.get('c') == 'unknown'
+        with patch('src.services.swiss_validation.time.monotonic', return_value=1e12):
+            assert cache.get('c') is None
+
+
+class TestValidationInLookups:
+    """Lookups reject invalid input before any network call"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(swiss_data, 'negative_cache', NegativeCache())
+        app = Flask(__name__)
+        app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        db.init_app(app)
+        app.register_blueprint(swiss_bp, url_prefix='/api/swiss')
+        with app.app_context():
+            db.create_all()
+            yield app.test_client()
+
+    def test_malformed_uid_skips_zefix(self, client):
+        with patch.object(swiss_data.requests, 'get') as get:
+            response = client.post('/api/swiss/company-lookup', json={'uid_number': 'CHE-116.281.711'})
+
+        assert response.status_code == 400
+        assert response.get_json()['validation_error'] is True
+        get.assert_not_called()
+
+    def test_unknown_uid_is_negatively_cached(self, client):
+        empty = Mock(status_code=200, json=Mock(return_value={'list': []}))
+        with patch.object(swiss_data.requests, 'get', return_value=empty) as get:
+            first = client.post('/api/swiss/company-lookup', json={'uid_number': 'CHE-116.281.710'}).get_json()
+            second = client.post('/api/swiss/company-lookup', json={'uid_number': '116281710'}).get_json()
+
+        assert first['companies'] == second['companies'] == []
+        assert get.call_count == 1
+
+    def test_postal_code_out_of_range_skips_openplz(self, client):
+        with patch.object(swiss_data.requests, 'get') as get:
+            data = client.post('/api/swiss/postal-codes/validate', json={'postal_code': '0999'}).get_json()
+
+        assert data['valid'] is False
+        assert data['format_error'] is True
+        get.assert_not_called()
+
+    def test_batch_endpoint(self, client):
+        data = client.post('/api/swiss/validate/batch', json={
+            'uids': ['116281710', 'CHE-116.281.711'],
+            'postal_codes': ['8001', '99999'],
+            'phones': ['079 123 45 67']
+        }).get_json()
+
+        assert [u['normalized'] for u in data['uids']] == ['CHE-116.281.710', None]
+        assert [p['valid'] for p in data['postal_codes']] == [True, False]
+        assert data['phones'][0]['normalized'] == '+41791234567'
+
+    def test_non_ascii_uid_rejected_locally(self, client):
+        with patch.object(swiss_data.requests, 'get') as get:
+            lookup = client.post('/api/swiss/company-lookup', json={'uid_number': 'CHE-١٢٣.456.789'})
+            batch = client.post('/api/swiss/validate/batch', json={'uids': ['CHE-١٢٣.456.789', '116281710']})
+
+        assert lookup.status_code == 400 and lookup.get_json()['validation_error'] is True
+        assert batch.status_code == 200
+        assert [u['normalized'] for u in batch.get_json()['uids']] == [None, 'CHE-116.281.710']
+        get.assert_not_called()
@@ -0,0 +1,88 @@
+"""
+Test Suite for the TCO Break-even Solver
+
+Tests cover:
+1. Closed-form mileage and electricity price roots
+2. Holding period bisection against a month-by-month scan
+3. /api/tco/break-even single and catalog batch mode
+"""
+
+import pytest
+import sys
+import os
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import tco_bp, vehicle_catalog
+from src.services.tco_breakeven import solve_break_even
+from src.services.tco_engine import compute_tco, pack_tco_inputs
+
+PARAMETER_SETS = [
+    {'canton': 'ZH', 'comparison_vehicle': {'purchase_price': 80000, 'consumption': 9.0}},
+    {'canton': 'BE', 'comparison_vehicle': {'purchase_price': 65000, 'consumption': 7.9}},
+    {'canton': 'GE', 'comparison_vehicle': {'purchase_price': 40000, 'consumption': 5.0}},
+]
+
+
+def savings(params):
+    return float(compute_tco(pack_tco_inputs([params])).savings[0])
+
+
+class TestBreakEvenSolver:
+    """Test suite for the solver"""
+
+    def test_mileage_root(self):
+        solutions = solve_break_even(pack_tco_inputs(PARAMETER_SETS), 'annual_mileage')
+
+        for params, solution in zip(PARAMETER_SETS, solutions[:2]):
+            mileage = solution['break_even']
+            assert solution['ev_cheaper'] == 'above'
+            assert savings({**params, 'annual_mileage': mileage}) == pytest.approx(0, abs=1)
+        assert solutions[2]['break_even'] is None or solutions[2]['break_even'] > 100000
+
+    def test_electricity_price_root(self):
+        solution = solve_break_even(pack_tco_inputs(PARAMETER_SETS[:1]), 'electricity_price')[0]
+
+        assert solution['ev_cheaper'] == 'below'
+        inputs = pack_tco_inputs(PARAMETER_SETS[:1])
+        at_root = compute_tco(inputs.replace(electricity_price=solution['break_even'])).savings[0]
+        assert at_root == pytest.approx(0, abs=5)
+
+    def test_holding_period_matches_scan(self):
+        inputs = pack_tco_inputs(PARAMETER_SETS)
+        solutions = solve_break_even(inputs, 'holding_period')
+
+        for i, solution in enumerate(solutions):
+            months = np.arange(1, 241)
+            scan = compute_tco(inputs.take(np.full(240, i)).replace(years=months / 12)).savings
+            first = months[np.argmax(scan >= 0)] if (scan >= 0).any() else None
+            assert solution['break_even'] == first
+
+    def test_unknown_target(self):
+        with pytest.raises(ValueError):
+            solve_break_even(pack_tco_inputs([{}]), 'weather')
+
+
+class TestBreakEvenEndpoint:
+    """Test suite for /api/tco/break-even"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_single_and_catalog(self, client):
+        single = client.post('/api/tco/break-even', json={**PARAMETER_SETS[1], 'solve_for': 'holding_period'})
+        assert single.get_json()['break_even']['unit'] == 'months'
+
+        batch = client.post('/api/tco/break-even', json={
+            'catalog': True, 'comparison_vehicles': [c['comparison_vehicle'] for c in PARAMETER_SETS]
+        }).get_json()['break_even']
+        assert len(batch) == len(vehicle_catalog) * len(PARAMETER_SETS)
+        assert batch[0]['vehicle'] == vehicle_catalog[0].model
+
+        assert client.post('/api/tco/break-even', json={'solve_for': 'x'}).status_code == 400
@@ -0,0 +1,97 @@
+"""
+Test Suite for TCO Result Memoization
+
+Tests cover:
+1. Canonical parameter hashing
+2. LRU bounds and the Redis tier
+3. Stable calculation_id, ETag / 304 and cached bodies on /api/tco/calculate
+4. Invalidation when reference constants change
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes import tco_calculator
+from src.services import tco_engine
+from src.services.tco_cache import TcoResultCache, calculation_id, etag, parameters_hash
+
+REQUEST = {'canton': 'ZH', 'annual_mileage': 15000, 'vehicle': {'purchase_price': 85200}}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+class TestTcoResultCache:
+    """Test suite for hashing and the cache tiers"""
+
+    def test_canonical_hash(self):
+        digest = parameters_hash(REQUEST)
+
+        assert parameters_hash({'annual_mileage': 15000.0, 'canton': ' zh ', 'vehicle': {}}) == digest
+        assert parameters_hash({}) == digest
+        assert parameters_hash({**REQUEST, 'annual_mileage': 15001}) != digest
+        assert calculation_id(digest) == f'TCO-{digest[:16]}'
+
+    def test_lru_and_redis_tier(self):
+        redis = FakeRedis()
+        cache = TcoResultCache(max_entries=2, redis_client=redis)
+        for key in ('a' * 64, 'b' * 64, 'c' * 64):
+            cache.put(key, {'key': key[0]})
+
+        assert cache.stats()['entries'] == 2
+        assert cache.get_by_id(calculation_id('a' * 64)) == {'key': 'a'}
+        assert cache.get('a' * 64) == {'key': 'a'}
+        assert TcoResultCache(redis_client=redis).get('c' * 64) == {'key': 'c'}
+        assert cache.get('d' * 64) is None
+
+
+class TestCalculateMemoization:
+    """Test suite for /api/tco/calculate with the result cache"""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        monkeypatch.setattr(tco_calculator, 'tco_results', TcoResultCache())
+        app = Flask(__name__)
+        app.register_blueprint(tco_calculator.tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_cached_body_and_etag(self, client):
+        first = client.post('/api/tco/calculate', json=REQUEST)
+        second = client.post('/api/tco/calculate', json={**REQUEST, 'canton': 'zh'})
+
+        assert first.headers['X-Cache'] == 'MISS' and second.headers['X-Cache'] == 'HIT'
+        assert first.get_json() == second.get_json()
+        calc_id = first.get_json()['tco_calculation']['calculation_id']
+        assert calc_id == calculation_id(parameters_hash(REQUEST))
+
+        not_modified = client.post('/api/tco/calculate', json=REQUEST, headers={'If-None-Match': first.headers['ETag']})
+        assert not_modified.status_code == 304
+
+        stored = client.get(f'/api/tco/calculations/{calc_id}')
+        assert stored.get_json() == first.get_json()
+        assert client.get(f'/api/tco/calculations/{calc_id}',
+                          headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+        assert client.get('/api/tco/calculations/TCO-0000000000000000').status_code == 404
+        assert client.get('/api/tco/calculations/TCO-0000000000000000',
+                          headers={'If-None-Match': etag('0000000000000000')}).status_code == 404
+
+    def test_constants_change_recomputes(self, client, monkeypatch):
+        before = client.post('/api/tco/calculate', json=REQUEST).get_json()['tco_calculation']
+        monkeypatch.setitem(tco_engine.SWISS_CONSTANTS, 'insurance_factor_ev', 0.9)
+        after = client.post('/api/tco/calculate', json=REQUEST)
+
+        assert after.headers['X-Cache'] == 'MISS'
+        assert after.get_json()['tco_calculation']['calculation_id'] != before['calculation_id']
+        assert after.get_json()['tco_calculation']['ev_costs']['total_cost'] < before['ev_costs']['total_cost']
@@ -0,0 +1,124 @@
+"""
+Test Suite for the Vectorized TCO Engine
+
+Tests cover:
+1. Parity with calculate_ev_costs / calculate_ice_costs
+2. Parameter merging, validation and column replacement
+3. /api/tco/scenarios results, summary and limits
+4. Batch speed for thousands of scenarios
+"""
+
+import pytest
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import calculate_ev_costs, calculate_ice_costs, tco_bp
+from src.services.tco_engine import compute_tco, merge_parameters, pack_tco_inputs, result_rows
+
+ICE_VEHICLE = {'purchase_price': 65000, 'consumption': 7.9, 'power_kw': 180, 'weight_kg': 1800}
+
+PARAMETER_SETS = [
+    {},
+    {'canton': 'BE', 'annual_mileage': 22000, 'calculation_period_years': 8, 'down_payment': 5000,
+     'financing_rate': 0.0, 'vehicle': {'purchase_price': 99000, 'consumption': 21.0},
+     'comparison_vehicle': ICE_VEHICLE},
+    {'canton': 'GE', 'annual_mileage': 9000, 'calculation_period_years': 3, 'financing_rate': 0.052,
+     'comparison_vehicle': {'purchase_price': 58000}},
+    {'canton': 'XX', 'calculation_period_years': 35, 'comparison_vehicle': ICE_VEHICLE},
+]
+
+
+class TestTcoEngine:
+    """Test suite for packing and the kernel"""
+
+    def test_matches_scalar_calculation(self):
+        inputs = pack_tco_inputs(PARAMETER_SETS)
+        result = compute_tco(inputs)
+
+        for i, params in enumerate(PARAMETER_SETS):
+            vehicle = params.get('vehicle', {})
+            args = (params.get('annual_mileage', 15000), params.get('calculation_period_years', 5),
+                    params.get('canton', 'ZH'), params.get('down_payment', 20000), params.get('financing_rate', 0.039))
+            ev = calculate_ev_costs(vehicle.get('purchase_price', 85200), *args, vehicle)
+            assert result.ev_total_cost[i] == pytest.approx(ev['total_cost'])
+            assert result.ev_road_tax_total[i] == pytest.approx(ev['taxes_fees']['total'])
+            assert result.ev_residual_value[i] == pytest.approx(ev['depreciation']['residual_value'])
+            if 'comparison_vehicle' in params:
+                comparison = params['comparison_vehicle']
+                ice = calculate_ice_costs(comparison['purchase_price'], *args, comparison)
+                assert result.ice_total_cost[i] == pytest.approx(ice['total_cost'])
+                assert result.savings[i] == pytest.approx(ice['total_cost'] - ev['total_cost'])
+
+        assert inputs.has_comparison.tolist() == [False, True, True, True]
+
+    def test_merge_and_validation(self):
+        merged = merge_parameters({'canton': 'ZH', 'vehicle': {'purchase_price': 85200, 'consumption': 18.5}},
+                                  {'vehicle': {'consumption': 20}})
+        assert merged['vehicle'] == {'purchase_price': 85200, 'consumption': 20}
+
+        with pytest.raises(ValueError, match='annual_mileage'):
+            pack_tco_inputs([{'annual_mileage': 0}])
+        with pytest.raises(ValueError, match='vehicle.purchase_price'):
+            pack_tco_inputs([{'vehicle': {'purchase_price': '85200'}}])
+
+    def test_replace_columns(self):
+        inputs = pack_tco_inputs([{}, {'canton': 'BE'}])
+        pricier = compute_tco(inputs.replace(electricity_price=inputs.electricity_price * 1.3))
+        base = compute_tco(inputs)
+
+        assert np.all(pricier.ev_total_cost > base.ev_total_cost)
+        assert compute_tco(inputs.take([1, 1, 0])).ev_total_cost.tolist() == \
+            base.ev_total_cost[[1, 1, 0]].tolist()
+
+
+class TestScenariosEndpoint:
+    """Test suite for /api/tco/scenarios"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_scenarios(self, client):
+        response = client.post('/api/tco/scenarios', json={
+            'base_parameters': {'canton': 'ZH', 'comparison_vehicle': ICE_VEHICLE},
+            'scenarios': [
+                {'name': 'Low mileage', 'annual_mileage': 8000},
+                {'name': 'High mileage', 'annual_mileage': 30000},
+            ]
+        })
+
+        data = response.get_json()
+        assert response.status_code == 200
+        low, high = data['scenarios']
+        assert high['parameters']['comparison_vehicle'] == ICE_VEHICLE
+        assert high['tco_result']['savings']['total_savings'] > low['tco_result']['savings']['total_savings']
+        assert data['summary']['highest_savings_scenario'] == 'High mileage'
+        inputs = pack_tco_inputs([low['parameters']])
+        assert low['tco_result'] == next(result_rows(inputs, compute_tco(inputs)))
+
+    def test_invalid_scenarios_rejected(self, client):
+        response = client.post('/api/tco/scenarios', json={'scenarios': [{'financing_rate': 'low'}]})
+        assert response.status_code == 400
+
+    def test_thousands_of_scenarios(self, client):
+        scenarios = [{'name': f'S{i}', 'annual_mileage': 5000 + i * 10, 'calculation_period_years': 1 + i % 10,
+                      'comparison_vehicle': ICE_VEHICLE} for i in range(5000)]
+        client.post('/api/tco/scenarios', json={'scenarios': scenarios[:10]})
+
+        started = time.perf_counter()
+        inputs = pack_tco_inputs(scenarios)
+        result = compute_tco(inputs)
+        elapsed = time.perf_counter() - started
+
+        assert len(result) == 5000
+        assert elapsed < 0.1
+        response = client.post('/api/tco/scenarios', json={'scenarios': scenarios})
+        assert len(response.get_json()['scenarios']) == 5000
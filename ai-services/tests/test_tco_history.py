@@ -0,0 +1,184 @@
+"""
+Test Suite for the TCO History Write-behind
+
+Tests cover:
+1. tco_calculations rows built from /calculate results
+2. Batching by rows and flush interval, drain on shutdown
+3. Backpressure when the database falls behind
+4. Validation of canton and id references, row-by-row retry on constraint violations
+5. /api/tco/calculate persisting results without waiting for the database
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.models.tco_calculation import TcoCalculation
+from src.models.user import db
+from src.routes import tco_calculator
+from src.routes.tco_calculator import tco_bp
+from src.services import tco_history
+from src.services.tco_history import TcoWriteBehind, calculation_record
+
+CUSTOMER_ID = '9b2f6a4e-3c1d-4e8f-a6b7-1d2c3e4f5a6b'
+VEHICLE_ID = str(uuid.UUID(int=1))
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'history.db'}"
+    db.init_app(app)
+    app.register_blueprint(tco_bp, url_prefix='/api/tco')
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def calculate(client, mileage, **extra):
+    response = client.post('/api/tco/calculate', json={'annual_mileage': mileage, 'canton': 'BE', **extra})
+    return response.get_json()['tco_calculation']
+
+
+def stored(app):
+    with app.app_context():
+        return TcoCalculation.query.order_by(TcoCalculation.annual_kilometers).all()
+
+
+class TestTcoWriteBehind:
+    """Test suite for the write-behind queue"""
+
+    def test_record_from_result(self, app):
+        result = calculate(app.test_client(), 12000, comparison_vehicle={'purchase_price': 70000})
+        record = calculation_record(result, customer_id='c-1')
+
+        assert record['calculation_id'] == result['calculation_id']
+        assert record['canton'] == 'BE' and record['duration_years'] == 5
+        assert record['annual_kilometers'] == 12000 and record['customer_id'] == 'c-1'
+        assert record['total_tco'] == pytest.approx(result['ev_costs']['total_cost'], abs=0.01)
+        assert record['tco_per_month'] == pytest.approx(result['ev_costs']['total_cost'] / 60, abs=0.01)
+        assert record['savings'] == result['savings']
+
+    def test_batches_and_drain(self, app):
+        results = [calculate(app.test_client(), 10000 + i) for i in range(25)]
+        writer = TcoWriteBehind(batch_rows=10, flush_ms=50)
+        writer.init_app(app)
+        for result in results[:5]:
+            assert writer.submit(result)
+        time.sleep(0.3)
+        assert len(stored(app)) == 5                     # flushed by the interval, not by size
+
+        for result in results[5:]:
+            writer.submit(result)
+        assert writer.drain() == 0
+        rows = stored(app)
+        assert [row.annual_kilometers for row in rows] == list(range(10000, 10025))
+        assert writer.stats()['written'] == 25 and writer.stats()['batches'] >= 3
+        assert not writer.submit(results[0])
+
+    def test_backpressure(self, app):
+        result = calculate(app.test_client(), 15000)
+        release = threading.Event()
+        writer = TcoWriteBehind(batch_rows=1, flush_ms=0, queue_size=5)
+        original = writer._write
+        writer._write = lambda batch: (release.wait(5), original(batch))
+        writer.init_app(app)
+
+        started = time.perf_counter()
+        accepted = [writer.submit(result) for _ in range(50)]
+        elapsed = time.perf_counter() - started
+
+        assert elapsed < 0.5
+        assert 5 <= sum(accepted) <= 6 and writer.stats()['dropped'] == 50 - sum(accepted)
+        release.set()
+        writer.drain()
+        assert len(stored(app)) == sum(accepted)
+
+    def test_invalid_references(self, app):
+        client = app.test_client()
+        result = calculate(client, 16000)
+        writer = TcoWriteBehind(flush_ms=20)
+        writer.init_app(app)
+
+        assert writer.submit(calculate(client, 16000, canton='ge'), customer_id=CUSTOMER_ID.upper())
+        assert writer.submit(result, customer_id='c-1', vehicle_id='LYRIQ-2025')
+        assert not writer.submit(calculate(client, 16000, canton='Zürich'))
+        writer.drain()
+
+        rows = stored(app)
+        assert [(row.canton, row.customer_id, row.vehicle_id) for row in rows] == [
+            ('GE', CUSTOMER_ID, None), ('BE', None, None)
+        ]
+        assert writer.stats()['rejected'] == 1
+        with pytest.raises(ValueError):
+            calculation_record({**result, 'parameters': {**result['parameters'], 'canton': 'XX'}})
+
+    def test_constraint_violation_drops_only_bad_rows(self, app, monkeypatch):
+        results = [calculate(app.test_client(), 10000 + i) for i in range(6)]
+        original = tco_history.calculation_record
+
+        def record(result, *args):
+            row = original(result, *args)
+            if row['annual_kilometers'] in (10002, 10004):
+                row['total_tco'] = None                  # NOT NULL violation
+            return row
+
+        monkeypatch.setattr(tco_history, 'calculation_record', record)
+        writer = TcoWriteBehind(batch_rows=10, flush_ms=1000)
+        writer.init_app(app)
+        for result in results:
+            writer.submit(result)
+        writer.drain()
+
+        assert [row.annual_kilometers for row in stored(app)] == [10000, 10001, 10003, 10005]
+        assert writer.stats()['written'] == 4 and writer.stats()['failed'] == 2
+
+    def test_throughput(self, app):
+        result = calculate(app.test_client(), 15000)
+        writer = TcoWriteBehind(batch_rows=500, flush_ms=100, queue_size=10000)
+        writer.init_app(app)
+
+        started = time.perf_counter()
+        assert all(writer.submit(result) for _ in range(5000))
+        writer.drain()
+        assert time.perf_counter() - started < 5.0
+        assert writer.stats()['written'] == 5000
+
+
+class TestCalculateHistory:
+    """Test suite for /api/tco/calculate persistence"""
+
+    def test_calculate_persists_results(self, app, monkeypatch):
+        writer = TcoWriteBehind(flush_ms=20)
+        monkeypatch.setattr(tco_calculator, 'tco_history', writer)
+        writer.init_app(app)
+        client = app.test_client()
+
+        calculate(client, 21000, customer_id=CUSTOMER_ID)
+        time.sleep(0.05)
+        first = client.post('/api/tco/calculate', json={'annual_mileage': 21000, 'canton': 'BE',
+                                                         'customer_id': CUSTOMER_ID})
+        revalidated = client.post('/api/tco/calculate', json={'annual_mileage': 21000, 'canton': 'BE',
+                                                               'customer_id': CUSTOMER_ID},
+                                  headers={'If-None-Match': first.headers['ETag']})
+        calculate(client, 22000, vehicle={'id': VEHICLE_ID, 'model': 'LYRIQ'})
+        writer.drain()
+
+        # Cache hits and 304 answers are served calculations too
+        assert first.headers['X-Cache'] == 'HIT' and revalidated.status_code == 304
+        rows = stored(app)
+        assert [(row.annual_kilometers, row.customer_id, row.vehicle_id) for row in rows] == [
+            (21000, CUSTOMER_ID, None)] * 3 + [(22000, None, VEHICLE_ID)
+        ]
+        assert len({row.calculation_id for row in rows[:3]}) == 1
+        # Cache hits are dated when they were served, not when the result was computed
+        served = sorted(row.calculation_date for row in rows[:3])
+        assert served[1] - served[0] >= timedelta(seconds=0.05)
+        assert rows[0].to_dict()['calculation_id'].startswith('TCO-')
@@ -0,0 +1,87 @@
+"""
+Test Suite for the TCO Risk Simulation
+
+Tests cover:
+1. Seeded reproducibility and percentile ordering
+2. Uncertainty overrides and validation
+3. Identical results with process-pool sharding
+4. /api/tco/simulate response and latency
+"""
+
+import pytest
+import sys
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import tco_bp
+from src.services.tco_risk import SHARD_TRIALS, simulate_tco
+
+PARAMETERS = {'canton': 'ZH', 'comparison_vehicle': {'purchase_price': 65000, 'consumption': 7.9}}
+
+
+class TestTcoRiskSimulation:
+    """Test suite for the Monte Carlo engine"""
+
+    def test_seeded_and_ordered(self):
+        first = simulate_tco(PARAMETERS, trials=5000, seed=7)
+        second = simulate_tco(PARAMETERS, trials=5000, seed=7)
+
+        for name in ('ev_total_cost', 'ice_total_cost', 'savings'):
+            assert first[name] == second[name]
+            assert first[name]['p5'] < first[name]['p50'] < first[name]['p95']
+        assert 0 <= first['probability_ev_cheaper'] <= 1
+        assert simulate_tco(PARAMETERS, trials=5000, seed=8)['ev_total_cost'] != first['ev_total_cost']
+
+    def test_uncertainty_overrides(self):
+        certain = simulate_tco(PARAMETERS, trials=200, seed=1, uncertainty={
+            'electricity_price': 0, 'fuel_price': 0, 'annual_mileage': 0, 'depreciation_rate': 0, 'financing_rate': 0
+        })
+        assert certain['ev_total_cost']['std'] == 0
+        assert certain['probability_ev_cheaper'] in (0.0, 1.0)
+        assert simulate_tco({}, trials=100)['probability_ev_cheaper'] is None
+
+        with pytest.raises(ValueError):
+            simulate_tco(PARAMETERS, uncertainty={'weather': 0.1})
+        with pytest.raises(ValueError):
+            simulate_tco(PARAMETERS, trials=0)
+
+    def test_process_pool_gives_same_result(self):
+        trials = SHARD_TRIALS + 500
+        serial = simulate_tco(PARAMETERS, trials=trials, seed=3)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            pooled = simulate_tco(PARAMETERS, trials=trials, seed=3, executor=executor)
+
+        assert serial['shards'] == pooled['shards'] == 2
+        assert serial['ev_total_cost'] == pooled['ev_total_cost']
+        assert serial['probability_ev_cheaper_net'] == pooled['probability_ev_cheaper_net']
+
+
+class TestSimulateEndpoint:
+    """Test suite for /api/tco/simulate"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_simulate(self, client):
+        client.post('/api/tco/simulate', json={**PARAMETERS, 'trials': 100})
+
+        started = time.perf_counter()
+        response = client.post('/api/tco/simulate', json={**PARAMETERS, 'trials': 10000, 'seed': 42})
+        elapsed = time.perf_counter() - started
+
+        simulation = response.get_json()['simulation']
+        assert response.status_code == 200
+        assert simulation['trials'] == 10000 and simulation['seed'] == 42
+        assert 'trials' not in response.get_json()['parameters']
+        assert elapsed < 0.2
+
+    def test_invalid_request(self, client):
+        response = client.post('/api/tco/simulate', json={**PARAMETERS, 'trials': 10 ** 7})
+        assert response.status_code == 400
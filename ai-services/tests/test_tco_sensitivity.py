@@ -0,0 +1,76 @@
+"""
+Test Suite for the TCO Sensitivity Analysis
+
+Tests cover:
+1. Perturbed savings match separate engine runs
+2. Ranking by swing and input validation
+3. /api/tco/sensitivity response and latency
+"""
+
+import pytest
+import sys
+import os
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+from src.routes.tco_calculator import tco_bp
+from src.services.tco_engine import compute_tco, merge_parameters, pack_tco_inputs
+from src.services.tco_sensitivity import SENSITIVITY_INPUTS, sensitivity_analysis
+
+PARAMETERS = {'canton': 'BE', 'annual_mileage': 20000,
+              'comparison_vehicle': {'purchase_price': 65000, 'consumption': 7.9}}
+
+
+def savings(params):
+    return float(compute_tco(pack_tco_inputs([params])).savings[0])
+
+
+class TestSensitivityAnalysis:
+    """Test suite for the batched tornado analysis"""
+
+    def test_matches_separate_runs(self):
+        analysis = sensitivity_analysis(PARAMETERS, 0.2)
+        drivers = {driver['parameter']: driver for driver in analysis['drivers']}
+
+        assert analysis['base']['savings'] == pytest.approx(savings(PARAMETERS), abs=0.01)
+        assert drivers['annual_mileage']['savings_high'] == pytest.approx(
+            savings({**PARAMETERS, 'annual_mileage': 24000}), abs=0.01)
+        assert drivers['consumption']['savings_low'] == pytest.approx(
+            savings(merge_parameters(PARAMETERS, {'vehicle': {'consumption': 18.5 * 0.8}})), abs=0.01)
+        assert drivers['gasoline_price']['high_value'] == pytest.approx(1.65 * 1.2)
+        assert set(drivers) == set(SENSITIVITY_INPUTS)
+
+    def test_ranked_by_swing(self):
+        drivers = sensitivity_analysis(PARAMETERS)['drivers']
+        swings = [driver['swing'] for driver in drivers]
+
+        assert swings == sorted(swings, reverse=True)
+        assert drivers[0]['parameter'] == 'purchase_price'
+        with pytest.raises(ValueError):
+            sensitivity_analysis(PARAMETERS, 0)
+
+
+class TestSensitivityEndpoint:
+    """Test suite for /api/tco/sensitivity"""
+
+    @pytest.fixture
+    def client(self):
+        app = Flask(__name__)
+        app.register_blueprint(tco_bp, url_prefix='/api/tco')
+        return app.test_client()
+
+    def test_sensitivity(self, client):
+        client.post('/api/tco/sensitivity', json=PARAMETERS)
+
+        started = time.perf_counter()
+        response = client.post('/api/tco/sensitivity', json={**PARAMETERS, 'variation': 0.3})
+        elapsed = time.perf_counter() - started
+
+        data = response.get_json()
+        assert response.status_code == 200
+        assert data['sensitivity']['variation'] == 0.3
+        assert len(data['sensitivity']['drivers']) == len(SENSITIVITY_INPUTS)
+        assert elapsed < 0.05
+        assert client.post('/api/tco/sensitivity', json={'variation': 2}).status_code == 400
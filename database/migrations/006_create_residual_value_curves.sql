@@ -0,0 +1,26 @@
+-- Migration: Create residual_value_curves table
+-- Date: 2026-10-18
+
+CREATE TABLE IF NOT EXISTS residual_value_curves (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    model_name VARCHAR(100),                -- NULL: generic curve of the powertrain
+    model_variant VARCHAR(50),              -- NULL: all variants of the model
+    powertrain VARCHAR(10) NOT NULL CHECK (powertrain IN ('ev', 'ice')),
+    annual_km INTEGER NOT NULL,
+    residual_1y NUMERIC(4,3) NOT NULL,
+    residual_2y NUMERIC(4,3) NOT NULL,
+    residual_3y NUMERIC(4,3) NOT NULL,
+    residual_4y NUMERIC(4,3) NOT NULL,
+    residual_5y NUMERIC(4,3) NOT NULL,
+    residual_6y NUMERIC(4,3) NOT NULL,
+    residual_8y NUMERIC(4,3) NOT NULL,
+    residual_10y NUMERIC(4,3) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT uq_residual_value_curves UNIQUE (model_name, model_variant, powertrain, annual_km)
+);
+
+-- Add comment
+COMMENT ON TABLE residual_value_curves IS 'Residual value share of the purchase price by age and annual mileage band';
+COMMENT ON COLUMN residual_value_curves.annual_km IS 'Annual mileage the row applies to (km per year)';
@@ -0,0 +1,12 @@
+-- Migration: Add result history columns to tco_calculations
+-- Date: 2026-10-18
+
+ALTER TABLE tco_calculations ADD COLUMN IF NOT EXISTS calculation_id VARCHAR(20);
+ALTER TABLE tco_calculations ADD COLUMN IF NOT EXISTS savings JSONB;
+
+CREATE INDEX IF NOT EXISTS idx_tco_calculations_calculation_id ON tco_calculations(calculation_id);
+CREATE INDEX IF NOT EXISTS idx_tco_calculations_calculation_date ON tco_calculations(calculation_date);
+
+-- Add comment
+COMMENT ON COLUMN tco_calculations.calculation_id IS 'Stable id of the calculation parameters (TCO- + parameter hash)';
+COMMENT ON COLUMN tco_calculations.savings IS 'Savings against the ICE comparison vehicle, NULL without one';
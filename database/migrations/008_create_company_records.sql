@@ -0,0 +1,13 @@
+-- Migration: Create company_records table
+-- Date: 2026-10-18
+
+CREATE TABLE IF NOT EXISTS company_records (
+    uid VARCHAR(20) PRIMARY KEY,            -- CHE-123.456.789
+    name VARCHAR(255) NOT NULL,
+    data TEXT NOT NULL,                     -- company as returned by the API (JSON)
+    fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add comment
+COMMENT ON TABLE company_records IS 'Companies fetched from ZEFIX or bulk-loaded, for the local company-name search';
+COMMENT ON COLUMN company_records.data IS 'Company record in the /company-lookup response format (JSON text)';
@@ -0,0 +1,16 @@
+-- Migration: Create geocoded_addresses table
+-- Date: 2026-10-18
+
+CREATE TABLE IF NOT EXISTS geocoded_addresses (
+    address_key VARCHAR(255) PRIMARY KEY,   -- normalized address
+    found BOOLEAN NOT NULL DEFAULT FALSE,
+    lat DOUBLE PRECISION,
+    lng DOUBLE PRECISION,
+    label VARCHAR(255),
+    source VARCHAR(40) NOT NULL DEFAULT 'swisstopo',
+    geocoded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Add comment
+COMMENT ON TABLE geocoded_addresses IS 'Persistent swisstopo geocoding cache, including addresses that were not found';
+COMMENT ON COLUMN geocoded_addresses.address_key IS 'Address normalized by the AI services (case, abbreviations, punctuation), the cache key';
@@ -0,0 +1,71 @@
+-- Residual Value Curves Seed Data
+-- Share of the purchase price a vehicle is worth by age (years) and annual mileage band,
+-- per model (variant NULL = all variants) and a generic curve per powertrain (model NULL)
+
+INSERT INTO residual_value_curves (
+    model_name,
+    model_variant,
+    powertrain,
+    annual_km,
+    residual_1y,
+    residual_2y,
+    residual_3y,
+    residual_4y,
+    residual_5y,
+    residual_6y,
+    residual_8y,
+    residual_10y
+) VALUES
+-- Generic EV
+(NULL, NULL, 'ev', 10000, 0.810, 0.707, 0.622, 0.555, 0.498, 0.440, 0.351, 0.269),
+(NULL, NULL, 'ev', 15000, 0.800, 0.690, 0.600, 0.530, 0.470, 0.410, 0.320, 0.240),
+(NULL, NULL, 'ev', 25000, 0.780, 0.655, 0.555, 0.477, 0.411, 0.348, 0.256, 0.180),
+(NULL, NULL, 'ev', 40000, 0.760, 0.621, 0.510, 0.424, 0.352, 0.287, 0.192, 0.120),
+
+-- CADILLAC LYRIQ
+('CADILLAC LYRIQ', NULL, 'ev', 10000, 0.830, 0.727, 0.642, 0.576, 0.519, 0.461, 0.373, 0.291),
+('CADILLAC LYRIQ', NULL, 'ev', 15000, 0.820, 0.710, 0.620, 0.550, 0.490, 0.430, 0.340, 0.260),
+('CADILLAC LYRIQ', NULL, 'ev', 25000, 0.799, 0.674, 0.574, 0.495, 0.429, 0.365, 0.272, 0.195),
+('CADILLAC LYRIQ', NULL, 'ev', 40000, 0.779, 0.639, 0.527, 0.440, 0.367, 0.301, 0.204, 0.130),
+
+-- CADILLAC LYRIQ Sport
+('CADILLAC LYRIQ', 'Sport', 'ev', 10000, 0.810, 0.707, 0.622, 0.555, 0.498, 0.440, 0.351, 0.280),
+('CADILLAC LYRIQ', 'Sport', 'ev', 15000, 0.800, 0.690, 0.600, 0.530, 0.470, 0.410, 0.320, 0.250),
+('CADILLAC LYRIQ', 'Sport', 'ev', 25000, 0.780, 0.655, 0.555, 0.477, 0.411, 0.348, 0.256, 0.188),
+('CADILLAC LYRIQ', 'Sport', 'ev', 40000, 0.760, 0.621, 0.510, 0.424, 0.352, 0.287, 0.192, 0.125),
+
+-- CADILLAC VISTIQ
+('CADILLAC VISTIQ', NULL, 'ev', 10000, 0.840, 0.737, 0.653, 0.587, 0.530, 0.472, 0.384, 0.302),
+('CADILLAC VISTIQ', NULL, 'ev', 15000, 0.830, 0.720, 0.630, 0.560, 0.500, 0.440, 0.350, 0.270),
+('CADILLAC VISTIQ', NULL, 'ev', 25000, 0.809, 0.684, 0.583, 0.504, 0.438, 0.374, 0.280, 0.203),
+('CADILLAC VISTIQ', NULL, 'ev', 40000, 0.788, 0.648, 0.535, 0.448, 0.375, 0.308, 0.210, 0.135),
+
+-- Generic ICE
+(NULL, NULL, 'ice', 10000, 0.799, 0.676, 0.580, 0.493, 0.424, 0.364, 0.274, 0.202),
+(NULL, NULL, 'ice', 15000, 0.790, 0.660, 0.560, 0.470, 0.400, 0.340, 0.250, 0.180),
+(NULL, NULL, 'ice', 25000, 0.770, 0.627, 0.518, 0.423, 0.350, 0.289, 0.200, 0.135),
+(NULL, NULL, 'ice', 40000, 0.750, 0.594, 0.476, 0.376, 0.300, 0.238, 0.150, 0.090),
+
+-- BMW X5
+('BMW X5', NULL, 'ice', 10000, 0.820, 0.707, 0.611, 0.534, 0.466, 0.407, 0.318, 0.246),
+('BMW X5', NULL, 'ice', 15000, 0.810, 0.690, 0.590, 0.510, 0.440, 0.380, 0.290, 0.220),
+('BMW X5', NULL, 'ice', 25000, 0.790, 0.655, 0.546, 0.459, 0.385, 0.323, 0.232, 0.165),
+('BMW X5', NULL, 'ice', 40000, 0.769, 0.621, 0.501, 0.408, 0.330, 0.266, 0.174, 0.110),
+
+-- Mercedes-Benz GLE
+('Mercedes-Benz GLE', NULL, 'ice', 10000, 0.810, 0.696, 0.601, 0.524, 0.456, 0.397, 0.307, 0.235),
+('Mercedes-Benz GLE', NULL, 'ice', 15000, 0.800, 0.680, 0.580, 0.500, 0.430, 0.370, 0.280, 0.210),
+('Mercedes-Benz GLE', NULL, 'ice', 25000, 0.780, 0.646, 0.536, 0.450, 0.376, 0.315, 0.224, 0.158),
+('Mercedes-Benz GLE', NULL, 'ice', 40000, 0.760, 0.612, 0.493, 0.400, 0.323, 0.259, 0.168, 0.105),
+
+-- Audi Q7
+('Audi Q7', NULL, 'ice', 10000, 0.789, 0.676, 0.580, 0.503, 0.435, 0.375, 0.285, 0.213),
+('Audi Q7', NULL, 'ice', 15000, 0.780, 0.660, 0.560, 0.480, 0.410, 0.350, 0.260, 0.190),
+('Audi Q7', NULL, 'ice', 25000, 0.760, 0.627, 0.518, 0.432, 0.359, 0.297, 0.208, 0.143),
+('Audi Q7', NULL, 'ice', 40000, 0.741, 0.594, 0.476, 0.384, 0.307, 0.245, 0.156, 0.095),
+
+-- Volvo XC90
+('Volvo XC90', NULL, 'ice', 10000, 0.799, 0.686, 0.591, 0.514, 0.445, 0.386, 0.296, 0.224),
+('Volvo XC90', NULL, 'ice', 15000, 0.790, 0.670, 0.570, 0.490, 0.420, 0.360, 0.270, 0.200),
+('Volvo XC90', NULL, 'ice', 25000, 0.770, 0.636, 0.527, 0.441, 0.367, 0.306, 0.216, 0.150),
+('Volvo XC90', NULL, 'ice', 40000, 0.750, 0.603, 0.484, 0.392, 0.315, 0.252, 0.162, 0.100);